@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+"""
+일괄 보고서 (Qt 없이) — python cm_v56.py --batch ... 또는 python batch_report.py ...
+- 입력: traffic_counter_state.json(계수 상태), *.dat(Projects/SN_*), traffic_counter.db(logs 테이블)
+    파일/폴더를 섞어 줄 수 있고, 폴더는 하위까지 찾습니다.
+- 파일마다 프로세스 풀에서 읽어 지점별 부분 결과(Partial)로 만들고, 지점마다 count_merge 로
+  합친 뒤(범위 겹침/충돌 검사) 시트형 CSV / 방향별 시트 XLSX 를 다시 풀에서 병렬로 씁니다.
+  충돌이 있으면 출력 폴더에 _conflicts.csv 를 남깁니다 (--merge sum|max|first).
+- 파일별 처리량(레코드 수, 크기, ms, MB/s)과 지점별 출력 시간을 출력합니다.
+
+지점 키: state = current_folder 폴더명, DAT = WORK_NO, logs = 세션 영상들이 있는 폴더명.
+DAT 섹션 k 는 레이아웃의 k 번째 사용 방향 시트, 행/열은 슬롯/차종 순서로 봅니다.
+"""
+import argparse, itertools, json, os, sqlite3, sys, time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import count_merge
+import dat_codec
+import sheet_layout
+import xlsx_writer
+
+POOL_MIN_TASKS = 4      # 이보다 적으면 프로세스 풀 없이 현재 프로세스에서 처리
+FORMATS = ("csv", "xlsx")
+# 작업 프로세스 시작 방식 (spawn/fork/forkserver). 비우면 플랫폼 기본값 — Windows 는 spawn
+START_METHOD = os.environ.get("COUNTERMAX_MP_START", "").strip().lower() or None
+STATE_NAMES = ("traffic_counter_state",)
+DB_NAMES = ("traffic_counter.db",)
+
+# 계수 프로그램 ProjectConfig 기본값과 같게 (상태 파일/--config 가 없을 때)
+DEFAULT_CFG = {
+    "directions": [f"{i}번방향" for i in range(1, 31)],
+    "enabled_directions": [True] * 12 + [False] * 18,
+    "vehicle_types": ["승용차", "소형버스", "대형버스", "소형화물", "중형화물", "대형화물"],
+    "active_windows": [[7 * 3600, 9 * 3600], [12 * 3600, 14 * 3600], [17 * 3600, 19 * 3600]],
+}
+
+Table = count_merge.Table      # CountTable.table 와 같은 모양
+
+
+@dataclass
+class Partial:
+    """파일 하나(또는 logs 세션 하나)에서 읽은 지점 하나의 계수."""
+    site: str
+    source: str
+    operator: str = ""
+    table: Table = field(default_factory=dict)
+    cfg: Optional[dict] = None          # state 파일이면 그 설정
+
+
+@dataclass
+class FileResult:
+    path: str
+    kind: str
+    size: int = 0
+    records: int = 0
+    ms: float = 0.0
+    partials: List[Partial] = field(default_factory=list)
+    error: str = ""
+
+
+def layout_of(cfg: Optional[dict]) -> sheet_layout.SheetLayout:
+    cfg = cfg or DEFAULT_CFG
+    vehicles = cfg.get("vehicle_types") or DEFAULT_CFG["vehicle_types"]
+    return sheet_layout.layout_for(cfg.get("active_windows") or [], cfg.get("directions") or DEFAULT_CFG["directions"],
+                                   cfg.get("enabled_directions") or [], vehicles)
+
+
+# ---------------- 입력 찾기 ----------------
+def classify(path: str) -> str:
+    name = os.path.basename(path).lower()
+    if name.endswith(".dat"):
+        return "dat"
+    if name.endswith(".db") and (name in DB_NAMES or "traffic_counter" in name):
+        return "logs"
+    if name.endswith(".json") and any(name.startswith(s) for s in STATE_NAMES):
+        return "state"
+    return ""
+
+
+def collect_inputs(paths: List[str]) -> List[Tuple[str, str]]:
+    out, seen = [], set()
+    for p in paths:
+        if os.path.isdir(p):
+            cands = []
+            for root, _dirs, files in os.walk(p):
+                cands.extend(os.path.join(root, f) for f in files)
+        else:
+            cands = [p]
+        for c in sorted(cands):
+            kind = classify(c)
+            key = os.path.normcase(os.path.abspath(c))
+            if kind and key not in seen:
+                seen.add(key)
+                out.append((c, kind))
+    return out
+
+
+# ---------------- 읽기 (풀 작업) ----------------
+def _read_state(path: str) -> List[Partial]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    table: Table = {}
+    for idx, inner in ((data.get("counts") or {}).get("table") or {}).items():
+        cells = {}
+        for key, c in (inner or {}).items():
+            d, sep, v = str(key).partition("|")
+            if sep and c:
+                cells[(d, v)] = int(c)
+        if cells:
+            table[int(idx)] = cells
+    folder = data.get("current_folder") or ""
+    site = os.path.basename(os.path.normpath(folder)) if folder else os.path.splitext(os.path.basename(path))[0]
+    return [Partial(site=site, source=path, operator=str(data.get("user") or ""), table=table,
+                    cfg=data.get("cfg") or None)]
+
+
+def _read_dat(path: str, cfg: Optional[dict], survey: Optional[str]) -> List[Partial]:
+    rec = dat_codec.read_dat(path)
+    if rec.deleted:
+        return []
+    if survey and rec.info.get("SURVEY_NO", survey) != survey:
+        return []
+    lay = layout_of(cfg)
+    table: Table = {}
+    for k, mat in enumerate(rec.sections):
+        if k >= len(lay.direction_names):
+            break
+        dname = lay.direction_names[k]
+        for r, row in enumerate(mat):
+            if r >= len(lay.slot_starts):
+                break
+            idx = lay.slot_starts[r] // lay.slot_sec + 1
+            cells = None
+            for c, v in enumerate(row[:len(lay.vehicles)]):
+                if v:
+                    if cells is None:
+                        cells = table.setdefault(idx, {})
+                    cells[(dname, lay.vehicles[c])] = cells.get((dname, lay.vehicles[c]), 0) + int(v)
+    wn = rec.info.get("WORK_NO") or "_".join(os.path.basename(path).split("_")[:2])
+    return [Partial(site=wn, source=path, operator=rec.info.get("USER_ID", ""), table=table)]
+
+
+def _read_logs(path: str) -> List[Partial]:
+    """logs 테이블을 세션별로 id 순서대로 재생 (CountTable 처럼 셀마다 0 하한)."""
+    conn = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True)
+    try:
+        cols = {r[1] for r in conn.execute("PRAGMA table_info(logs)").fetchall()}
+        sid_col = "l.session_id" if "session_id" in cols else "NULL"
+        rows = conn.execute(f"""SELECT {sid_col}, l.video_path, l.interval_index, l.direction, l.vehicle, l.delta,
+                                       u.username
+                                FROM logs l LEFT JOIN users u ON l.user_id=u.id ORDER BY l.id""").fetchall()
+    finally:
+        conn.close()
+    sessions: Dict[str, Partial] = {}
+    folders: Dict[str, Counter] = {}
+    for sid, vpath, idx, d, v, delta, user in rows:
+        try:
+            idx = int(idx); delta = int(delta)
+        except (TypeError, ValueError):
+            continue
+        if not delta:
+            continue
+        key = sid or "legacy"
+        part = sessions.get(key)
+        if part is None:
+            part = sessions[key] = Partial(site="", source=f"{path}#{key}", operator=str(user or ""))
+            folders[key] = Counter()
+        if vpath:
+            folders[key][os.path.basename(os.path.dirname(os.path.normpath(vpath)))] += 1
+        cells = part.table.setdefault(idx, {})
+        cells[(d, v)] = max(0, cells.get((d, v), 0) + delta)
+    for key, part in sessions.items():
+        common = folders[key].most_common(1)
+        part.site = (common[0][0] if common and common[0][0] else "") or f"session_{key}"
+    return list(sessions.values())
+
+
+def read_input(path: str, kind: str, cfg: Optional[dict] = None, survey: Optional[str] = None) -> FileResult:
+    """풀 작업 단위 (모듈 최상위 함수여야 spawn 에서 pickle 가능)."""
+    res = FileResult(path=path, kind=kind)
+    t0 = time.perf_counter()
+    try:
+        res.size = os.path.getsize(path)
+        if kind == "state":
+            res.partials = _read_state(path)
+        elif kind == "dat":
+            res.partials = _read_dat(path, cfg, survey)
+        elif kind == "logs":
+            res.partials = _read_logs(path)
+        res.records = sum(len(cells) for p in res.partials for cells in p.table.values())
+    except Exception as e:
+        res.error = f"{type(e).__name__}: {e}"
+    res.ms = (time.perf_counter() - t0) * 1000.0
+    return res
+
+
+# ---------------- 합치기 / 쓰기 ----------------
+def _safe_name(name: str) -> str:
+    return "".join("_" if ch in '<>:"/\\|?*' else ch for ch in name).strip() or "site"
+
+
+def _part_name(part: Partial) -> str:
+    name = os.path.basename(part.source)
+    return f"{part.operator}:{name}" if part.operator else name
+
+
+def write_site(out_dir: str, site: str, parts: List[Partial], cfg: Optional[dict], policy: str,
+               formats: Tuple[str, ...]):
+    """지점 하나를 병합해 CSV/XLSX 쓰기 (풀 작업 단위). -> (지점, 파일들, ms, 레이아웃 밖 셀 수, MergeResult)
+    상태 파일 설정이 하나도 없으면 cfg(--config 또는 기본값)를 병합 레이아웃으로 씁니다."""
+    import csv
+    t0 = time.perf_counter()
+    merged = count_merge.merge_site([(_part_name(p), p.table, p.cfg) for p in parts], policy, cfg or DEFAULT_CFG)
+    lay = merged.layout
+    mats = lay.fill(merged.table)
+    dropped = sum(1 for p in parts for idx, cells in p.table.items() for k, v in cells.items()
+                  if v and (idx not in lay.slot_rows or k not in lay.cells))
+    base = os.path.join(out_dir, _safe_name(site))
+    files = []
+    if "csv" in formats:
+        with open(base + ".csv", "w", encoding="utf-8-sig", newline="") as f:
+            w = csv.writer(f)
+            w.writerows(lay.wide_header())
+            w.writerows(lay.wide_rows(mats))
+        files.append(base + ".csv")
+    if "xlsx" in formats:
+        sheets = [(f"{d}", itertools.chain([lay.header()], lay.sheet_rows(m))) for d, m in zip(lay.directions, mats)]
+        xlsx_writer.write_xlsx(base + ".xlsx", sheets)
+        files.append(base + ".xlsx")
+    return site, files, (time.perf_counter() - t0) * 1000.0, dropped, merged
+
+
+def _run_tasks(fn, arg_lists: List[tuple], workers: int):
+    """작업이 적거나 workers<=1 이면 현재 프로세스에서, 아니면 프로세스 풀에서 (입력 순서 유지)."""
+    if len(arg_lists) < POOL_MIN_TASKS or workers <= 1:
+        return [fn(*args) for args in arg_lists]
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    ctx = multiprocessing.get_context(START_METHOD) if START_METHOD else None
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        return list(pool.map(fn, *zip(*arg_lists)))
+
+
+def run(inputs: List[str], out_dir: str, survey: Optional[str] = None, formats=FORMATS,
+        workers: Optional[int] = None, config: Optional[str] = None, policy: str = "sum", log=print) -> int:
+    workers = workers or min(8, os.cpu_count() or 1)
+    cfg = None
+    if config:
+        with open(config, "r", encoding="utf-8") as f:
+            cfg = (json.load(f) or {}).get("cfg") or None
+    found = collect_inputs(inputs)
+    if not found:
+        log("입력 파일이 없습니다 (traffic_counter_state*.json / *.dat / traffic_counter*.db).")
+        return 2
+    os.makedirs(out_dir, exist_ok=True)
+
+    t0 = time.perf_counter()
+    results = _run_tasks(read_input, [(p, k, cfg, survey) for p, k in found], workers)
+    t_read = time.perf_counter() - t0
+    errors = 0
+    for res in results:
+        name = os.path.basename(res.path)
+        if res.error:
+            errors += 1
+            log(f"  ! {name} [{res.kind}] {res.error}")
+            continue
+        mbps = (res.size / 1048576.0) / (res.ms / 1000.0) if res.ms > 0 else 0.0
+        log(f"  {name} [{res.kind}] 지점 {len(res.partials)}, 셀 {res.records}, "
+            f"{res.size / 1024.0:.1f} KB, {res.ms:.1f} ms, {mbps:.1f} MB/s")
+
+    by_site: Dict[str, List[Partial]] = {}
+    for res in results:
+        for part in res.partials:
+            by_site.setdefault(part.site, []).append(part)
+    jobs = []
+    for site, parts in sorted(by_site.items()):
+        jobs.append((out_dir, site, parts, cfg, policy, tuple(formats)))
+    t1 = time.perf_counter()
+    written = _run_tasks(write_site, jobs, workers)
+    t_write = time.perf_counter() - t1
+    conflicts = []
+    for site, files, ms, dropped, merged in written:
+        extra = f", 레이아웃 밖 셀 {dropped}" if dropped else ""
+        log(f"  -> {site}: 입력 {len(by_site[site])}개, 합계 {merged.total},"
+            f" {', '.join(os.path.basename(f) for f in files)} ({ms:.0f} ms{extra})")
+        for a, b, n, dirs in merged.overlaps:
+            log(f"     겹침 {a} ↔ {b}: 셀 {n}개 (방향 {', '.join(map(str, dirs))})")
+        if merged.conflicts:
+            log(f"     충돌 {len(merged.conflicts)}셀 → {policy}")
+        if merged.gaps:
+            log("     빈칸 " + ", ".join(f"{d}방향 {n}셀" for d, n in sorted(merged.gaps.items())))
+        conflicts.extend(count_merge.conflict_rows(site, merged))
+    if conflicts:
+        import csv
+        path = os.path.join(out_dir, "_conflicts.csv")
+        with open(path, "w", encoding="utf-8-sig", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(count_merge.CONFLICT_HEADER)
+            w.writerows(conflicts)
+        log(f"충돌 {len(conflicts)}셀 → {path}")
+    total_mb = sum(r.size for r in results) / 1048576.0
+    log(f"파일 {len(results)}개 ({total_mb:.2f} MB) 읽기 {t_read * 1000:.0f} ms"
+        f" ({len(results) / t_read if t_read > 0 else 0:.0f} 파일/s), 지점 {len(jobs)}개 쓰기 {t_write * 1000:.0f} ms,"
+        f" 작업자 {workers}, 오류 {errors}")
+    return 1 if errors else 0
+
+
+def main(argv: List[str]) -> int:
+    ap = argparse.ArgumentParser(prog="cm_v56.py --batch", description="계수 결과 일괄 병합/보고서 (Qt 없이)")
+    ap.add_argument("inputs", nargs="+", help="상태 json / DAT / traffic_counter.db 파일 또는 폴더")
+    ap.add_argument("-o", "--out", default="batch_out", help="출력 폴더 (기본 batch_out)")
+    ap.add_argument("--survey", help="이 SN_... 의 DAT 만 사용")
+    ap.add_argument("--format", default="csv,xlsx", help="csv,xlsx 중 쉼표로")
+    ap.add_argument("--workers", type=int, help="프로세스 수 (기본 CPU 수, 최대 8)")
+    ap.add_argument("--merge", choices=count_merge.POLICIES, default="sum",
+                    help="같은 셀을 둘 이상이 센 경우: sum 더함(기본) / max 큰 값 / first 먼저 준 입력")
+    ap.add_argument("--config", help="시간창/방향/차종을 가져올 상태 json (DAT/logs 용, 기본은 ProjectConfig 기본값)")
+    args = ap.parse_args(argv)
+    formats = tuple(f.strip().lower() for f in args.format.split(",") if f.strip())
+    bad = [f for f in formats if f not in FORMATS]
+    if bad or not formats:
+        ap.error(f"--format 은 {', '.join(FORMATS)} 중에서 쉼표로: {', '.join(bad) or args.format!r}")
+    return run(args.inputs, args.out, args.survey, formats, args.workers, args.config, args.merge)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -6,7 +6,7 @@ Traffic Counter Enterprise MAX — CLEAN BUILD (v5)
 - 전면 정리: 자동정지/책갈피/구간자동멈춤 관련 기능과 버튼, 마커슬라이더 완전 제거
 - 핵심 유지: 로그인/권한, 15분 슬롯 카운팅, 단축키(방향/차종), 파일/폴더, 시트/엑셀 저장, 로그 내보내기
 """
-import os, sys, re, sqlite3, hashlib, json
+import os, sys, re, sqlite3, hashlib, json, time, bisect, threading, struct
 
 # =========================
 # DEBUG / DIAGNOSTICS (v36)
@@ -23,9 +23,33 @@ def dlog(msg: str):
         pass
 
 from dataclasses import dataclass, field
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, TYPE_CHECKING
 from pathlib import Path
 import base64
+import itertools
+import mpv_host
+import sheet_layout
+import xlsx_writer
+if TYPE_CHECKING:
+    import pandas   # 주석용 (실제로는 _pandas() 로 필요할 때만 불러옴)
+
+# ==== Headless batch (--batch) ====
+# Qt 를 불러오기 전에 분기: batch_report 는 Qt 없이 state/DAT/logs 를 합쳐 지점별 CSV/XLSX 를 씁니다.
+# __main__ 을 batch_report 로 바꿔 두어야 spawn(Windows) 작업 프로세스가 이 GUI 모듈을 다시 불러오지 않습니다.
+if __name__ == "__main__" and "--batch" in sys.argv:
+    import batch_report
+    sys.modules["__main__"] = batch_report
+    sys.exit(batch_report.main(sys.argv[sys.argv.index("--batch") + 1:]))
+
+# ==== Startup timing (--startup-bench) ====
+_STARTUP_T0 = time.perf_counter()
+_STARTUP_MARKS: List[Tuple[str, float]] = []
+
+def _startup_mark(name: str):
+    """시작 구간 기록: (이름, 프로세스 시작 후 ms). --startup-bench 에서 출력합니다."""
+    _STARTUP_MARKS.append((name, (time.perf_counter() - _STARTUP_T0) * 1000.0))
+
+_startup_mark("stdlib")
 # ==== Embedded ENV settings script (single-file distribution) ====
 EMBEDDED_ENV_B64 = (
     "IyAtKi0gY29kaW5nOiB1dGYtOCAtKi0KIiIiCu2ZmOqyveyEpOyglSAo7ZSE66GcIO2UjOufrOyKpCkg4oCUIGFsbOKAkWlu4oCRb25lIHBhdGNoOArsmpTs"
@@ -1752,8 +1776,21 @@ EMBEDDED_ENV_B64 = (
     "aW4oKQ=="
 )
 
+_EMBEDDED_ENV_CACHE: Optional[str] = None
+
+def _embedded_env_source() -> str:
+    """내장 ENV 스크립트 소스 — ⚙ 클릭 시 처음 한 번만 디코드합니다."""
+    global _EMBEDDED_ENV_CACHE
+    if _EMBEDDED_ENV_CACHE is None:
+        try:
+            _EMBEDDED_ENV_CACHE = base64.b64decode(EMBEDDED_ENV_B64).decode("utf-8")
+        except Exception:
+            _EMBEDDED_ENV_CACHE = ""
+    return _EMBEDDED_ENV_CACHE
+
 # ==== Third-party ====
 from PyQt6 import QtWidgets, QtGui, QtCore
+_startup_mark("pyqt6")
 
 class TightListDelegate(QtWidgets.QStyledItemDelegate):
     """파일 목록(QListWidget) 항목 높이를 강제로 줄이기 위한 delegate."""
@@ -1858,299 +1895,72 @@ def _setup_vlc_path():
     # 이후 import vlc에서 표준 오류가 발생하며, 사용자가 직접 VLC 경로를 지정해야 한다.
     return
 
-_setup_vlc_path()
-
-import vlc
-import pandas as pd
-
-try:
-    import openpyxl  # noqa: F401
-    _HAS_XLSX = True
-except Exception:
-    _HAS_XLSX = False
-
-
-# ==== Embedded MPV (portable) ====
-import ctypes
-
-class _MpvLoadError(RuntimeError):
-    pass
-
-def _load_libmpv():
-    """
-    libmpv DLL을 찾고 로드합니다.
-
-    - 개발용(.py) : counter_max.py 가 있는 폴더 또는 하위 mpv/mpv-64 폴더에서 검색
-    - 배포용(.exe, PyInstaller) :
-        Counter_Max.exe 가 있는 폴더 또는 그 하위 mpv/mpv-64 폴더에서 검색
-
-    추가로 MPV_PATH / MPV_HOME 환경변수로 직접 경로를 지정할 수도 있습니다.
-    """
-    import os, sys, ctypes
-
-    base_dirs = []
-
-    # 1) 환경변수 우선
-    env = os.environ.get("MPV_PATH") or os.environ.get("MPV_HOME")
-    if env:
-        base_dirs.append(env)
-
-    # 2) PyInstaller 로 빌드된 exe 위치
-    if getattr(sys, "frozen", False):
-        exe_dir = os.path.dirname(getattr(sys, "executable", "") or "")
-        if exe_dir:
-            base_dirs.extend([
-                exe_dir,
-                os.path.join(exe_dir, "mpv"),
-                os.path.join(exe_dir, "mpv-64"),
-            ])
-        # onefile 모드에서 임시 풀리는 _MEIPASS 도 후보에 추가
-        meipass = getattr(sys, "_MEIPASS", None)
-        if meipass:
-            base_dirs.extend([
-                meipass,
-                os.path.join(meipass, "mpv"),
-                os.path.join(meipass, "mpv-64"),
-            ])
-
-    # 3) 일반 파이썬 실행 시: 스크립트(.py) 파일 기준
-    try:
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-    except Exception:
-        script_dir = os.getcwd()
-    base_dirs.extend([
-        script_dir,
-        os.path.join(script_dir, "mpv"),
-        os.path.join(script_dir, "mpv-64"),
-    ])
-
-    # 4) 현재 작업 디렉터리도 마지막 후보로
-    cwd = os.getcwd()
-    if cwd:
-        base_dirs.append(cwd)
-
-    # 중복 제거 (순서 유지)
-    seen = set()
-    dirs: list[str] = []
-    for d in base_dirs:
-        if not d:
-            continue
-        norm = os.path.normpath(d)
-        if norm in seen:
-            continue
-        seen.add(norm)
-        dirs.append(norm)
-
-    names = ["libmpv-2.dll", "mpv-2.dll", "libmpv.dll", "mpv.dll"]
-    tried = []
-
-    for d in dirs:
-        if not os.path.isdir(d):
-            continue
-        for n in names:
-            path = os.path.join(d, n)
-            if not os.path.exists(path):
-                continue
-            tried.append(path)
-            try:
-                return ctypes.WinDLL(path)
-            except Exception:
-                # 로드 실패 시 다음 후보 계속 시도
-                continue
-
-    # 여기까지 도달하면 libmpv 를 전혀 찾지 못한 상태
-    raise _MpvLoadError(
-        "libmpv DLL을 찾을 수 없습니다.\n"
-        "mpv 포터블(zip)을 받아서 libmpv-2.dll 파일을\n"
-        "프로그램 exe가 있는 폴더 또는 exe 옆의 mpv/mpv-64 폴더에 복사해 주세요.\n\n"
-        "예) Counter_Max.exe 와 같은 폴더에 libmpv-2.dll 또는 mpv/libmpv-2.dll"
-    )
-
-
-class _SimpleMpv:
-    """
-    libmpv C API 를 ctypes로 직접 호출하는 간단 래퍼.
-    - 설치(pip)가 필요 없고, libmpv-2.dll 파일만 있으면 동작합니다.
-    - 여기서는 필요한 기능(loadfile, stop, pause, speed, time-pos, duration, volume)만 최소 구현합니다.
-    """
-    def __init__(self):
-        self.lib = _load_libmpv()
-        # 함수 시그니처 설정
-        self.lib.mpv_create.restype = ctypes.c_void_p
-        self.lib.mpv_initialize.argtypes = [ctypes.c_void_p]
-        self.lib.mpv_initialize.restype = ctypes.c_int
-        self.lib.mpv_terminate_destroy.argtypes = [ctypes.c_void_p]
-        self.lib.mpv_terminate_destroy.restype = None
-        self.lib.mpv_set_option_string.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_char_p]
-        self.lib.mpv_set_option_string.restype = ctypes.c_int
-        self.lib.mpv_command.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_char_p)]
-        self.lib.mpv_command.restype = ctypes.c_int
-        self.lib.mpv_set_property_string.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_char_p]
-        self.lib.mpv_set_property_string.restype = ctypes.c_int
-        # 문자열 property 조회용
-        self.lib.mpv_get_property_string.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
-        self.lib.mpv_get_property_string.restype = ctypes.c_void_p
-        self.lib.mpv_free.argtypes = [ctypes.c_void_p]
-        self.lib.mpv_free.restype = None
-
-        self.handle = self.lib.mpv_create()
-        if not self.handle:
-            raise RuntimeError("mpv_create 실패")
-
-        # 콘솔 메시지 최소화
-        self.lib.mpv_set_option_string(self.handle, b"terminal", b"no")
-        self.lib.mpv_set_option_string(self.handle, b"msg-level", b"all=no")
-
-        # 초기화
-        if self.lib.mpv_initialize(self.handle) < 0:
-            raise RuntimeError("mpv_initialize 실패")
-
-    # -------- 내부 유틸 --------
-    def _command(self, args):
-        # args: [b"loadfile", b"path", b"replace"]
-        c_argv = (ctypes.c_char_p * (len(args)+1))()
-        for i, a in enumerate(args):
-            c_argv[i] = a
-        c_argv[len(args)] = None
-        return self.lib.mpv_command(self.handle, c_argv)
-
-    def _set_prop_str(self, name, value):
-        if isinstance(name, str):
-            name = name.encode("utf-8")
-        if isinstance(value, str):
-            value = value.encode("utf-8")
-        return self.lib.mpv_set_property_string(self.handle, name, value)
-
-    def _get_prop_str(self, name):
-        if isinstance(name, str):
-            name = name.encode("utf-8")
-        ptr = self.lib.mpv_get_property_string(self.handle, name)
-        if not ptr:
-            return None
-        try:
-            s = ctypes.cast(ptr, ctypes.c_char_p).value
-            if s is None:
-                return None
-            return s.decode("utf-8")
-        finally:
-            self.lib.mpv_free(ptr)
-
-    # -------- 공개 메서드 --------
-    def set_wid(self, wid: int):
-        """렌더링 윈도우 핸들 설정 (Windows 전용)."""
-        try:
-            self._set_prop_str("wid", str(int(wid)))
-        except Exception:
-            pass
-
-    def loadfile(self, path: str):
-        try:
-            self._command([b"loadfile", path.encode("utf-8"), b"replace"])
-        except Exception:
-            pass
-
-    def stop(self):
-        try:
-            self._command([b"stop"])
-        except Exception:
-            pass
-
-    @property
-    def pause(self) -> bool:
-        v = self._get_prop_str("pause")
-        if v is None:
-            return False
-        return v.lower() in ("yes", "1", "true")
-
-    @pause.setter
-    def pause(self, flag: bool):
-        self._set_prop_str("pause", "yes" if flag else "no")
-
-    @property
-    def speed(self) -> float:
-        v = self._get_prop_str("speed")
-        try:
-            return float(v)
-        except Exception:
-            return 1.0
-
-    @speed.setter
-    def speed(self, sp: float):
-        try:
-            sp = max(0.1, min(16.0, float(sp)))
-        except Exception:
-            sp = 1.0
-        self._set_prop_str("speed", str(sp))
-
-    @property
-    def time_pos(self) -> float:
-        v = self._get_prop_str("time-pos")
-        try:
-            return float(v)
-        except Exception:
-            return 0.0
-
-    @time_pos.setter
-    def time_pos(self, sec: float):
-        try:
-            if sec < 0:
-                sec = 0.0
-            self._set_prop_str("time-pos", str(float(sec)))
-        except Exception:
-            pass
+# ==== Lazy heavy imports ====
+# pandas / openpyxl / vlc 는 시작 시간을 크게 늘리므로 처음 쓰는 시점(내보내기, 길이 조회)에 불러옵니다.
+# (엑셀 저장은 xlsx_writer 로 직접 쓰므로 openpyxl 이 필요 없습니다.)
+_VLC_MOD = None
+_VLC_INSTANCE = None
 
-    @property
-    def duration(self) -> float:
-        v = self._get_prop_str("duration")
-        try:
-            return float(v)
-        except Exception:
-            return 0.0
+def _pandas():
+    import pandas
+    return pandas
 
-    @property
-    def volume(self) -> int:
-        v = self._get_prop_str("volume")
+def _vlc():
+    """python-vlc 모듈 (처음 호출 시 libvlc 경로 설정 후 import). 없으면 None."""
+    global _VLC_MOD
+    if _VLC_MOD is None:
         try:
-            return int(float(v))
-        except Exception:
-            return 0
+            _setup_vlc_path()
+            import vlc
+            _VLC_MOD = vlc
+        except Exception as e:
+            dlog(f"vlc unavailable: {e}")
+            _VLC_MOD = False
+    return _VLC_MOD or None
 
-    @volume.setter
-    def volume(self, val: int):
+def _vlc_instance():
+    """길이 조회용 공용 vlc.Instance (파일마다 만들지 않음)."""
+    global _VLC_INSTANCE
+    if _VLC_INSTANCE is None:
+        vlc = _vlc()
         try:
-            v = max(0, min(100, int(val)))
+            _VLC_INSTANCE = vlc.Instance() if vlc else False
         except Exception:
-            v = 100
-        self._set_prop_str("volume", str(v))
-
-    @property
-    def eof_reached(self) -> bool:
-        v = self._get_prop_str("eof-reached")
-        if v is None:
-            return False
-        return v.lower() in ("yes", "1", "true")
+            _VLC_INSTANCE = False
+    return _VLC_INSTANCE or None
 
-    def terminate(self):
-        try:
-            if self.handle:
-                self.lib.mpv_terminate_destroy(self.handle)
-        except Exception:
-            pass
-        self.handle = None
 
+# ==== Embedded MPV (portable) ====
+# libmpv ctypes 코어(SimpleMpv)와 DLL 탐색은 mpv_host 모듈 (플레이어 호스트 자식 프로세스와 공용)
+import ctypes
 
 class MpvAdapter:
     """
-    _SimpleMpv 인스턴스를 기존 VLC mediaplayer 인터페이스 비슷하게 래핑.
+    mpv_host.SimpleMpv 인스턴스를 기존 VLC mediaplayer 인터페이스 비슷하게 래핑.
     - play/pause/stop/is_playing
     - get_time/set_time/get_length
     - set_position/get_position
     - set_rate/get_rate
     - audio_set_volume/audio_get_volume
+    - load/playlist_clear/get_playlist_pos (자동 다음 재생용 플레이리스트)
     """
-    def __init__(self, player: _SimpleMpv|None):
+    def __init__(self, player: mpv_host.SimpleMpv|None):
         self._p = player
 
+    # --- 플레이리스트 ---
+    def load(self, path: str, mode: str = "replace"):
+        if self._p is not None:
+            self._p.loadfile(path, mode)
+
+    def playlist_clear(self):
+        if self._p is not None:
+            self._p.playlist_clear()
+
+    def get_playlist_pos(self) -> int:
+        if self._p is None:
+            return -1
+        return self._p.playlist_pos
+
     # --- 재생 제어 ---
     def play(self):
         if self._p is not None:
@@ -2224,6 +2034,220 @@ class MpvAdapter:
             return 0
         return int(self._p.volume)
 
+# ==== Out-of-process player host (COUNTERMAX_PLAYER_HOST=1) ====
+# mpv 를 자식 프로세스에서 돌리고 같은 창 핸들(wid)에 렌더링합니다.
+# - 명령(loadfile/pause/speed/seek...)은 파이프로 보내고 (전송은 별도 스레드, UI 는 기다리지 않음)
+# - time-pos/duration/EOF 등 상태는 자식이 공유 메모리 블록에 주기적으로 기록, UI 는 잠금 없이 읽습니다 (seqlock).
+# NAS 읽기가 libmpv 안에서 멈춰도 UI 스레드의 키 입력 처리는 막히지 않습니다.
+# 자식 프로세스 쪽(mpv_host.host_main)은 Qt 없는 mpv_host 모듈에 있어, spawn 자식이 이 GUI 모듈을 다시 읽지 않습니다.
+
+
+class _HostedMpv:
+    """mpv_host.SimpleMpv 와 같은 인터페이스의 프록시. 읽기는 공유 메모리, 쓰기는 파이프.
+
+    쓰기 직후 자식이 아직 처리하지 않은 값(ack < 명령 id)은 보낸 값을 그대로 돌려줘,
+    pause 토글처럼 '설정 후 바로 읽기'가 어긋나지 않게 합니다.
+    """
+    RATE_PROFILES = mpv_host.SimpleMpv.RATE_PROFILES
+    READY_TIMEOUT_S = 15.0
+
+    def __init__(self):
+        import multiprocessing, queue
+        from multiprocessing import shared_memory
+        ctx = multiprocessing.get_context("spawn")
+        self._shm = shared_memory.SharedMemory(create=True, size=mpv_host.HOST_STATE.size)
+        self._shm.buf[:mpv_host.HOST_STATE.size] = bytes(mpv_host.HOST_STATE.size)
+        self._conn, child = ctx.Pipe()
+        self._proc = ctx.Process(target=mpv_host.host_main, args=(child, self._shm.name), name="mpv-host", daemon=True)
+        # spawn 자식은 부모의 __main__ 을 다시 실행하므로, 시작하는 동안만 __main__ 을 mpv_host 로 바꿔
+        # 자식이 이 GUI 모듈(PyQt6, 모듈 수준 패치) 대신 mpv_host 만 불러오게 합니다.
+        main = sys.modules.get("__main__")
+        sys.modules["__main__"] = mpv_host
+        try:
+            self._proc.start()
+        finally:
+            sys.modules["__main__"] = main
+        if not self._conn.poll(self.READY_TIMEOUT_S):
+            self.terminate()
+            raise RuntimeError("mpv 호스트 프로세스 응답 없음")
+        kind, msg = self._conn.recv()
+        if kind != "ready":
+            self.terminate()
+            raise (mpv_host.MpvLoadError if kind == "loaderror" else RuntimeError)(msg)
+        self._cmd_id = 0
+        self._override: Dict[str, Tuple[object, int]] = {}
+        self._state = (0, 0, 0.0, 0.0, 1.0, 100.0, 1, 0, -1, 0, 0, 0.0, 0.0)
+        self._profile_idx = None
+        self._queue = queue.SimpleQueue()
+        self._sender = threading.Thread(target=self._send_loop, name="mpv-host-send", daemon=True)
+        self._sender.start()
+        import atexit
+        atexit.register(self.terminate)
+
+    # -------- 내부 유틸 --------
+    def _send_loop(self):
+        while True:
+            msg = self._queue.get()
+            try:
+                self._conn.send(msg)
+            except Exception:
+                return
+            if msg[1] == "quit":
+                return
+
+    def _post(self, kind: str, name: str = "", arg=()) -> int:
+        self._cmd_id += 1
+        self._queue.put((self._cmd_id, kind, name, arg))
+        return self._cmd_id
+
+    def _read(self) -> tuple:
+        """seqlock 읽기: 쓰는 중이면 몇 번 다시 읽고, 그래도 안 되면 직전 값 사용."""
+        buf = self._shm.buf
+        for _ in range(4):
+            s1 = struct.unpack_from("<I", buf, 0)[0]
+            if s1 == 0:
+                break   # 아직 한 번도 게시되지 않음
+            if s1 & 1:
+                continue
+            st = mpv_host.HOST_STATE.unpack_from(buf, 0)
+            if struct.unpack_from("<I", buf, 0)[0] == s1:
+                self._state = st
+                break
+        return self._state
+
+    def _get(self, name: str, field_idx: int):
+        st = self._read()
+        ov = self._override.get(name)
+        if ov is not None:
+            if st[1] < ov[1]:
+                return ov[0]
+            self._override.pop(name, None)
+        return st[field_idx]
+
+    def _set(self, name: str, value, **shadow):
+        cid = self._post("set", name, value)
+        self._override[name] = (value, cid)
+        for k, v in shadow.items():
+            self._override[k] = (v, cid)
+
+    # -------- 공개 메서드 (mpv_host.SimpleMpv 와 동일) --------
+    def set_wid(self, wid: int):
+        self._post("call", "set_wid", (int(wid),))
+
+    def loadfile(self, path: str, mode: str = "replace"):
+        cid = self._post("call", "loadfile", (path, mode))
+        if mode == "replace":
+            for k, v in (("playlist_pos", 0), ("time_pos", 0.0), ("duration", 0.0), ("eof_reached", False)):
+                self._override[k] = (v, cid)
+
+    def playlist_clear(self):
+        cid = self._post("call", "playlist_clear")
+        self._override["playlist_pos"] = (0, cid)
+
+    def stop(self):
+        self._post("call", "stop")
+
+    def _profile_for(self, rate: float) -> int:
+        idx = 0
+        for i, (lo, _opts) in enumerate(self.RATE_PROFILES):
+            if rate >= lo:
+                idx = i
+        return idx
+
+    def apply_rate_profile(self, rate: float) -> int:
+        idx = self._profile_for(rate)
+        if idx != self._profile_idx:
+            self._profile_idx = idx
+            self._post("call", "apply_rate_profile", (float(rate),))
+        return idx
+
+    def playback_stats(self) -> dict:
+        st = self._read()
+        return {"profile": self._profile_idx or 0, "dropped": st[9], "decoder_dropped": st[10],
+                "avsync": st[11], "vf_fps": st[12]}
+
+    @property
+    def pause(self) -> bool:
+        return bool(self._get("pause", 6))
+
+    @pause.setter
+    def pause(self, flag: bool):
+        self._set("pause", bool(flag))
+
+    @property
+    def speed(self) -> float:
+        return float(self._get("speed", 4))
+
+    @speed.setter
+    def speed(self, sp: float):
+        try:
+            sp = max(0.1, min(16.0, float(sp)))
+        except Exception:
+            sp = 1.0
+        self._profile_idx = self._profile_for(sp)   # 자식의 speed 설정이 프로파일도 함께 적용
+        self._set("speed", sp)
+
+    @property
+    def time_pos(self) -> float:
+        return float(self._get("time_pos", 2))
+
+    @time_pos.setter
+    def time_pos(self, sec: float):
+        self._set("time_pos", max(0.0, float(sec)), eof_reached=False)
+
+    @property
+    def duration(self) -> float:
+        return float(self._get("duration", 3))
+
+    @property
+    def volume(self) -> int:
+        return int(self._get("volume", 5))
+
+    @volume.setter
+    def volume(self, val: int):
+        try:
+            v = max(0, min(100, int(val)))
+        except Exception:
+            v = 100
+        self._set("volume", v)
+
+    @property
+    def eof_reached(self) -> bool:
+        return bool(self._get("eof_reached", 7))
+
+    @property
+    def playlist_pos(self) -> int:
+        return int(self._get("playlist_pos", 8))
+
+    def terminate(self):
+        try:
+            self._post("quit")
+        except Exception:
+            pass
+        try:
+            self._proc.join(1.0)
+            if self._proc.is_alive():
+                self._proc.kill()
+        except Exception:
+            pass
+        try:
+            self._shm.close()
+            self._shm.unlink()
+        except Exception:
+            pass
+
+
+def _create_player_core():
+    """환경변수 COUNTERMAX_PLAYER_HOST=1 이면 별도 프로세스 mpv, 아니면(또는 실패 시) 프로세스 내 mpv."""
+    if os.environ.get("COUNTERMAX_PLAYER_HOST", "").strip().lower() in ("1", "yes", "on", "true"):
+        try:
+            return _HostedMpv()
+        except mpv_host.MpvLoadError:
+            raise
+        except Exception as e:
+            dlog(f"player host unavailable, falling back to in-process mpv: {e}")
+    return mpv_host.SimpleMpv()
+
 # ==== App const ====
 APP_NAME   = "Traffic Counter Enterprise MAX — v9.2 Fluent Dark"
 DB_PATH    = Path(__file__).with_name("traffic_counter.db")
@@ -2697,6 +2721,11 @@ def db_init():
         direction TEXT, vehicle TEXT, delta INTEGER,
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
         FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE)""")
+    # 이벤트 저널 컬럼(구버전 DB 마이그레이션): 입력 키 / 작업 세션
+    cols={r[1] for r in c.execute("PRAGMA table_info(logs)").fetchall()}
+    if "hotkey" not in cols: c.execute("ALTER TABLE logs ADD COLUMN hotkey TEXT")
+    if "session_id" not in cols: c.execute("ALTER TABLE logs ADD COLUMN session_id TEXT")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_logs_session ON logs(session_id, id)")
     if c.execute("SELECT COUNT(*) FROM users").fetchone()[0]==0:
         c.execute("INSERT INTO users(username,password_hash,role) VALUES(?,?,?)", ("admin", sha256("1234"), "admin"))
         c.execute("INSERT INTO users(username,password_hash,role) VALUES(?,?,?)", ("test01", sha256("01050353316"), "operator"))
@@ -2730,13 +2759,41 @@ def user_reset_password(i,p):
     conn=db_connect(); c=conn.cursor()
     c.execute("UPDATE users SET password_hash=? WHERE id=?", (sha256(p),i)); conn.commit(); conn.close()
 
-def log_event(uid, vpath, vms, idx, d, v, delta):
+def log_event(uid, vpath, vms, idx, d, v, delta, hotkey:str="", session_id:str="")->int:
     conn=db_connect(); c=conn.cursor()
-    c.execute("""INSERT INTO logs(user_id,video_path,video_ms,interval_index,direction,vehicle,delta)
-                 VALUES(?,?,?,?,?,?,?)""",(uid,vpath,vms,idx,d,v,delta))
-    conn.commit(); conn.close()
+    c.execute("""INSERT INTO logs(user_id,video_path,video_ms,interval_index,direction,vehicle,delta,hotkey,session_id)
+                 VALUES(?,?,?,?,?,?,?,?,?)""",(uid,vpath,vms,idx,d,v,delta,hotkey,session_id))
+    rid=c.lastrowid; conn.commit(); conn.close()
+    return int(rid or 0)
+
+def logs_latest_session(uid)->Optional[str]:
+    """해당 사용자의 가장 최근 작업 세션 id (없으면 None)."""
+    conn=db_connect(); c=conn.cursor()
+    c.execute("""SELECT session_id FROM logs WHERE user_id=? AND session_id IS NOT NULL AND session_id<>''
+                 ORDER BY id DESC LIMIT 1""",(uid,))
+    r=c.fetchone(); conn.close()
+    return r[0] if r else None
+
+def logs_load_events(session_id:str, after_id:int=0)->List["CountEvent"]:
+    """logs 테이블에서 세션의 계수 이벤트를 id 순서대로 읽어 CountEvent 목록으로 돌려줍니다.
+    after_id 이후(스냅샷 이후 꼬리)만 읽을 수 있습니다."""
+    conn=db_connect(); c=conn.cursor()
+    c.execute("""SELECT id, video_path, video_ms, interval_index, direction, vehicle, delta, hotkey
+                 FROM logs WHERE session_id=? AND id>? ORDER BY id""",(session_id, int(after_id or 0)))
+    rows=c.fetchall(); conn.close()
+    out=[]
+    for rid, vpath, vms, idx, d, v, delta, key in rows:
+        try:
+            idx=int(idx); delta=int(delta)
+        except Exception:
+            continue
+        if not delta: continue
+        out.append(CountEvent(d, v, idx, slot_label((idx-1)*SLOT_SEC), delta,
+                              key or "", vpath or "", int(vms or 0), int(rid), int(rid)))
+    return out
 
 def logs_export_csv(path:str):
+    pd=_pandas()
     conn=db_connect()
     df=pd.read_sql_query("""SELECT l.id, datetime(l.created_at,'localtime') AS time, u.username, u.role,
                                    l.video_path, l.video_ms, l.interval_index, l.direction, l.vehicle, l.delta
@@ -2748,6 +2805,10 @@ def logs_export_csv(path:str):
 class ProjectConfig:
     def vehicle_count(self):
         return len(self.vehicle_types) if hasattr(self, 'vehicle_types') else 6
+    def layout(self) -> "sheet_layout.SheetLayout":
+        """시간창/방향/차종 설정으로 만든 시트 레이아웃 (설정이 같으면 캐시된 같은 객체)."""
+        return sheet_layout.layout_for(self.active_windows, self.directions, self.enabled_directions,
+                                       self.vehicle_types[:self.vehicle_count()], SLOT_SEC)
     directions: List[str]   = field(default_factory=lambda: [f"{i}번방향" for i in range(1,31)])
     enabled_directions: List[bool] = field(default_factory=lambda: [True]*12 + [False]*18)
     def get_enabled_indices(self):
@@ -2761,6 +2822,7 @@ class ProjectConfig:
 
 class CountTable(QtCore.QObject):
     changed = QtCore.pyqtSignal()
+    cellChanged = QtCore.pyqtSignal(int, str, str, int)   # (slot idx, 방향, 차종, 새 값) — inc 로 값이 바뀐 셀
     def __init__(self, dirs, vehs):
         super().__init__(); self.directions=dirs; self.vehicle_types=vehs
         self.table: Dict[int, Dict[Tuple[str,str], int]] = {}
@@ -2768,72 +2830,697 @@ class CountTable(QtCore.QObject):
     def ensure_interval(self, idx:int, label:str):
         if idx not in self.table: self.table[idx] = {(d,v):0 for d in self.directions for v in self.vehicle_types}
         self.labels[idx]=label
-    def inc(self, idx:int, label:str, d:str, v:str, delta:int=1):
+    def inc(self, idx:int, label:str, d:str, v:str, delta:int=1)->int:
+        """증감 후 실제로 반영된 delta(0 하한 보정 후)를 돌려줍니다."""
         self.ensure_interval(idx,label)
-        k=(d,v); self.table[idx][k]=max(0, self.table[idx].get(k,0)+delta); self.changed.emit()
+        k=(d,v); old=self.table[idx].get(k,0); new=max(0, old+delta); self.table[idx][k]=new
+        if new!=old: self.cellChanged.emit(idx, d, v, new)
+        self.changed.emit()
+        return new-old
+    def snapshot(self):
+        return ({idx: dict(c) for idx, c in self.table.items()}, dict(self.labels))
+    def restore(self, snap, emit:bool=True):
+        tbl, lbl = snap
+        self.table = {idx: dict(c) for idx, c in tbl.items()}; self.labels = dict(lbl)
+        if emit: self.changed.emit()
+    def replay(self, events):
+        """이벤트를 신호 없이 순서대로 적용한 뒤 changed 를 한 번만 보냅니다(대량 재구성용)."""
+        tbl = self.table
+        for ev in events:
+            cells = tbl.get(ev.slot_idx)
+            if cells is None:
+                self.ensure_interval(ev.slot_idx, ev.slot_label); cells = tbl[ev.slot_idx]
+            k = (ev.direction, ev.vehicle)
+            cells[k] = max(0, cells.get(k, 0) + ev.delta)
+        self.changed.emit()
     def clear_interval(self, idx:int, label:str):
         self.table[idx] = {(d,v):0 for d in self.directions for v in self.vehicle_types}
         self.labels[idx]=label; self.changed.emit()
-    def to_long_df(self)->pd.DataFrame:
+    def to_long_df(self)->"pandas.DataFrame":
         rows=[]; 
         for idx,counts in sorted(self.table.items()):
             for (d,v),c in counts.items():
                 rows.append({"slot_index":idx, "slot_label":self.labels.get(idx,""), "direction":d, "vehicle":v, "count":c})
-        return pd.DataFrame(rows)
-    def to_sheet_df_per_direction(self, cfg:ProjectConfig, dirno:int)->pd.DataFrame:
-        labels = []
-        for s,e in sorted(cfg.active_windows):
-            t=s
-            while t<e:
-                labels.append(f"{hm(t)}~{hm((t+SLOT_SEC)%86400)}")
-                t+=SLOT_SEC
-        labels = list(dict.fromkeys(labels))
-        vehicles = cfg.vehicle_types[:cfg.vehicle_count()]
-        out = pd.DataFrame({"시간대": labels})
-        df = self.to_long_df()
-        if df.empty:
-            for v in vehicles: out[v] = 0
+        return _pandas().DataFrame(rows)
+    def sheet_matrices(self, layout:"sheet_layout.SheetLayout")->List[List[List[int]]]:
+        """레이아웃의 방향별 [행][차종] 배열 (to_long_df/pivot 없이 한 번 훑어 채움)."""
+        return layout.fill(self.table)
+    def to_sheet_df_per_direction(self, cfg:ProjectConfig, dirno:int)->"pandas.DataFrame":
+        lay = cfg.layout()
+        k = lay.sheet_of(dirno)
+        mat = self.sheet_matrices(lay)[k] if k >= 0 else [[0] * len(lay.vehicles) for _ in lay.labels]
+        return _pandas().DataFrame(list(lay.sheet_rows(mat)), columns=lay.header())
+
+# ==== Count events (journal) ====
+@dataclass
+class CountEvent:
+    """계수 1건. logs 테이블 한 행과 1:1로 대응합니다.
+    delta 는 요청값이 아니라 CountTable 에 실제 반영된 증감입니다(0 하한 보정 후)."""
+    direction: str
+    vehicle: str
+    slot_idx: int
+    slot_label: str
+    delta: int
+    key: str = ""
+    video_path: str = ""
+    video_ms: int = 0
+    batch: int = 0      # 같은 batch 는 undo/redo 한 단위 (리셋 등)
+    log_id: int = 0
+
+class CountEventIndex:
+    """영상 파일별 계수 이벤트 색인 (video_ms 오름차순).
+
+    파일마다 정렬된 ms 리스트와 같은 순서의 이벤트 리스트를 두고 bisect 로 조회합니다.
+    - between(path, t0, t1): t0 <= ms < t1 인 이벤트
+    - next_after / prev_before: 다음/이전 이벤트
+    - density(path, length_ms, n): 시크바 밀도 표시용 구간별 개수
+    version 은 내용이 바뀔 때마다 증가합니다(화면 캐시 무효화용).
+    """
+
+    def __init__(self):
+        self._ms: Dict[str, List[int]] = {}
+        self._evs: Dict[str, List[CountEvent]] = {}
+        self.version = 0
+
+    @staticmethod
+    def key(path: Optional[str]) -> str:
+        return os.path.normcase(os.path.normpath(path)) if path else ""
+
+    def clear(self):
+        self._ms.clear(); self._evs.clear(); self.version += 1
+
+    def add(self, ev: CountEvent):
+        k = self.key(ev.video_path)
+        if not k:
+            return
+        ms = self._ms.setdefault(k, []); evs = self._evs.setdefault(k, [])
+        i = bisect.bisect_right(ms, ev.video_ms)
+        ms.insert(i, ev.video_ms); evs.insert(i, ev)
+        self.version += 1
+
+    def remove(self, ev: CountEvent):
+        k = self.key(ev.video_path)
+        ms = self._ms.get(k); evs = self._evs.get(k)
+        if not ms:
+            return
+        i = bisect.bisect_left(ms, ev.video_ms)
+        while i < len(ms) and ms[i] == ev.video_ms:
+            if evs[i] is ev:
+                del ms[i]; del evs[i]; self.version += 1
+                return
+            i += 1
+
+    def load(self, events):
+        """이벤트 목록으로 색인을 새로 만듭니다(정렬 1회)."""
+        self._ms.clear(); self._evs.clear()
+        groups: Dict[str, List[CountEvent]] = {}
+        for ev in events:
+            k = self.key(ev.video_path)
+            if k:
+                groups.setdefault(k, []).append(ev)
+        for k, evs in groups.items():
+            evs.sort(key=lambda e: e.video_ms)
+            self._evs[k] = evs; self._ms[k] = [e.video_ms for e in evs]
+        self.version += 1
+
+    def count(self, path: Optional[str]) -> int:
+        return len(self._ms.get(self.key(path), ()))
+
+    def between(self, path: Optional[str], t0: int, t1: int) -> List[CountEvent]:
+        k = self.key(path); ms = self._ms.get(k)
+        if not ms:
+            return []
+        return self._evs[k][bisect.bisect_left(ms, t0):bisect.bisect_left(ms, t1)]
+
+    def next_after(self, path: Optional[str], t: int) -> Optional[CountEvent]:
+        k = self.key(path); ms = self._ms.get(k)
+        if not ms:
+            return None
+        i = bisect.bisect_right(ms, t)
+        return self._evs[k][i] if i < len(ms) else None
+
+    def prev_before(self, path: Optional[str], t: int) -> Optional[CountEvent]:
+        k = self.key(path); ms = self._ms.get(k)
+        if not ms:
+            return None
+        i = bisect.bisect_left(ms, t)
+        return self._evs[k][i - 1] if i > 0 else None
+
+    def density(self, path: Optional[str], length_ms: int, buckets: int) -> List[int]:
+        """[0, length_ms) 를 buckets 개로 나눈 구간별 이벤트 수."""
+        ms = self._ms.get(self.key(path))
+        if not ms or length_ms <= 0 or buckets <= 0:
+            return [0] * max(0, buckets)
+        out = []; lo = 0
+        for b in range(buckets):
+            hi = bisect.bisect_left(ms, (b + 1) * length_ms / buckets, lo)
+            out.append(hi - lo); lo = hi
+        return out
+
+class CountEventLog:
+    """append-only 계수 이벤트 스트림 + undo/redo 커서.
+
+    - events[:cursor] 가 현재 CountTable 상태를 만든 이벤트입니다.
+    - undo/redo 는 커서만 옮기고 해당 이벤트의 역/정방향 delta 를 한 번 적용합니다.
+    - SNAPSHOT_EVERY 개마다 테이블 스냅샷을 남겨, rebuild() 는 가장 가까운 스냅샷 + 꼬리 재생만 합니다.
+    """
+    SNAPSHOT_EVERY = 2000
+
+    def __init__(self, table: CountTable):
+        self.table = table
+        self.index = CountEventIndex()   # events[:cursor] 의 영상 시간 색인
+        self.reset()
+
+    def reset(self, table: Optional[CountTable] = None):
+        """현재 테이블 상태를 기준(base)으로 스트림을 비웁니다."""
+        if table is not None:
+            self.table = table
+        self.events: List[CountEvent] = []
+        self.cursor = 0
+        self._batch = 0
+        self._snap_pos: List[int] = [0]
+        self._snaps = [self.table.snapshot()]
+        self._history: List[CountEvent] = []   # base 이전 이벤트(색인 전용, 재생하지 않음)
+        self.index.clear()
+
+    def set_history(self, events):
+        """base 스냅샷에 이미 반영된 이전 이벤트를 색인용으로만 등록합니다."""
+        self._history = self.net_events(events)
+        self.index.load(self._history + self.events[:self.cursor])
+
+    @staticmethod
+    def net_events(events) -> List[CountEvent]:
+        """logs 의 'undo' 보정 행과 그 원래 행을 서로 지워, 실제로 남아 있는 계수만 돌려줍니다."""
+        out: List[Optional[CountEvent]] = []
+        open_: Dict[tuple, List[int]] = {}
+        for ev in events:
+            if ev.key == "undo":
+                k = (ev.video_path, ev.video_ms, ev.direction, ev.vehicle, -ev.delta)
+                lst = open_.get(k)
+                if lst:
+                    out[lst.pop()] = None
+                continue
+            open_.setdefault((ev.video_path, ev.video_ms, ev.direction, ev.vehicle, ev.delta), []).append(len(out))
+            out.append(ev)
+        return [ev for ev in out if ev is not None]
+
+    def new_batch(self) -> int:
+        self._batch += 1
+        return self._batch
+
+    def _truncate_redo(self):
+        if self.cursor < len(self.events):
+            del self.events[self.cursor:]
+            k = bisect.bisect_right(self._snap_pos, self.cursor)
+            del self._snap_pos[k:]; del self._snaps[k:]
+
+    def _push(self, ev: CountEvent):
+        self.events.append(ev); self.cursor += 1
+        self.index.add(ev)
+        if self.cursor % self.SNAPSHOT_EVERY == 0:
+            self._snap_pos.append(self.cursor); self._snaps.append(self.table.snapshot())
+
+    def record(self, idx: int, label: str, d: str, v: str, delta: int, key: str = "",
+               video_path: str = "", video_ms: int = 0, batch: Optional[int] = None) -> Optional[CountEvent]:
+        """CountTable 에 증감을 적용하고 이벤트로 남깁니다. 변화가 없으면(0 하한) None."""
+        applied = self.table.inc(idx, label, d, v, delta)
+        if not applied:
+            return None
+        self._truncate_redo()
+        ev = CountEvent(d, v, int(idx), label, int(applied), key or "", video_path or "", int(video_ms or 0),
+                        batch if batch is not None else self.new_batch())
+        self._push(ev)
+        return ev
+
+    def extend(self, events):
+        """이미 테이블에 반영되지 않은 이벤트(로그 꼬리 등)를 스트림 뒤에 붙입니다. 적용은 rebuild()."""
+        self._truncate_redo()
+        for ev in events:
+            self.events.append(ev)
+            self._batch = max(self._batch, int(ev.batch or 0))
+
+    def can_undo(self) -> bool:
+        return self.cursor > 0
+
+    def can_redo(self) -> bool:
+        return self.cursor < len(self.events)
+
+    def undo(self) -> List[CountEvent]:
+        """마지막 batch 를 되돌리고 되돌린 이벤트를 돌려줍니다."""
+        out = []
+        if self.cursor <= 0:
             return out
-        dname=f"{dirno}번방향"
-        df=df[df["direction"]==dname]
-        if df.empty:
-            for v in vehicles: out[v] = 0
+        b = self.events[self.cursor - 1].batch
+        while self.cursor > 0 and self.events[self.cursor - 1].batch == b:
+            self.cursor -= 1
+            ev = self.events[self.cursor]
+            self.table.inc(ev.slot_idx, ev.slot_label, ev.direction, ev.vehicle, -ev.delta)
+            self.index.remove(ev)
+            out.append(ev)
+        return out
+
+    def redo(self) -> List[CountEvent]:
+        out = []
+        if self.cursor >= len(self.events):
             return out
-        pv=df.pivot_table(index="slot_label", columns="vehicle", values="count", aggfunc="sum", fill_value=0)
-        pv = pv.reindex(index=out["시간대"], fill_value=0)
-        for v in vehicles:
-            out[v] = pv[v].to_numpy() if v in pv.columns else 0
+        b = self.events[self.cursor].batch
+        while self.cursor < len(self.events) and self.events[self.cursor].batch == b:
+            ev = self.events[self.cursor]
+            self.table.inc(ev.slot_idx, ev.slot_label, ev.direction, ev.vehicle, ev.delta)
+            self.index.add(ev)
+            self.cursor += 1
+            out.append(ev)
         return out
 
+    def rebuild(self, upto: Optional[int] = None):
+        """가장 가까운 스냅샷에서 events[:upto] 까지 재생해 CountTable 을 재구성합니다."""
+        upto = len(self.events) if upto is None else max(0, min(int(upto), len(self.events)))
+        k = bisect.bisect_right(self._snap_pos, upto) - 1
+        pos = self._snap_pos[k]
+        self.table.restore(self._snaps[k], emit=False)
+        tail = self.events[pos:upto]
+        self.table.replay(tail)
+        self.cursor = upto
+        self.index.load(self._history + self.net_events(self.events[:upto]))
+        return len(tail)
+
 # ==== Player ====
 
+# ==== Clip staging cache (NAS -> 로컬 SSD) ====
+class ClipStagingCache:
+    """현재 폴더의 다음 N개 영상을 로컬 캐시 폴더로 미리 복사하는 백그라운드 스테이징 캐시.
+
+    - 원본이 네트워크 경로(UNC/WebDAV/매핑 드라이브)일 때만 복사합니다.
+    - 캐시 파일명에 원본 (size, mtime)을 넣어, 원본이 바뀌면 자동으로 무효가 됩니다.
+    - 복사는 .part 로 받은 뒤 크기를 확인하고 rename 합니다 (중간에 끊겨도 잘못된 파일을 열지 않음).
+    - 전체 용량이 상한을 넘으면 가장 오래 쓰지 않은 파일(mtime 기준)부터 지웁니다.
+    - 환경변수: COUNTERMAX_PREFETCH=0 (끄기), COUNTERMAX_PREFETCH_COUNT, COUNTERMAX_PREFETCH_MBPS,
+      COUNTERMAX_CLIP_CACHE_GB, COUNTERMAX_CLIP_CACHE_DIR
+    """
+    CHUNK = 1 << 20
+
+    def __init__(self, root: Optional[str] = None):
+        def _env_num(key, default):
+            try:
+                return float(os.environ.get(key, "") or default)
+            except Exception:
+                return float(default)
+        self.enabled = os.environ.get("COUNTERMAX_PREFETCH", "1").strip() not in ("0", "false", "off")
+        self.count = max(0, int(_env_num("COUNTERMAX_PREFETCH_COUNT", 3)))
+        self.rate = max(0.0, _env_num("COUNTERMAX_PREFETCH_MBPS", 40)) * (1 << 20)   # 0 = 무제한
+        self.cap_bytes = int(max(1.0, _env_num("COUNTERMAX_CLIP_CACHE_GB", 20)) * (1 << 30))
+        if not root:
+            root = os.environ.get("COUNTERMAX_CLIP_CACHE_DIR", "").strip()
+        if not root:
+            base = os.environ.get("LOCALAPPDATA") or str(Path.home() / ".cache")
+            root = os.path.join(base, "CounterMax", "clip_cache")
+        self.root = root
+        self._cond = threading.Condition()
+        self._wanted: List[str] = []      # 복사할 원본 경로 (우선순위 순)
+        self._pinned: Dict[str, str] = {}  # 지우면 안 되는 원본 (정규화 경로 -> 원본 경로)
+        self._gen = 0
+        self._stop = False
+        self._thread = None
+        self._stat_cache: Dict[str, Tuple[float, Optional[Tuple[int, int]]]] = {}
+
+    # ---- 경로 ----
+    @staticmethod
+    def is_remote(path: str) -> bool:
+        p = str(path or "")
+        if p.startswith("\\\\") or p.startswith("//"):
+            return True
+        drive = os.path.splitdrive(p)[0]
+        if sys.platform.startswith("win") and len(drive) == 2:
+            try:
+                return ctypes.windll.kernel32.GetDriveTypeW(drive + "\\") == 4   # DRIVE_REMOTE
+            except Exception:
+                return False
+        return False
+
+    def _stat(self, src: str, max_age: float = 2.0) -> Optional[Tuple[int, int]]:
+        """원본 (size, mtime) — 네트워크 stat 을 줄이기 위해 잠깐 캐시합니다."""
+        now = time.monotonic()
+        hit = self._stat_cache.get(src)
+        if hit and now - hit[0] < max_age:
+            return hit[1]
+        try:
+            st = os.stat(src)
+            val = (int(st.st_size), int(st.st_mtime))
+        except Exception:
+            val = None
+        self._stat_cache[src] = (now, val)
+        return val
+
+    def _cache_name(self, src: str, sig: Tuple[int, int]) -> str:
+        h = hashlib.sha1(os.path.normcase(os.path.abspath(src)).encode("utf-8", "ignore")).hexdigest()[:16]
+        ext = os.path.splitext(src)[1] or ".bin"
+        return os.path.join(self.root, f"{h}_{sig[0]}_{sig[1]}{ext}")
+
+    def local_path(self, src: str) -> Optional[str]:
+        """검증된 로컬 사본 경로 (없거나 원본과 다르면 None). 사용 시각을 갱신해 LRU 를 유지합니다."""
+        if not self.enabled or not src:
+            return None
+        sig = self._stat(src)
+        if not sig:
+            return None
+        dst = self._cache_name(src, sig)
+        try:
+            if os.path.getsize(dst) != sig[0]:
+                return None
+            os.utime(dst, None)
+        except Exception:
+            return None
+        return dst
+
+    # ---- 예약 ----
+    def schedule(self, current: str, upcoming: List[str]):
+        """재생 파일과 다음 파일 목록을 알려 줍니다. 이전 예약은 취소되고 새 목록만 복사합니다."""
+        if not self.enabled:
+            return
+        wanted = [p for p in list(upcoming)[:self.count] if p and self.is_remote(p)]
+        with self._cond:
+            self._gen += 1
+            self._wanted = wanted
+            self._pinned = {os.path.normcase(os.path.abspath(p)): p for p in [current] + wanted if p}
+            self._cond.notify_all()
+        if wanted and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="clip-prefetch", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stop = True
+            self._wanted = []
+            self._cond.notify_all()
+
+    # ---- 작업 스레드 ----
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stop and not self._wanted:
+                    self._cond.wait()
+                if self._stop:
+                    return
+                src = self._wanted.pop(0)
+                gen = self._gen
+            try:
+                self._fetch(src, gen)
+            except Exception as e:
+                dlog(f"prefetch failed: {src}: {e}")
+
+    def _cancelled(self, gen: int) -> bool:
+        return self._stop or gen != self._gen
+
+    def _fetch(self, src: str, gen: int):
+        sig = self._stat(src, max_age=0.0)
+        if not sig:
+            return
+        dst = self._cache_name(src, sig)
+        if os.path.isfile(dst) and os.path.getsize(dst) == sig[0]:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        self._evict(need=sig[0])
+        part = dst + ".part"
+        done = 0
+        t0 = time.monotonic()
+        try:
+            with open(src, "rb") as fi, open(part, "wb") as fo:
+                while True:
+                    if self._cancelled(gen) and os.path.normcase(os.path.abspath(src)) not in self._pinned:
+                        raise InterruptedError("cancelled")
+                    if self._stop:
+                        raise InterruptedError("stopped")
+                    buf = fi.read(self.CHUNK)
+                    if not buf:
+                        break
+                    fo.write(buf)
+                    done += len(buf)
+                    if self.rate > 0:
+                        # 토큰 버킷: 평균 속도가 상한을 넘으면 그만큼 쉼
+                        ahead = done / self.rate - (time.monotonic() - t0)
+                        if ahead > 0:
+                            time.sleep(min(ahead, 1.0))
+            if done != sig[0] or self._stat(src, max_age=0.0) != sig:
+                raise IOError("source changed during copy")
+            os.replace(part, dst)
+            dlog(f"prefetch ok: {os.path.basename(src)} ({done >> 20} MB)")
+        except Exception:
+            try:
+                os.remove(part)
+            except Exception:
+                pass
+            raise
+
+    def _evict(self, need: int = 0):
+        """용량 상한(cap_bytes)을 넘지 않도록 오래된 캐시부터 삭제. 예약/재생 중 파일은 건너뜀."""
+        try:
+            entries = []
+            total = 0
+            for name in os.listdir(self.root):
+                fp = os.path.join(self.root, name)
+                try:
+                    st = os.stat(fp)
+                except Exception:
+                    continue
+                total += st.st_size
+                entries.append((st.st_mtime, st.st_size, fp))
+        except Exception:
+            return
+        if total + need <= self.cap_bytes:
+            return
+        pinned_names = set()
+        with self._cond:
+            pinned = list(self._pinned.values())
+        for p in pinned:
+            sig = (self._stat_cache.get(p) or (0, None))[1]
+            if sig:
+                pinned_names.add(os.path.normcase(self._cache_name(p, sig)))
+        for _mt, size, fp in sorted(entries):
+            if total + need <= self.cap_bytes:
+                break
+            if os.path.normcase(fp) in pinned_names:
+                continue
+            try:
+                os.remove(fp)
+                total -= size
+            except Exception:
+                pass   # 재생 중(잠김) 등
+
+# ==== Env file watcher (env/hotkeys/site JSON 핫 리로드) ====
+class EnvFileWatcher(QtCore.QObject):
+    """env_data_plus_allinone.json / hotkeys_db.json / 선택 지점 site_*.json 변경 감시.
+
+    - 로컬 파일은 QFileSystemWatcher, 네트워크 경로(SMB/WebDAV)나 감시 등록이 안 되는 파일은
+      백그라운드 스레드에서 (mtime, size) 폴링으로 감지합니다.
+    - 변경 알림은 파일별로 DEBOUNCE_MS 동안 모아 한 번만 처리하고, 바뀐 파일 하나만
+      작업 스레드에서 다시 읽어 파싱한 뒤 fileReloaded(kind, path, data) 로 알립니다.
+    - 내용(sha1)이 직전과 같거나 (mtime, size)가 그대로면 알리지 않습니다.
+    - 환경변수: COUNTERMAX_WATCH=0 (끄기), COUNTERMAX_WATCH_POLL=1 (항상 폴링),
+      COUNTERMAX_WATCH_POLL_S, COUNTERMAX_WATCH_DEBOUNCE_MS
+    """
+    fileReloaded = QtCore.pyqtSignal(str, str, object)   # kind("env"/"hk"/"site"), path, dict
+    _changed = QtCore.pyqtSignal(str)
+    _parsed = QtCore.pyqtSignal(str, object, object, str)  # path, sig, data(None=실패, False=해시만), sha1
+    DEBOUNCE_MS = 400
+    POLL_S = 2.0
+    MAX_RETRY = 3
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        def _env_num(key, default):
+            try:
+                return float(os.environ.get(key, "") or default)
+            except Exception:
+                return float(default)
+        self.enabled = os.environ.get("COUNTERMAX_WATCH", "1").strip() not in ("0", "false", "off")
+        self.force_poll = os.environ.get("COUNTERMAX_WATCH_POLL", "0").strip() in ("1", "true", "on")
+        self.poll_s = max(0.5, _env_num("COUNTERMAX_WATCH_POLL_S", self.POLL_S))
+        self.debounce_ms = max(50, int(_env_num("COUNTERMAX_WATCH_DEBOUNCE_MS", self.DEBOUNCE_MS)))
+        self._paths: Dict[str, str] = {}                  # kind -> path
+        self._sig: Dict[str, Optional[Tuple[int, int]]] = {}   # path -> 마지막으로 반영한 (mtime_ns, size)
+        self._digest: Dict[str, str] = {}
+        self._retry: Dict[str, int] = {}
+        self._timers: Dict[str, QtCore.QTimer] = {}
+        self._lock = threading.Lock()
+        self._polled: Dict[str, Optional[Tuple[int, int]]] = {}   # 폴링 대상 (스레드 쪽 마지막 관측값)
+        self._stop = threading.Event()
+        self._poll_thread = None
+        self._fsw = QtCore.QFileSystemWatcher(self)
+        self._fsw.fileChanged.connect(self._on_changed)
+        self._changed.connect(self._on_changed)
+        self._parsed.connect(self._on_parsed)
+
+    @staticmethod
+    def _stat_sig(path: str) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(path)
+            return (int(st.st_mtime_ns), int(st.st_size))
+        except Exception:
+            return None
+
+    # ---- 등록 ----
+    def watch(self, kind: str, path: Optional[str]):
+        """kind 로 감시할 파일을 (재)지정. 같은 경로를 다시 넘기면 현재 상태를 '반영됨'으로 기록합니다
+        (계수 프로그램이 직접 저장한 직후 호출하면 자기 저장으로 다시 읽지 않음)."""
+        if not self.enabled:
+            return
+        path = os.path.normpath(path) if path else ""
+        old = self._paths.get(kind)
+        if old and old != path:
+            self._paths.pop(kind, None)
+            if old not in self._paths.values():
+                self._unwatch(old)
+        if not path:
+            return
+        self._paths[kind] = path
+        self._sig[path] = self._stat_sig(path)
+        if old == path:
+            return
+        # 현재 내용 해시를 미리 받아 두어, 내용이 같은 재저장은 알리지 않음
+        threading.Thread(target=self._parse_worker, args=(path, None, None),
+                         name="env-watch-seed", daemon=True).start()
+        if self.force_poll or ClipStagingCache.is_remote(path) or not self._fsw.addPath(path):
+            with self._lock:
+                self._polled[path] = self._sig[path]
+            self._ensure_poller()
+
+    def path_for(self, kind: str) -> str:
+        return self._paths.get(kind, "")
+
+    def _unwatch(self, path: str):
+        try:
+            self._fsw.removePath(path)
+        except Exception:
+            pass
+        with self._lock:
+            self._polled.pop(path, None)
+        for d in (self._sig, self._digest, self._retry):
+            d.pop(path, None)
+        t = self._timers.pop(path, None)
+        if t is not None:
+            t.stop(); t.deleteLater()
+
+    def stop(self):
+        self._stop.set()
+
+    # ---- 폴링 (네트워크 경로) ----
+    def _ensure_poller(self):
+        if self._poll_thread is not None and self._poll_thread.is_alive():
+            return
+        self._poll_thread = threading.Thread(target=self._poll_loop, name="env-watch-poll", daemon=True)
+        self._poll_thread.start()
+
+    def _poll_loop(self):
+        while not self._stop.wait(self.poll_s):
+            with self._lock:
+                items = list(self._polled.items())
+            for path, seen in items:
+                sig = self._stat_sig(path)
+                if sig is None or sig == seen:
+                    continue
+                with self._lock:
+                    if path in self._polled:
+                        self._polled[path] = sig
+                self._changed.emit(path)
+
+    # ---- 디바운스 + 작업 스레드 파싱 ----
+    def _on_changed(self, path: str):
+        path = os.path.normpath(path)
+        if path not in self._paths.values():
+            return
+        t = self._timers.get(path)
+        if t is None:
+            t = QtCore.QTimer(self)
+            t.setSingleShot(True)
+            t.timeout.connect(lambda p=path: self._reload(p))
+            self._timers[path] = t
+        t.start(self.debounce_ms)
+
+    def _reload(self, path: str):
+        if path not in self._paths.values():
+            return
+        # 원자적 교체(임시파일 -> rename)로 감시가 풀린 경우 다시 등록
+        try:
+            with self._lock:
+                polled = path in self._polled
+            if not polled and path not in self._fsw.files() and os.path.exists(path):
+                self._fsw.addPath(path)
+        except Exception:
+            pass
+        known_sig, known_digest = self._sig.get(path), self._digest.get(path, "")
+        threading.Thread(target=self._parse_worker, args=(path, known_sig, known_digest),
+                         name="env-watch-parse", daemon=True).start()
+
+    def _parse_worker(self, path: str, known_sig, known_digest: Optional[str]):
+        """known_digest=None 이면 해시만 계산(감시 시작 시)."""
+        sig = self._stat_sig(path)
+        if sig is None or (known_sig is not None and sig == known_sig):
+            return
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+        except Exception:
+            self._parsed.emit(path, sig, None, "")
+            return
+        digest = hashlib.sha1(raw).hexdigest()
+        if known_digest is None or digest == known_digest:
+            self._parsed.emit(path, sig, False, digest)
+            return
+        try:
+            data = json.loads(raw.decode("utf-8-sig"))
+        except Exception:
+            data = None   # 쓰는 중(잘린 파일)일 수 있음 -> 재시도
+        self._parsed.emit(path, sig, data if isinstance(data, dict) else None, digest)
+
+    def _on_parsed(self, path: str, sig, data, digest: str):
+        if path not in self._paths.values():
+            return
+        if data is False:
+            self._sig[path] = sig
+            self._digest[path] = digest
+            return
+        if data is None:
+            n = self._retry.get(path, 0) + 1
+            self._retry[path] = n
+            if n <= self.MAX_RETRY:
+                self._on_changed(path)
+            else:
+                dlog(f"[WATCH] parse failed, giving up until next change: {path}")
+                self._retry.pop(path, None)
+                self._sig[path] = sig
+            return
+        self._retry.pop(path, None)
+        self._sig[path] = sig
+        if digest == self._digest.get(path):
+            return
+        self._digest[path] = digest
+        for kind, p in list(self._paths.items()):
+            if p == path:
+                dlog(f"[WATCH] reloaded {kind}: {path}")
+                self.fileReloaded.emit(kind, path, data)
+
+
 class MpvVideoWidget(QtWidgets.QFrame):
     positionChanged = QtCore.pyqtSignal(float)
     timeChanged = QtCore.pyqtSignal(int)
     mediaEnded = QtCore.pyqtSignal()
+    # mpv 가 플레이리스트 다음 항목으로 넘어감: (새 원본 경로, 직전 파일 길이 ms)
+    playlistAdvanced = QtCore.pyqtSignal(str, int)
+    _coreBuilt = QtCore.pyqtSignal(object, object)
+
+    # 준비 전 명령 중 마지막 값만 의미 있는 것들 (같은 키는 덮어씀)
+    _COALESCE = {"play": "playstate", "pause": "playstate", "set_rate": "rate", "audio_set_volume": "volume"}
 
     def __init__(self, parent=None):
         super().__init__(parent)
+        # libmpv 로드/생성/초기화는 백그라운드 스레드에서. 준비 전 명령은 큐에 쌓았다가 준비되면 재생합니다.
         self._player_core = None
-        try:
-            self._player_core = _SimpleMpv()
-        except _MpvLoadError as e:
-            # libmpv DLL 자체를 찾지 못한 경우: 친절한 안내 후 더미 플레이어로 진행
-            QtWidgets.QMessageBox.critical(
-                self,
-                "mpv 구성 파일 없음",
-                str(e)
-            )
-            self._player_core = None
-        except Exception as e:
-            QtWidgets.QMessageBox.critical(
-                self,
-                "mpv 초기화 오류",
-                f"mpv 초기화에 실패했습니다.\\n{e}"
-            )
-            self._player_core = None
-
-        self.mediaplayer = MpvAdapter(self._player_core)
+        self.mediaplayer = MpvAdapter(None)
+        self._core_state = "starting"       # starting | ready | failed (코어가 있어도 창 연결 전이면 starting)
+        self._pending_cmds: List[Tuple[str, tuple]] = []
+        self._pending_seek: Optional[Tuple[str, float]] = None
+        self._coreBuilt.connect(self._on_core_built)
+        threading.Thread(target=self._build_core, name="mpv-init", daemon=True).start()
 
         self.timer = QtCore.QTimer(self)
         self.timer.setInterval(40)  # 25fps 기준
@@ -2843,42 +3530,175 @@ class MpvVideoWidget(QtWidgets.QFrame):
         self._eof_emitted = False
         self._last_is_playing = False  # legacy flag (not used in new EOF detection)
         self._last_pos = 0.0          # 마지막으로 관측한 재생 위치(0.0~1.0)
+        self._pl_sources: List[str] = []  # mpv 플레이리스트 항목별 원본 경로 (스테이징 사본이어도 원본 기준)
+        self._pl_pos = 0
+        self._last_len_ms = 0
+        self._rate_samples: List[Tuple[float, int]] = []   # (monotonic 초, time-pos ms) — 실제 배속 측정용
+
+    def _build_core(self):
+        """(작업 스레드) 플레이어 코어 생성 후 결과를 UI 스레드로 전달."""
+        try:
+            core, err = _create_player_core(), None
+        except Exception as e:
+            core, err = None, e
+        try:
+            self._coreBuilt.emit(core, err)
+        except RuntimeError:
+            pass   # 위젯이 먼저 닫힘
+
+    def _on_core_built(self, core, err):
+        if err is not None or core is None:
+            self._core_state = "failed"
+            self._pending_cmds = []
+            self._pending_seek = None
+            if isinstance(err, mpv_host.MpvLoadError):
+                # libmpv DLL 자체를 찾지 못한 경우: 친절한 안내 후 더미 플레이어로 진행
+                QtWidgets.QMessageBox.critical(self, "mpv 구성 파일 없음", str(err))
+            else:
+                QtWidgets.QMessageBox.critical(self, "mpv 초기화 오류", f"mpv 초기화에 실패했습니다.\n{err}")
+            return
+        self._player_core = core
+        # 숨겨진 상태면 창 핸들을 붙이는 showEvent 까지 대기 명령을 미룹니다 (먼저 load 하면 mpv 가 자기 창을 띄움)
+        if self.isVisible():
+            self._attach_and_replay()
+
+    def _attach_and_replay(self):
+        core = self._player_core
+        try:
+            core.set_wid(int(self.winId()))
+        except Exception:
+            pass
+        self.mediaplayer = MpvAdapter(core)
+        self._core_state = "ready"
+        cmds, self._pending_cmds = self._pending_cmds, []
+        for name, args in cmds:
+            try:
+                getattr(self.mediaplayer, name)(*args)
+            except Exception:
+                pass
+        if self._pending_seek is not None:
+            self._apply_pending_seek()
+        dlog(f"mpv ready ({len(cmds)} queued command(s) replayed)")
+
+    def _apply_pending_seek(self, tries: int = 0):
+        """대기 중이던 시크는 파일이 열려 길이가 나온 뒤에 적용 (최대 약 3초 대기)."""
+        if self._pending_seek is None:
+            return
+        if self.mediaplayer.get_length() <= 0 and tries < 60:
+            QtCore.QTimer.singleShot(50, lambda: self._apply_pending_seek(tries + 1))
+            return
+        name, arg = self._pending_seek
+        self._pending_seek = None
+        try:
+            getattr(self.mediaplayer, name)(arg)
+        except Exception:
+            pass
+
+    def _mp(self, name: str, *args):
+        """mediaplayer 명령: 준비됐으면 바로 실행, 준비 중이면 큐에 넣음 (실패 상태면 무시)."""
+        if self._core_state == "ready":
+            return getattr(self.mediaplayer, name)(*args)
+        if self._core_state == "failed":
+            return None
+        if name in ("set_time", "set_position"):
+            self._pending_seek = (name, args[0])
+            return None
+        if name == "load" and (args[1:] or ("replace",))[0] == "replace":
+            self._pending_seek = None
+        key = self._COALESCE.get(name)
+        if key:
+            self._pending_cmds = [c for c in self._pending_cmds if self._COALESCE.get(c[0]) != key]
+        self._pending_cmds.append((name, args))
+        return None
 
     def showEvent(self, event: QtGui.QShowEvent) -> None:
         super().showEvent(event)
         # 위젯이 실제 화면에 배치된 후 윈도우 핸들을 mpv에 연결
+        if self._player_core is None:
+            return
+        if self._core_state == "starting":
+            self._attach_and_replay()
+            return
         try:
-            if self._player_core is not None:
-                wid = int(self.winId())
-                self._player_core.set_wid(wid)
+            self._player_core.set_wid(int(self.winId()))
         except Exception:
             pass
 
     # ---- 기존 VlcVideoWidget 과 동일하게 보이는 퍼블릭 메서드 ----
-    def set_media(self, filepath: str):
-        if self._player_core is None:
+    def set_media(self, filepath: str, source: str = None):
+        """filepath 를 즉시 열고 플레이리스트를 이 파일 하나로 초기화. source 는 원본 경로(캐시 사본일 때)."""
+        self._pl_sources = [source or filepath]
+        self._pl_pos = 0
+        self._last_len_ms = 0
+        self._eof_emitted = False
+        self._rate_samples = []
+        try:
+            self._mp("load", filepath, "replace")
+        except Exception:
+            pass
+
+    def queue_next(self, filepath: str, source: str = None) -> bool:
+        """현재 항목 뒤에 다음 파일을 예약 (이미 같은 파일이 예약돼 있으면 무시)."""
+        src = source or filepath
+        if self._core_state == "failed" or not self._pl_sources:
+            return False
+        if self.queued_next() == src:
+            return False
+        if self._pl_pos + 1 < len(self._pl_sources):
+            self.clear_queue()
+        try:
+            self._mp("load", filepath, "append")
+        except Exception:
+            return False
+        self._pl_sources.append(src)
+        return True
+
+    def queued_next(self) -> Optional[str]:
+        i = self._pl_pos + 1
+        return self._pl_sources[i] if i < len(self._pl_sources) else None
+
+    def clear_queue(self):
+        """예약된 다음 파일 취소 (현재 재생 항목은 유지)."""
+        if len(self._pl_sources) <= 1:
             return
         try:
-            self._player_core.loadfile(filepath)
+            self._mp("playlist_clear")
         except Exception:
             pass
+        self._pl_sources = [self._pl_sources[self._pl_pos]]
+        self._pl_pos = 0
+
+    def _poll_playlist(self):
+        """mpv playlist-pos 변화를 감지해 playlistAdvanced 발신. 넘어갔으면 True."""
+        if len(self._pl_sources) <= 1:
+            return False
+        pos = self.mediaplayer.get_playlist_pos()
+        if pos == self._pl_pos or not (0 <= pos < len(self._pl_sources)):
+            return False
+        prev_len = self._last_len_ms
+        self._pl_pos = pos
+        self._last_len_ms = 0
+        self._rate_samples = []
+        self._eof_emitted = False
+        self.playlistAdvanced.emit(self._pl_sources[pos], int(prev_len))
+        return True
 
     def play(self):
         try:
-            self.mediaplayer.play()
+            self._mp("play")
             self.timer.start()
         except Exception:
             pass
 
     def pause(self):
         try:
-            self.mediaplayer.pause()
+            self._mp("pause")
         except Exception:
             pass
 
     def stop(self):
         try:
-            self.mediaplayer.stop()
+            self._mp("stop")
         finally:
             self.timer.stop()
 
@@ -2896,7 +3716,7 @@ class MpvVideoWidget(QtWidgets.QFrame):
 
     def set_time_ms(self, ms: int):
         try:
-            self.mediaplayer.set_time(ms)
+            self._mp("set_time", ms)
         except Exception:
             pass
 
@@ -2908,7 +3728,7 @@ class MpvVideoWidget(QtWidgets.QFrame):
 
     def set_position(self, p: float):
         try:
-            self.mediaplayer.set_position(p)
+            self._mp("set_position", p)
         except Exception:
             pass
 
@@ -2920,7 +3740,8 @@ class MpvVideoWidget(QtWidgets.QFrame):
 
     def set_rate(self, r: float):
         try:
-            self.mediaplayer.set_rate(r)
+            self._mp("set_rate", r)
+            self._rate_samples = []
         except Exception:
             pass
 
@@ -2932,9 +3753,40 @@ class MpvVideoWidget(QtWidgets.QFrame):
 
     def audio_set_volume(self, v: int):
         try:
-            self.mediaplayer.audio_set_volume(v)
+            self._mp("audio_set_volume", v)
+        except Exception:
+            pass
+
+    RATE_WINDOW_S = 3.0
+
+    def _sample_rate(self, cur_ms: int):
+        """최근 RATE_WINDOW_S 초 동안의 (벽시계, 재생위치) 기록. 일시정지/뒤로 이동/큰 점프면 새로 시작."""
+        now = time.monotonic()
+        smp = self._rate_samples
+        if smp:
+            dt = now - smp[-1][0]
+            dv = cur_ms - smp[-1][1]
+            if dv < 0 or dv > (dt * 16.0 + 0.5) * 1000.0 or not self.is_playing():
+                smp.clear()
+        smp.append((now, int(cur_ms)))
+        while len(smp) > 2 and now - smp[0][0] > self.RATE_WINDOW_S:
+            smp.pop(0)
+
+    def playback_stats(self) -> dict:
+        """mpv 재생 지표 + 실제로 유지된 배속(effective_rate; 측정 구간이 짧으면 0)."""
+        stats = {"profile": 0, "dropped": 0, "decoder_dropped": 0, "avsync": 0.0, "vf_fps": 0.0}
+        try:
+            if self._player_core is not None:
+                stats.update(self._player_core.playback_stats())
         except Exception:
             pass
+        stats["rate"] = self.get_rate()
+        smp = self._rate_samples
+        eff = 0.0
+        if len(smp) >= 2 and smp[-1][0] - smp[0][0] >= 1.0:
+            eff = (smp[-1][1] - smp[0][1]) / 1000.0 / (smp[-1][0] - smp[0][0])
+        stats["effective_rate"] = eff
+        return stats
 
     def update_ui(self):
         """플레이어 상태 폴링 + EOF(재생 종료) 감지.
@@ -2942,6 +3794,11 @@ class MpvVideoWidget(QtWidgets.QFrame):
         - 1차: mpv의 eof-reached property 사용
         - 2차: 남은 시간이 아주 짧을 때(프레임/시간 기반) EOF로 간주
         """
+        # 플레이리스트 전환 감지 (자동 다음 재생: mpv 가 다음 항목을 직접 이어 재생)
+        try:
+            self._poll_playlist()
+        except Exception:
+            pass
         # 위치/시간 갱신
         pos = None
         cur_time_ms = 0
@@ -2954,13 +3811,20 @@ class MpvVideoWidget(QtWidgets.QFrame):
         try:
             cur_time_ms = self.get_time_ms()
             self.timeChanged.emit(cur_time_ms)
+            self._sample_rate(cur_time_ms)
         except Exception:
             pass
         try:
             length_ms = self.length_ms()
+            if length_ms > 0:
+                self._last_len_ms = length_ms
         except Exception:
             length_ms = 0
 
+        # 다음 항목이 예약돼 있으면 mpv 가 알아서 넘어가므로 EOF 로 보지 않음
+        if self.queued_next() is not None:
+            return
+
         # EOF 감지
         try:
             core = self._player_core
@@ -3301,7 +4165,6 @@ class CountWindowDialog(QtWidgets.QDialog):
         if r>=0: self.list.takeItem(r); self.refresh_preview()
 
     def refresh_preview(self):
-        SLOT_SEC = 15*60
         def to_sec(s):
             h,m=map(int,s.split(":"))
             return h*3600+m*60
@@ -3311,12 +4174,8 @@ class CountWindowDialog(QtWidgets.QDialog):
             sa=to_sec(a); sb=to_sec(b)
             if sb<=sa: sb+=24*3600
             ranges.append((sa,sb))
-        slots=[]; i=1
-        for s,e in ranges:
-            t=s
-            while t<e:
-                slots.append((i, hm(t%86400), hm((t+SLOT_SEC)%86400)))
-                t+=SLOT_SEC; i+=1
+        # 시트/엑셀과 같은 슬롯 목록(정렬, 겹치는 구간은 한 번만)
+        slots=[(i, hm(t), hm(t+SLOT_SEC)) for i, t in enumerate(sheet_layout.slot_starts(ranges, SLOT_SEC), 1)]
         self.preview.setRowCount(len(slots))
         for r,(no,a,b) in enumerate(slots):
             self.preview.setItem(r,0,QtWidgets.QTableWidgetItem(str(no)))
@@ -3339,9 +4198,12 @@ class HelpDialog(QtWidgets.QDialog):
             " ←/→: 5초 이동\n"
             " ↑/↓: 볼륨 up/down\n"
             " PageUp/PageDown: 이전/다음 영상\n"
+            " Ctrl+←/Ctrl+→: 이전/다음 계수 위치\n"
+            " Ctrl+E: 감사 모드(계수 구간만 재생)\n"
             "\n입력창\n"
             " Tab/Shift+Tab: 방향탭 내 이동\n"
             " Ctrl+Tab/Ctrl+Shift+Tab: 방향그룹 이동\n"
+            " Ctrl+Z / Ctrl+Y: 계수 되돌리기 / 다시 실행\n"
             "\n기타\n"
             " F1: 도움말\n"
             " F2: 폴더 열기\n"
@@ -3384,33 +4246,19 @@ class SheetDialog(QtWidgets.QDialog):
         tabs=QtWidgets.QTabWidget()
         v.addWidget(tabs, 1)
         self.tables = {}
-        enabled = [i+1 for i, ok in enumerate(cfg.enabled_directions) if ok and i < len(cfg.directions)]
-        if not enabled:
-            enabled = [1]
-        for dirno in enabled:
+        self.models = {}
+        layout = cfg.layout()
+        mats = counts.sheet_matrices(layout)
+        for dirno, mat in zip(layout.directions, mats):
             tab=QtWidgets.QWidget(); lay=QtWidgets.QVBoxLayout(tab)
-            table=QtWidgets.QTableWidget(); lay.addWidget(table)
-            df=counts.to_sheet_df_per_direction(cfg, dirno)
-            table.setColumnCount(len(df.columns)); table.setRowCount(len(df))
-            table.setHorizontalHeaderLabels(list(df.columns))
-            for r in range(len(df)):
-                for c,col in enumerate(df.columns):
-                    table.setItem(r,c,QtWidgets.QTableWidgetItem(str(df.iloc[r,c])))
+            table=QtWidgets.QTableView(); lay.addWidget(table)
+            model=SheetTableModel(layout, mat, table)
+            table.setModel(model)
+            table.verticalHeader().setVisible(False)
             table.horizontalHeader().setStretchLastSection(True)
             table.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.ResizeMode.Stretch)
-            # Right-align numeric cells
-            for r in range(len(df)):
-                for c, col in enumerate(df.columns):
-                    item = table.item(r, c)
-                    if item is None:
-                        continue
-                    txt = item.text().strip()
-                    try:
-                        float(txt.replace(',', ''))
-                        item.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignRight | QtCore.Qt.AlignmentFlag.AlignVCenter)
-                    except Exception:
-                        pass
             self.tables[dirno] = table
+            self.models[dirno] = model
             tabs.addTab(tab, f"{dirno}번")
 
         # 하단: 엑셀저장(통합출력), 등록, 닫기
@@ -3462,32 +4310,139 @@ class SheetDialog(QtWidgets.QDialog):
             QtWidgets.QMessageBox.warning(self, "오류", "엑셀 저장 중 문제가 발생했습니다.")
 
     def refresh(self):
-        # 재계산하여 각 방향 탭의 표를 갱신
-        try:
-            for dirno, table in self.tables.items():
-                df = self.counts.to_sheet_df_per_direction(self.cfg, dirno)
-                table.setColumnCount(len(df.columns)); table.setRowCount(len(df))
-                table.setHorizontalHeaderLabels(list(df.columns))
-                for r in range(len(df)):
-                    for c, col in enumerate(df.columns):
-                        table.setItem(r, c, QtWidgets.QTableWidgetItem(str(df.iloc[r, c])))
-                table.horizontalHeader().setStretchLastSection(True)
-                table.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.ResizeMode.Stretch)
-                # Right-align numeric cells
-                for r in range(len(df)):
-                    for c, col in enumerate(df.columns):
-                        item = table.item(r, c)
-                        if item is None:
-                            continue
-                        txt = item.text().strip()
-                        try:
-                            float(txt.replace(',', ''))
-                            item.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignRight | QtCore.Qt.AlignmentFlag.AlignVCenter)
-                        except Exception:
-                            pass
+        # 배열만 다시 채워 각 방향 탭의 모델에 넘김 (레이아웃이 바뀐 방향은 열이 다를 수 있어 모델이 리셋)
+        try:
+            layout = self.cfg.layout()
+            mats = self.counts.sheet_matrices(layout)
+            for dirno, model in self.models.items():
+                k = layout.sheet_of(dirno)
+                if k >= 0:
+                    model.set_matrix(layout, mats[k])
         except Exception as e:
             pass
 
+
+class SheetTableModel(QtCore.QAbstractTableModel):
+    """시트 보기 표: 시간대 | 차종별 값. SheetLayout 과 정수 배열을 그대로 보여줍니다."""
+    _RIGHT = QtCore.Qt.AlignmentFlag.AlignRight | QtCore.Qt.AlignmentFlag.AlignVCenter
+    ALIGN_RIGHT = int(getattr(_RIGHT, "value", _RIGHT))
+
+    def __init__(self, layout, mat, parent=None):
+        super().__init__(parent)
+        self.layout = layout; self.mat = mat
+
+    def set_matrix(self, layout, mat):
+        if layout is self.layout and len(mat) == len(self.mat):
+            self.mat = mat
+            if mat:
+                self.dataChanged.emit(self.index(0, 1), self.index(len(mat) - 1, len(layout.vehicles)), [])
+            return
+        self.beginResetModel()
+        self.layout = layout; self.mat = mat
+        self.endResetModel()
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.layout.labels)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else 1 + len(self.layout.vehicles)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if role == QtCore.Qt.ItemDataRole.DisplayRole and orientation == QtCore.Qt.Orientation.Horizontal:
+            hdr = self.layout.header()
+            return hdr[section] if 0 <= section < len(hdr) else None
+        return None
+
+    def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        r, c = index.row(), index.column()
+        if role == QtCore.Qt.ItemDataRole.DisplayRole:
+            return self.layout.labels[r] if c == 0 else str(self.mat[r][c - 1])
+        if role == QtCore.Qt.ItemDataRole.TextAlignmentRole and c > 0:
+            return self.ALIGN_RIGHT     # 숫자 셀 오른쪽 정렬
+        return None
+
+class XlsxExportJob(QtCore.QObject):
+    """xlsx_writer.write_xlsx 를 작업 스레드에서 실행. sheets 는 UI 스레드에서 만든 배열 사본만 참조해야 합니다.
+    신호는 작업 스레드에서 emit 되어 큐 연결로 UI 스레드에 전달됩니다."""
+    progress = QtCore.pyqtSignal(int, int)      # (끝난 시트, 전체 시트)
+    finished = QtCore.pyqtSignal(str, float)    # (경로, ms)
+    failed = QtCore.pyqtSignal(str, str)        # (경로, 오류)
+
+    def __init__(self, path, sheets, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.sheets = sheets
+
+    def start(self):
+        threading.Thread(target=self._run, name="xlsx-export", daemon=True).start()
+
+    def _run(self):
+        t0 = time.perf_counter()
+        try:
+            xlsx_writer.write_xlsx(self.path, self.sheets, progress=self.progress.emit)
+        except Exception as e:
+            self.failed.emit(self.path, f"{type(e).__name__}: {e}")
+            return
+        self.finished.emit(self.path, (time.perf_counter() - t0) * 1000.0)
+
+
+class UiRefreshScheduler(QtCore.QObject):
+    """재생 중 위젯 갱신 병합기.
+
+    생산자(timeChanged, 라벨/자동정지 타이머 등)는 mark(name, value)로 최신 값만 남기고,
+    프레임당 한 번 flush() 에서 마지막으로 적용한 값과 다른 필드만 위젯에 반영합니다.
+    value 를 생략한 mark(name)는 '다시 계산' 플래그로, 프레임당 한 번만 실행됩니다.
+    """
+    FRAME_MS = 16
+    _FLAG = object()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._appliers: Dict[str, object] = {}
+        self._order: List[str] = []
+        self._pending: Dict[str, object] = {}
+        self._applied: Dict[str, object] = {}
+        self._nocache = set()
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.FRAME_MS)
+        self._timer.timeout.connect(self.flush)
+
+    def register(self, name: str, fn, compare: bool = True):
+        """fn(value) — 플래그 필드는 fn() 로 호출. 등록 순서대로 적용됩니다.
+        compare=False 면 마지막 적용 값과 비교하지 않고 fn 이 직접 위젯 값과 비교합니다
+        (사용자가 직접 바꿀 수 있는 슬라이더 등)."""
+        if name not in self._appliers:
+            self._order.append(name)
+        self._appliers[name] = fn
+        if not compare:
+            self._nocache.add(name)
+
+    def mark(self, name: str, value=_FLAG):
+        self._pending[name] = value
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def flush(self):
+        pending, self._pending = self._pending, {}
+        for name in self._order:
+            if name not in pending:
+                continue
+            val = pending[name]
+            try:
+                if val is self._FLAG:
+                    self._appliers[name]()
+                    continue
+                if name in self._nocache:
+                    self._appliers[name](val)
+                    continue
+                if self._applied.get(name, self._FLAG) == val:
+                    continue
+                if self._appliers[name](val) is not False:
+                    self._applied[name] = val
+            except Exception as e:
+                dlog(f"ui refresh '{name}' failed: {e}")
+
 class SeekSlider(QtWidgets.QSlider):
     """수평 슬라이더에서 클릭한 위치로 즉시 이동하는 슬라이더"""
     clickedTo = QtCore.pyqtSignal(int)
@@ -3505,39 +4460,73 @@ class SeekSlider(QtWidgets.QSlider):
         super().mousePressEvent(event)
 
     # --- v11: marker support (start & pause points as ▼) ---
+    # 마커 + 계수 밀도 띠는 QPixmap 오버레이에 한 번 그려 두고,
+    # 마커/밀도/크기가 바뀔 때만 다시 그립니다. 평소 repaint 는 핸들 + 오버레이 blit 만 합니다.
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._marker_start = None
         self._marker_pause = None
+        self._density: Tuple[int, ...] = ()
+        self._overlay: Optional[QtGui.QPixmap] = None
+
+    @staticmethod
+    def _same_frac(a, b) -> bool:
+        if a is None or b is None:
+            return a is b
+        return abs(a - b) < 1e-4
 
     def setMarkers(self, start_pos: float|None, pause_pos: float|None):
-        """start_pos, pause_pos: 0.0~1.0 (None이면 비표시)"""
+        """start_pos, pause_pos: 0.0~1.0 (None이면 비표시). 값이 같으면 아무 것도 하지 않음."""
+        if self._same_frac(start_pos, self._marker_start) and self._same_frac(pause_pos, self._marker_pause):
+            return
         self._marker_start = start_pos
         self._marker_pause = pause_pos
+        self._invalidate_overlay()
+
+    def densityBuckets(self) -> int:
+        """밀도 띠 구간 수 (약 3px 당 1구간)."""
+        return max(1, self.width() // 3)
+
+    def setEventDensity(self, counts):
+        """구간별 계수 이벤트 수 (None/빈 값이면 비표시)."""
+        counts = tuple(int(c) for c in (counts or ()))
+        if counts == self._density:
+            return
+        self._density = counts
+        self._invalidate_overlay()
+
+    def _invalidate_overlay(self):
+        self._overlay = None
         self.update()
 
-    def paintEvent(self, e: QtGui.QPaintEvent):
-        super().paintEvent(e)
+    def resizeEvent(self, e: QtGui.QResizeEvent):
+        self._overlay = None
+        super().resizeEvent(e)
+
+    def _render_overlay(self) -> QtGui.QPixmap:
+        dpr = self.devicePixelRatioF()
+        pm = QtGui.QPixmap(max(1, int(self.width() * dpr)), max(1, int(self.height() * dpr)))
+        pm.setDevicePixelRatio(dpr)
+        pm.fill(QtCore.Qt.GlobalColor.transparent)
+        p = QtGui.QPainter(pm)
         try:
-            p = QtGui.QPainter(self)
             p.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing, True)
             rect = self.rect(); y = rect.center().y()
-            def draw_triangle(x, y_mid, fill: QtGui.QColor, outline: QtGui.QColor):
-                size = 12
-                path = QtGui.QPainterPath()
-                path.moveTo(x, y_mid - size//2)
-                path.lineTo(x - size//2, y_mid + size//2)
-                path.lineTo(x + size//2, y_mid + size//2)
-                path.closeSubpath()
-                # shadow
-                p.setPen(QtGui.QPen(QtGui.QColor(0,0,0,120), 2))
-                p.setBrush(QtGui.QColor(0,0,0,80))
-                p.translate(0,1); p.drawPath(path); p.translate(0,-1)
-                # body
-                p.setPen(QtGui.QPen(outline, 2))
-                p.setBrush(fill)
-                p.drawPath(path)
-            
+
+            # 계수 밀도 띠 (하단)
+            dens = self._density
+            peak = max(dens) if dens else 0
+            if peak > 0:
+                n = len(dens); bw = rect.width() / float(n)
+                hmax = max(2, rect.height() // 4)
+                p.setPen(QtCore.Qt.PenStyle.NoPen)
+                p.setBrush(QtGui.QColor(255, 150, 30, 170))
+                for i, c in enumerate(dens):
+                    if c <= 0:
+                        continue
+                    h = max(1, int(round(hmax * c / peak)))
+                    p.drawRect(QtCore.QRectF(rect.left() + i * bw, rect.bottom() - h + 1, max(1.0, bw - 0.5), h))
+
             def draw_triangle_up(x, y_mid, fill: QtGui.QColor, outline: QtGui.QColor):
                 size = 12
                 path = QtGui.QPainterPath()
@@ -3560,18 +4549,177 @@ class SeekSlider(QtWidgets.QSlider):
                 p.translate(0,1); p.drawPath(path); p.translate(0,-1)
                 p.setPen(QtGui.QPen(outline, 2)); p.setBrush(fill); p.drawPath(path)
 
-            start_frac = getattr(self, "_marker_start", None)
-            pause_frac = getattr(self, "_marker_pause", None)
+            start_frac = self._marker_start
+            pause_frac = self._marker_pause
             if start_frac is not None and 0.0 <= start_frac <= 1.0:
                 x = rect.left() + int(start_frac * rect.width())
                 draw_triangle_up(x, y, QtGui.QColor(230,60,60,230), QtGui.QColor(70,0,0,230))  # RED ▲
             if pause_frac is not None and 0.0 <= pause_frac <= 1.0:
                 x = rect.left() + int(pause_frac * rect.width())
                 draw_triangle_down(x, y, QtGui.QColor(60,90,230,230), QtGui.QColor(0,0,90,230))  # BLUE ▼
+        finally:
+            p.end()
+        return pm
+
+    def paintEvent(self, e: QtGui.QPaintEvent):
+        super().paintEvent(e)
+        try:
+            if self._overlay is None:
+                self._overlay = self._render_overlay()
+            p = QtGui.QPainter(self)
+            p.drawPixmap(0, 0, self._overlay)
             p.end()
         except Exception: pass
 
 # ==== Main Window ====
+class DirPanelManager:
+    """방향 패널 / 그룹 탭 증분 동기화.
+
+    설정(방향 이름, 차종, 그룹, 단축키)이 바뀌어도 탭 위젯을 통째로 버리지 않습니다.
+    - 남아 있는 방향 패널은 제목/차종명/단축키 중 바뀐 라벨만 setText
+    - 차종 수가 바뀌면 해당 셀만 추가/삭제
+    - 새 방향/그룹만 생성하고, 사라진 방향/그룹만 삭제
+    위젯 참조는 MainWindow 의 panel_btns / panel_lbls / shortcut_lbls / panel_boxes / panel_cells 를 그대로 씁니다.
+    """
+
+    def __init__(self, win: "MainWindow"):
+        self.win = win
+        # (그룹 방향 tuple, 패널을 놓을 활성 방향 tuple) -> 탭 페이지
+        self.pages: Dict[Tuple[Tuple[int, ...], Tuple[int, ...]], QtWidgets.QWidget] = {}
+
+    def default_groups(self) -> List[Tuple[Tuple[int, ...], str]]:
+        """1-2-3, 4-5-6 … 중 활성 방향이 있는 그룹 [(방향 tuple, 탭 라벨)]."""
+        w = self.win
+        enabled = set(w.get_enabled_indices()); n = len(w.cfg.directions)
+        out = []
+        for a in range(0, 30, 3):
+            dirs = tuple(d for d in (a, a + 1, a + 2) if d in enabled and d < n)
+            if dirs:
+                out.append((dirs, " - ".join(str(d + 1) for d in dirs)))
+        return out
+
+    def sync(self, groups=None):
+        """groups: [(방향 인덱스 tuple, 탭 라벨), ...] — None 이면 default_groups().
+
+        그룹마다 탭을 하나씩 만들고(방향이 모두 비활성이어도), 패널은 활성 방향만 왼쪽부터 채웁니다.
+        group_tab_mapping 에는 그룹의 방향 전체가 들어갑니다.
+        """
+        w = self.win
+        if groups is None:
+            groups = self.default_groups()
+        groups = [(tuple(dict.fromkeys(d)), lbl) for d, lbl in groups if d]
+        enabled = set(w.get_enabled_indices())
+        keys = [(dirs, tuple(d for d in dirs if d in enabled)) for dirs, _ in groups]
+        wanted_dirs = {d for _dirs, shown in keys for d in shown}
+        wanted_keys = set(keys)
+
+        # 1) 사라진 방향 패널 정리
+        for didx in [d for d in list(w.panel_boxes) if d not in wanted_dirs]:
+            self._drop_panel(didx)
+        # 2) 남은 패널은 바뀐 부분만, 새 방향은 생성
+        for didx in sorted(wanted_dirs):
+            if didx in w.panel_boxes:
+                self._update_panel(didx)
+            else:
+                w.build_dir_panel(didx)
+        # 3) 새 그룹 페이지만 생성 (기존 패널은 새 페이지로 옮겨짐)
+        for key in keys:
+            if key not in self.pages:
+                self.pages[key] = self._make_page(key[1])
+
+        # 4) 탭 순서/라벨 맞추기
+        tab = w.tab
+        tab.blockSignals(True)
+        try:
+            cur_page = tab.currentWidget()
+            for i, (key, (_dirs, lbl)) in enumerate(zip(keys, groups)):
+                page = self.pages[key]
+                j = tab.indexOf(page)
+                if j != i:
+                    if j >= 0:
+                        tab.removeTab(j)
+                    tab.insertTab(i, page, lbl)
+                elif tab.tabText(i) != lbl:
+                    tab.setTabText(i, lbl)
+            while tab.count() > len(groups):
+                tab.removeTab(tab.count() - 1)
+            k = tab.indexOf(cur_page) if cur_page is not None else -1
+            tab.setCurrentIndex(k if k >= 0 else 0)
+        finally:
+            tab.blockSignals(False)
+
+        # 5) 쓰지 않는 페이지 삭제
+        for key in [k for k in self.pages if k not in wanted_keys]:
+            page = self.pages.pop(key)
+            try:
+                page.deleteLater()
+            except RuntimeError:
+                pass
+        w.group_tab_mapping = [list(dirs) for dirs, _ in groups]
+        w._bind_count_labels()
+
+    def reset(self):
+        """탭 위젯을 새로 만든 경우 등: 캐시된 페이지를 잊습니다."""
+        self.pages.clear()
+
+    def _make_page(self, dirs: Tuple[int, ...]) -> QtWidgets.QWidget:
+        """3열(1:1:1) 고정 배치 — 이미 있는 패널을 왼쪽부터 놓고 남는 열은 빈 칸."""
+        w = self.win
+        page = QtWidgets.QWidget()
+        grid = QtWidgets.QGridLayout(page)
+        sc = getattr(w, 'panel_scale', 0.70)
+        m = max(1, int(6 * sc))
+        grid.setContentsMargins(m, m, m, m)
+        grid.setHorizontalSpacing(m)
+        grid.setVerticalSpacing(m)
+        for col in range(max(3, len(dirs))):
+            grid.setColumnStretch(col, 1)
+            gb = w.panel_boxes.get(dirs[col]) if col < len(dirs) else None
+            if gb is not None:
+                grid.addWidget(gb, 0, col)
+            else:
+                ph = QtWidgets.QWidget()
+                ph.setSizePolicy(QtWidgets.QSizePolicy.Policy.Expanding,
+                                 QtWidgets.QSizePolicy.Policy.MinimumExpanding)
+                grid.addWidget(ph, 0, col)
+        return page
+
+    def _drop_panel(self, didx: int):
+        w = self.win
+        gb = w.panel_boxes.pop(didx, None)
+        for d in (w.panel_btns, w.panel_lbls, w.shortcut_lbls, w.panel_cells):
+            d.pop(didx, None)
+        if gb is not None:
+            try:
+                gb.setParent(None); gb.deleteLater()
+            except RuntimeError:
+                pass
+
+    def _update_panel(self, didx: int):
+        w = self.win; cfg = w.cfg
+        gb = w.panel_boxes[didx]
+        title = cfg.directions[didx]
+        if gb.title() != title:
+            gb.setTitle(title)
+        vehs = cfg.vehicle_types[:cfg.vehicle_count()]
+        keys = cfg.dir_hotkeys[didx] if didx < len(cfg.dir_hotkeys) else []
+        cells = w.panel_cells[didx]
+        # 줄어든 차종 셀 삭제
+        while len(cells["frames"]) > len(vehs):
+            fr = cells["frames"].pop(); cells["names"].pop()
+            w.panel_btns[didx].pop(); w.panel_lbls[didx].pop(); w.shortcut_lbls[didx].pop()
+            fr.setParent(None); fr.deleteLater()
+        for i, veh in enumerate(vehs):
+            key = keys[i] if i < len(keys) else ""
+            if i >= len(cells["frames"]):
+                w._add_vehicle_cell(didx, i, veh, key)
+                continue
+            if cells["names"][i].text() != veh:
+                cells["names"][i].setText(veh); w.panel_btns[didx][i].setText(veh)
+            kl = w.shortcut_lbls[didx][i]
+            if kl.text() != key:
+                kl.setText(key)
+
 class MainWindow(QtWidgets.QMainWindow):
     # --- ENV 연동: 환경설정 창 열기(필수) ---
     def _open_env_settings_window_fallback(self):
@@ -3604,7 +4752,7 @@ class MainWindow(QtWidgets.QMainWindow):
         try:
             embedded_path = os.path.join(base_dir, "_env_hotkey_embedded.py")
             if not os.path.exists(embedded_path) or os.path.getsize(embedded_path) < 1024:
-                src = getattr(self, "_EMBEDDED_ENV_SOURCE", "")
+                src = _embedded_env_source()
                 if not src:
                     raise RuntimeError("내장 ENV 소스(_EMBEDDED_ENV_SOURCE)가 없습니다.")
                 with open(embedded_path, "w", encoding="utf-8") as f:
@@ -3759,6 +4907,8 @@ class MainWindow(QtWidgets.QMainWindow):
             tip = f"ENV: {env_tag}\nHK: {hk_tag}"
             if hasattr(self,'btnRefreshTop') and self.btnRefreshTop:
                 self.btnRefreshTop.setToolTip(tip)
+            self.env_watcher.watch("env", env_p)
+            self.env_watcher.watch("hk", hk_p)
         except Exception:
             pass
 
@@ -4103,15 +5253,7 @@ class MainWindow(QtWidgets.QMainWindow):
             total_ms = 0
 
         remain_ms = max(0, total_ms - cur_ms)
-        remain_sec = remain_ms // 1000  # 화면에 보이는 남은 시간(초) 기준
-
-        # === 자동 다음파일 넘어가기 (표시 남은시간이 0초이고, 실제로도 0.8초 이내일 때만) ===
-        try:
-            if remain_sec == 0 and remain_ms <= 800 and hasattr(self, "next_video"):
-                self.next_video()
-                return
-        except Exception:
-            pass
+        # 자동 다음 파일 전환은 mpv 플레이리스트(playlistAdvanced)와 mediaEnded 에서만 처리합니다.
 
         # 시간 라벨
         try:
@@ -4119,19 +5261,31 @@ class MainWindow(QtWidgets.QMainWindow):
         except Exception:
             pass
 
-        # 슬라이더 (0~1000 구간)
+        # 슬라이더 (0~1000 구간) — 실제 반영은 프레임당 한 번(ui_refresh)
         try:
             if hasattr(self, "slider") and total_ms > 0:
                 frac = max(0.0, min(1.0, cur_ms / float(total_ms)))
                 val = int(round(frac * (self.slider.maximum() - self.slider.minimum()))) + self.slider.minimum()
-                # 드래그 중에는 강제 이동하지 않도록 (필요 시 SeekSlider에 _dragging 플래그 사용)
-                if not getattr(self.slider, "_dragging", False):
-                    self.slider.blockSignals(True)
-                    self.slider.setValue(val)
-                    self.slider.blockSignals(False)
+                self.ui_refresh.mark("slider", val)
         except Exception:
             pass
 
+    def _apply_slider_value(self, val: int):
+        """ui_refresh 적용기: 드래그/시크 중에는 건너뛰고, 위젯 값과 다를 때만 setValue."""
+        sl = getattr(self, "slider", None)
+        if sl is None or getattr(self, "_seeking", False) or sl.isSliderDown() or getattr(sl, "_dragging", False):
+            return
+        if sl.value() != val:
+            sl.blockSignals(True)
+            sl.setValue(val)
+            sl.blockSignals(False)
+
+    def _apply_time_text(self, text: str):
+        lbl = getattr(self, "playTimeLbl", None)
+        if lbl is None:
+            return False
+        lbl.setText(text)
+
 
     def _apply_toggle_style(self, btn, checked: bool):
         try:
@@ -4522,6 +5676,24 @@ class MainWindow(QtWidgets.QMainWindow):
             self.slider.setMarkers(start_frac, pause_frac)
         except Exception:
             pass
+        try:
+            self._update_event_density()
+        except Exception:
+            pass
+
+    def _update_event_density(self):
+        """현재 파일의 계수 밀도 띠 갱신 — 색인/파일/길이/폭이 바뀐 경우에만 다시 계산."""
+        sl = getattr(self, "slider", None)
+        if sl is None or not hasattr(sl, "setEventDensity"):
+            return
+        idx = self.journal.index
+        L = int(self.video.length_ms() or 0)
+        nb = sl.densityBuckets()
+        key = (idx.version, self.current_file, L, nb)
+        if key == getattr(self, "_density_key", None):
+            return
+        self._density_key = key
+        sl.setEventDensity(idx.density(self.current_file, L, nb) if L > 0 else None)
 
 
     def _recalc_carry_on_origin(self):
@@ -4625,70 +5797,6 @@ class MainWindow(QtWidgets.QMainWindow):
         return
 
 
-    def _make_group_page(self, a:int, b:int, c:int) -> QtWidgets.QWidget:
-        """Create a 3-column (1:1:1) fixed grid page for a direction group.
-        Compress-left: only active directions are placed from the left columns; remaining columns are placeholders.
-        """
-        page = QtWidgets.QWidget()
-        grid = QtWidgets.QGridLayout(page)
-        sc = getattr(self, 'panel_scale', 0.70)
-        m = max(1, int(6 * sc))
-        s = max(1, int(6 * sc))
-        grid.setContentsMargins(m, m, m, m)
-        grid.setHorizontalSpacing(s)
-        grid.setVerticalSpacing(s)
-        enabled = set(self.get_enabled_indices())
-        triplet = (a, b, c)
-        active = [d for d in triplet if (d in enabled) and (d < len(self.cfg.directions))]
-        for col in range(3):
-            grid.setColumnStretch(col, 1)
-            if col < len(active):
-                didx = active[col]
-                try:
-                    grid.addWidget(self.build_dir_panel(didx), 0, col)
-                except Exception:
-                    ph = QtWidgets.QWidget()
-                    ph.setSizePolicy(QtWidgets.QSizePolicy.Policy.Expanding,
-                                     QtWidgets.QSizePolicy.Policy.MinimumExpanding)
-                    grid.addWidget(ph, 0, col)
-            else:
-                ph = QtWidgets.QWidget()
-                ph.setSizePolicy(QtWidgets.QSizePolicy.Policy.Expanding,
-                                 QtWidgets.QSizePolicy.Policy.MinimumExpanding)
-                grid.addWidget(ph, 0, col)
-        return page
-
-
-
-    
-
-    class _HeaderlessTabWidget(QtWidgets.QTabWidget):
-        def __init__(self, *args, **kwargs):
-            super().__init__(*args, **kwargs)
-            self._bar = QtWidgets.QTabBar(parent=self)
-            self._bar.setVisible(False)
-            self._bar.setFixedHeight(0)
-            self._bar.setExpanding(False)
-            super().setTabBar(self._bar)
-            self._apply_no_header_style()
-
-        def setTabBar(self, bar: QtWidgets.QTabBar) -> None:
-            super().setTabBar(self._bar)
-            self._apply_no_header_style()
-
-        def _apply_no_header_style(self):
-            self.setStyleSheet(
-                "QTabBar { height:0px; margin:0; padding:0; }QTabBar::tab { height:0px; width:0px; margin:0; padding:0; border:0; }"
-            )
-
-
-    class _NullTabBar(QtWidgets.QTabBar):
-        def addTab(self, *args, **kwargs): return -1
-        def setCurrentIndex(self, *args, **kwargs): pass
-        def count(self): return 0
-
-
-
     def _sync_group_tabs(self):
         """Mirror QTabWidget's tabs into the compact QTabBar placed next to slotCombo."""
         try:
@@ -4717,93 +5825,11 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def open_direction_settings(self):
         """방향 설정 다이얼로그 후, 활성 방향만 포함하는 탭을 다시 구성."""
-        # 1~30 방향을 3개씩 그룹 (1-3, 4-6, ...)
-        groups = [(i, i+1, i+2) for i in range(0, 30, 3)]
-
         dlg = DirectionSettingsDialog(self, cfg=self.cfg)
         if dlg.exec() != QtWidgets.QDialog.DialogCode.Accepted:
             return
-
-        # 기존 탭 제거
-        try:
-            self.tab.setParent(None)
-        except Exception:
-            pass
-
-        # 패널 캐시 초기화
-        self.panel_btns = {}
-        self.panel_lbls = {}
-        self.shortcut_lbls = {}
-
-        # 새 헤더 없는 탭 위젯 생성
-        self.tab = self._HeaderlessTabWidget()
-
-        max_dirs = min(30, len(self.cfg.directions))
-        enabled = set(self.get_enabled_indices())
-
-        # 탭별 활성 방향 인덱스 매핑 초기화
-        self.group_tab_mapping = []
-
-        # 그룹별로, 활성 방향이 하나라도 있는 경우에만 탭 생성
-        for a, b, c in groups:
-            enabled_in_group = [d for d in (a, b, c) if d in enabled and d < max_dirs]
-            if not enabled_in_group:
-                continue
-            page = self._make_group_page(a, b, c)
-            lbl = " - ".join(str(i + 1) for i in enabled_in_group)
-            self.tab.addTab(page, lbl)
-            # 이 탭에 속한 실제 방향 인덱스 기억
-            self.group_tab_mapping.append(list(enabled_in_group))
-
-        # 레이아웃에 다시 붙이기
-        try:
-            self.left_layout.addWidget(self.tab)
-        except Exception:
-            try:
-                self.centralWidget().layout().addWidget(self.tab)
-            except Exception:
-                pass
-
-        # groupTabs 동기화
-        try:
-            self._sync_group_tabs()
-        except Exception:
-            pass
-
-        # 활성 방향을 첫 번째 활성 방향으로 재설정
-        self.active_dir_index = self.first_enabled()
-        self.refresh_all_quick_counts()
-        self.update_active_highlight()
-
-        # 오른쪽 버튼들의 중복 연결 해제 후 다시 연결
-        try:
-            self.btnSheet.clicked.disconnect()
-        except Exception:
-            pass
-        try:
-            self.btnExcel.clicked.disconnect()
-        except Exception:
-            pass
-        try:
-            self.btnReset.clicked.disconnect()
-        except Exception:
-            pass
-
-        self.btnExcel.clicked.connect(
-            self.save_xlsx,
-            getattr(QtCore.Qt, "ConnectionType", QtCore.Qt).UniqueConnection,
-        )
-        self.btnSheet.clicked.connect(
-            self.open_sheet,
-            getattr(QtCore.Qt, "ConnectionType", QtCore.Qt).UniqueConnection,
-        )
-        self.btnReset.clicked.connect(
-            self.clear_current_counts,
-            getattr(QtCore.Qt, "ConnectionType", QtCore.Qt).UniqueConnection,
-        )
-
-        # 테마 재적용
-        self.apply_fluent_dark()
+        # 1~30 방향을 3개씩 그룹 (1-3, 4-6, ...) — 바뀐 방향/그룹만 생성·삭제
+        self.rebuild_panels_after_change()
 
     def _apply_initial_constraints(self):
         """초기 실행 시 분할기 크기 제약을 한 번 적용합니다."""
@@ -5085,12 +6111,8 @@ class MainWindow(QtWidgets.QMainWindow):
             pass
 
     
-    def apply_fluent_dark(self):
-        """화면 스타일(일반 / 다크)에 따라 전체 스타일을 적용합니다."""
-        mode = getattr(self, "theme_mode", "light")
-        if mode not in ("light", "dark"):
-            mode = "light"
-
+    def _compile_theme_css(self, mode: str):
+        """모드별 창 전체 스타일시트 문자열과 배경색을 조립합니다(캐시는 _theme_stylesheet)."""
         # 다크 모드 팔레트: 남색이 아닌 다크 그레이 계열
         if mode == "dark":
             base = "#212121"
@@ -5117,7 +6139,7 @@ class MainWindow(QtWidgets.QMainWindow):
             input_bg = "#ffffff"
 
         base_pt = self.F(10.5)
-        self.setStyleSheet(f"""
+        css = f"""
             QWidget {{
                 background:{base};
                 color:{text};
@@ -5184,7 +6206,39 @@ class MainWindow(QtWidgets.QMainWindow):
                 background:{hover};
                 color:{text};
             }}
-        """)
+            QGroupBox[dirPanel="true"] {{
+                border:1px solid #666;
+                padding-top:16px;
+            }}
+            QGroupBox[dirPanel="true"][activeDir="true"] {{
+                border:2px solid #2b7cff;
+                font-weight:600;
+            }}
+        """
+        return css, base
+
+    def _theme_stylesheet(self, mode: str):
+        """(css, base) — 모드/배율별로 한 번만 조립해 재사용."""
+        cache = self.__dict__.setdefault("_theme_css_cache", {})
+        key = (mode, self.ui_scale)
+        if key not in cache:
+            cache[key] = self._compile_theme_css(mode)
+        return cache[key]
+
+    def apply_fluent_dark(self, force: bool = False):
+        """화면 스타일(일반 / 다크)에 따라 전체 스타일을 적용합니다.
+        이미 같은 모드/배율로 적용돼 있으면 아무 것도 하지 않습니다(전체 re-polish 방지).
+        방향 강조 등 상태별 모양은 동적 속성 + 위 스타일시트의 속성 선택자로 처리합니다."""
+        mode = getattr(self, "theme_mode", "light")
+        if mode not in ("light", "dark"):
+            mode = "light"
+        key = (mode, self.ui_scale, id(getattr(self, "fileList", None)))
+        if not force and getattr(self, "_theme_applied_key", None) == key:
+            return
+        self._theme_applied_key = key
+
+        css, base = self._theme_stylesheet(mode)
+        self.setStyleSheet(css)
         
         # 개별 위젯(특히 우측 폴더 목록)의 텍스트 색을 모드에 맞게 조정
         try:
@@ -5237,8 +6291,8 @@ class MainWindow(QtWidgets.QMainWindow):
         if mode not in ("light", "dark"):
             mode = "light"
         self.theme_mode = mode
-        # 실제 스타일 재적용
-        self.apply_fluent_dark()
+        # 실제 스타일 재적용 (모드 전환 시에만 창 스타일시트를 바꿈)
+        self.apply_fluent_dark(force=True)
         # 토글 UI 동기화
         self._update_theme_toggle_ui()
 
@@ -5335,12 +6389,28 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self.setWindowTitle(f"{APP_NAME} - {user['username']} ({user['role']})")
         self.cfg=ProjectConfig();
+        # 재생 관련 위젯 갱신은 프레임 단위로 병합 (라벨 텍스트/슬라이더 값/마커)
+        self.ui_refresh = UiRefreshScheduler(self)
+        self.ui_refresh.register("time_text", self._apply_time_text)
+        self.ui_refresh.register("slider", self._apply_slider_value, compare=False)
+        self.ui_refresh.register("markers", lambda: (self._recalc_carry_on_origin(), self._update_markers_for_current_file()))
+        # NAS 영상 스테이징 캐시 (다음 N개 파일을 로컬로 미리 복사)
+        self.clip_cache = ClipStagingCache()
+        # env/hotkeys/site JSON 변경 감시 (관리자가 저장하면 새로고침 없이 반영)
+        self.env_watcher = EnvFileWatcher(self)
+        self.env_watcher.fileReloaded.connect(self._on_env_file_reloaded)
         # normalize hotkeys for up to 30 directions
         if not hasattr(self.cfg, "dir_hotkeys") or len(self.cfg.dir_hotkeys) < 30:
             base = getattr(self.cfg, "dir_hotkeys", [[str(i+1) for i in range(6)]])
             needed = 30 - len(base)
             self.cfg.dir_hotkeys = base + [base[0][:] for _ in range(max(0, needed))]
         self.counts=CountTable(self.cfg.directions, self.cfg.vehicle_types)
+        # 계수 이벤트 저널 (undo/redo + logs 재생 복원). 세션 id 로 logs 행을 묶습니다.
+        self.journal=CountEventLog(self.counts)
+        self._count_lbl_bind={}
+        self._wire_count_cells()
+        self.journal_session=f"{time.strftime('%Y%m%d_%H%M%S')}_{user.get('id')}"
+        self._journal_last_log_id=0
         self.current_file: Optional[str]=None; self.current_folder: Optional[Path]=None
         self.current_slot_start:int = self.cfg.active_windows[0][0] if self.cfg.active_windows else 0
         self.active_dir_index:int=0
@@ -5372,6 +6442,12 @@ class MainWindow(QtWidgets.QMainWindow):
         self.siteCombo.setPlaceholderText("지점")
         self.siteCombo.setFixedWidth(self.S(220))
 
+        # 빠른 찾기: 과업명·SN·발주처·기간·지번·지점명·작업번호 (접두어/초성)
+        self.quickFind = QtWidgets.QLineEdit()
+        self.quickFind.setPlaceholderText("빠른 찾기 (과업·지점·작업번호·초성)")
+        self.quickFind.setClearButtonEnabled(True)
+        self.quickFind.setFixedWidth(self.S(240))
+
         self.btnEnvSettings = QtWidgets.QToolButton()
         self.btnEnvSettings.setText("⚙")
         self.btnEnvSettings.setToolTip("환경설정 열기")
@@ -5387,6 +6463,7 @@ class MainWindow(QtWidgets.QMainWindow):
         topbar.addWidget(self.btnRefreshTop)
         topbar.addWidget(self.projectCombo)
         topbar.addWidget(self.siteCombo)
+        topbar.addWidget(self.quickFind)
         topbar.addStretch(1)
         topbar.addWidget(self.btnEnvSettings)
         if theme_widget is not None:
@@ -5398,6 +6475,10 @@ class MainWindow(QtWidgets.QMainWindow):
         self.btnRefreshTop.clicked.connect(self.open_env_hotkeys_db)
         self.projectCombo.currentIndexChanged.connect(self._on_env_project_changed)
         self.siteCombo.currentIndexChanged.connect(self._on_env_site_changed)
+        try:
+            self._setup_quick_find()
+        except Exception as e:
+            dlog(f"[FIND] setup failed: {e}")
         # 안전장치: 메서드가 누락된 경우 대비(과거 버전/병합 오류 방지)
         if not hasattr(self, 'open_env_settings_window'):
             self.open_env_settings_window = self._open_env_settings_window_fallback
@@ -5437,7 +6518,7 @@ class MainWindow(QtWidgets.QMainWindow):
                         if not L or L <= 0:
                             pos = self.video.get_position()
                             # pos만으로는 총길이를 알 수 없으므로, 0일 때는 현재시간만 표시
-                            self.playTimeLbl.setText(f"{self.ms_to_hms(cur)} / 00:00:00")
+                            self.ui_refresh.mark("time_text", f"{self.ms_to_hms(cur)} / 00:00:00")
                         else:
                             self.update_time_labels(cur, max(0, L-cur))
                     except Exception:
@@ -5483,6 +6564,8 @@ QSlider::handle:horizontal { width:12px; height:12px; margin:-4px 0; border-radi
 # [배속/재생시간] [슬라이더] 가로 한 줄
         seekRow = QtWidgets.QHBoxLayout()
         seekRow.addWidget(self.rateLbl)
+        self._rate_stats_timer = QtCore.QTimer(self); self._rate_stats_timer.setInterval(1000)
+        self._rate_stats_timer.timeout.connect(self._update_rate_stats); self._rate_stats_timer.start()
         seekRow.addSpacing(8)
         seekRow.addWidget(self.playTimeLbl)
         seekRow.addSpacing(12)
@@ -5769,19 +6852,19 @@ QSlider::handle:horizontal { width:12px; height:12px; margin:-4px 0; border-radi
         try:
             if not hasattr(self, "_auto_pause_tick"):
                 self._auto_pause_tick = QtCore.QTimer(self); self._auto_pause_tick.setInterval(200)
-                self._auto_pause_tick.timeout.connect(lambda: (self._recalc_carry_on_origin(), self._update_markers_for_current_file(), self._carry_supervisor_tick()))
+                self._auto_pause_tick.timeout.connect(lambda: (self.ui_refresh.mark("markers"), self._carry_supervisor_tick()))
                 self._auto_pause_tick.start()
         except Exception: pass
 
         # video hooks
         try:
-            self.video.timeChanged.connect(lambda _ms: (self._recalc_carry_on_origin(), self._update_markers_for_current_file()))
+            self.video.timeChanged.connect(lambda _ms: self.ui_refresh.mark("markers"))
         except Exception: pass
 
         # at media end: compute initial carry (origin) then apply across files
-        def _media_end_carry_handler_v11():
+        def _media_end_carry_handler_v11(L_ms: int = 0):
             if not (self.auto_pause_enabled and self.auto_pause_interval_ms): return
-            cur_idx = self.current_file_index(); L = self._len_ms()
+            cur_idx = self.current_file_index(); L = int(L_ms) if L_ms else self._len_ms()
             if self.break_origin_index is not None and cur_idx == self.break_origin_index and self.break_start_ms is not None:
                 self._origin_closed = True
                 start = int(self.break_start_ms or 0)
@@ -5792,11 +6875,17 @@ QSlider::handle:horizontal { width:12px; height:12px; margin:-4px 0; border-radi
             # On every file end AFTER origin, deduct the file length from the remaining carry,
             # but only if we haven't already done so (origin handled separately at start above).
             if self.break_origin_index is not None and cur_idx > self.break_origin_index:
-                L_end = self._len_ms()
+                L_end = L
                 if L_end > 0:
                     self._carry_remain_ms = max(0, rem - L_end)
+        self._carry_on_media_end = _media_end_carry_handler_v11
+        try:
+            self.video.mediaEnded.connect(lambda: _media_end_carry_handler_v11())
+        except Exception: pass
+        # 자동 다음 재생: mpv 플레이리스트 전환/예약
         try:
-            self.video.mediaEnded.connect(_media_end_carry_handler_v11)
+            self.video.playlistAdvanced.connect(self._on_playlist_advanced)
+            self.chkAutonext.toggled.connect(lambda _on: self._queue_next_clip())
         except Exception: pass
 
 
@@ -5879,20 +6968,11 @@ QSlider::handle:horizontal { width:12px; height:12px; margin:-4px 0; border-radi
                 self.tab.tabBar().raise_()
         except Exception:
             pass
-        self.panel_btns={}; self.panel_lbls={}; self.shortcut_lbls={}
-        # 탭별 활성 방향 인덱스 매핑 초기화
-        self.group_tab_mapping = []
-        groups=[(i,i+1,i+2,f"{i+1}-{i+2}-{i+3}") for i in range(0,30,3)]
-        for a,b,c,t in groups:
-            # create tab only if any enabled direction in this group
-            enabled_in_group = [d for d in (a,b,c) if d in self.get_enabled_indices() and d < len(self.cfg.directions)]
-            if not enabled_in_group:
-                continue
-            page = self._make_group_page(a, b, c)
-            lbl = " - ".join(str(i+1) for i in enabled_in_group)
-            self.tab.addTab(page, lbl)
-            # 이 탭에서 사용할 실제 방향 인덱스 목록 저장
-            self.group_tab_mapping.append(list(enabled_in_group))
+        self.panel_btns={}; self.panel_lbls={}; self.shortcut_lbls={}; self.panel_boxes={}; self.panel_cells={}
+        # 방향 패널/그룹 탭은 DirPanelManager 가 생성하고, 이후 설정 변경 시 증분 갱신
+        # (group_tab_mapping: 탭별 활성 방향 인덱스 목록도 함께 설정)
+        self.panel_mgr = DirPanelManager(self)
+        self.panel_mgr.sync()
 
         self._sync_group_tabs()
 
@@ -5975,7 +7055,7 @@ QSlider::handle:horizontal { width:12px; height:12px; margin:-4px 0; border-radi
         def _on_video_position(p: float):
             if not self._seeking:
                 try:
-                    self.slider.setValue(int(p * 1000))
+                    self.ui_refresh.mark("slider", int(p * 1000))
                 except Exception:
                     pass
         self.video.positionChanged.connect(_on_video_position)
@@ -6036,127 +7116,181 @@ QSlider::handle:horizontal { width:12px; height:12px; margin:-4px 0; border-radi
             dlog(f"build_dir_panel didx={didx+1} title={self.cfg.directions[didx]} hotkeys={self.cfg.dir_hotkeys[didx]}")
         title=self.cfg.directions[didx]
         gb=QtWidgets.QGroupBox(title); gb.setProperty("dirIndex", didx)
+        # 강조 표시는 동적 속성으로 (테마 스타일시트의 QGroupBox[dirPanel][activeDir] 규칙)
+        gb.setProperty("dirPanel", True); gb.setProperty("activeDir", didx == getattr(self, "active_dir_index", -1))
+        if not hasattr(self, "panel_boxes"): self.panel_boxes = {}
+        if not hasattr(self, "panel_cells"): self.panel_cells = {}
+        self.panel_boxes[didx] = gb
         v=QtWidgets.QVBoxLayout(gb); grid=QtWidgets.QGridLayout(); v.addLayout(grid)
-        # 그룹박스 제목과 내용 사이 여백/간격 축소
-        v.setContentsMargins(4, 4, 4, 4)
-        v.setSpacing(2)
-
-        self.panel_btns[didx]=[]; self.panel_lbls[didx]=[]; self.shortcut_lbls[didx]=[]
-        vc = self.cfg.vehicle_count()
-        for i,veh in enumerate(self.cfg.vehicle_types[:vc]):
-            nameLbl=QtWidgets.QLabel(veh); nameLbl.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter); nameLbl.setMinimumHeight(18)
-            cntLbl=QtWidgets.QLabel("0"); cntLbl.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter); cntLbl.setMinimumHeight(18); cntLbl.setStyleSheet("font-weight:600;")
-            keyLbl=QtWidgets.QLabel(self.cfg.dir_hotkeys[didx][i]); keyLbl.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter); keyLbl.setMinimumHeight(18); keyLbl.setStyleSheet("color:#111; background:#eef2f8; border:1px solid #cfd4dc; border-radius:6px; padding:2px 6px; font-weight:600;")
-            btn=QtWidgets.QToolButton(); btn.setText(veh); btn.setToolButtonStyle(QtCore.Qt.ToolButtonStyle.ToolButtonTextOnly)
-
-
-            # === 70% scale & count emphasis ===
-
-            sc = getattr(self, "panel_scale", 0.70)
-
-            _base_lbl_h = 18
-
-            _base_btn_h = 28
-
-            _base_font_pt = 10
-
-            _base_cnt_pt  = 11
-
-
-            lbl_h = max(10, int(_base_lbl_h * sc))
-
-            btn_h = max(16, int(_base_btn_h * sc))
-
-            pt    = max(7,  int(round(_base_font_pt * sc)))
-
-            cntpt = max(pt, int(round(_base_cnt_pt  * sc * 1.15)))  # emphasize count label
-
-
-            # fonts
-
-            _f_base = nameLbl.font(); _f_base.setPointSize(pt)
-
-            _f_cnt  = QtGui.QFont(_f_base); _f_cnt.setPointSize(cntpt); _f_cnt.setBold(True)
-
-
-            nameLbl.setMinimumHeight(lbl_h); nameLbl.setFont(_f_base)
-
-            cntLbl.setMinimumHeight(lbl_h);  cntLbl.setFont(_f_cnt)
-
-            cntLbl.setStyleSheet(
-
-                "font-weight:800; color:#111; background:#fff7cc;"
-
-                "border:1px solid #e6c558; border-radius:6px; padding:1px 4px;"
-
-            )
-
-            keyLbl.setMinimumHeight(lbl_h);  keyLbl.setFont(_f_base)
-
-            _pad_x =  max(2, int(6 * sc)); _pad_y =  max(1, int(2 * sc))
-
-            keyLbl.setStyleSheet(
+        # 그룹박스 제목과 내용 사이 여백/간격 축소
+        v.setContentsMargins(4, 4, 4, 4)
+        v.setSpacing(2)
 
-                f"color:#111; background:#eef2f8; border:1px solid #cfd4dc;"
+        self.panel_btns[didx]=[]; self.panel_lbls[didx]=[]; self.shortcut_lbls[didx]=[]
+        # 셀 구조(차종명 라벨/프레임)는 DirPanelManager 가 증분 갱신할 때 사용
+        self.panel_cells[didx]={"grid": grid, "frames": [], "names": []}
+        vc = self.cfg.vehicle_count()
+        keys = self.cfg.dir_hotkeys[didx] if didx < len(self.cfg.dir_hotkeys) else []
+        for i,veh in enumerate(self.cfg.vehicle_types[:vc]):
+            self._add_vehicle_cell(didx, i, veh, keys[i] if i < len(keys) else "")
+        gb.mousePressEvent = lambda e, dd=didx: self.set_active_dir(dd) or QtWidgets.QGroupBox.mousePressEvent(gb, e)
+        return gb
 
-                f"border-radius:6px; padding:{_pad_y}px {_pad_x}px; font-weight:600;"
+    def _add_vehicle_cell(self, didx:int, i:int, veh:str, key:str):
+        """방향 패널에 차종 셀(이름/계수/단축키) 하나를 i 번째 열로 추가."""
+        cells = self.panel_cells[didx]; grid = cells["grid"]
+        nameLbl=QtWidgets.QLabel(veh); nameLbl.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter); nameLbl.setMinimumHeight(18)
+        cntLbl=QtWidgets.QLabel("0"); cntLbl.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter); cntLbl.setMinimumHeight(18); cntLbl.setStyleSheet("font-weight:600;")
+        keyLbl=QtWidgets.QLabel(key); keyLbl.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter); keyLbl.setMinimumHeight(18); keyLbl.setStyleSheet("color:#111; background:#eef2f8; border:1px solid #cfd4dc; border-radius:6px; padding:2px 6px; font-weight:600;")
+        btn=QtWidgets.QToolButton(); btn.setText(veh); btn.setToolButtonStyle(QtCore.Qt.ToolButtonStyle.ToolButtonTextOnly)
 
-            )
+        # === 70% scale & count emphasis ===
+        sc = getattr(self, "panel_scale", 0.70)
+        _base_lbl_h = 18
+        _base_btn_h = 28
+        _base_font_pt = 10
+        _base_cnt_pt  = 11
+
+        lbl_h = max(10, int(_base_lbl_h * sc))
+        btn_h = max(16, int(_base_btn_h * sc))
+        pt    = max(7,  int(round(_base_font_pt * sc)))
+        cntpt = max(pt, int(round(_base_cnt_pt  * sc * 1.15)))  # emphasize count label
+
+        # fonts
+        _f_base = nameLbl.font(); _f_base.setPointSize(pt)
+        _f_cnt  = QtGui.QFont(_f_base); _f_cnt.setPointSize(cntpt); _f_cnt.setBold(True)
+
+        nameLbl.setMinimumHeight(lbl_h); nameLbl.setFont(_f_base)
+        cntLbl.setMinimumHeight(lbl_h);  cntLbl.setFont(_f_cnt)
+        cntLbl.setStyleSheet(
+            "font-weight:800; color:#111; background:#fff7cc;"
+            "border:1px solid #e6c558; border-radius:6px; padding:1px 4px;"
+        )
+        keyLbl.setMinimumHeight(lbl_h);  keyLbl.setFont(_f_base)
+        _pad_x =  max(2, int(6 * sc)); _pad_y =  max(1, int(2 * sc))
+        keyLbl.setStyleSheet(
+            f"color:#111; background:#eef2f8; border:1px solid #cfd4dc;"
+            f"border-radius:6px; padding:{_pad_y}px {_pad_x}px; font-weight:600;"
+        )
 
-            btn.setFixedHeight(btn_h)
-
-            _bf = btn.font(); _bf.setPointSize(pt); btn.setFont(_bf)
-            btn.clicked.connect(lambda _,ii=i,dd=didx: self.quick_add(dd, ii))
-            frame=QtWidgets.QFrame(); fl=QtWidgets.QVBoxLayout(frame); fl.setContentsMargins(2,2,2,2); fl.setSpacing(2)
-            _pad_i = max(1, int(2 * getattr(self, 'panel_scale', 0.70)))
-            fl.setContentsMargins(_pad_i, _pad_i, _pad_i, _pad_i)
-            fl.setSpacing(_pad_i)
-            fl.addWidget(nameLbl); fl.addWidget(cntLbl); fl.addWidget(keyLbl)
-            grid.addWidget(frame, 0, i, 1, 1)
-            self.panel_btns[didx].append(btn); self.panel_lbls[didx].append(cntLbl); self.shortcut_lbls[didx].append(keyLbl)
-        gb.mousePressEvent = lambda e, dd=didx: self.set_active_dir(dd) or QtWidgets.QGroupBox.mousePressEvent(gb, e)
-        return gb
+        btn.setFixedHeight(btn_h)
+        _bf = btn.font(); _bf.setPointSize(pt); btn.setFont(_bf)
+        btn.clicked.connect(lambda _,ii=i,dd=didx: self.quick_add(dd, ii))
+        frame=QtWidgets.QFrame(); fl=QtWidgets.QVBoxLayout(frame); fl.setContentsMargins(2,2,2,2); fl.setSpacing(2)
+        _pad_i = max(1, int(2 * getattr(self, 'panel_scale', 0.70)))
+        fl.setContentsMargins(_pad_i, _pad_i, _pad_i, _pad_i)
+        fl.setSpacing(_pad_i)
+        fl.addWidget(nameLbl); fl.addWidget(cntLbl); fl.addWidget(keyLbl)
+        grid.addWidget(frame, 0, i, 1, 1)
+        self.panel_btns[didx].append(btn); self.panel_lbls[didx].append(cntLbl); self.shortcut_lbls[didx].append(keyLbl)
+        cells["frames"].append(frame); cells["names"].append(nameLbl)
 
     def update_active_highlight(self):
-        for didx in range(12):
-            w = next((g for g in self.findChildren(QtWidgets.QGroupBox) if g.property("dirIndex")==didx), None)
-            if not w: continue
-            if didx==self.active_dir_index:
-                w.setStyleSheet("QGroupBox{border:2px solid #2b7cff; padding-top:16px; font-weight:600;}")
-            else:
-                w.setStyleSheet("QGroupBox{border:1px solid #666; padding-top:16px;}")
+        """활성 방향 강조: activeDir 속성이 바뀐 패널만 re-polish (창 전체 재스타일 없음)."""
+        for didx, w in list(getattr(self, "panel_boxes", {}).items()):
+            on = (didx == self.active_dir_index)
+            try:
+                if bool(w.property("activeDir")) == on:
+                    continue
+                w.setProperty("activeDir", on)
+                st = w.style(); st.unpolish(w); st.polish(w); w.update()
+            except RuntimeError:
+                # 이미 삭제된 패널
+                self.panel_boxes.pop(didx, None)
 
     def refresh_quick_counts_for(self, didx:int):
         if didx not in self.panel_lbls:
             return
         idx=self.interval_index(); label=self.current_label(); d=self.cfg.directions[didx]
         self.counts.ensure_interval(idx,label)
+        row=self.counts.table[idx]
         vc = self.cfg.vehicle_count()
         for i,veh in enumerate(self.cfg.vehicle_types[:vc]):
-            n=self.counts.table[idx].get((d,veh),0)
             if i < len(self.panel_lbls[didx]):
-                self.panel_lbls[didx][i].setText(str(n))
+                lbl=self.panel_lbls[didx][i]; t=str(row.get((d,veh),0))
+                if lbl.text()!=t: lbl.setText(t)
+
+    def _bind_count_labels(self):
+        """(방향명, 차종명) -> 계수 라벨 바인딩 재구성 (패널 구성이 바뀐 뒤 호출)."""
+        bind={}
+        vts=self.cfg.vehicle_types[:self.cfg.vehicle_count()]
+        for didx, lbls in self.panel_lbls.items():
+            if didx >= len(self.cfg.directions): continue
+            d=self.cfg.directions[didx]
+            for i, veh in enumerate(vts[:len(lbls)]):
+                bind[(d, veh)]=lbls[i]
+        self._count_lbl_bind=bind
+
+    def _wire_count_cells(self):
+        """CountTable.cellChanged → 라벨 1개 갱신 연결 (counts 교체 시 다시 호출)."""
+        self.counts.cellChanged.connect(self._on_count_cell_changed, getattr(QtCore.Qt, 'ConnectionType', QtCore.Qt).UniqueConnection)
+
+    def _on_count_cell_changed(self, idx:int, d:str, v:str, n:int):
+        """셀 하나가 바뀌면 현재 시간대에 보이는 해당 라벨 하나만 갱신."""
+        if idx != self.interval_index():
+            return
+        lbl=getattr(self, "_count_lbl_bind", {}).get((d, v))
+        if lbl is not None:
+            t=str(n)
+            if lbl.text()!=t: lbl.setText(t)
 
     def refresh_all_quick_counts(self):
-        for didx in self.get_enabled_indices():
-            if didx in self.panel_lbls: self.refresh_quick_counts_for(didx)
-
-    def quick_add(self, didx:int, veh_index:int, delta:int=+1):
+        """시간대 전환/복원/패널 재구성 시: 새 시간대 행을 한 번 읽고 글자가 다른 라벨만 setText."""
+        if not self._count_lbl_bind:
+            self._bind_count_labels()
+        idx=self.interval_index(); self.counts.ensure_interval(idx, self.current_label())
+        row=self.counts.table[idx]
+        for (d, veh), lbl in self._count_lbl_bind.items():
+            t=str(row.get((d, veh), 0))
+            if lbl.text()!=t: lbl.setText(t)
+
+    def quick_add(self, didx:int, veh_index:int, delta:int=+1, key:str=""):
         d=self.cfg.directions[didx]; v=self.cfg.vehicle_types[veh_index]
         idx=self.interval_index(); label=self.current_label()
-        self.counts.inc(idx,label,d,v,delta); log_event(self.user["id"], self.current_file or "", self.video.get_time_ms(), idx, d, v, delta)
-        self.refresh_quick_counts_for(didx)
+        ev=self.journal.record(idx, label, d, v, delta, key=key, video_path=self.current_file or "", video_ms=self.video.get_time_ms())
+        if ev is not None:
+            ev.log_id=self._log_count_event(ev, ev.delta, key)
+        # 라벨은 CountTable.cellChanged → _on_count_cell_changed 가 해당 칸만 갱신
+
+    def _log_count_event(self, ev:"CountEvent", delta:int, key:str="")->int:
+        """저널 이벤트를 logs 테이블에 한 행으로 남기고 logs.id 를 돌려줍니다."""
+        try:
+            rid=log_event(self.user["id"], ev.video_path, ev.video_ms, ev.slot_idx, ev.direction, ev.vehicle, delta,
+                          hotkey=key, session_id=self.journal_session)
+            self._journal_last_log_id=max(getattr(self, "_journal_last_log_id", 0), rid)
+            return rid
+        except Exception as e:
+            dlog(f"log_event failed: {e}")
+            return 0
+
+    def undo_count(self):
+        """마지막 계수(리셋은 한 묶음)를 되돌립니다. logs 에는 보정 행(-delta)을 남깁니다."""
+        evs=self.journal.undo()
+        for ev in evs:
+            self._log_count_event(ev, -ev.delta, "undo")
+
+    def redo_count(self):
+        evs=self.journal.redo()
+        for ev in evs:
+            self._log_count_event(ev, ev.delta, "redo")
 
     # clear / sheet / windows
     def clear_current_counts(self):
         # 리셋: 현재 선택된 방향(활성 방향)만 초기화 — 현재 시간대 한정
+        # 셀별 -n 이벤트를 하나의 batch 로 남겨 Ctrl+Z 한 번에 되돌릴 수 있게 함
         idx = self.interval_index(); label = self.current_label()
         self.counts.ensure_interval(idx, label)
         d = self.cfg.directions[self.active_dir_index]
+        batch = self.journal.new_batch()
+        vpath = self.current_file or ""; vms = self.video.get_time_ms()
         for v in self.cfg.vehicle_types[:6]:
-            self.counts.table[idx][(d, v)] = 0
+            n = self.counts.table[idx].get((d, v), 0)
+            if not n:
+                continue
+            ev = self.journal.record(idx, label, d, v, -n, key="reset", video_path=vpath, video_ms=vms, batch=batch)
+            if ev is not None:
+                ev.log_id = self._log_count_event(ev, ev.delta, "reset")
         self.counts.changed.emit()
-        self.refresh_quick_counts_for(self.active_dir_index)
 
     def open_sheet(self):
         try:
@@ -6206,6 +7340,8 @@ QSlider::handle:horizontal { width:12px; height:12px; margin:-4px 0; border-radi
                     if v in self.cfg.vehicle_types and d in self.cfg.directions:
                         new_counts.table[idx][(d, v)] = c
             self.counts = new_counts
+            self.journal.reset(new_counts)
+            self._wire_count_cells()
             # normalize hotkeys length per direction
             vc = self.cfg.vehicle_count()
             for i in range(len(self.cfg.dir_hotkeys)):
@@ -6216,44 +7352,12 @@ QSlider::handle:horizontal { width:12px; height:12px; margin:-4px 0; border-radi
             self.rebuild_panels_after_change()
         
     def rebuild_panels_after_change(self):
-        # Remove and rebuild tab widget safely
-        self.tab.setParent(None)
-        self.panel_btns = {}
-        self.panel_lbls = {}
-        self.shortcut_lbls = {}
-        self.tab = self._HeaderlessTabWidget()
-        groups=[(i,i+1,i+2,f"{i+1}-{i+2}-{i+3}") for i in range(0,30,3)]
-        for a,b,c,t in groups:
-            enabled_in_group = [d for d in (a,b,c) if d in self.get_enabled_indices() and d < len(self.cfg.directions)]
-            if not enabled_in_group:
-                continue
-            page = self._make_group_page(a, b, c)
-            lbl = " - ".join(str(i+1) for i in enabled_in_group)
-            self.tab.addTab(page, lbl)
-        # insert back
-        self.left_layout.addWidget(self.tab)
+        """설정(방향/차종/단축키) 변경 후 패널·탭 동기화 — 바뀐 부분만 갱신 (DirPanelManager)."""
+        self.panel_mgr.sync()
         self._sync_group_tabs()
         self.active_dir_index = self.first_enabled()
         self.refresh_all_quick_counts(); self.update_active_highlight()
-        # 상태 복원은 초기 실행 시 한 번만 수행 (load_last_state_on_start에서 처리)
-        # wire right actions exactly once (UniqueConnection to prevent duplicates)
-        try:
-            self.btnSheet.clicked.disconnect()
-        except Exception:
-            pass
-        try:
-            self.btnExcel.clicked.disconnect()
-        except Exception:
-            pass
-        try:
-            self.btnReset.clicked.disconnect()
-        except Exception:
-            pass
-        self.btnExcel.clicked.connect(self.save_progress, getattr(QtCore.Qt, 'ConnectionType', QtCore.Qt).UniqueConnection)
-        self.btnSheet.clicked.connect(self.open_sheet, getattr(QtCore.Qt, 'ConnectionType', QtCore.Qt).UniqueConnection)
-        self.btnReset.clicked.connect(self.clear_current_counts, getattr(QtCore.Qt, 'ConnectionType', QtCore.Qt).UniqueConnection)
-        self.apply_fluent_dark()
-        # v9.2 right actions
+        # 새 패널은 창 스타일시트로 자동 polish 되므로 테마 재적용/버튼 재연결 불필요
 
     
     def open_hotkey_settings(self):
@@ -6401,9 +7505,9 @@ QSlider::handle:horizontal { width:12px; height:12px; margin:-4px 0; border-radi
             # VLC로 길이 읽기 (ms 단위, 동기 파싱 시도)
             length_sec = 0.0
             try:
-                inst = getattr(self.video, "instance", None)
+                inst = getattr(self.video, "instance", None) or _vlc_instance()
                 if inst is None:
-                    inst = vlc.Instance()
+                    raise RuntimeError("vlc unavailable")
                 media = inst.media_new(str(p))
                 try:
                     # 가능한 경우 동기 파싱을 먼저 시도
@@ -6440,6 +7544,8 @@ QSlider::handle:horizontal { width:12px; height:12px; margin:-4px 0; border-radi
             self.highlight_current_file()
         except Exception:
             pass
+        # 목록/정렬이 바뀌었으면 예약된 다음 파일도 다시 맞춤
+        self._queue_next_clip()
 
     def play_selected_item(self, it:QtWidgets.QListWidgetItem):
         # ensure markers refresh for new file
@@ -6455,6 +7561,36 @@ QSlider::handle:horizontal { width:12px; height:12px; margin:-4px 0; border-radi
 
     def set_media_and_play(self, path: str):
         """미디어를 설정하고 재생을 시작하며, 현재 재생 파일 라벨/목록을 갱신"""
+        # VLC 미디어 설정 및 재생 (로컬 스테이징 사본이 준비돼 있으면 그것을 엶; current_file 은 원본 경로 유지)
+        self.video.set_media(self._staged_media_path(path), source=path)
+        self.video.play()
+        self._adopt_current_file(path)
+
+    def _on_playlist_advanced(self, path: str, prev_len_ms: int):
+        """mpv 가 플레이리스트 다음 항목으로 이어 재생함: loadfile 없이 현재 파일 상태만 전환."""
+        try:
+            self._carry_on_media_end(prev_len_ms)
+        except Exception:
+            pass
+        self._adopt_current_file(path)
+
+    def _queue_next_clip(self):
+        """자동 다음 재생이 켜져 있으면 목록의 다음 파일을 mpv 플레이리스트에 예약, 꺼져 있으면 예약 취소."""
+        try:
+            nxt = None
+            if self.chkAutonext.isChecked():
+                i = self.current_file_index()
+                if 0 <= i < self.fileList.count() - 1:
+                    nxt = self.fileList.item(i + 1).data(QtCore.Qt.ItemDataRole.UserRole)
+            if nxt:
+                self.video.queue_next(self._staged_media_path(nxt), source=nxt)
+            else:
+                self.video.clear_queue()
+        except Exception as e:
+            dlog(f"queue next clip failed: {e}")
+
+    def _adopt_current_file(self, path: str):
+        """path 를 현재 재생 파일로 반영 (라벨/강조/마커/스테이징/다음 파일 예약)."""
         # 현재 재생 파일 경로 저장
         self.current_file = path
         # 파일명에서 시작 시각(HHMMSS)을 추정하여 방식 C용 기준초로 저장
@@ -6462,10 +7598,7 @@ QSlider::handle:horizontal { width:12px; height:12px; margin:-4px 0; border-radi
             self.current_file_start_sec = self._guess_start_sec_from_filename(path)
         except Exception:
             self.current_file_start_sec = None
-
-        # VLC 미디어 설정 및 재생
-        self.video.set_media(path)
-        self.video.play()
+        self._schedule_clip_prefetch()
 
         # 예약된 carry 일시정지 정보 초기화
         self._carry_sched_file = None
@@ -6499,8 +7632,31 @@ QSlider::handle:horizontal { width:12px; height:12px; margin:-4px 0; border-radi
             self.highlight_current_file()
         except Exception:
             pass
+        self._queue_next_clip()
+        self.ui_refresh.mark("markers")
 
 
+    def _staged_media_path(self, path: str) -> str:
+        """원본 대신 열 경로: 검증된 로컬 사본이 있으면 그 경로, 아니면 원본."""
+        try:
+            local = self.clip_cache.local_path(path)
+            if local:
+                dlog(f"staged clip: {os.path.basename(path)} -> {local}")
+                return local
+        except Exception:
+            pass
+        return path
+
+    def _schedule_clip_prefetch(self):
+        """파일 목록에서 현재 파일 다음 N개를 스테이징 캐시에 예약."""
+        try:
+            i = self.current_file_index()
+            n = self.fileList.count()
+            role = QtCore.Qt.ItemDataRole.UserRole
+            upcoming = [self.fileList.item(j).data(role) for j in range(i + 1, min(n, i + 1 + self.clip_cache.count))] if i >= 0 else []
+            self.clip_cache.schedule(self.current_file, upcoming)
+        except Exception as e:
+            dlog(f"prefetch schedule failed: {e}")
 
     def highlight_current_file(self):
         """현재 재생 중인 파일 행 전체를 파란 배경 + 흰 글자로 강조"""
@@ -6582,12 +7738,7 @@ QSlider::handle:horizontal { width:12px; height:12px; margin:-4px 0; border-radi
 
     # slot/combo
     def rebuild_slot_combo(self, select_start:int=None):
-        items=[]
-        for s,e in sorted(self.cfg.active_windows):
-            t=s
-            while t<e:
-                items.append(t); t += SLOT_SEC
-        items=list(dict.fromkeys(items)) or [0]
+        items=list(self.cfg.layout().slot_starts)
         self.slotCombo.blockSignals(True); self.slotCombo.clear()
         for t in items: self.slotCombo.addItem(slot_label(t), t)
         self.slotCombo.blockSignals(False)
@@ -6851,6 +8002,26 @@ QSlider::handle:horizontal { width:12px; height:12px; margin:-4px 0; border-radi
         except Exception:
             pass
         rate=max(0.25, min(12.0, rate)); self.video.set_rate(rate); self.rateLbl.setText(f"배속: {rate:.2f}x")
+        self._update_rate_stats()
+
+    def _update_rate_stats(self):
+        """1초 주기: 실제 유지 배속이 목표보다 10% 이상 낮으면 라벨에 표시, 툴팁에 드롭 프레임/A-V 어긋남."""
+        try:
+            st = self.video.playback_stats()
+        except Exception:
+            return
+        rate = float(st.get("rate") or 1.0)
+        eff = float(st.get("effective_rate") or 0.0)
+        text = f"배속: {rate:.2f}x"
+        if eff > 0 and rate >= 2.0 and eff < rate * 0.9:
+            text += f" (실제 {eff:.1f}x)"
+        if self.rateLbl.text() != text:
+            self.rateLbl.setText(text)
+        tip = (f"실제 배속: {eff:.2f}x\n버린 프레임: {st.get('dropped', 0)} (디코더 {st.get('decoder_dropped', 0)})\n"
+               f"A-V 어긋남: {float(st.get('avsync') or 0.0):+.3f}s\n출력 fps: {float(st.get('vf_fps') or 0.0):.1f}\n"
+               f"프로파일: {st.get('profile', 0)}")
+        if self.rateLbl.toolTip() != tip:
+            self.rateLbl.setToolTip(tip)
 
     def set_active_dir(self, idx:int):
         if not (0<=idx<len(self.cfg.directions)): return
@@ -6860,26 +8031,8 @@ QSlider::handle:horizontal { width:12px; height:12px; margin:-4px 0; border-radi
             if not enabled: return
             idx = min(enabled, key=lambda x: abs(x-idx))
         self.active_dir_index = idx
+        # 강조 속성만 바꿈 — 버튼 연결은 __init__ 에서 한 번, 테마는 set_theme_mode 에서만 적용
         self.update_active_highlight()
-        # 상태 복원은 초기 실행 시 한 번만 수행 (load_last_state_on_start에서 처리)
-        # wire right actions exactly once (UniqueConnection to prevent duplicates)
-        try:
-            self.btnSheet.clicked.disconnect()
-        except Exception:
-            pass
-        try:
-            self.btnExcel.clicked.disconnect()
-        except Exception:
-            pass
-        try:
-            self.btnReset.clicked.disconnect()
-        except Exception:
-            pass
-        self.btnExcel.clicked.connect(self.save_progress, getattr(QtCore.Qt, 'ConnectionType', QtCore.Qt).UniqueConnection)
-        self.btnSheet.clicked.connect(self.open_sheet, getattr(QtCore.Qt, 'ConnectionType', QtCore.Qt).UniqueConnection)
-        self.btnReset.clicked.connect(self.clear_current_counts, getattr(QtCore.Qt, 'ConnectionType', QtCore.Qt).UniqueConnection)
-        self.apply_fluent_dark()
-        # v9.2 right actions
 
     def move_active_within_group(self, delta:int):
         """Tab / Shift+Tab: 현재 탭 내에서 활성 방향 간 이동.
@@ -6992,6 +8145,10 @@ QSlider::handle:horizontal { width:12px; height:12px; margin:-4px 0; border-radi
             self.hot_shortcuts.append(QtGui.QShortcut(QtGui.QKeySequence(key), self, activated=self.play_next_file))
         for key in ("PageUp","PgUp"):
             self.hot_shortcuts.append(QtGui.QShortcut(QtGui.QKeySequence(key), self, activated=self.play_prev_file))
+        # 계수 되돌리기 / 다시 실행 (이벤트 저널)
+        self.hot_shortcuts.append(QtGui.QShortcut(QtGui.QKeySequence("Ctrl+Z"), self, activated=self.undo_count))
+        for key in ("Ctrl+Y","Ctrl+Shift+Z"):
+            self.hot_shortcuts.append(QtGui.QShortcut(QtGui.QKeySequence(key), self, activated=self.redo_count))
         self.hot_shortcuts.append(QtGui.QShortcut(QtGui.QKeySequence(QtCore.Qt.Key.Key_Up), self, activated=lambda: self.volume_up(+5)))
         self.hot_shortcuts.append(QtGui.QShortcut(QtGui.QKeySequence(QtCore.Qt.Key.Key_Down), self, activated=lambda: self.volume_down(+5)))
         def bind_dir_keys():
@@ -7087,7 +8244,7 @@ QSlider::handle:horizontal { width:12px; height:12px; margin:-4px 0; border-radi
                         except Exception:
                             pass
                     try:
-                        self.quick_add(target_dir, veh_idx, delta)
+                        self.quick_add(target_dir, veh_idx, delta, key=(k if delta > 0 else f"Shift+{k}"))
                     except Exception:
                         pass
                 return _handler
@@ -7106,6 +8263,10 @@ QSlider::handle:horizontal { width:12px; height:12px; margin:-4px 0; border-radi
         bind_dir_keys()
         self.hot_shortcuts.append(QtGui.QShortcut(QtGui.QKeySequence(QtCore.Qt.Key.Key_Left), self, activated=lambda: self.seek_rel(-5000)))
         self.hot_shortcuts.append(QtGui.QShortcut(QtGui.QKeySequence(QtCore.Qt.Key.Key_Right), self, activated=lambda: self.seek_rel(+5000)))
+        # 감사 모드 / 계수 이벤트 이동
+        self.hot_shortcuts.append(QtGui.QShortcut(QtGui.QKeySequence("Ctrl+E"), self, activated=self.toggle_audit_mode))
+        self.hot_shortcuts.append(QtGui.QShortcut(QtGui.QKeySequence("Ctrl+Right"), self, activated=lambda: self.jump_to_event(+1)))
+        self.hot_shortcuts.append(QtGui.QShortcut(QtGui.QKeySequence("Ctrl+Left"), self, activated=lambda: self.jump_to_event(-1)))
         self._refresh_bottom_hotkey_labels()
 
 
@@ -7215,6 +8376,11 @@ QSlider::handle:horizontal { width:12px; height:12px; margin:-4px 0; border-radi
         """
         # 재생 시간 라벨
         self._update_time_label(ms)
+        # 감사 모드: 이벤트 사이 빈 구간 건너뛰기
+        try:
+            self._audit_tick(ms)
+        except Exception:
+            pass
         # 방식 C: 재생 시각 기준으로 계수시간(슬롯) 자동 이동
         try:
             self._update_slot_from_playback_time(ms)
@@ -7223,10 +8389,7 @@ QSlider::handle:horizontal { width:12px; height:12px; margin:-4px 0; border-radi
 
         # 이미 자동정지 후, 사용자가 수동으로 다시 재생할 때까지 대기하는 상태라면
         if getattr(self, "_awaiting_resume", False):
-            try:
-                self._update_markers_for_current_file()
-            except Exception:
-                pass
+            self.ui_refresh.mark("markers")
             return
 
         # --- 자동 멈춤 조건 검사 ---
@@ -7252,20 +8415,18 @@ QSlider::handle:horizontal { width:12px; height:12px; margin:-4px 0; border-radi
             # 계산 중 오류가 나더라도 재생 자체는 계속되도록 보호
             pass
 
-        # 일반적인 경우: 마커만 갱신
-        try:
-            self._update_markers_for_current_file()
-        except Exception:
-            pass
+        # 일반적인 경우: 마커만 갱신 (프레임당 한 번)
+        self.ui_refresh.mark("markers")
 
 
     def update_time_labels(self, cur_ms:int, remain_ms:int):
         total = self.video.length_ms()
         total_txt = self.ms_to_hms(total)
+        # 표시 초가 바뀐 경우에만 실제 setText (ui_refresh 가 이전 값과 비교)
         if self.timeMode==0:
-            self.playTimeLbl.setText(f"{self.ms_to_hms(cur_ms)} / {total_txt}")
+            self.ui_refresh.mark("time_text", f"{self.ms_to_hms(cur_ms)} / {total_txt}")
         else:
-            self.playTimeLbl.setText(f"-{self.ms_to_hms(remain_ms)} / {total_txt}")
+            self.ui_refresh.mark("time_text", f"-{self.ms_to_hms(remain_ms)} / {total_txt}")
 
     def on_time_label_clicked(self, e):
         self.timeMode = 1 - getattr(self, "timeMode", 0)
@@ -7301,6 +8462,14 @@ QSlider::handle:horizontal { width:12px; height:12px; margin:-4px 0; border-radi
             # 메시지 박스 표시 실패 시에는 저장 후 종료
             resp = QtWidgets.QMessageBox.StandardButton.Yes
 
+        try:
+            self.clip_cache.stop()
+        except Exception:
+            pass
+        try:
+            self.env_watcher.stop()
+        except Exception:
+            pass
         if resp == QtWidgets.QMessageBox.StandardButton.Yes:
             try:
                 self.save_state(reason="exit")
@@ -7326,6 +8495,61 @@ QSlider::handle:horizontal { width:12px; height:12px; margin:-4px 0; border-radi
         if L<=0: return
         t=max(0, min(L-1, t+delta_ms)); self.video.set_time_ms(t)
 
+    # 감사(QA) 모드: 영상 시간 색인으로 계수 이벤트 사이를 바로 건너뛰며 확인
+    AUDIT_LEAD_MS = 1500   # 이벤트 앞 재생 여유
+    AUDIT_TAIL_MS = 1000   # 이벤트 뒤 재생 여유
+
+    def _audit_notice(self, text:str):
+        try:
+            sl = getattr(self, "slider", None) or self
+            QtWidgets.QToolTip.showText(sl.mapToGlobal(QtCore.QPoint(0, 0)), text, sl)
+        except Exception:
+            pass
+
+    def jump_to_event(self, step:int):
+        """현재 위치 기준 다음(+1)/이전(-1) 계수 이벤트의 LEAD 앞으로 이동."""
+        path = self.current_file
+        if not path:
+            return
+        ref = self.video.get_time_ms() + self.AUDIT_LEAD_MS
+        idx = self.journal.index
+        ev = idx.next_after(path, ref) if step > 0 else idx.prev_before(path, ref)
+        if ev is None:
+            self._audit_notice("다음 계수 기록 없음" if step > 0 else "이전 계수 기록 없음")
+            return
+        self.video.set_time_ms(max(0, ev.video_ms - self.AUDIT_LEAD_MS))
+        self._audit_notice(f"{ev.direction} {ev.vehicle} ({ev.delta:+d}) @ {self.ms_to_hms(ev.video_ms)}")
+
+    def toggle_audit_mode(self):
+        """감사 모드: 재생 중 이벤트가 없는 구간은 건너뛰고 각 이벤트 앞뒤만 재생."""
+        self._audit_active = not getattr(self, "_audit_active", False)
+        if not self._audit_active:
+            self._audit_notice("감사 모드 해제")
+            return
+        n = self.journal.index.count(self.current_file)
+        if n == 0:
+            self._audit_active = False
+            self._audit_notice("이 영상에는 계수 기록이 없습니다")
+            return
+        self._audit_notice(f"감사 모드: 계수 {n}건")
+        self._audit_tick(self.video.get_time_ms())
+
+    def _audit_tick(self, ms:int):
+        if not getattr(self, "_audit_active", False):
+            return
+        nxt = self.journal.index.next_after(self.current_file, int(ms) - self.AUDIT_TAIL_MS)
+        if nxt is None:
+            self._audit_active = False
+            try:
+                self.video.pause()
+            except Exception:
+                pass
+            self._audit_notice("감사 완료: 이 영상의 마지막 계수까지 확인했습니다")
+            return
+        # 다음 이벤트까지 여유보다 멀면 바로 이벤트 앞으로 이동
+        if nxt.video_ms - int(ms) > self.AUDIT_LEAD_MS + 500:
+            self.video.set_time_ms(max(0, nxt.video_ms - self.AUDIT_LEAD_MS))
+
     # save
     def state_path(self) -> Path:
         """자동 저장용 상태 파일 경로 (계수/폴더/재생위치)."""
@@ -7387,6 +8611,11 @@ QSlider::handle:horizontal { width:12px; height:12px; margin:-4px 0; border-radi
                     "table": table_out,
                     "labels": labels_out,
                 },
+                # 이 스냅샷이 반영한 마지막 logs.id — 복원 시 이후 로그(꼬리)만 재생
+                "journal": {
+                    "session_id": getattr(self, "journal_session", None),
+                    "log_id": int(getattr(self, "_journal_last_log_id", 0) or 0),
+                },
                 "cfg": {
                     "directions": list(getattr(self.cfg, "directions", [])),
                     "enabled_directions": list(getattr(self.cfg, "enabled_directions", [])),
@@ -7409,6 +8638,51 @@ QSlider::handle:horizontal { width:12px; height:12px; margin:-4px 0; border-radi
             pass
 
 
+    def _rebuild_counts_from_logs(self, session_id: str, after_id: int = 0, keep_base: bool = False) -> int:
+        """logs 테이블의 세션 이벤트로 CountTable 재구성.
+        - keep_base=True : 현재 테이블(상태 파일 스냅샷)을 기준으로 after_id 이후만 재생
+        - keep_base=False: 빈 테이블에서 세션 전체 재생
+        """
+        if not keep_base:
+            self.counts.restore(({}, {}), emit=False)
+        self.journal.reset(self.counts)
+        events = logs_load_events(session_id, after_id)
+        history = []
+        if keep_base and after_id:
+            # 스냅샷 이전 이벤트는 재생하지 않고 영상 시간 색인(감사 모드)에만 사용
+            history = [e for e in logs_load_events(session_id) if e.log_id <= after_id]
+        self.journal.extend(events)
+        n = self.journal.rebuild()
+        # 복원된 계수를 새 base 로: 로그 행('undo' 보정 행 포함)을 undo 스택에 남기지 않아
+        # 이번 실행에서 기록한 계수만 되돌릴 수 있게 합니다. 불러온 이벤트는 색인에만 사용.
+        self.journal.reset(self.counts)
+        self.journal.set_history(history + events)
+        if events:
+            self._journal_last_log_id = max(self._journal_last_log_id, events[-1].log_id)
+        try:
+            self.refresh_all_quick_counts()
+        except Exception:
+            pass
+        dlog(f"journal rebuild session={session_id} after={after_id} replayed={n}")
+        return n
+
+    def _offer_rebuild_counts_from_logs(self):
+        """상태 파일이 없을 때, 마지막 작업 세션의 logs 로 계수 복원을 제안."""
+        sid = logs_latest_session(self.user["id"])
+        if not sid:
+            return
+        resp = QtWidgets.QMessageBox.question(
+            self,
+            "계수 로그 복원",
+            f"저장된 작업 상태가 없습니다.\n마지막 작업 세션({sid})의 계수 기록으로 계수를 복원하시겠습니까?",
+            QtWidgets.QMessageBox.StandardButton.Yes | QtWidgets.QMessageBox.StandardButton.No,
+            QtWidgets.QMessageBox.StandardButton.Yes,
+        )
+        if resp != QtWidgets.QMessageBox.StandardButton.Yes:
+            return
+        self.journal_session = sid
+        self._rebuild_counts_from_logs(sid)
+
     def load_last_state(self):
         """마지막 자동 저장 상태에서 폴더/파일/재생위치/계수 복원."""
         # 한 번만 복원하도록 가드
@@ -7424,6 +8698,11 @@ QSlider::handle:horizontal { width:12px; height:12px; margin:-4px 0; border-radi
             if not path.exists():
                 # 더 이상 시도하지 않도록 플래그만 설정
                 self._loaded_last_state_once = True
+                # 상태 파일이 없으면 마지막 세션의 계수 로그로 복원 제안
+                try:
+                    self._offer_rebuild_counts_from_logs()
+                except Exception:
+                    pass
                 return
 
             # 이전 작업을 불러올지 사용자에게 확인
@@ -7542,6 +8821,19 @@ QSlider::handle:horizontal { width:12px; height:12px; margin:-4px 0; border-radi
         except Exception:
             pass
 
+        # --- 이벤트 저널: 같은 세션 이어쓰기 + 상태 저장 이후 로그(꼬리) 재생 ---
+        try:
+            jr = data.get("journal") or {}
+            sid = jr.get("session_id") if isinstance(jr, dict) else None
+            if sid:
+                self.journal_session = str(sid)
+                self._journal_last_log_id = int(jr.get("log_id") or 0)
+                self._rebuild_counts_from_logs(self.journal_session, self._journal_last_log_id, keep_base=True)
+            else:
+                self.journal.reset(self.counts)
+        except Exception:
+            pass
+
         # --- 슬롯(조사시간) 콤보 복원 ---
         try:
             slot_start = int(data.get("slot_start", 0) or 0)
@@ -7607,41 +8899,23 @@ QSlider::handle:horizontal { width:12px; height:12px; margin:-4px 0; border-radi
         return base/"traffic_counter_autosave.csv"
 
 
+    def _write_sheet_csv(self, path):
+        """시트형 CSV: 머리글 2줄(방향번호/차종) + 시간대별 행. 레이아웃 배열을 그대로 씁니다."""
+        import csv
+        lay = self.cfg.layout()
+        mats = self.counts.sheet_matrices(lay)
+        with open(path, "w", encoding="utf-8-sig", newline="") as f:
+            w = csv.writer(f)
+            w.writerows(lay.wide_header())
+            w.writerows(lay.wide_rows(mats))
+
     def save_csv(self, auto:bool=False):
-        df_long=self.counts.to_long_df()
-        if df_long.empty and not auto:
+        if not self.counts.table and not auto:
             QtWidgets.QMessageBox.information(self,"안내","저장할 데이터가 없습니다."); return
-        labels=[]
-        for s,e in sorted(self.cfg.active_windows):
-            t=s
-            while t<e:
-                labels.append(slot_label(t)); t+=SLOT_SEC
-        labels=list(dict.fromkeys(labels)) or ["00:00~00:15"]
-        if df_long.empty:
-            df_out = pd.DataFrame({"시간대": labels})
-        else:
-            df_long=df_long.copy()
-            df_long["시간대"] = df_long["slot_label"]
-            # 방향명을 안전하게 번호로 매핑 (정규식 추출 대신 cfg 기준 매핑)
-            _dir_map = {name: i+1 for i, name in enumerate(self.cfg.directions)}
-            df_long["방향번호"] = df_long["direction"].map(_dir_map)
-            df_long = df_long.dropna(subset=["방향번호"])
-            df_long["방향번호"] = df_long["방향번호"].astype(int)
-            pv=df_long.pivot_table(index="시간대", columns=["방향번호","vehicle"], values="count", aggfunc="sum", fill_value=0)
-            cols=[]; vehicles=self.cfg.vehicle_types[:self.cfg.vehicle_count()]
-            enabled_dirs = [i+1 for i, ok in enumerate(self.cfg.enabled_directions) if ok and i < len(self.cfg.directions)]
-            if not enabled_dirs:
-                enabled_dirs = [1]
-            for d in enabled_dirs:
-                for v in vehicles:
-                    if (d,v) in pv.columns:
-                        cols.append((d,v))
-            pv=pv.reindex(columns=cols, fill_value=0).reset_index()
-            df_out=pv
         if auto:
-            path=self.autosave_path(); df_out.to_csv(path, index=False, encoding="utf-8-sig"); return
+            self._write_sheet_csv(self.autosave_path()); return
         path,_=QtWidgets.QFileDialog.getSaveFileName(self,"CSV 저장(시트형)","traffic_counts_sheet.csv","CSV (*.csv)")
-        if path: df_out.to_csv(path, index=False, encoding="utf-8-sig"); QtWidgets.QMessageBox.information(self,"저장됨", f"저장 완료: {path}")
+        if path: self._write_sheet_csv(path); QtWidgets.QMessageBox.information(self,"저장됨", f"저장 완료: {path}")
 
     def save_progress(self):
         """현재 진행 중인 내역을 저장하는 자리(추후 구현)."""
@@ -7652,19 +8926,35 @@ QSlider::handle:horizontal { width:12px; height:12px; margin:-4px 0; border-radi
 
 
     def save_xlsx(self):
-        if not _HAS_XLSX:
-            QtWidgets.QMessageBox.warning(self,"안내","openpyxl 설치가 필요합니다: pip install openpyxl"); return
+        """방향별 시트 엑셀 저장. 배열은 여기서 한 번 채우고(사본), 파일 쓰기는 작업 스레드에서 합니다."""
+        if getattr(self, "_xlsx_job", None) is not None:
+            QtWidgets.QMessageBox.information(self,"안내","엑셀 저장이 진행 중입니다."); return
         path,_=QtWidgets.QFileDialog.getSaveFileName(self,"엑셀 저장(방향별 시트)","traffic_counts_by_direction.xlsx","Excel Workbook (*.xlsx)")
         if not path: return
-        with pd.ExcelWriter(path, engine="openpyxl") as writer:
-            enabled_dirs = [i+1 for i, ok in enumerate(self.cfg.enabled_directions) if ok and i < len(self.cfg.directions)]
-            if not enabled_dirs:
-                enabled_dirs = [1]
-            for dirno in enabled_dirs:
-                df=self.counts.to_sheet_df_per_direction(self.cfg, dirno)
-                sheet_name=f"{dirno}"
-                df.to_excel(writer, sheet_name=sheet_name, index=False)
-        QtWidgets.QMessageBox.information(self,"저장됨", f"엑셀 저장 완료: {path}")
+        lay = self.cfg.layout()
+        mats = self.counts.sheet_matrices(lay)
+        sheets = [(f"{dirno}", itertools.chain([lay.header()], lay.sheet_rows(mat)))
+                  for dirno, mat in zip(lay.directions, mats)]
+        prog = QtWidgets.QProgressDialog("엑셀 저장 중...", None, 0, len(sheets), self)
+        prog.setWindowTitle("엑셀 저장")
+        prog.setWindowModality(QtCore.Qt.WindowModality.NonModal)
+        prog.setMinimumDuration(300)
+        job = XlsxExportJob(path, sheets, self)
+        self._xlsx_job = job
+
+        def _done(p, ms):
+            prog.close(); self._xlsx_job = None; job.deleteLater()
+            dlog(f"[XLSX] {len(sheets)} sheets in {ms:.0f} ms -> {p}")
+            QtWidgets.QMessageBox.information(self,"저장됨", f"엑셀 저장 완료: {p}")
+
+        def _fail(p, err):
+            prog.close(); self._xlsx_job = None; job.deleteLater()
+            QtWidgets.QMessageBox.warning(self,"오류", f"엑셀 저장 실패:\n{p}\n{err}")
+
+        job.progress.connect(lambda done, total: prog.setValue(done))
+        job.finished.connect(_done)
+        job.failed.connect(_fail)
+        job.start()
 
 # ==== Users/Admin ====
 class LoginDialog(QtWidgets.QDialog):
@@ -7802,432 +9092,70 @@ class UserManagerDialog(QtWidgets.QDialog):
         def _site_title(t):
             jibun = t.get("jibun") or t.get("지번") or ""
             nm = t.get("name") or t.get("지점명") or t.get("site_name") or ""
-            if jibun and nm:
-                return f"{jibun}_{nm}"
-            return nm or jibun or "(지점)"
-
-        for s in surveys:
-            cb_s.addItem(_survey_title(s))
-
-        def _reload_sites():
-            cb_t.clear()
-            sidx = cb_s.currentIndex()
-            if not (0 <= sidx < len(surveys)):
-                return
-            sites = surveys[sidx].get("sites") or []
-            for t in sites:
-                cb_t.addItem(_site_title(t))
-
-        cb_s.currentIndexChanged.connect(_reload_sites)
-        _reload_sites()
-
-        form.addRow("과업:", cb_s)
-        form.addRow("지점:", cb_t)
-        v.addLayout(form)
-
-        btns = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.StandardButton.Ok | QtWidgets.QDialogButtonBox.StandardButton.Cancel)
-        btns.accepted.connect(dlg.accept)
-        btns.rejected.connect(dlg.reject)
-        v.addWidget(btns)
-
-        if dlg.exec() != QtWidgets.QDialog.DialogCode.Accepted:
-            return (None, None)
-        return (cb_s.currentIndex(), cb_t.currentIndex())
-
-    def open_env_settings_window(self):
-        """환경설정 UI를 별도 창으로 실행합니다(동일 폴더의 env_*.py 우선)."""
-        import subprocess
-        import sys
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-
-        # 1) 같은 폴더의 대표 env 파일 우선 탐색
-        candidates = [
-            os.path.join(base_dir, "env_hotkey97_fixed_displayname_export_hotkeys_v2.py"),
-            os.path.join(base_dir, "env_hotkey97_fixed_displayname_export_hotkeys.py"),
-            os.path.join(base_dir, "env_hotkey97_fixed_displayname.py"),
-        ]
-        env_py = None
-        for p in candidates:
-            if os.path.isfile(p):
-                env_py = p
-                break
-
-        # 2) 없으면 파일 선택
-        if env_py is None:
-            env_py, _ = QtWidgets.QFileDialog.getOpenFileName(
-                self, "환경설정 파일 선택", base_dir, "Python (*.py)"
-            )
-            if not env_py:
-                return
-
-        try:
-            subprocess.Popen([sys.executable, env_py], cwd=base_dir)
-        except Exception as e:
-            QtWidgets.QMessageBox.warning(self, "환경설정 실행 실패", str(e))
-
-
-
-    def apply_env_selection(self, survey_index: int, site_index: int):
-            """
-            환경설정(JSON) 기반으로 선택된 과업/지점의
-            - 상단 과업/지점 표시
-            - 입력그룹 탭(예: 1-2-3 / 4-5-6 ...)
-            - 각 방향별(1~12) 차종/단축키(방향별 sheet) 적용
-            을 계수 화면에 반영합니다.
-            """
-            envdb = getattr(self, "envdb", None) or {}
-            hkdb  = getattr(self, "hkdb", None) or {}  # 보조(향후 site별 override 용)
-            surveys = envdb.get("surveys", []) or []
-            projects = envdb.get("projects", []) or []
-
-            if not (0 <= survey_index < len(surveys)):
-                return
-            survey = surveys[survey_index]
-            sites = survey.get("sites") or []
-            if not (0 <= site_index < len(sites)):
-                return
-            site = sites[site_index]
-
-            # --- hotkeys_db.json(보조)에서 site override가 있으면 적용 ---
-            
-            def _find_override_site(hkdb_obj, survey_obj, site_obj):
-
-                """hotkeys_db.json 구조가 버전마다 달라서, 가능한 한 유연하게 '해당 지점' override를 찾습니다.
-
-                - 1순위: 작업번호(work_no) 일치
-
-                - 2순위: 지번+지점명 일치
-
-                - candidates: counters/groups(또는 입력그룹)/dir_hotkeys/group_dir_hotkeys/hotkeys 키가 있는 dict
-
-                """
-
-                try:
-
-                    target_wno = site_obj.get('작업번호') or site_obj.get('work_no') or site_obj.get('id')
-
-                    target_jibun = site_obj.get('지번') or site_obj.get('jibun')
-
-                    target_nm = site_obj.get('지점명') or site_obj.get('name')
-
-
-                    def _iter_dicts(o):
-
-                        if isinstance(o, dict):
-
-                            yield o
-
-                            for v in o.values():
-
-                                yield from _iter_dicts(v)
-
-                        elif isinstance(o, list):
-
-                            for v in o:
-
-                                yield from _iter_dicts(v)
-
-
-                    for d in _iter_dicts(hkdb_obj):
-
-                        if not isinstance(d, dict):
-
-                            continue
-
-                        has_override = (
-
-                            isinstance(d.get('counters'), list)
-
-                            or isinstance(d.get('groups'), list)
-
-                            or isinstance(d.get('입력그룹'), list)
-
-                            or isinstance(d.get('dir_hotkeys'), dict)
-
-                            or isinstance(d.get('group_dir_hotkeys'), dict)
-
-                            or isinstance(d.get('hotkeys'), (dict, list))
-
-                        )
-
-                        if not has_override:
-
-                            continue
-
-
-                        wno = d.get('작업번호') or d.get('work_no') or d.get('id')
-
-                        if target_wno and wno and str(wno) == str(target_wno):
-
-                            return d
-
-
-                        jb = d.get('지번') or d.get('jibun')
-
-                        nm = d.get('지점명') or d.get('name')
-
-                        if (target_jibun is not None) and (target_nm is not None) and (jb is not None) and (nm is not None):
-
-                            if (str(jb) == str(target_jibun)) and (str(nm) == str(target_nm)):
+            if jibun and nm:
+                return f"{jibun}_{nm}"
+            return nm or jibun or "(지점)"
 
-                                return d
+        for s in surveys:
+            cb_s.addItem(_survey_title(s))
 
+        def _reload_sites():
+            cb_t.clear()
+            sidx = cb_s.currentIndex()
+            if not (0 <= sidx < len(surveys)):
+                return
+            sites = surveys[sidx].get("sites") or []
+            for t in sites:
+                cb_t.addItem(_site_title(t))
 
-                    return None
+        cb_s.currentIndexChanged.connect(_reload_sites)
+        _reload_sites()
 
-                except Exception:
+        form.addRow("과업:", cb_s)
+        form.addRow("지점:", cb_t)
+        v.addLayout(form)
 
-                    return None
-                except Exception:
-                    return None
-
-            ov_site = _find_override_site(hkdb, survey, site)
-            if isinstance(ov_site, dict):
-                # counters / groups 등 override가 있으면 덮어쓰기
-                if isinstance(ov_site.get('groups'), list):
-                    site['groups'] = ov_site.get('groups')
-                if isinstance(ov_site.get('counters'), list):
-                    site['counters'] = ov_site.get('counters')
-                # 차량 단축키 시트(프로젝트) override가 있으면 env projects보다 우선 사용
-                if isinstance(hkdb.get('projects'), list):
-                    projects = hkdb.get('projects') or projects
-
-            # -----------------------------
-            # 1) 상단 표시
-            # -----------------------------
-            try:
-                info = survey.get("info") if isinstance(survey.get("info"), dict) else {}
-                work_name = (info.get("name") or "").strip()
-                jibun = str(site.get("지번") or site.get("jibun") or site.get("address") or "").strip()
-                sname = str(site.get("지점명") or site.get("name") or site.get("site_name") or "").strip()
-                site_disp = (f"{jibun}_{sname}" if (jibun or sname) else "").strip("_")
-                if hasattr(self, "projectCombo"):
-                    # 표시만(선택은 콤보 자체가 관리)
-                    pass
-                if hasattr(self, "siteCombo"):
-                    pass
-                # 상단 라벨/입력칸(있으면)
-                if hasattr(self, "editProject") and self.editProject:
-                    self.editProject.setText(work_name)
-                if hasattr(self, "editSite") and self.editSite:
-                    self.editSite.setText(site_disp)
-            except Exception:
-                pass
+        btns = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.StandardButton.Ok | QtWidgets.QDialogButtonBox.StandardButton.Cancel)
+        btns.accepted.connect(dlg.accept)
+        btns.rejected.connect(dlg.reject)
+        v.addWidget(btns)
 
-            # -----------------------------
-            # 2) cfg: 차종명 / 방향 타이틀 / enabled_directions
-            try:
-                # 현재 지점(site)의 counters 이름들과 project의 (vehicle_set / hotkey sheet) 이름을 비교하여
-                # 가장 잘 맞는 project를 자동 선택합니다.
-                counter_names = []
-                for c in (site.get("counters") or []):
-                    if isinstance(c, dict):
-                        nm = str(c.get("name") or c.get("display") or "").strip()
-                        if nm:
-                            counter_names.append(nm)
-
-                def _proj_names(pobj):
-                    vnm = []
-                    for it in (pobj.get("vehicle_set") or []):
-                        if isinstance(it, dict):
-                            n = str(it.get("차종명") or it.get("차종구분") or it.get("name") or "").strip()
-                            if n:
-                                vnm.append(n)
-                    snm = []
-                    for it in (pobj.get("hotkey_sheets_global") or []):
-                        if isinstance(it, dict):
-                            n = str(it.get("name") or it.get("sheet") or "").strip()
-                            if n:
-                                snm.append(n)
-                    return set(vnm), set(snm)
-
-                best_proj = projects[0] if projects else {}
-                best_score = -1
-                for pobj in (projects or []):
-                    vs, ss = _proj_names(pobj)
-                    score = 0
-                    # site의 counter sheet명이 project의 hotkey sheet명과 일치하면 강하게 가산
-                    score += len(set(counter_names) & ss) * 10
-                    # site의 counter sheet명이 project의 vehicle_set명과 일치하는 경우(유출입 등) 가산
-                    score += len(set(counter_names) & vs) * 5
-                    if score > best_score:
-                        best_score = score
-                        best_proj = pobj
-
-                self._active_project = best_proj or {}
-                self._active_project_name = str((best_proj or {}).get("name") or "").strip()
-
-                # 차종명: active project의 vehicle_set을 우선 사용
-                vnames = []
-                for it in ((best_proj or {}).get("vehicle_set") or []):
-                    if isinstance(it, dict):
-                        nm = (it.get("차종명") or it.get("차종구분") or it.get("name") or "")
-                        nm = str(nm).strip()
-                        if nm:
-                            vnames.append(nm)
-                if vnames:
-                    self.cfg.vehicle_types = vnames
-            except Exception:
-                pass
+        if dlg.exec() != QtWidgets.QDialog.DialogCode.Accepted:
+            return (None, None)
+        return (cb_s.currentIndex(), cb_t.currentIndex())
 
-            try:
-                # 방향수(예: 12)
-                n_dir = int(site.get("방향수") or 0)
-                if n_dir <= 0:
-                    # counters에서 최대 dir로 추정
-                    mx = 0
-                    for c in (site.get("counters") or []):
-                        try:
-                            mx = max(mx, int(str(c.get("dir") or 0)))
-                        except Exception:
-                            pass
-                    n_dir = mx or 12
-
-                # cfg.directions는 index 기반(0은 미사용일 때가 많음)
-                # build_dir_panel이 didx=1..n을 사용하므로 길이를 넉넉히 확보
-                need_len = max(30, n_dir + 1)
-                if not hasattr(self.cfg, "directions") or len(self.cfg.directions) < need_len:
-                    # 기존 유지하며 확장
-                    cur = list(getattr(self.cfg, "directions", []))
-                    if not cur:
-                        cur = [""] * need_len
-                    else:
-                        cur += [""] * (need_len - len(cur))
-                    self.cfg.directions = cur
-                for d in range(1, n_dir + 1):
-                    self.cfg.directions[d] = f"{d}번방향"
-
-                # enabled_directions도 동일하게
-                if not hasattr(self.cfg, "enabled_directions") or len(self.cfg.enabled_directions) < need_len:
-                    cur = list(getattr(self.cfg, "enabled_directions", []))
-                    if not cur:
-                        cur = [False] * need_len
-                    else:
-                        cur += [False] * (need_len - len(cur))
-                    self.cfg.enabled_directions = cur
-                for d in range(1, need_len):
-                    self.cfg.enabled_directions[d] = (d <= n_dir)
-            except Exception:
-                pass
+    def open_env_settings_window(self):
+        """환경설정 UI를 별도 창으로 실행합니다(동일 폴더의 env_*.py 우선)."""
+        import subprocess
+        import sys
+        base_dir = os.path.dirname(os.path.abspath(__file__))
 
-            # -----------------------------
-            # 3) 방향별 차종 단축키 적용
-            #    - site.counters: dir별 counter sheet name(방향(숫자)/방향(Q)/방향(A)...)
-            #    - project.hotkey_sheets_global: sheet name -> 차량별 단축키
-            # -----------------------------
-            try:
-                # 어떤 project를 쓸지(작업참조 == project.name)
-                ref = ""
-                try:
-                    ref = (survey.get("vehicle") or {}).get("작업참조") or ""
-                except Exception:
-                    pass
-                proj = getattr(self, '_active_project', None) or (projects[0] if projects else None)
-
-                sheets = {}
-                if proj:
-                    for sh in (proj.get("hotkey_sheets_global") or []):
-                        nm = (sh.get("name") or "").strip()
-                        if nm:
-                            sheets[nm] = sh
-
-                # counters에서 dir->sheetname
-                dir_to_sheet = {}
-                for c in (site.get("counters") or []):
-                    try:
-                        d = int(str(c.get("dir") or 0))
-                    except Exception:
-                        continue
-                    nm = (c.get("name") or "").strip()
-                    if d > 0 and nm:
-                        dir_to_sheet[d] = nm
-
-                # cfg.dir_hotkeys[dir] = [차종별 키들]
-                if not hasattr(self.cfg, "dir_hotkeys") or not self.cfg.dir_hotkeys:
-                    self.cfg.dir_hotkeys = [[] for _ in range(30)]
-
-                # 차량 순서(현재 cfg.vehicle_types 순서) 기준으로 키를 정렬
-                vorder = list(getattr(self.cfg, "vehicle_types", []))
-                for dir_no in group_dirs:
-                    sheet_name = dir_to_sheet.get(str(dir_no)) or dir_to_sheet.get(dir_no)
-                    if not sheet_name:
-                        continue
-                    sh = sheets.get(sheet_name, {})
-                    # keys 정렬: vehicle_types 순서를 우선(없으면 dict 순서)
-                    keys = []
-                    if vorder:
-                        for vname in vorder:
-                            if vname in sh:
-                                keys.append(str(sh.get(vname, '')))
-                    if not keys:
-                        # fallback
-                        keys = [str(v) for v in sh.values()]
-                    # 방향 번호 기준으로 저장(중요! slot 인덱스가 아니라 dir_no)
-                    idx = max(0, int(dir_no) - 1)
-                    # 길이 확보
-                    while len(self.cfg.dir_hotkeys) <= idx:
-                        self.cfg.dir_hotkeys.append([])
-                    self.cfg.dir_hotkeys[idx] = keys
-
-# UI 갱신(단축키 라벨 포함)
-                try:
-                    self.refresh_all_quick_counts()
-                except Exception:
-                    pass
-            except Exception:
-                pass
+        # 1) 같은 폴더의 대표 env 파일 우선 탐색
+        candidates = [
+            os.path.join(base_dir, "env_hotkey97_fixed_displayname_export_hotkeys_v2.py"),
+            os.path.join(base_dir, "env_hotkey97_fixed_displayname_export_hotkeys.py"),
+            os.path.join(base_dir, "env_hotkey97_fixed_displayname.py"),
+        ]
+        env_py = None
+        for p in candidates:
+            if os.path.isfile(p):
+                env_py = p
+                break
 
-            # -----------------------------
-            # 4) 입력그룹 탭 재구성
-            #    - site.groups: ["1-2-3", "4-5-6", ...]
-            # -----------------------------
-            try:
-                groups = site.get("groups") or []
-                if not groups:
-                    # 기본 생성(3개씩)
-                    groups = []
-                    n_dir = 12
-                    for a in range(1, n_dir + 1, 3):
-                        b = min(n_dir, a + 1)
-                        c = min(n_dir, a + 2)
-                        groups.append(f"{a}-{b}-{c}")
-
-                # 메인 탭(self.tab) 재구성
-                if hasattr(self, "tab") and self.tab:
-                    self.tab.blockSignals(True)
-                    try:
-                        while self.tab.count():
-                            w = self.tab.widget(0)
-                            self.tab.removeTab(0)
-                            if w:
-                                w.deleteLater()
-                    except Exception:
-                        pass
+        # 2) 없으면 파일 선택
+        if env_py is None:
+            env_py, _ = QtWidgets.QFileDialog.getOpenFileName(
+                self, "환경설정 파일 선택", base_dir, "Python (*.py)"
+            )
+            if not env_py:
+                return
 
-                    for gtxt in groups:
-                        parts = [p for p in str(gtxt).split("-") if p.strip().isdigit()]
-                        nums = [int(p) for p in parts]
-                        if len(nums) == 3:
-                            a, b, c = nums
-                        elif len(nums) == 2:
-                            a, b = nums; c = nums[-1]
-                        elif len(nums) == 1:
-                            a = nums[0]; b = a; c = a
-                        else:
-                            continue
-                        page = self._make_group_page(a, b, c)
-                        self.tab.addTab(page, str(gtxt))
+        try:
+            subprocess.Popen([sys.executable, env_py], cwd=base_dir)
+        except Exception as e:
+            QtWidgets.QMessageBox.warning(self, "환경설정 실행 실패", str(e))
 
-                    self.tab.setCurrentIndex(0)
-                    self.tab.blockSignals(False)
 
-                    # 미러 탭 동기화
-                    try:
-                        self._sync_group_tabs()
-                    except Exception:
-                        pass
-            except Exception:
-                pass
 
     def _format_site_label(self, site: dict) -> str:
         """지점 표기: 지번_지점명 (한국어 키/영문 키 모두 대응)"""
@@ -8480,6 +9408,11 @@ def apply_env_hotkeys_to_counter(self, site_json=None, surveys=None, survey_inde
         if not hk_payload:
             hk_payload = target_site.get("site_hotkeys")
 
+        # --- 2b) hotkeys_db.json 투영본 (환경설정이 시트->키를 미리 풀어 둔 값) ---
+        if not hk_payload:
+            hk_payload = hk_site_entry(getattr(self, "hkdb", None) or {},
+                                       target_site.get("작업번호") or "").get("site_hotkeys")
+
         hk_by_dir = {}
         vehicle_names = []
 
@@ -8591,6 +9524,8 @@ def do_login()->Optional[dict]:
             QtWidgets.QMessageBox.warning(None,"로그인 실패","아이디 또는 비밀번호가 올바르지 않습니다.")
         else: return None
 
+_startup_mark("classes")
+
 def main():
     db_init()
     app=QtWidgets.QApplication(sys.argv)
@@ -8651,11 +9586,14 @@ QScrollBar::sub-page:vertical {
     user=do_login()
     if not user: return 0
     w=MainWindow(user); w.resize(1660, 1000); w.show()
-    # 프로그램 최초 실행 시 한 번만 이전 작업 상태 복원
-    try:
-        w.load_last_state()
-    except Exception:
-        pass
+    # 프로그램 최초 실행 시 한 번만 이전 작업 상태 복원 — 창이 먼저 그려진 뒤 이벤트 루프에서 실행
+    # (mpv 는 백그라운드에서 준비되며, 그 전에 내린 set_media/시크는 준비되면 순서대로 적용됨)
+    def _restore_last_state():
+        try:
+            w.load_last_state()
+        except Exception:
+            pass
+    QtCore.QTimer.singleShot(0, _restore_last_state)
     # --- 창을 모니터 가운데로 이동 ---
     try:
         screen = QtGui.QGuiApplication.primaryScreen()
@@ -8687,21 +9625,8 @@ def _mw_format_site_label(self, site: dict) -> str:
         return "지점"
 
 
-def _mw_populate_env_project_site_combos(self):
-    """Populate project/site combos from env_data_plus_allinone.json (정본).
-
-    - 과업: surveys[].info.name
-    - 지점: 선택된 surveys[].sites[] -> 지번_지점명
-
-    hotkeys_db.json은 "단축키/차종/방향 설정값"만 보조로 사용하고,
-    과업/지점 목록은 env_data_plus_allinone.json에서 항상 가져옵니다.
-    """
-    pc = getattr(self, "projectCombo", None)
-    sc = getattr(self, "siteCombo", None)
-    if pc is None or sc is None:
-        return
-
-    # 1) load env_data_plus_allinone.json
+def _mw_read_env_allinone():
+    """env_data_plus_allinone.json 을 후보 경로에서 찾아 읽음 → (env dict | None, path | None)."""
     env = None
     env_path = None
     try:
@@ -8731,6 +9656,36 @@ def _mw_populate_env_project_site_combos(self):
     except Exception:
         env = None
 
+    return env, env_path
+
+
+def _mw_populate_env_project_site_combos(self, env=None, keep_selection=False):
+    """Populate project/site combos from env_data_plus_allinone.json (정본).
+
+    - 과업: surveys[].info.name
+    - 지점: 선택된 surveys[].sites[] -> 지번_지점명
+
+    hotkeys_db.json은 "단축키/차종/방향 설정값"만 보조로 사용하고,
+    과업/지점 목록은 env_data_plus_allinone.json에서 항상 가져옵니다.
+    env 를 넘기면(같은 프로세스의 환경설정 창이 저장한 dict) 디스크를 다시 읽지 않고,
+    keep_selection=True 면 현재 과업/지점 선택을 유지합니다.
+    """
+    pc = getattr(self, "projectCombo", None)
+    sc = getattr(self, "siteCombo", None)
+    if pc is None or sc is None:
+        return
+
+    prev_sidx, prev_tidx = None, 0
+    if keep_selection and pc.count() > 0:
+        prev_sidx = pc.currentData()
+        prev_tidx = max(0, sc.currentIndex())
+
+    # 1) load env_data_plus_allinone.json (in-memory env 가 넘어오면 그대로 사용)
+    if isinstance(env, dict):
+        env_path = getattr(self, "_env_data_path", None)
+    else:
+        env, env_path = _mw_read_env_allinone()
+
     if not isinstance(env, dict):
         # fallback to cached env if present
         env = getattr(self, "_env_data_cache", None)
@@ -8741,6 +9696,7 @@ def _mw_populate_env_project_site_combos(self):
         self._env_data_cache = env
         self._env_data_path = env_path
     self._env_surveys_cache = surveys
+    self._site_index_stale = True
 
     # 2) fill project combo
     try:
@@ -8753,15 +9709,18 @@ def _mw_populate_env_project_site_combos(self):
                 continue
             pc.addItem(name, int(sidx))
         if pc.count() > 0:
-            pc.setCurrentIndex(0)
+            keep = pc.findData(prev_sidx) if prev_sidx is not None else -1
+            pc.setCurrentIndex(keep if keep >= 0 else 0)
+            if keep < 0:
+                prev_tidx = 0
     finally:
         try: pc.blockSignals(False)
         except Exception: pass
 
     # 3) populate sites for current project
-    _mw_on_env_project_changed(self, pc.currentIndex())
+    _mw_on_env_project_changed(self, pc.currentIndex(), site_index=prev_tidx)
 
-def _mw_on_env_project_changed(self, _idx: int = 0):
+def _mw_on_env_project_changed(self, _idx: int = 0, site_index: int = 0):
     """When project combo changes, rebuild site combo from env surveys cache."""
     surveys = getattr(self, "_env_surveys_cache", None) or []
     pc = getattr(self, "projectCombo", None)
@@ -8793,7 +9752,7 @@ def _mw_on_env_project_changed(self, _idx: int = 0):
             label = _mw_format_site_label(self, site)
             sc.addItem(label, int(tidx))
         if sc.count() > 0:
-            sc.setCurrentIndex(0)
+            sc.setCurrentIndex(site_index if 0 <= site_index < sc.count() else 0)
     finally:
         try: sc.blockSignals(False)
         except Exception: pass
@@ -8877,6 +9836,148 @@ def _mw_apply_env_selection(self, survey_index: int, site_index: int):
     _mw_on_env_site_changed(self, sc.currentIndex())
 
 
+# ==== In-process env settings ====
+# env_hotkey*.py 가 ENV_INPROCESS_API 를 제공하면 새 파이썬을 띄우지 않고 같은 프로세스에서
+# 환경설정 창(Main)을 열어 이미 로드한 env dict 를 그대로 공유합니다.
+_ENV_MODULE = None
+
+
+def _load_env_settings_module(env_py: str):
+    """env 설정 파일을 모듈로 한 번만 import (in-process API 가 없는 구버전이면 None)."""
+    global _ENV_MODULE
+    if _ENV_MODULE is not None:
+        return _ENV_MODULE
+    try:
+        with open(env_py, "r", encoding="utf-8") as f:
+            if "ENV_INPROCESS_API" not in f.read():
+                return None
+        import importlib.util
+        spec = importlib.util.spec_from_file_location("countermax_env_settings", env_py)
+        mod = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(mod)
+        if not hasattr(mod, "Main") or not hasattr(mod, "add_save_listener"):
+            return None
+        _ENV_MODULE = mod
+    except Exception as e:
+        dlog(f"[ENV] in-process import failed: {e}")
+        return None
+    return _ENV_MODULE
+
+
+def _mw_on_env_model_saved(self, data):
+    """환경설정 창에서 저장 → 메모리의 envdb/hkdb 갱신 후 과업/지점 콤보·단축키를 선택 유지한 채 재적용."""
+    if not isinstance(data, dict):
+        return
+    self.envdb = data
+    self._env_data_cache = data
+    try:
+        if _ENV_MODULE is not None and hasattr(_ENV_MODULE, "build_hotkeys_projection"):
+            self.hkdb = _ENV_MODULE.build_hotkeys_projection(data)
+        else:
+            hk = dict(getattr(self, "hkdb", None) or {})
+            hk["projects"] = data.get("projects", []) or []
+            hk["surveys"] = data.get("surveys", []) or []
+            self.hkdb = hk
+    except Exception:
+        pass
+    try:
+        _mw_populate_env_project_site_combos(self, env=data, keep_selection=True)
+    except Exception as e:
+        dlog(f"[ENV] combo refresh after save failed: {e}")
+
+
+def _mw_env_outline(surveys) -> list:
+    """과업/지점 콤보에 보이는 구조만 추림 (이름·지점 표기가 바뀌었는지 비교용)."""
+    out = []
+    for s in (surveys or []):
+        if not isinstance(s, dict):
+            out.append(None)
+            continue
+        info = s.get("info") or {}
+        sites = s.get("sites") or []
+        if isinstance(sites, dict):
+            sites = list(sites.values())
+        out.append(((info.get("name") or s.get("project") or s.get("name") or s.get("title") or "").strip(),
+                    [_mw_format_site_label(None, t) for t in sites if isinstance(t, dict)]))
+    return out
+
+
+def _mw_on_env_file_reloaded(self, kind: str, path: str, data: dict):
+    """EnvFileWatcher 알림: 바뀐 파일만 반영하고, 선택 중인 과업/지점이 영향을 받을 때만 재적용."""
+    try:
+        if kind == "site":
+            if path == self.env_watcher.path_for("site"):
+                _mw_apply_site_json_runtime(self, data)
+            return
+        if kind not in ("env", "hk"):
+            return
+        attr = "envdb" if kind == "env" else "hkdb"
+        old = getattr(self, attr, None) or {}
+        setattr(self, attr, data)
+        if kind == "env":
+            self._env_data_cache = data
+        if not isinstance(getattr(self, "_env_surveys_cache", None), list):
+            return   # 아직 과업/지점을 불러오지 않음
+        old_s = old.get("surveys") or []
+        new_s = data.get("surveys") or []
+        if kind == "env" and _mw_env_outline(old_s) != _mw_env_outline(new_s):
+            # 과업/지점 목록 자체가 바뀜 -> 콤보 재구성(선택 유지) + 현재 지점 재적용
+            _mw_populate_env_project_site_combos(self, env=data, keep_selection=True)
+            return
+        pc = getattr(self, "projectCombo", None)
+        sidx = pc.currentData() if pc is not None else None
+        touched = old.get("projects") != data.get("projects")
+        if isinstance(sidx, int):
+            a = old_s[sidx] if 0 <= sidx < len(old_s) else None
+            b = new_s[sidx] if 0 <= sidx < len(new_s) else None
+            touched = touched or a != b
+        if kind == "env":
+            self._env_surveys_cache = new_s
+            idx = getattr(self, "_site_index", None)
+            if idx is not None and not getattr(self, "_site_index_stale", True):
+                # 구조는 같음 -> 내용이 바뀐 과업만 다시 색인
+                for i, (a, b) in enumerate(zip(old_s, new_s)):
+                    if a != b:
+                        idx.update_survey(i, b)
+        if touched:
+            sc = getattr(self, "siteCombo", None)
+            _mw_on_env_site_changed(self, sc.currentIndex() if sc is not None else 0)
+    except Exception as e:
+        dlog(f"[WATCH] apply {kind} failed: {e}")
+
+
+def _mw_open_env_settings_inprocess(self, env_py: str) -> bool:
+    mod = _load_env_settings_module(env_py)
+    if mod is None:
+        return False
+    win = getattr(self, "_env_window", None)
+    try:
+        if win is not None and win.isVisible():
+            win.raise_(); win.activateWindow()
+            return True
+    except RuntimeError:
+        win = None
+    env = getattr(self, "_env_data_cache", None) or getattr(self, "envdb", None)
+    try:
+        env_path = getattr(self, "_env_data_path", None) or best_env_db_path()
+        if env_path:
+            mod.use_data_path(env_path)
+        if not isinstance(env, dict) or not env:
+            env = mod.load_data()
+            self._env_data_cache = env
+        if not getattr(self, "_env_save_listener", None):
+            self._env_save_listener = lambda data, _self=self: _mw_on_env_model_saved(_self, data)
+            mod.add_save_listener(self._env_save_listener)
+        win = mod.Main(env, self)
+        win.setModal(False)
+        self._env_window = win
+        win.show()
+        return True
+    except Exception as e:
+        dlog(f"[ENV] in-process open failed, falling back to subprocess: {e}")
+        return False
+
+
 def _mw_open_env_settings_window(self):
     """⚙: open embedded env settings script (or external env_*.py if present)."""
     import os, sys, subprocess, glob
@@ -8891,7 +9992,7 @@ def _mw_open_env_settings_window(self):
     # if none, try to write embedded env if available
     if not env_py:
         try:
-            embedded = globals().get("_EMBEDDED_ENV_SOURCE", None)
+            embedded = _embedded_env_source()
             if embedded:
                 env_py = os.path.join(base_dir, "_env_hotkey_embedded.py")
                 if (not os.path.exists(env_py)) or (os.path.getsize(env_py) < 1000):
@@ -8908,6 +10009,9 @@ def _mw_open_env_settings_window(self):
             pass
         return
 
+    if os.environ.get("COUNTERMAX_ENV_SUBPROCESS", "0") != "1" and _mw_open_env_settings_inprocess(self, env_py):
+        return
+
     try:
         subprocess.Popen([sys.executable, env_py], cwd=base_dir)
     except Exception as e:
@@ -8918,14 +10022,106 @@ def _mw_open_env_settings_window(self):
             pass
 
 
+# ==== Quick find ====
+# site_search.py(환경설정 프로그램과 공용)의 역색인으로 과업/지점을 접두어·초성 검색합니다.
+# 콤보를 다시 채우면 색인을 stale 로만 표시하고, 실제 색인은 처음 검색할 때 만듭니다.
+try:
+    import site_search
+except Exception:
+    site_search = None
+
+QUICK_FIND_LIMIT = 30
+
+
+def _mw_site_index(self):
+    if site_search is None:
+        return None
+    idx = getattr(self, "_site_index", None)
+    if idx is None or getattr(self, "_site_index_stale", True):
+        t0 = time.perf_counter()
+        idx = site_search.SiteSearchIndex(getattr(self, "_env_surveys_cache", None) or [])
+        self._site_index = idx
+        self._site_index_stale = False
+        dlog(f"[FIND] indexed {len(idx)} docs in {(time.perf_counter() - t0) * 1000.0:.0f} ms")
+    return idx
+
+
+def _mw_setup_quick_find(self):
+    ed = getattr(self, "quickFind", None)
+    if ed is None:
+        return
+    if site_search is None:
+        ed.setEnabled(False)
+        ed.setToolTip("site_search.py 를 찾지 못해 빠른 찾기를 쓸 수 없습니다.")
+        return
+    self._quick_find_hits = []
+    self._quick_find_model = QtGui.QStandardItemModel(ed)
+    comp = QtWidgets.QCompleter(self._quick_find_model, ed)
+    comp.setCompletionMode(QtWidgets.QCompleter.CompletionMode.UnfilteredPopupCompletion)
+    comp.setMaxVisibleItems(15)
+    ed.setCompleter(comp)
+    ed.textEdited.connect(lambda text: _mw_on_quick_find_edited(self, text))
+    ed.returnPressed.connect(lambda: _mw_on_quick_find_return(self))
+    comp.activated[QtCore.QModelIndex].connect(lambda index: _mw_on_quick_find_activated(self, index))
+
+
+def _mw_on_quick_find_edited(self, text: str):
+    model = self._quick_find_model
+    model.clear()
+    idx = _mw_site_index(self) if text.strip() else None
+    self._quick_find_hits = idx.search(text, limit=QUICK_FIND_LIMIT) if idx is not None else []
+    for hit in self._quick_find_hits:
+        item = QtGui.QStandardItem(hit.label)
+        item.setData((hit.survey_index, hit.site_index), QtCore.Qt.ItemDataRole.UserRole)
+        item.setEditable(False)
+        model.appendRow(item)
+    self.quickFind.setToolTip(f"{len(self._quick_find_hits)}건 · {idx.last_ms:.1f} ms" if self._quick_find_hits else "")
+
+
+def _mw_on_quick_find_activated(self, index):
+    key = index.data(QtCore.Qt.ItemDataRole.UserRole)
+    self._quick_find_hits = []   # 팝업에서 Enter 로 고르면 returnPressed 도 오므로 중복 이동 방지
+    if key:
+        _mw_quick_find_goto(self, *key)
+    QtCore.QTimer.singleShot(0, self.quickFind.clear)
+
+
+def _mw_on_quick_find_return(self):
+    hits = getattr(self, "_quick_find_hits", None)
+    if hits:
+        self._quick_find_hits = []
+        _mw_quick_find_goto(self, hits[0].survey_index, hits[0].site_index)
+        self.quickFind.clear()
+
+
+def _mw_quick_find_goto(self, survey_index: int, site_index: int = -1):
+    """콤보를 사용자가 고른 것과 같은 순서로 바꿈(과업 -> 지점). site_index=-1 이면 과업만."""
+    pc = getattr(self, "projectCombo", None)
+    sc = getattr(self, "siteCombo", None)
+    if pc is None or sc is None:
+        return
+    k = pc.findData(int(survey_index))
+    if k < 0:
+        return
+    changed = pc.currentIndex() != k
+    if changed:
+        pc.setCurrentIndex(k)       # -> _on_env_project_changed: 지점 콤보 재구성
+    if 0 <= site_index < sc.count() and sc.currentIndex() != site_index:
+        sc.setCurrentIndex(site_index)      # -> _on_env_site_changed (v18 지점 json 적용 포함)
+    elif changed:
+        self._on_env_site_changed(sc.currentIndex())
+
+
 # Bind methods to MainWindow defensively
 try:
+    MainWindow._setup_quick_find = _mw_setup_quick_find
     MainWindow._format_site_label = _mw_format_site_label
     MainWindow._populate_env_project_site_combos = _mw_populate_env_project_site_combos
     MainWindow._on_env_project_changed = _mw_on_env_project_changed
     MainWindow._on_env_site_changed = _mw_on_env_site_changed
     MainWindow.apply_env_selection = _mw_apply_env_selection
     MainWindow.open_env_settings_window = _mw_open_env_settings_window
+    MainWindow._on_env_file_reloaded = _mw_on_env_file_reloaded
 except Exception:
     pass
 
@@ -8977,8 +10173,19 @@ def _env_sheet_map_from_project(proj: dict) -> dict:
             out[str(nm)] = [it for it in items if isinstance(it, dict)]
     return out
 
+def hk_site_entry(hkdb: dict, work_no: str) -> dict:
+    """hotkeys_db.json(version 2 투영본)의 by_work 색인으로 지점 항목을 바로 찾음 (없으면 {})."""
+    try:
+        si, ti = (hkdb.get("by_work") or {})[work_no]
+        return hkdb["surveys"][si]["sites"][ti] or {}
+    except Exception:
+        return {}
+
 def _hk_find_site_override(hkdb: dict, survey: dict, site: dict) -> dict:
     # Match order: survey sn -> survey name ; site work_no -> jibun+name
+    hit = hk_site_entry(hkdb, site.get("작업번호") or site.get("work_no") or "")
+    if hit:
+        return hit
     hs = hkdb.get("surveys") or []
     if isinstance(hs, dict):
         hs = [v for v in hs.values() if isinstance(v, dict)]
@@ -9419,15 +10626,9 @@ def _mw_rebuild_tabs_from_cfg_groups_v35(self):
         if not hasattr(self, "tab") or self.tab is None:
             return False
 
-        # 탭 초기화
-        try:
-            self.tab.blockSignals(True)
-            while self.tab.count():
-                self.tab.removeTab(0)
-        except Exception:
-            pass
-
-        self.group_tab_mapping = []
+        # 그룹 목록 계산 후 DirPanelManager 로 증분 동기화 (탭을 모두 지우고 다시 만들지 않음)
+        ndirs = len(getattr(self.cfg, "directions", []) or [])
+        groups = []
 
         # group_dirs의 각 그룹은 [10,11,12] 같은 '방향번호(1-based)' 리스트
         for nums in gdirs:
@@ -9439,19 +10640,10 @@ def _mw_rebuild_tabs_from_cfg_groups_v35(self):
                 continue
 
             # 0-based 인덱스로 변환
-            idxs = []
-            for n in nums:
-                if 1 <= n <= len(getattr(self.cfg, "directions", []) or []):
-                    idxs.append(n - 1)
-
+            idxs = [n - 1 for n in nums if 1 <= n <= ndirs]
             if not idxs:
                 continue
 
-            # 그룹은 보통 3개이지만, 안전하게 3개 미만/초과도 처리
-            a = idxs[0]
-            b = idxs[1] if len(idxs) >= 2 else idxs[0]
-            c = idxs[2] if len(idxs) >= 3 else idxs[-1]
-
             # enabled_directions도 그룹에 포함된 인덱스는 True로 보정(지점/그룹 기반 표시 보장)
             try:
                 if hasattr(self, "enabled_directions") and isinstance(self.enabled_directions, list):
@@ -9461,27 +10653,18 @@ def _mw_rebuild_tabs_from_cfg_groups_v35(self):
             except Exception:
                 pass
 
-            # 페이지 생성
-            try:
-                page = self._make_group_page(a, b, c)
-            except Exception:
-                # _make_group_page가 없으면 스킵
-                continue
-
-            tab_text = "-".join(str(x) for x in nums)
-            try:
-                self.tab.addTab(page, tab_text)
-            except Exception:
-                try:
-                    self.tab.addTab(page, tab_text.replace("-", " - "))
-                except Exception:
-                    pass
+            # 방향이 모두 비활성인 그룹도 탭은 유지 (패널은 sync 가 활성 방향만 생성)
+            groups.append((tuple(idxs), "-".join(str(x) for x in nums)))
 
-            # 이 탭에 속한 실제 방향 인덱스 기억
-            self.group_tab_mapping.append(list(dict.fromkeys(idxs)))
+        try:
+            self.panel_mgr.sync(groups)
+        except Exception as e:
+            dlog(f"v35 panel sync failed: {e}")
+            return False
 
         # 첫 탭 선택
         try:
+            self.tab.blockSignals(True)
             if self.tab.count() > 0:
                 self.tab.setCurrentIndex(0)
         except Exception:
@@ -9568,6 +10751,35 @@ def _mw_on_group_tab_changed_v35(self, idx: int):
         return
 # === end v35 PATCH ===
 
+def _mw_apply_site_json_runtime(self, site_json: dict):
+    """site json -> cfg/단축키 키맵 반영 후 단축키·하단 라벨 재설치 (지점 선택, 파일 변경 감시 공용)."""
+    _mw_apply_site_json_to_cfg_v26(self, site_json)
+    # (v2-step2) site json -> hotkey keymap 주입 (계수프로그램 런타임에서 직접 사용)
+    try:
+        vc = int(getattr(self.cfg, "vehicle_count", lambda: 6)() or 6)
+    except Exception:
+        vc = 6
+    try:
+        self._site_hotkey_keymap = build_hotkey_keymap_from_site_json(site_json, vc)
+        dlog(f"[DBG] injected _site_hotkey_keymap keys={len(self._site_hotkey_keymap)}")
+    except Exception as e:
+        dlog(f"[WARN] build_hotkey_keymap_from_site_json failed: {e}")
+        self._site_hotkey_keymap = {}
+    # 단축키/라벨 즉시 재설치 (지점 이동 후 'OK 눌러야 적용' 문제 방지)
+    try:
+        self.install_hotkeys(reinstall=True)
+    except Exception:
+        pass
+    try:
+        self._refresh_bottom_hotkey_labels()
+    except Exception:
+        pass
+
+    try:
+        dlog(f"after apply_site_json_to_cfg: 10={self.cfg.dir_hotkeys[9]} 11={self.cfg.dir_hotkeys[10]} 12={self.cfg.dir_hotkeys[11]}")
+    except Exception:
+        pass
+
 def _mw_apply_env_selection_v18(self):
     """
     v18: env_data_plus_allinone.json + site_{workno}.json을 함께 사용.
@@ -9633,32 +10845,11 @@ def _mw_apply_env_selection_v18(self):
             except Exception as e:
                 dlog(f"[WARN] sync_sitejson_hotkeys_from_env failed: {e}")
 
-            _mw_apply_site_json_to_cfg_v26(self, site_json)
-            # (v2-step2) site json -> hotkey keymap 주입 (계수프로그램 런타임에서 직접 사용)
-            try:
-                vc = int(getattr(self.cfg, "vehicle_count", lambda: 6)() or 6)
-            except Exception:
-                vc = 6
-            try:
-                self._site_hotkey_keymap = build_hotkey_keymap_from_site_json(site_json, vc)
-                dlog(f"[DBG] injected _site_hotkey_keymap keys={len(self._site_hotkey_keymap)}")
-            except Exception as e:
-                dlog(f"[WARN] build_hotkey_keymap_from_site_json failed: {e}")
-                self._site_hotkey_keymap = {}
-            # 단축키/라벨 즉시 재설치 (지점 이동 후 'OK 눌러야 적용' 문제 방지)
-            try:
-                self.install_hotkeys(reinstall=True)
-            except Exception:
-                pass
-            try:
-                self._refresh_bottom_hotkey_labels()
-            except Exception:
-                pass
-
             try:
-                dlog(f"after apply_site_json_to_cfg: 10={self.cfg.dir_hotkeys[9]} 11={self.cfg.dir_hotkeys[10]} 12={self.cfg.dir_hotkeys[11]}")
+                self.env_watcher.watch("site", site_json_path)
             except Exception:
                 pass
+            _mw_apply_site_json_runtime(self, site_json)
 
         # 상태표시
             try:
@@ -9737,5 +10928,91 @@ except Exception:
     pass
 # --- /v26 FIX ---
 
+_startup_mark("patches")
+
+# ==== Startup benchmark (--startup-bench) ====
+STARTUP_BUDGET_MS = 2000.0                       # 로그인 창 생성까지 허용 시간 (COUNTERMAX_STARTUP_BUDGET_MS 로 변경)
+_STARTUP_DEFERRED = ("pandas", "openpyxl", "vlc")  # 시작 시 불러오면 안 되는 모듈
+
+def _startup_probe() -> int:
+    """--startup-probe: 로그인 창 생성 직전까지 진행하고 구간 기록을 JSON 한 줄로 출력."""
+    _app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv[:1])   # 참조를 잡아 둬야 QApplication 이 살아 있음
+    _startup_mark("qapp")
+    db_init()
+    _startup_mark("db_init")
+    dlg = LoginDialog()
+    _startup_mark("login_dialog")
+    loaded = sorted(m for m in _STARTUP_DEFERRED if m in sys.modules)
+    print("STARTUP_JSON " + json.dumps({"marks": _STARTUP_MARKS, "loaded_heavy": loaded}), flush=True)
+    dlg.deleteLater()
+    return 0
+
+def _startup_bench(argv: List[str]) -> int:
+    """새 프로세스에서 -X importtime 으로 --startup-probe 를 실행해 구간별/모듈별 시간을 출력합니다.
+    로그인 창까지의 시간이 예산을 넘거나, 지연 대상 모듈이 시작 시 로드되면 1 을 반환합니다.
+    사용: python cm_v56.py --startup-bench [--budget-ms 2000]"""
+    import subprocess
+    budget = STARTUP_BUDGET_MS
+    try:
+        budget = float(os.environ.get("COUNTERMAX_STARTUP_BUDGET_MS", "") or budget)
+        if "--budget-ms" in argv:
+            budget = float(argv[argv.index("--budget-ms") + 1])
+    except Exception:
+        pass
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", os.path.abspath(__file__), "--startup-probe"],
+                          capture_output=True, text=True, encoding="utf-8", errors="replace", env=env, timeout=180)
+    wall_ms = (time.perf_counter() - t0) * 1000.0
+    info = None
+    for line in proc.stdout.splitlines():
+        if line.startswith("STARTUP_JSON "):
+            info = json.loads(line[len("STARTUP_JSON "):])
+    if info is None:
+        print("startup probe failed:\n" + "\n".join(proc.stderr.splitlines()[-20:]))
+        return 1
+
+    # 최상위 import 만 (들여쓰기 없는 항목) 누적 시간 순으로
+    tops = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        parts = line.split("|")
+        if len(parts) < 3:
+            continue
+        name = parts[2].rstrip()
+        if len(name) - len(name.lstrip(" ")) != 1:
+            continue
+        try:
+            tops.append((int(parts[1]) / 1000.0, name.strip()))
+        except Exception:
+            pass
+    tops.sort(reverse=True)
+
+    print(f"{'구간':<14}{'누적 ms':>10}{'구간 ms':>10}")
+    prev = 0.0
+    for name, ms in info["marks"]:
+        print(f"{name:<14}{ms:>10.1f}{ms - prev:>10.1f}")
+        prev = ms
+    print(f"\n{'import (최상위)':<30}{'누적 ms':>10}")
+    for ms, name in tops[:12]:
+        print(f"{name:<30}{ms:>10.1f}")
+    total = dict((n, ms) for n, ms in info["marks"]).get("login_dialog", prev)
+    heavy = info.get("loaded_heavy") or []
+    print(f"\n로그인 창까지: {total:.0f} ms (예산 {budget:.0f} ms), 프로세스 전체: {wall_ms:.0f} ms")
+    ok = True
+    if heavy:
+        print("실패: 시작 시 불러온 지연 대상 모듈: " + ", ".join(heavy)); ok = False
+    if total > budget:
+        print("실패: 시작 시간 예산 초과"); ok = False
+    return 0 if ok else 1
+
 if __name__=="__main__":
+    if "--startup-probe" in sys.argv:
+        sys.exit(_startup_probe())
+    if "--startup-bench" in sys.argv:
+        sys.exit(_startup_bench(sys.argv))
+    import multiprocessing
+    multiprocessing.freeze_support()   # 플레이어 호스트 프로세스(spawn) — 패키징된 exe 대비
     sys.exit(main())
\ No newline at end of file
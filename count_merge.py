@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+다중 계수자 병합 — 한 지점을 방향 묶음/시간대로 나눠 계수한 부분 결과(CountTable) N 개를 하나로.
+- merge_site(partials, policy="sum") -> MergeResult(table, layout, conflicts, overlaps, gaps)
+    partials: [(이름, table, cfg|None)] — table 은 CountTable.table 모양 {슬롯index: {(방향, 차종): 값}}
+    병합 레이아웃 = 시간창 합집합 × 사용 방향 합집합 × 차종(첫 설정).
+- 범위(coverage): cfg 가 있으면 (사용 방향 × 시간창 슬롯 × 전체 차종), 여기에 값이 있는 셀을 더합니다.
+    (방향 × 슬롯 × 차종) 셀 하나를 비트 하나로 보는 정수 비트마스크라, 겹침/빈칸 검사가
+    셀 반복 없이 AND/OR 몇 번으로 끝납니다. 값은 레이아웃 순서의 평평한 정수 배열로 더합니다.
+- 겹침(overlap): 두 부분 결과의 범위가 겹치는 셀 수 (쌍별, 방향번호와 함께)
+- 충돌(conflict): 겹친 셀 중 둘 이상이 값을 가진 셀 → policy 로 정리하고 목록으로 남김
+    sum   모두 더함 (기본, 기존 엑셀 병합과 같음)
+    max   가장 큰 값 (같은 차량을 두 사람이 센 경우)
+    first 먼저 준 부분 결과의 값
+- 빈칸(gaps): 병합 레이아웃 안에서 아무도 맡지 않은 셀 수 (방향별)
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import sheet_layout
+
+POLICIES = ("sum", "max", "first")
+CONFLICT_HEADER = ["지점", "방향", "시간대", "차종", "병합값", "방식", "부분 결과"]
+
+Table = Dict[int, Dict[Tuple[str, str], int]]
+
+
+@dataclass
+class Conflict:
+    direction: int          # 방향번호
+    slot: str               # 시간대 라벨
+    vehicle: str
+    values: List[Tuple[str, int]]   # (부분 결과 이름, 값) — 값이 있는 것만
+    merged: int
+
+
+@dataclass
+class MergeResult:
+    table: Table
+    layout: sheet_layout.SheetLayout
+    policy: str = "sum"
+    conflicts: List[Conflict] = field(default_factory=list)
+    overlaps: List[Tuple[str, str, int, Tuple[int, ...]]] = field(default_factory=list)   # (a, b, 셀 수, 방향번호)
+    gaps: Dict[int, int] = field(default_factory=dict)       # 방향번호 -> 맡은 사람 없는 셀 수
+    total: int = 0
+
+
+def _popcount(x: int) -> int:
+    return bin(x).count("1")
+
+
+def _bits(x: int):
+    while x:
+        low = x & -x
+        yield low.bit_length() - 1
+        x ^= low
+
+
+def _union_windows(cfgs: Sequence[dict]) -> List[Tuple[int, int]]:
+    spans = sorted((int(s), int(e)) for cfg in cfgs for s, e in (cfg.get("active_windows") or []))
+    merged: List[Tuple[int, int]] = []
+    for s, e in spans:
+        if merged and s <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], e))
+        else:
+            merged.append((s, e))
+    return merged
+
+
+def merged_layout(cfgs: Sequence[dict], default_cfg: dict) -> sheet_layout.SheetLayout:
+    """부분 결과 설정들을 덮는 레이아웃. 설정이 하나도 없으면 default_cfg."""
+    cfgs = [c for c in cfgs if c] or [default_cfg]
+    base = cfgs[0]
+    names = base.get("directions") or default_cfg.get("directions") or []
+    n = max(len(names), max(len(c.get("enabled_directions") or []) for c in cfgs))
+    enabled = [any(i < len(c.get("enabled_directions") or []) and c["enabled_directions"][i] for c in cfgs)
+               for i in range(n)]
+    return sheet_layout.layout_for(_union_windows(cfgs), names, enabled,
+                                   base.get("vehicle_types") or default_cfg.get("vehicle_types") or [])
+
+
+def _flatten(lay: sheet_layout.SheetLayout, table: Table) -> Tuple[List[int], int]:
+    """table -> (레이아웃 순서 평평한 배열, 값 있는 셀 비트마스크). 레이아웃 밖 셀은 버림."""
+    nr, nc = len(lay.labels), len(lay.vehicles)
+    vec = [0] * (len(lay.directions) * nr * nc)
+    mask = 0
+    rows, cells = lay.slot_rows, lay.cells
+    for idx, counts in table.items():
+        r = rows.get(idx)
+        if r is None:
+            continue
+        for key, v in counts.items():
+            pos = cells.get(key)
+            if pos is not None and v:
+                i = (pos[0] * nr + r) * nc + pos[1]
+                vec[i] += v
+                mask |= 1 << i
+    return vec, mask
+
+
+def _declared(lay: sheet_layout.SheetLayout, cfg: Optional[dict]) -> int:
+    """cfg 의 사용 방향 × 시간창 슬롯 × 전체 차종 비트마스크 (cfg 없으면 0)."""
+    if not cfg:
+        return 0
+    own = sheet_layout.layout_for(cfg.get("active_windows") or [], cfg.get("directions") or [],
+                                  cfg.get("enabled_directions") or [], lay.vehicles)
+    nr, nc = len(lay.labels), len(lay.vehicles)
+    row_bits = 0
+    full_row = (1 << nc) - 1
+    for r in {lay.slot_rows[idx] for idx in own.slot_rows if idx in lay.slot_rows}:
+        row_bits |= full_row << (r * nc)
+    mask = 0
+    for dn in own.direction_names:
+        pos = lay.cells.get((dn, lay.vehicles[0])) if lay.vehicles else None
+        if pos is not None:
+            mask |= row_bits << (pos[0] * nr * nc)
+    return mask
+
+
+def _sheets_in(lay: sheet_layout.SheetLayout, mask: int) -> Tuple[int, ...]:
+    span = len(lay.labels) * len(lay.vehicles)
+    sheet = (1 << span) - 1
+    return tuple(d for k, d in enumerate(lay.directions) if mask & (sheet << (k * span)))
+
+
+def merge_site(partials: Sequence[Tuple[str, Table, Optional[dict]]], policy: str = "sum",
+               default_cfg: Optional[dict] = None) -> MergeResult:
+    if policy not in POLICIES:
+        raise ValueError(f"알 수 없는 병합 방식: {policy} ({', '.join(POLICIES)})")
+    lay = merged_layout([cfg for _n, _t, cfg in partials], default_cfg or {})
+    names = [name for name, _t, _c in partials]
+    vecs, masks = [], []
+    for _name, table, cfg in partials:
+        vec, observed = _flatten(lay, table)
+        vecs.append(vec)
+        masks.append(observed | _declared(lay, cfg))
+
+    res = MergeResult(table={}, layout=lay, policy=policy)
+    # 겹침: 쌍별 AND, 충돌 후보: 둘 이상이 맡은 셀
+    seen = dup = 0
+    for m in masks:
+        dup |= seen & m
+        seen |= m
+    for a in range(len(masks)):
+        for b in range(a + 1, len(masks)):
+            both = masks[a] & masks[b]
+            if both:
+                res.overlaps.append((names[a], names[b], _popcount(both), _sheets_in(lay, both)))
+
+    merged = [sum(col) for col in zip(*vecs)] if vecs else [0] * (len(lay.directions) * len(lay.labels) * len(lay.vehicles))
+    nr, nc = len(lay.labels), len(lay.vehicles)
+    for i in _bits(dup):
+        vals = [(names[p], vecs[p][i]) for p in range(len(vecs)) if vecs[p][i]]
+        if len(vals) < 2:
+            continue
+        if policy == "max":
+            merged[i] = max(v for _n, v in vals)
+        elif policy == "first":
+            merged[i] = vals[0][1]
+        k, rest = divmod(i, nr * nc)
+        r, c = divmod(rest, nc)
+        res.conflicts.append(Conflict(direction=lay.directions[k], slot=lay.labels[r], vehicle=lay.vehicles[c],
+                                      values=vals, merged=merged[i]))
+
+    full = (1 << len(merged)) - 1
+    missing = full & ~seen if any(cfg for _n, _t, cfg in partials) else 0
+    span = nr * nc
+    for k, d in enumerate(lay.directions):
+        n = _popcount((missing >> (k * span)) & ((1 << span) - 1))
+        if n:
+            res.gaps[d] = n
+
+    # 평평한 배열 -> CountTable 모양 (슬롯 index 는 각 행의 첫 슬롯)
+    idx_of_row = [t // lay.slot_sec + 1 for t in lay.slot_starts]
+    for i, v in enumerate(merged):
+        if not v:
+            continue
+        k, rest = divmod(i, span)
+        r, c = divmod(rest, nc)
+        res.table.setdefault(idx_of_row[r], {})[(lay.direction_names[k], lay.vehicles[c])] = v
+        res.total += v
+    return res
+
+
+def conflict_rows(site: str, result: MergeResult) -> List[list]:
+    """충돌 보고 CSV 행 (머리글 제외)."""
+    return [[site, c.direction, c.slot, c.vehicle, c.merged, result.policy,
+             " / ".join(f"{n}={v}" for n, v in c.values)] for c in result.conflicts]
+
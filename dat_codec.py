@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""
+DAT 코덱 — 환경설정/계수 프로그램 공용
+- 쓰기: write_dat(path, info, matrices, sparse=False)  — cp949 strict (못 쓰는 헤더 값은 ValueError)
+    섹션마다 한 번에 기록(셀마다 f.write 하지 않음). sparse=True 면 0 셀을 생략하고
+    [INFO] 에 SPARSE=1, 각 섹션 첫 줄에 SHAPE=행,열 을 남깁니다.
+- 읽기: read_dat(path) -> DatRecord(info, sections)
+    파일을 줄 단위로 흘려 읽어 섹션별 정수 2차원 리스트(계수 배열)로 채웁니다.
+    SPARSE/SHAPE 가 없는 기존(밀집) DAT 도 그대로 읽습니다.
+- 색인: index_projects(projects_root) -> {SN_...: SurveyIndex}
+    Projects/SN_*/*.dat 를 프로세스 풀에서 병렬로 파싱해 과업 단위로 합산합니다.
+
+파일 형식 (cp949, CRLF):
+    [INFO]
+    DOC_NO=WN_xxx_YYYYMMDD_USERID
+    ...
+    [0]
+    0,0=12
+    0,1=3
+"""
+import os, sys, glob
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DAT_ENCODING = "cp949"
+INFO_KEYS = ("DOC_NO", "SURVEY_NO", "WORK_NO", "USER_ID", "USER_NM", "REC_DATE",
+             "SEQ_NO", "START_TIME", "LAST_TIME", "STATE", "DELETED")
+POOL_MIN_FILES = 32      # 이보다 적으면 프로세스 풀 없이 현재 프로세스에서 파싱
+
+
+@dataclass
+class DatRecord:
+    info: Dict[str, str] = field(default_factory=dict)
+    sections: List[List[List[int]]] = field(default_factory=list)
+    path: str = ""
+
+    @property
+    def deleted(self) -> bool:
+        return str(self.info.get("DELETED", "0")).strip() not in ("", "0")
+
+
+@dataclass
+class SurveyIndex:
+    """과업(SN_...) 하나의 DAT 색인/합계."""
+    survey_no: str
+    docs: List[Dict[str, str]] = field(default_factory=list)          # 파일별 [INFO] (+ _path)
+    works: Dict[str, List[List[List[int]]]] = field(default_factory=dict)  # WORK_NO -> 섹션 합계
+    total: List[List[List[int]]] = field(default_factory=list)        # 과업 전체 섹션 합계
+    errors: List[Tuple[str, str]] = field(default_factory=list)       # (path, 오류)
+
+
+# ---------------- 쓰기 ----------------
+def _row_ints(row) -> List[int]:
+    try:
+        return [int(v) for v in row]
+    except Exception:
+        out = []
+        for v in row:
+            try:
+                out.append(int(v))
+            except Exception:
+                out.append(0)
+        return out
+
+
+def format_section(index: int, mat, sparse: bool = False) -> str:
+    """섹션 하나를 문자열로 (마지막 빈 줄 포함)."""
+    lines = [f"[{index}]"]
+    rows = [_row_ints(row) for row in (mat or [])]
+    if sparse:
+        ncols = max((len(r) for r in rows), default=0)
+        lines.append(f"SHAPE={len(rows)},{ncols}")
+        for r, row in enumerate(rows):
+            lines.extend(f"{r},{c}={v}" for c, v in enumerate(row) if v)
+    else:
+        for r, row in enumerate(rows):
+            lines.extend(f"{r},{c}={v}" for c, v in enumerate(row))
+    lines.append("")
+    return "\r\n".join(lines) + "\r\n"
+
+
+def format_info(info: Dict[str, object], sparse: bool = False) -> str:
+    lines = ["[INFO]"]
+    keys = [k for k in INFO_KEYS if k in info] + [k for k in info if k not in INFO_KEYS]
+    lines.extend(f"{k}={info[k]}" for k in keys)
+    if sparse:
+        lines.append("SPARSE=1")
+    lines.append("")
+    return "\r\n".join(lines) + "\r\n"
+
+
+def check_info(info: Dict[str, object]):
+    """[INFO] 값이 cp949 로 기록 가능한지 확인. 안 되면 어느 항목인지 담아 ValueError."""
+    for k, v in info.items():
+        try:
+            f"{k}={v}".encode(DAT_ENCODING)
+        except UnicodeEncodeError as e:
+            raise ValueError(f"DAT 헤더 {k} 값을 {DAT_ENCODING} 로 쓸 수 없습니다: {v!r}") from e
+
+
+def write_dat(path: str, info: Dict[str, object], matrices=None, sparse: bool = False) -> str:
+    """DAT 파일 기록. 헤더 1회 + 섹션마다 1회 write.
+    쓰기는 strict 인코딩: cp949 로 못 쓰는 헤더 값은 '?' 로 바꾸지 않고 파일을 만들기 전에 ValueError."""
+    check_info(info)
+    with open(path, "w", encoding=DAT_ENCODING, newline="") as f:
+        f.write(format_info(info, sparse))
+        for section_index, mat in enumerate(matrices or []):
+            f.write(format_section(section_index, mat, sparse))
+    return path
+
+
+# ---------------- 읽기 ----------------
+def _grow(mat: List[List[int]], r: int, c: int):
+    while len(mat) <= r:
+        mat.append([])
+    row = mat[r]
+    if len(row) <= c:
+        row.extend([0] * (c + 1 - len(row)))
+
+
+def iter_dat_lines(path: str) -> Iterable[str]:
+    with open(path, "r", encoding=DAT_ENCODING, errors="replace", newline="") as f:
+        for line in f:
+            line = line.strip()     # 기존 파일의 \r\r\n 도 허용
+            if line:
+                yield line
+
+
+def read_dat(path: str, info_only: bool = False) -> DatRecord:
+    """DAT 를 줄 단위로 읽어 DatRecord 로. info_only=True 면 [INFO] 만 읽고 멈춥니다."""
+    rec = DatRecord(path=path)
+    cur: Optional[List[List[int]]] = None
+    in_info = False
+    for line in iter_dat_lines(path):
+        if line[0] == "[" and line[-1] == "]":
+            name = line[1:-1].strip()
+            if name.upper() == "INFO":
+                in_info, cur = True, None
+                continue
+            if info_only:
+                break
+            in_info = False
+            try:
+                idx = int(name)
+            except ValueError:
+                cur = None
+                continue
+            while len(rec.sections) <= idx:
+                rec.sections.append([])
+            cur = rec.sections[idx]
+            continue
+        key, sep, val = line.partition("=")
+        if not sep:
+            continue
+        if in_info:
+            rec.info[key.strip()] = val.strip()
+            continue
+        if cur is None:
+            continue
+        rc, comma, cc = key.partition(",")
+        if not comma:
+            if key.strip().upper() == "SHAPE":     # 희소 형식: 0 셀까지 포함한 크기
+                try:
+                    nr, nc = (int(x) for x in val.split(","))
+                    if nr > 0:
+                        _grow(cur, nr - 1, max(0, nc - 1))
+                        for row in cur:
+                            if len(row) < nc:
+                                row.extend([0] * (nc - len(row)))
+                except ValueError:
+                    pass
+            continue
+        try:
+            r, c = int(rc), int(cc)
+            v = int(val)
+        except ValueError:
+            continue
+        if r >= len(cur) or c >= len(cur[r]):
+            _grow(cur, r, c)
+        cur[r][c] = v
+    # 밀집 형식에서 행 길이가 들쭉날쭉하면 맞춤
+    for mat in rec.sections:
+        ncols = max((len(row) for row in mat), default=0)
+        for row in mat:
+            if len(row) < ncols:
+                row.extend([0] * (ncols - len(row)))
+    return rec
+
+
+# ---------------- 합산 / 색인 ----------------
+def add_sections(acc: List[List[List[int]]], sections: List[List[List[int]]]) -> List[List[List[int]]]:
+    """acc += sections (모양이 다르면 큰 쪽에 맞춰 늘림)."""
+    while len(acc) < len(sections):
+        acc.append([])
+    for a, s in zip(acc, sections):
+        for r, row in enumerate(s):
+            if not row:
+                continue
+            _grow(a, r, len(row) - 1)
+            arow = a[r]
+            for c, v in enumerate(row):
+                if v:
+                    arow[c] += v
+    return acc
+
+
+def _index_batch(paths: List[str], include_deleted: bool = False):
+    """프로세스 풀 작업 단위 (모듈 최상위 함수여야 spawn 에서 pickle 가능).
+    파일 묶음을 파싱해 (SN, WORK_NO) 별 부분합만 돌려주어 프로세스 간 전송량을 줄입니다."""
+    docs, errors = [], []
+    sums: Dict[Tuple[str, str], List[List[List[int]]]] = {}
+    for path in paths:
+        sn = os.path.basename(os.path.dirname(path))
+        try:
+            rec = read_dat(path)
+        except Exception as e:
+            errors.append((sn, path, f"{type(e).__name__}: {e}"))
+            continue
+        doc = dict(rec.info)
+        doc["_path"] = path
+        docs.append((sn, doc))
+        if rec.deleted and not include_deleted:
+            continue
+        wn = rec.info.get("WORK_NO") or "_".join(os.path.basename(path).split("_")[:2])
+        add_sections(sums.setdefault((sn, wn), []), rec.sections)
+    return docs, errors, sums
+
+
+def find_dat_files(projects_root: str, survey_no: Optional[str] = None) -> List[str]:
+    pattern = os.path.join(projects_root, survey_no or "SN_*", "*.dat")
+    return sorted(glob.glob(pattern))
+
+
+def index_projects(projects_root: str, survey_no: Optional[str] = None,
+                   workers: Optional[int] = None, include_deleted: bool = False) -> Dict[str, SurveyIndex]:
+    """Projects/SN_*/ 아래 DAT 를 병렬 파싱해 과업별 SurveyIndex 로 합산합니다."""
+    paths = find_dat_files(projects_root, survey_no)
+    nproc = workers or min(8, os.cpu_count() or 1)
+    if len(paths) < POOL_MIN_FILES or nproc <= 1:
+        results = [_index_batch(paths, include_deleted)]
+        pool = None
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        step = max(1, -(-len(paths) // (nproc * 4)))
+        batches = [paths[i:i + step] for i in range(0, len(paths), step)]
+        pool = ProcessPoolExecutor(max_workers=nproc)
+        results = pool.map(_index_batch, batches, [include_deleted] * len(batches))
+    out: Dict[str, SurveyIndex] = {}
+    try:
+        for docs, errors, sums in results:
+            for sn, doc in docs:
+                out.setdefault(sn, SurveyIndex(survey_no=sn)).docs.append(doc)
+            for sn, path, err in errors:
+                out.setdefault(sn, SurveyIndex(survey_no=sn)).errors.append((path, err))
+            for (sn, wn), sections in sums.items():
+                idx = out.setdefault(sn, SurveyIndex(survey_no=sn))
+                add_sections(idx.works.setdefault(wn, []), sections)
+                add_sections(idx.total, sections)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return out
+
+
+def _main(argv: List[str]) -> int:
+    """python dat_codec.py <Projects 폴더> [SN_...] — 과업별 파일 수/합계 출력."""
+    import time
+    if not argv:
+        print(_main.__doc__)
+        return 2
+    t0 = time.perf_counter()
+    res = index_projects(argv[0], argv[1] if len(argv) > 1 else None)
+    ms = (time.perf_counter() - t0) * 1000.0
+    for sn, idx in sorted(res.items()):
+        total = sum(v for mat in idx.total for row in mat for v in row)
+        print(f"{sn}: 파일 {len(idx.docs)}개, 작업 {len(idx.works)}개, 합계 {total}, 오류 {len(idx.errors)}")
+    print(f"{sum(len(i.docs) for i in res.values())}개 파일, {ms:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
@@ -10,10 +10,23 @@
 - 시트 미리보기: 탭=방향(그룹), 열=시간대 + 현재 조사차종(차종명) 컬럼들
 데이터 파일: env_data_plus_allinone.json
 """
-import os, sys, json, datetime as dt
-from PyQt5 import QtWidgets, QtCore, QtGui
+import os, sys, json, hashlib, threading, datetime as dt
+import dat_codec
+import sheet_layout
+import site_search
+# 계수 프로그램(PyQt6) 안에서 페이지를 띄울 때는 이미 로드된 PyQt6 를 그대로 사용합니다.
+if "PyQt6" in sys.modules:
+    from PyQt6 import QtWidgets, QtCore, QtGui
+else:
+    try:
+        from PyQt5 import QtWidgets, QtCore, QtGui
+    except ImportError:
+        from PyQt6 import QtWidgets, QtCore, QtGui
 
 APP_VER = "1.1.6-patch8"
+# 계수 프로그램이 이 파일을 같은 프로세스에 모듈로 불러와 Main(data, parent)를 띄울 수 있음을 표시
+ENV_INPROCESS_API = 1
+
 
 # ----- NAS / Survey 데이터 루트 설정 -----
 # 외부/내부에서 브라우저로 접근할 때 사용하는 HTTP 루트 (참고용 상수)
@@ -102,6 +115,7 @@ def write_survey_dat(
     state: int = 1,
     deleted: int = 0,
     matrices=None,    # 계수 데이터 (2차원 리스트들의 리스트)
+    sparse: bool = False,  # True: 0 셀 생략 (SPARSE=1, dat_codec.read_dat 가 복원)
 ):
     """
     조사/지점 작업 1건에 대한 DAT 파일을 생성합니다.
@@ -113,6 +127,7 @@ def write_survey_dat(
     matrices 는 2차원 리스트들의 리스트입니다.
         예: [ mat0, mat1, ... ]
         matN 은 rows x cols 크기의 int 값 리스트입니다.
+    실제 기록/읽기는 dat_codec 모듈(계수 프로그램과 공용)이 담당합니다.
     """
     # 조사일 문자열 처리
     if isinstance(rec_date, (dt.date, dt.datetime)):
@@ -127,34 +142,20 @@ def write_survey_dat(
     folder = ensure_project_dir(survey_no)
     filename = _os.path.join(folder, doc_no + ".dat")
 
-    # 헤더 작성
-    with open(filename, "w", encoding="cp949", newline="\r\n") as f:
-        f.write("[INFO]\r\n")
-        f.write(f"DOC_NO={doc_no}\r\n")
-        f.write(f"SURVEY_NO={survey_no}\r\n")
-        f.write(f"WORK_NO={work_no}\r\n")
-        f.write(f"USER_ID={user_id}\r\n")
-        f.write(f"USER_NM={user_name}\r\n")
-        f.write(f"REC_DATE={rec_date_str}\r\n")
-        f.write(f"SEQ_NO={int(seq_no)}\r\n")
-        f.write(f"START_TIME={format_korean_datetime(start_time)}\r\n")
-        f.write(f"LAST_TIME={format_korean_datetime(last_time)}\r\n")
-        f.write(f"STATE={int(state)}\r\n")
-        f.write(f"DELETED={int(deleted)}\r\n")
-        f.write("\r\n")
-
-        # 계수 데이터 섹션 작성
-        if matrices:
-            for section_index, mat in enumerate(matrices):
-                f.write(f"[{section_index}]\r\n")
-                for r, row in enumerate(mat):
-                    for c, val in enumerate(row):
-                        try:
-                            ival = int(val)
-                        except Exception:
-                            ival = 0
-                        f.write(f"{r},{c}={ival}\r\n")
-                f.write("\r\n")
+    info = {
+        "DOC_NO": doc_no,
+        "SURVEY_NO": survey_no,
+        "WORK_NO": work_no,
+        "USER_ID": user_id,
+        "USER_NM": user_name,
+        "REC_DATE": rec_date_str,
+        "SEQ_NO": int(seq_no),
+        "START_TIME": format_korean_datetime(start_time),
+        "LAST_TIME": format_korean_datetime(last_time),
+        "STATE": int(state),
+        "DELETED": int(deleted),
+    }
+    dat_codec.write_dat(filename, info, matrices, sparse=sparse)
 
     return filename
 
@@ -210,29 +211,345 @@ def _hotkeys_db_path():
     return os.path.join(folder, "hotkeys_db.json")
 
 
-def export_hotkeys_db(data):
-    """계수프로그램이 읽을 hotkeys_db.json 생성(과업/지점/방향/차종/단축키 포함)."""
-    out = {
-        "version": 1,
+# ----- hotkeys_db.json (계수 프로그램용 단축키 투영본, version 2) -----
+# 전체 프로젝트/과업 사본 대신, 지점별로 계수 프로그램이 쓰는 값만 담습니다.
+#   {"version": 2, "exported_at", "hash",
+#    "surveys": [{"info": {"sn","name"}, "hash", "sites": [
+#        {"작업번호","지번","지점명","방향수","groups","counters",
+#         "site_hotkeys": {"by_dir": {"10": ["Q",...]}, "vehicle_names": [...]}}]}],
+#    "by_work": {"WN_0001": [과업 인덱스, 지점 인덱스]}}
+HK_SITE_KEYS = ("작업번호", "지번", "지점명", "방향수", "groups", "counters",
+                "vehicle", "vehicle_project", "vehicle_set_name")
+_HK_EXPORT_CACHE = {}     # 과업 키(sn/이름) -> 투영본 : 바뀐 과업만 다시 만듦
+_HK_PROJ_HASH = None      # 투영에 쓰인 프로젝트(차종/단축키 시트) hash — 바뀌면 전체 다시
+_HK_LAST_HASH = None      # 마지막으로 기록한 전체 hash (같으면 파일을 다시 쓰지 않음)
+# 다음 기록 때 다시 투영할 과업 키. 조사 관리 화면이 편집한 과업을 표시하고(mark_hotkeys_changed),
+# 저장 스냅샷을 만들 때 take_hotkeys_changed() 로 가져갑니다. None 이면 전체.
+_HK_CHANGED = None
+_HK_CHANGED_LOCK = threading.Lock()
+
+
+def _json_hash(obj):
+    return hashlib.sha1(json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def _hk_sheet_lookup(projects, preferred):
+    """시트명 -> (차종명 목록, 키 목록). 조사차종이 참조하는 프로젝트의 시트를 우선."""
+    out = {}
+    ordered = sorted(projects or [], key=lambda p: 0 if (p or {}).get("name") == preferred else 1)
+    for p in ordered:
+        for sh in (p or {}).get("hotkey_sheets_global", []) or []:
+            name = str((sh or {}).get("name", "")).strip()
+            if not name or name in out:
+                continue
+            items = [it for it in (sh.get("items") or []) if isinstance(it, dict)]
+            try:
+                items.sort(key=lambda it: int(it.get("순번", 0)))
+            except Exception:
+                pass
+            out[name] = ([str(it.get("차종명") or it.get("차종") or "") for it in items],
+                         [str(it.get("단축키") or it.get("키") or "").strip() for it in items])
+    return out
+
+
+def _hk_project_survey(survey, projects):
+    info = survey.get("info") or {}
+    veh = survey.get("vehicle") or {}
+    preferred = veh.get("작업참조", "") if isinstance(veh, dict) else ""
+    sheets = _hk_sheet_lookup(projects, preferred)
+    local_names = [str(r.get("차종명", "")) for r in (veh.get("차종목록") or [])] if isinstance(veh, dict) else []
+    sites_out = []
+    for site in survey.get("sites") or []:
+        if not isinstance(site, dict):
+            continue
+        st = {k: site[k] for k in HK_SITE_KEYS if k in site}
+        hk = site.get("site_hotkeys") if isinstance(site.get("site_hotkeys"), dict) else None
+        if not hk or not hk.get("by_dir"):
+            by_dir, vnames = {}, []
+            for c in site.get("counters") or []:
+                if not isinstance(c, dict):
+                    continue
+                sheet = str(c.get("name") or c.get("방향") or "").strip()
+                if c.get("dir") is None or sheet not in sheets:
+                    continue
+                names, keys = sheets[sheet]
+                by_dir[str(c.get("dir"))] = keys
+                vnames = vnames or names
+            hk = {"by_dir": by_dir, "vehicle_names": local_names or vnames}
+        st["site_hotkeys"] = hk
+        sites_out.append(st)
+    return {"info": {"sn": info.get("sn", ""), "name": info.get("name", "")}, "sites": sites_out}
+
+
+def _hk_survey_key(survey, si=None):
+    info = (survey or {}).get("info") or {}
+    return info.get("sn") or info.get("name") or f"#{si}"
+
+
+def mark_hotkeys_changed(surveys=None):
+    """다음 hotkeys_db 기록 때 이 과업들(없으면 전체)을 다시 투영하도록 표시."""
+    global _HK_CHANGED
+    with _HK_CHANGED_LOCK:
+        if surveys is None:
+            _HK_CHANGED = None
+        elif _HK_CHANGED is not None:
+            _HK_CHANGED.update(_hk_survey_key(sv) for sv in surveys if isinstance(sv, dict))
+
+
+def take_hotkeys_changed():
+    """표시된 과업 키를 가져가고 비움 (None = 전체)."""
+    global _HK_CHANGED
+    with _HK_CHANGED_LOCK:
+        changed, _HK_CHANGED = _HK_CHANGED, set()
+    return changed
+
+
+def _requeue_hotkeys_changed(changed):
+    """기록 실패 시 가져간 표시를 되돌림."""
+    global _HK_CHANGED
+    with _HK_CHANGED_LOCK:
+        if changed is None:
+            _HK_CHANGED = None
+        elif _HK_CHANGED is not None:
+            _HK_CHANGED.update(changed)
+
+
+def build_hotkeys_projection(data, changed=()):
+    """env 데이터 -> hotkeys_db.json 투영본.
+    changed 에 든 과업 키(None 이면 전체)와 캐시에 없는 과업만 다시 만들고 나머지는 이전 결과를 재사용합니다.
+    과업 내용을 직렬화해 비교하지 않으므로, 편집한 과업은 mark_hotkeys_changed 로 알려야 합니다."""
+    global _HK_PROJ_HASH
+    data = data or {}
+    projects = data.get("projects", []) or []
+    proj_hash = _json_hash([{"name": p.get("name"), "vehicle_set": p.get("vehicle_set"),
+                             "hotkey_sheets_global": p.get("hotkey_sheets_global")}
+                            for p in projects if isinstance(p, dict)])
+    if proj_hash != _HK_PROJ_HASH:
+        changed, _HK_PROJ_HASH = None, proj_hash
+    surveys_out, by_work, seen = [], {}, set()
+    for si, sv in enumerate(data.get("surveys", []) or []):
+        if not isinstance(sv, dict):
+            continue
+        key = _hk_survey_key(sv, si)
+        ckey = key if key not in seen else f"{key}#{si}"     # 복제로 sn 이 같은 과업은 따로 캐시
+        entry = _HK_EXPORT_CACHE.get(ckey)
+        if entry is None or changed is None or key in changed or key.startswith("#"):
+            entry = _hk_project_survey(sv, projects)
+            entry["hash"] = _json_hash(entry)
+            _HK_EXPORT_CACHE[ckey] = entry
+        seen.add(ckey)
+        idx = len(surveys_out)
+        surveys_out.append(entry)
+        for ti, st in enumerate(entry["sites"]):
+            wn = st.get("작업번호")
+            if wn and wn not in by_work:
+                by_work[wn] = [idx, ti]
+    for key in list(_HK_EXPORT_CACHE):
+        if key not in seen:
+            _HK_EXPORT_CACHE.pop(key, None)
+    return {
+        "version": 2,
         "exported_at": dt.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        # 계수쪽에서 그대로 참조할 수 있게 전체 프로젝트/과업 구조를 그대로 포함
-        "projects": (data or {}).get("projects", []) or [],
-        "surveys": (data or {}).get("surveys", []) or [],
+        "hash": hashlib.sha1("".join(e["hash"] for e in surveys_out).encode("ascii")).hexdigest(),
+        "surveys": surveys_out,
+        "by_work": by_work,
     }
+
+
+def export_hotkeys_db(data, changed=None):
+    """계수프로그램이 읽을 hotkeys_db.json 생성(과업/지점/방향/차종/단축키 투영본).
+    changed: 다시 투영할 과업 키 (None 이면 전체). 내용 hash 가 직전 기록과 같으면 파일을 다시 쓰지 않습니다."""
+    global _HK_LAST_HASH
     path = _hotkeys_db_path()
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(out, f, ensure_ascii=False, indent=2)
+    out = build_hotkeys_projection(data, changed)
+    if _HK_LAST_HASH is None:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                _HK_LAST_HASH = (json.load(f) or {}).get("hash") or ""
+        except Exception:
+            _HK_LAST_HASH = ""
+    if out["hash"] == _HK_LAST_HASH and os.path.exists(path):
+        return path
+    _write_json_atomic(path, out, compact=True)
+    _HK_LAST_HASH = out["hash"]
     return path
 
 
-def save_data(data):
-    with open(DATA_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+def _write_json_atomic(path, obj, compact=False):
+    """임시 파일에 다 쓴 뒤 교체 (NAS 에서 중간에 끊겨도 읽는 쪽이 잘린 JSON 을 보지 않도록)."""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        if compact:
+            json.dump(obj, f, ensure_ascii=False, separators=(",", ":"))
+        else:
+            json.dump(obj, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+# 저장 알림: 같은 프로세스에서 띄운 계수 프로그램이 디스크를 다시 읽지 않고 콤보/단축키를 갱신하도록
+_SAVE_LISTENERS = []
+
+def add_save_listener(fn):
+    if fn not in _SAVE_LISTENERS:
+        _SAVE_LISTENERS.append(fn)
+
+def remove_save_listener(fn):
+    try:
+        _SAVE_LISTENERS.remove(fn)
+    except ValueError:
+        pass
+
+def use_data_path(path):
+    """데이터 파일 위치를 바꿈 (계수 프로그램이 이미 찾은 env_data_plus_allinone.json 을 공유할 때)."""
+    global DATA_ROOT, DATA_PATH, PROJECTS_ROOT
+    if not path:
+        return
+    DATA_PATH = path
+    DATA_ROOT = os.path.dirname(os.path.abspath(path))
+    PROJECTS_ROOT = os.path.join(DATA_ROOT, "Projects")
+
+
+def _write_data_files(data, changed=None):
+    """env_data_plus_allinone.json + hotkeys_db.json 실제 기록 (동기, 작업 스레드에서도 호출).
+    changed 는 take_hotkeys_changed() 결과 — 실패하면 다음 기록 때 다시 투영하도록 되돌립니다."""
+    try:
+        _write_json_atomic(DATA_PATH, data)
+    except Exception:
+        _requeue_hotkeys_changed(changed)
+        raise
     # 계수프로그램 연동용 DB도 함께 갱신
     try:
-        export_hotkeys_db(data)
+        export_hotkeys_db(data, changed)
     except Exception:
-        pass
+        _requeue_hotkeys_changed(changed)
+
+
+def _notify_saved(data):
+    for fn in list(_SAVE_LISTENERS):
+        try:
+            fn(data)
+        except Exception:
+            pass
+
+
+# 환경설정 창이 떠 있으면 저장은 SaveCoordinator 가 모아서 처리
+_SAVE_COORDINATOR = None
+
+def save_data(data):
+    if _SAVE_COORDINATOR is not None:
+        _SAVE_COORDINATOR.mark_dirty(data)
+        return
+    _write_data_files(data, take_hotkeys_changed())
+    _notify_saved(data)
+
+
+class SaveCoordinator(QtCore.QObject):
+    """셀 편집/추가/삭제마다 NAS 에 전체 JSON 두 개를 다시 쓰지 않도록 저장을 모읍니다.
+
+    - save_data() 는 '변경됨'만 표시하고, COALESCE_MS 안의 변경은 한 번에 기록합니다.
+    - 스냅샷(json 직렬화)만 UI 스레드에서 만들고, 파일 기록은 작업 스레드에서 합니다.
+    - 저장 버튼/창 닫기에서는 flush(wait=True) 로 남은 변경을 바로 기록합니다.
+    - stateChanged: "dirty" / "saving" / "saved" / "error"
+    """
+    stateChanged = QtCore.pyqtSignal(str)
+    _done = QtCore.pyqtSignal(int, str)
+    COALESCE_MS = 1500
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._data = None
+        self._gen = 0           # 변경 세대
+        self._saved_gen = 0     # 기록 완료된 세대
+        self._thread = None
+        self._result = None     # 작업 스레드 결과 (세대, 오류) — 시그널/flush(wait) 중 먼저 받는 쪽이 처리
+        self._rerun = False
+        self.state = "saved"
+        self.last_error = ""
+        self.saved_at = None
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+        self._done.connect(self._on_done)
+
+    def _set_state(self, st):
+        if st != self.state:
+            self.state = st
+            self.stateChanged.emit(st)
+
+    def is_dirty(self):
+        return self._gen != self._saved_gen
+
+    def stop(self):
+        """예약된 저장/재시도를 멈춤 (창을 닫을 때)."""
+        self._timer.stop()
+
+    def mark_dirty(self, data):
+        self._data = data
+        self._gen += 1
+        if self.state != "saving":
+            self._set_state("dirty")
+        if not self._timer.isActive():
+            self._timer.start(self.COALESCE_MS)
+
+    def flush(self, wait=False):
+        self._timer.stop()
+        if self._thread is not None and self._thread.is_alive():
+            if not wait:
+                self._rerun = True
+                return
+            self._thread.join()
+            # 큐에 들어간 _done 보다 먼저 결과를 반영 (안 하면 같은 세대를 한 번 더 기록)
+            res, self._result = self._result, None
+            if res is not None:
+                self._finish(*res)
+        if self._data is None or not self.is_dirty():
+            return
+        gen = self._gen
+        snap = json.dumps(self._data, ensure_ascii=False)
+        changed = take_hotkeys_changed()
+        self._set_state("saving")
+        if wait:
+            self._finish(gen, self._write(snap, changed))
+            return
+        self._thread = threading.Thread(target=self._run, args=(gen, snap, changed), name="env-save", daemon=True)
+        self._thread.start()
+
+    def _run(self, gen, snap, changed):
+        err = self._write(snap, changed)
+        self._result = (gen, err)
+        self._done.emit(gen, err)
+
+    @staticmethod
+    def _write(snap, changed=None):
+        try:
+            _write_data_files(json.loads(snap), changed)
+            return ""
+        except Exception as e:
+            return str(e)
+
+    def _on_done(self, gen, err):
+        res, self._result = self._result, None
+        if res is None or (not err and gen <= self._saved_gen):
+            return      # flush(wait=True) 에서 이미 처리한 결과
+        self._finish(gen, err)
+
+    def _finish(self, gen, err):
+        self._thread = None
+        if err:
+            self.last_error = err
+            self._set_state("error")
+            self._timer.start(self.COALESCE_MS * 4)   # 잠시 후 다시 시도
+            return
+        self._saved_gen = max(self._saved_gen, gen)
+        self.saved_at = dt.datetime.now()
+        self.last_error = ""
+        _notify_saved(self._data)
+        if self.is_dirty():
+            self._set_state("dirty")
+            self._timer.start(0 if self._rerun else self.COALESCE_MS)
+        else:
+            self._set_state("saved")
+        self._rerun = False
 class WorkVehicleTab(QtWidgets.QWidget):
     def __init__(self, work):
         super().__init__(work); self.work = work
@@ -267,12 +584,12 @@ class WorkVehicleTab(QtWidgets.QWidget):
                 name = row.get("차종구분", row.get("차종명",""))
                 desc = row.get("설명", "")
                 self.tbl.setItem(r,0,QtWidgets.QTableWidgetItem(str(num)))
-                self.tbl.item(r,0).setTextAlignment(QtCore.Qt.AlignHCenter|QtCore.Qt.AlignVCenter)
-                self.tbl.item(r,0).setFlags(self.tbl.item(r,0).flags() & ~QtCore.Qt.ItemIsEditable)
+                self.tbl.item(r,0).setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter|QtCore.Qt.AlignmentFlag.AlignVCenter)
+                self.tbl.item(r,0).setFlags(self.tbl.item(r,0).flags() & ~QtCore.Qt.ItemFlag.ItemIsEditable)
                 self.tbl.setItem(r,1,QtWidgets.QTableWidgetItem(name))
-                self.tbl.item(r,1).setTextAlignment(QtCore.Qt.AlignHCenter|QtCore.Qt.AlignVCenter)
+                self.tbl.item(r,1).setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter|QtCore.Qt.AlignmentFlag.AlignVCenter)
                 self.tbl.setItem(r,2,QtWidgets.QTableWidgetItem(desc))
-                self.tbl.item(r,2).setTextAlignment(QtCore.Qt.AlignHCenter|QtCore.Qt.AlignVCenter)
+                self.tbl.item(r,2).setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter|QtCore.Qt.AlignmentFlag.AlignVCenter)
                 
         self.tbl.blockSignals(False)
         try:
@@ -305,7 +622,7 @@ class WorkVehicleTab(QtWidgets.QWidget):
 
     def add_row(self):
         r=self.tbl.rowCount(); self.tbl.insertRow(r)
-        it0=QtWidgets.QTableWidgetItem(str(r+1)); it0.setTextAlignment(QtCore.Qt.AlignHCenter|QtCore.Qt.AlignVCenter); it0.setFlags(it0.flags() & ~QtCore.Qt.ItemIsEditable); self.tbl.setItem(r,0,it0);it1=QtWidgets.QTableWidgetItem(""); it1.setTextAlignment(QtCore.Qt.AlignHCenter|QtCore.Qt.AlignVCenter); self.tbl.setItem(r,1,it1);it2=QtWidgets.QTableWidgetItem(""); it2.setTextAlignment(QtCore.Qt.AlignHCenter|QtCore.Qt.AlignVCenter); self.tbl.setItem(r,2,it2);it3=QtWidgets.QTableWidgetItem(""); it3.setFlags(it3.flags() & ~QtCore.Qt.ItemIsEditable); self.tbl.setItem(r,3,it3)
+        it0=QtWidgets.QTableWidgetItem(str(r+1)); it0.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter|QtCore.Qt.AlignmentFlag.AlignVCenter); it0.setFlags(it0.flags() & ~QtCore.Qt.ItemFlag.ItemIsEditable); self.tbl.setItem(r,0,it0);it1=QtWidgets.QTableWidgetItem(""); it1.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter|QtCore.Qt.AlignmentFlag.AlignVCenter); self.tbl.setItem(r,1,it1);it2=QtWidgets.QTableWidgetItem(""); it2.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter|QtCore.Qt.AlignmentFlag.AlignVCenter); self.tbl.setItem(r,2,it2);it3=QtWidgets.QTableWidgetItem(""); it3.setFlags(it3.flags() & ~QtCore.Qt.ItemFlag.ItemIsEditable); self.tbl.setItem(r,3,it3)
         
         self.persist()
 
@@ -461,7 +778,7 @@ class WorkHotkeyTab(QtWidgets.QWidget):
                 self.tbl.setItem(r,2,QtWidgets.QTableWidgetItem(rec.get("단축키","")))
                 for c in (0,1,2):
                     it = self.tbl.item(r,c)
-                    if it: it.setTextAlignment(QtCore.Qt.AlignHCenter|QtCore.Qt.AlignVCenter)
+                    if it: it.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter|QtCore.Qt.AlignmentFlag.AlignVCenter)
 
         self.tbl.blockSignals(False)
         try:
@@ -525,7 +842,7 @@ class WorkHotkeyTab(QtWidgets.QWidget):
         sheets = self._sheets() or []
         i = self.counter_list.currentRow()
         if not (0 <= i < len(sheets)): return
-        if QtWidgets.QMessageBox.question(self,"삭제 확인","현재 카운터를 삭제할까요?")==QtWidgets.QMessageBox.Yes:
+        if QtWidgets.QMessageBox.question(self,"삭제 확인","현재 카운터를 삭제할까요?")==QtWidgets.QMessageBox.StandardButton.Yes:
             sheets.pop(i)
             # re-number default names 1..n if numeric
             for idx, s in enumerate(sheets, 1):
@@ -561,7 +878,7 @@ class WorkHotkeyTab(QtWidgets.QWidget):
         self.persist_current()
 
     def reset_hotkeys(self):
-        if QtWidgets.QMessageBox.question(self,"초기화","현재 카운터의 단축키를 모두 비울까요?")!=QtWidgets.QMessageBox.Yes:
+        if QtWidgets.QMessageBox.question(self,"초기화","현재 카운터의 단축키를 모두 비울까요?")!=QtWidgets.QMessageBox.StandardButton.Yes:
             return
         for r in range(self.tbl.rowCount()):
             self.tbl.setItem(r,2,QtWidgets.QTableWidgetItem(""))
@@ -598,7 +915,7 @@ class WorkTemplateTab(QtWidgets.QWidget):
         right_wrapper = QtWidgets.QWidget()
         right_wrapper_layout = QtWidgets.QVBoxLayout(right_wrapper)
         right_wrapper_layout.setContentsMargins(0, 0, 0, 0)
-        right_wrapper_layout.setAlignment(QtCore.Qt.AlignTop)
+        right_wrapper_layout.setAlignment(QtCore.Qt.AlignmentFlag.AlignTop)
 
         right = QtWidgets.QGridLayout()
         # 방향번호 / 화살표 / 입력그룹(탭)+카운터 사이 가로 여백 최소화 및 우측 영역 확장
@@ -641,7 +958,7 @@ class WorkTemplateTab(QtWidgets.QWidget):
         # 2~3행: 방향번호 리스트(세로 전체), 화살표, 입력그룹(탭) + 카운터
         # 방향번호 리스트: row 2~3 전체 사용 (카운터 영역까지 존재)
         self.dir = QtWidgets.QListWidget()
-        self.dir.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self.dir.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.ExtendedSelection)
         # 방향번호 리스트: 가로 폭을 기존보다 2배 정도 넓게
         self.dir.setFixedWidth(100)
         try:
@@ -660,12 +977,12 @@ class WorkTemplateTab(QtWidgets.QWidget):
         vbtn.addWidget(self.fr)
         vbtn.addStretch(1)
         # 화살표 버튼을 열의 오른쪽으로 정렬하여 입력그룹 탭 쪽에 가깝게 배치
-        right.addLayout(vbtn, 2, 1, 2, 1, alignment=QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
+        right.addLayout(vbtn, 2, 1, 2, 1, alignment=QtCore.Qt.AlignmentFlag.AlignHCenter | QtCore.Qt.AlignmentFlag.AlignVCenter)
 
         # 입력 그룹(탭): 위쪽 영역(row 2)
         self.tabs = QtWidgets.QListWidget()
         # 가로 방향으로는 레이아웃 공간을 꽉 채우도록 설정
-        self.tabs.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Preferred)
+        self.tabs.setSizePolicy(QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Preferred)
         # 탭 영역 세로 크기 조정 (너무 커지지 않도록 상한 설정)
         try:
             self.tabs.setMaximumHeight(100)
@@ -681,15 +998,15 @@ class WorkTemplateTab(QtWidgets.QWidget):
         counter.addWidget(lbl_counter)
         self.tbl = QtWidgets.QTableWidget(0, 3)
         # 가로는 확장, 세로는 고정 높이 사용
-        self.tbl.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Fixed)
+        self.tbl.setSizePolicy(QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Fixed)
         self.tbl.setFixedHeight(250)   # 세로 크기 조정 (입력그룹 탭을 줄이고 카운터는 크게)
         self.tbl.setHorizontalHeaderLabels(["카운터", "방향", "표시명"])
-        self.tbl.horizontalHeader().setDefaultAlignment(QtCore.Qt.AlignHCenter)
+        self.tbl.horizontalHeader().setDefaultAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter)
         self.tbl.verticalHeader().setVisible(False)
         # 카운터 템플릿 테이블은 카운터/방향은 잠그고, 표시명만 수정 가능하도록 설정
         self.tbl.setEditTriggers(
-            QtWidgets.QAbstractItemView.DoubleClicked
-            | QtWidgets.QAbstractItemView.EditKeyPressed
+            QtWidgets.QAbstractItemView.EditTrigger.DoubleClicked
+            | QtWidgets.QAbstractItemView.EditTrigger.EditKeyPressed
         )
         # 카운터 템플릿 테이블 폰트 크기 축소 (입력그룹 시트와 유사하게)
         try:
@@ -715,10 +1032,10 @@ class WorkTemplateTab(QtWidgets.QWidget):
             for r in range(self.tbl.rowCount()):
                 it_counter = self.tbl.item(r, 0)
                 if it_counter:
-                    it_counter.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
+                    it_counter.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter | QtCore.Qt.AlignmentFlag.AlignVCenter)
                 it_dir = self.tbl.item(r, 1)
                 if it_dir:
-                    it_dir.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
+                    it_dir.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter | QtCore.Qt.AlignmentFlag.AlignVCenter)
         except Exception:
             pass
         try:
@@ -997,7 +1314,7 @@ class WorkTemplateTab(QtWidgets.QWidget):
         scroll.setWidgetResizable(True)
         preview_container = QtWidgets.QWidget()
         preview_layout = QtWidgets.QVBoxLayout(preview_container)
-        preview_layout.setAlignment(QtCore.Qt.AlignTop)
+        preview_layout.setAlignment(QtCore.Qt.AlignmentFlag.AlignTop)
         preview_layout.setContentsMargins(4, 4, 4, 4)
         preview_layout.setSpacing(2)
         scroll.setWidget(preview_container)
@@ -1029,7 +1346,7 @@ class WorkTemplateTab(QtWidgets.QWidget):
                     d_item = self.tbl.item(row, 1)
                     if d_item and d_item.text().strip() == dir_str:
                         name_item = QtWidgets.QTableWidgetItem(sheet_name)
-                        name_item.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
+                        name_item.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter | QtCore.Qt.AlignmentFlag.AlignVCenter)
                         self.tbl.setItem(row, 0, name_item)
                         found = True
                 # 해당 방향번호에 대한 카운터 행이 없으면 새로 추가
@@ -1037,11 +1354,11 @@ class WorkTemplateTab(QtWidgets.QWidget):
                     r = self.tbl.rowCount()
                     self.tbl.insertRow(r)
                     name_item = QtWidgets.QTableWidgetItem(sheet_name)
-                    name_item.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
+                    name_item.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter | QtCore.Qt.AlignmentFlag.AlignVCenter)
                     self.tbl.setItem(r, 0, name_item)
                     dir_item = QtWidgets.QTableWidgetItem(dir_str)
-                    dir_item.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
-                    dir_item.setFlags(dir_item.flags() & ~QtCore.Qt.ItemIsEditable)
+                    dir_item.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter | QtCore.Qt.AlignmentFlag.AlignVCenter)
+                    dir_item.setFlags(dir_item.flags() & ~QtCore.Qt.ItemFlag.ItemIsEditable)
                     self.tbl.setItem(r, 1, dir_item)
                     self.tbl.setItem(r, 2, QtWidgets.QTableWidgetItem(""))
             self.persist_current()
@@ -1051,21 +1368,21 @@ class WorkTemplateTab(QtWidgets.QWidget):
         btn_ok.clicked.connect(_on_ok)
         btn_cancel.clicked.connect(dlg.reject)
 
-        dlg.exec_()
+        dlg.exec()
 
     def add_counter(self):
         r = self.tbl.rowCount()
         self.tbl.insertRow(r)
         # 0열: 카운터 이름(숨김 처리되지만 내부적으로 유지, 편집 불가)
         name_item = QtWidgets.QTableWidgetItem(f"카운터{r+1}")
-        name_item.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
-        name_item.setFlags(name_item.flags() & ~QtCore.Qt.ItemIsEditable)
+        name_item.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter | QtCore.Qt.AlignmentFlag.AlignVCenter)
+        name_item.setFlags(name_item.flags() & ~QtCore.Qt.ItemFlag.ItemIsEditable)
         self.tbl.setItem(r, 0, name_item)
         # 1열: 번호(가운데 정렬, 편집 불가)
         dir_item = QtWidgets.QTableWidgetItem("1")
-        dir_item.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
+        dir_item.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter | QtCore.Qt.AlignmentFlag.AlignVCenter)
         # 방향(번호) 열은 읽기 전용
-        dir_item.setFlags(dir_item.flags() & ~QtCore.Qt.ItemIsEditable)
+        dir_item.setFlags(dir_item.flags() & ~QtCore.Qt.ItemFlag.ItemIsEditable)
         self.tbl.setItem(r, 1, dir_item)
         # 2열: 표시명(사용자 수정 가능)
         label_item = QtWidgets.QTableWidgetItem("")
@@ -1096,7 +1413,7 @@ class WorkTemplateTab(QtWidgets.QWidget):
     def del_tpl(self):
         i=self.lst.currentRow(); 
         if i<0: return
-        if QtWidgets.QMessageBox.question(self,"삭제 확인","삭제할까요?")==QtWidgets.QMessageBox.Yes:
+        if QtWidgets.QMessageBox.question(self,"삭제 확인","삭제할까요?")==QtWidgets.QMessageBox.StandardButton.Yes:
             p=self.current_project(); p["templates"].pop(i); save_data(self.work.data); self.load(preferred_index=i-1)
 
 
@@ -1158,14 +1475,14 @@ class WorkTemplateTab(QtWidgets.QWidget):
             self.tbl.insertRow(r)
             # 0열: 카운터 이름(숨김 컬럼, 편집 불가)
             name_item = QtWidgets.QTableWidgetItem(c.get("name", ""))
-            name_item.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
-            name_item.setFlags(name_item.flags() & ~QtCore.Qt.ItemIsEditable)
+            name_item.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter | QtCore.Qt.AlignmentFlag.AlignVCenter)
+            name_item.setFlags(name_item.flags() & ~QtCore.Qt.ItemFlag.ItemIsEditable)
             self.tbl.setItem(r, 0, name_item)
             # 1열: 번호(가운데 정렬, 편집 불가)
             dir_text = str(c.get("dir", "") if c.get("dir", "") is not None else "")
             dir_item = QtWidgets.QTableWidgetItem(dir_text)
-            dir_item.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
-            dir_item.setFlags(dir_item.flags() & ~QtCore.Qt.ItemIsEditable)
+            dir_item.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter | QtCore.Qt.AlignmentFlag.AlignVCenter)
+            dir_item.setFlags(dir_item.flags() & ~QtCore.Qt.ItemFlag.ItemIsEditable)
             self.tbl.setItem(r, 1, dir_item)
             # 2열: 표시명 (사용자 수정 가능)
             label_item = QtWidgets.QTableWidgetItem(c.get("label", ""))
@@ -1255,7 +1572,7 @@ class WorkManagerPage(QtWidgets.QWidget):
     def del_project(self):
         i=self.lst.currentRow(); 
         if i<0: return
-        if QtWidgets.QMessageBox.question(self,"삭제 확인","삭제할까요?")==QtWidgets.QMessageBox.Yes:
+        if QtWidgets.QMessageBox.question(self,"삭제 확인","삭제할까요?")==QtWidgets.QMessageBox.StandardButton.Yes:
             self.projects().pop(i); save_data(self.data); 
             # keep selection at the position of the deleted item (or last item if deleted last)
             preferred = max(0, min(i, len(self.projects())-1))
@@ -1380,14 +1697,14 @@ class SurveyTimeTab(QtWidgets.QWidget):
         self.tbl=QtWidgets.QTableWidget( 0,4); self.tbl.setHorizontalHeaderLabels(["번호","시작","종료"]); self.tbl.setHorizontalHeaderLabels(["번호","시작","종료",""]); self.tbl.horizontalHeader().setStretchLastSection(True)
         self.tbl.verticalHeader().setVisible(False)
         try:
-            self.tbl.horizontalHeader().setDefaultAlignment(QtCore.Qt.AlignHCenter)
+            self.tbl.horizontalHeader().setDefaultAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter)
         except Exception:
             pass
         # 셀 직접 편집 금지 (자동생성된 시간대만 사용)
-        self.tbl.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.tbl.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
         # 번호/시간/종료 열 가로간격 축소 & 가운데 정렬
         try:
-            self.tbl.horizontalHeader().setDefaultAlignment(QtCore.Qt.AlignHCenter)
+            self.tbl.horizontalHeader().setDefaultAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter)
             self.tbl.setColumnWidth(0, 50)
             self.tbl.setColumnWidth(1, 70)
             self.tbl.setColumnWidth(2, 70)
@@ -1401,7 +1718,7 @@ class SurveyTimeTab(QtWidgets.QWidget):
 
     def add_row(self):
         r=self.tbl.rowCount(); self.tbl.insertRow(r)
-        it0=QtWidgets.QTableWidgetItem(str(r+1)); it0.setTextAlignment(QtCore.Qt.AlignHCenter|QtCore.Qt.AlignVCenter); self.tbl.setItem(r,0,it0);it1=QtWidgets.QTableWidgetItem(self.t1.time().toString("HH:mm")); it1.setTextAlignment(QtCore.Qt.AlignHCenter|QtCore.Qt.AlignVCenter); self.tbl.setItem(r,1,it1);it2=QtWidgets.QTableWidgetItem(self.t2.time().toString("HH:mm")); it2.setTextAlignment(QtCore.Qt.AlignHCenter|QtCore.Qt.AlignVCenter); self.tbl.setItem(r,2,it2);it3=QtWidgets.QTableWidgetItem(""); it3.setFlags(it3.flags() & ~QtCore.Qt.ItemIsEditable); self.tbl.setItem(r,3,it3)
+        it0=QtWidgets.QTableWidgetItem(str(r+1)); it0.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter|QtCore.Qt.AlignmentFlag.AlignVCenter); self.tbl.setItem(r,0,it0);it1=QtWidgets.QTableWidgetItem(self.t1.time().toString("HH:mm")); it1.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter|QtCore.Qt.AlignmentFlag.AlignVCenter); self.tbl.setItem(r,1,it1);it2=QtWidgets.QTableWidgetItem(self.t2.time().toString("HH:mm")); it2.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter|QtCore.Qt.AlignmentFlag.AlignVCenter); self.tbl.setItem(r,2,it2);it3=QtWidgets.QTableWidgetItem(""); it3.setFlags(it3.flags() & ~QtCore.Qt.ItemFlag.ItemIsEditable); self.tbl.setItem(r,3,it3)
 
     def del_row(self):
         rows=sorted({i.row() for i in self.tbl.selectedIndexes()}, reverse=True)
@@ -1412,7 +1729,7 @@ class SurveyTimeTab(QtWidgets.QWidget):
 
     def reset(self):
         """조사시간 설정 초기화: 범위와 테이블을 모두 비움"""
-        if QtWidgets.QMessageBox.question(self, "초기화", "조사시간 설정을 모두 비울까요?") != QtWidgets.QMessageBox.Yes:
+        if QtWidgets.QMessageBox.question(self, "초기화", "조사시간 설정을 모두 비울까요?") != QtWidgets.QMessageBox.StandardButton.Yes:
             return
         self._ranges.clear()
         self.tbl.setRowCount(0)
@@ -1431,22 +1748,18 @@ class SurveyTimeTab(QtWidgets.QWidget):
         for i,(a,b,s) in enumerate(self._ranges,1):
             self.tbl.insertRow(self.tbl.rowCount())
             self.tbl.setItem(self.tbl.rowCount()-1,0,QtWidgets.QTableWidgetItem(str(i)));
-            self.tbl.item(self.tbl.rowCount()-1,0).setTextAlignment(QtCore.Qt.AlignHCenter|QtCore.Qt.AlignVCenter)
+            self.tbl.item(self.tbl.rowCount()-1,0).setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter|QtCore.Qt.AlignmentFlag.AlignVCenter)
             self.tbl.setItem(self.tbl.rowCount()-1,1,QtWidgets.QTableWidgetItem(a.toString('HH:mm')))
             self.tbl.setItem(self.tbl.rowCount()-1,2,QtWidgets.QTableWidgetItem(b.toString('HH:mm')))
 
     @staticmethod
     def _segment(a:QtCore.QTime, b:QtCore.QTime, step:int):
-        import datetime as _dt
-        t=_dt.datetime(2000,1,1,a.hour(),a.minute())
-        e=_dt.datetime(2000,1,1,b.hour(),b.minute())
-        out=[]
-        while t<e:
-            t2=t+_dt.timedelta(minutes=step)
-            if t2>e: break
-            out.append((t.strftime("%H:%M"), t2.strftime("%H:%M")))
-            t=t2
-        return out
+        """시작~종료를 step 분 간격으로 자름 (끝에 모자라는 구간은 버림). 계수 프로그램과 같은 슬롯 엔진."""
+        sa = a.hour()*3600 + a.minute()*60
+        sb = b.hour()*3600 + b.minute()*60
+        step_sec = int(step)*60
+        return [(sheet_layout.hm(t), sheet_layout.hm(t + step_sec))
+                for t in sheet_layout.slot_starts([(sa, sb)], step_sec, partial=False)]
 
     def generate(self):
         """현재 시작/종료/간격 설정을 기준으로 시간대를 자동생성하여 기존 목록 뒤에 이어붙입니다."""
@@ -1456,14 +1769,14 @@ class SurveyTimeTab(QtWidgets.QWidget):
             r = self.tbl.rowCount()
             self.tbl.insertRow(r)
             it0 = QtWidgets.QTableWidgetItem(str(r + 1))
-            it0.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
-            it0.setFlags(it0.flags() & ~QtCore.Qt.ItemIsEditable)
+            it0.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter | QtCore.Qt.AlignmentFlag.AlignVCenter)
+            it0.setFlags(it0.flags() & ~QtCore.Qt.ItemFlag.ItemIsEditable)
             it1 = QtWidgets.QTableWidgetItem(s)
-            it1.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
-            it1.setFlags(it1.flags() & ~QtCore.Qt.ItemIsEditable)
+            it1.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter | QtCore.Qt.AlignmentFlag.AlignVCenter)
+            it1.setFlags(it1.flags() & ~QtCore.Qt.ItemFlag.ItemIsEditable)
             it2 = QtWidgets.QTableWidgetItem(e)
-            it2.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
-            it2.setFlags(it2.flags() & ~QtCore.Qt.ItemIsEditable)
+            it2.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter | QtCore.Qt.AlignmentFlag.AlignVCenter)
+            it2.setFlags(it2.flags() & ~QtCore.Qt.ItemFlag.ItemIsEditable)
             self.tbl.setItem(r, 0, it0)
             self.tbl.setItem(r, 1, it1)
             self.tbl.setItem(r, 2, it2)
@@ -1486,18 +1799,18 @@ class SurveyTimeTab(QtWidgets.QWidget):
         for i,row in enumerate(rows or []):
             self.tbl.insertRow(i)
             it0 = QtWidgets.QTableWidgetItem(str(row.get("번호", i + 1)))
-            it0.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
-            it0.setFlags(it0.flags() & ~QtCore.Qt.ItemIsEditable)
+            it0.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter | QtCore.Qt.AlignmentFlag.AlignVCenter)
+            it0.setFlags(it0.flags() & ~QtCore.Qt.ItemFlag.ItemIsEditable)
             self.tbl.setItem(i, 0, it0)
 
             it1 = QtWidgets.QTableWidgetItem(row.get("시작", ""))
-            it1.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
-            it1.setFlags(it1.flags() & ~QtCore.Qt.ItemIsEditable)
+            it1.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter | QtCore.Qt.AlignmentFlag.AlignVCenter)
+            it1.setFlags(it1.flags() & ~QtCore.Qt.ItemFlag.ItemIsEditable)
             self.tbl.setItem(i, 1, it1)
 
             it2 = QtWidgets.QTableWidgetItem(row.get("종료", ""))
-            it2.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
-            it2.setFlags(it2.flags() & ~QtCore.Qt.ItemIsEditable)
+            it2.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter | QtCore.Qt.AlignmentFlag.AlignVCenter)
+            it2.setFlags(it2.flags() & ~QtCore.Qt.ItemFlag.ItemIsEditable)
             self.tbl.setItem(i, 2, it2)
 
 class SurveyVehicleTab(QtWidgets.QWidget):
@@ -1519,7 +1832,7 @@ class SurveyVehicleTab(QtWidgets.QWidget):
         self.tbl.setHorizontalHeaderLabels(["순번","차종명","단축키",""])
         self.tbl.verticalHeader().setVisible(False)
         try:
-            self.tbl.horizontalHeader().setDefaultAlignment(QtCore.Qt.AlignHCenter)
+            self.tbl.horizontalHeader().setDefaultAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter)
         except Exception:
             pass
         # 열 가로폭 고정: 순번/차종명/단축키/빈열
@@ -1556,7 +1869,7 @@ class SurveyVehicleTab(QtWidgets.QWidget):
             for c in (0, 1, 2):
                 it = self.tbl.item(r, c)
                 if it:
-                    it.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
+                    it.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter | QtCore.Qt.AlignmentFlag.AlignVCenter)
         try:
             # 조사차종 설정 시트 열 폭 고정: 순번 / 차종명 / 단축키
             self.tbl.setColumnWidth(0, 60)
@@ -1576,7 +1889,7 @@ class SurveyVehicleTab(QtWidgets.QWidget):
             self.tbl.setItem(r,2,QtWidgets.QTableWidgetItem(""))
             for c in (0,1,2):
                 it = self.tbl.item(r,c)
-                if it: it.setTextAlignment(QtCore.Qt.AlignHCenter|QtCore.Qt.AlignVCenter)
+                if it: it.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter|QtCore.Qt.AlignmentFlag.AlignVCenter)
             
             try:
                 # 조사차종 설정 시트 열 폭 고정: 순번 / 차종명 / 단축키
@@ -1590,7 +1903,7 @@ class SurveyVehicleTab(QtWidgets.QWidget):
 
     def add_row(self):
         r=self.tbl.rowCount(); self.tbl.insertRow(r)
-        it0=QtWidgets.QTableWidgetItem(str(r+1)); it0.setTextAlignment(QtCore.Qt.AlignHCenter|QtCore.Qt.AlignVCenter); it0.setFlags(it0.flags() & ~QtCore.Qt.ItemIsEditable); self.tbl.setItem(r,0,it0);it1=QtWidgets.QTableWidgetItem(""); it1.setTextAlignment(QtCore.Qt.AlignHCenter|QtCore.Qt.AlignVCenter); self.tbl.setItem(r,1,it1);it2=QtWidgets.QTableWidgetItem(""); it2.setTextAlignment(QtCore.Qt.AlignHCenter|QtCore.Qt.AlignVCenter); self.tbl.setItem(r,2,it2);it3=QtWidgets.QTableWidgetItem(""); it3.setFlags(it3.flags() & ~QtCore.Qt.ItemIsEditable); self.tbl.setItem(r,3,it3)
+        it0=QtWidgets.QTableWidgetItem(str(r+1)); it0.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter|QtCore.Qt.AlignmentFlag.AlignVCenter); it0.setFlags(it0.flags() & ~QtCore.Qt.ItemFlag.ItemIsEditable); self.tbl.setItem(r,0,it0);it1=QtWidgets.QTableWidgetItem(""); it1.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter|QtCore.Qt.AlignmentFlag.AlignVCenter); self.tbl.setItem(r,1,it1);it2=QtWidgets.QTableWidgetItem(""); it2.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter|QtCore.Qt.AlignmentFlag.AlignVCenter); self.tbl.setItem(r,2,it2);it3=QtWidgets.QTableWidgetItem(""); it3.setFlags(it3.flags() & ~QtCore.Qt.ItemFlag.ItemIsEditable); self.tbl.setItem(r,3,it3)
         
 
     def del_row(self):
@@ -1620,7 +1933,7 @@ class SurveyVehicleTab(QtWidgets.QWidget):
                 self.tbl.setItem(r,2,QtWidgets.QTableWidgetItem(row.get("단축키","")))
                 for c in (0,1,2):
                     it=self.tbl.item(r,c)
-                    if it: it.setTextAlignment(QtCore.Qt.AlignHCenter|QtCore.Qt.AlignVCenter)
+                    if it: it.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter|QtCore.Qt.AlignmentFlag.AlignVCenter)
 
                 
             try:
@@ -1632,12 +1945,178 @@ class SurveyVehicleTab(QtWidgets.QWidget):
                 pass
 
 
+class SiteTableModel(QtCore.QAbstractTableModel):
+    """조사지점 표 모델: 과업의 sites 리스트(지점 dict)를 복사 없이 그대로 행으로 사용.
+    셀은 화면에 그릴 때만 계산되므로 지점이 수천 개여도 과업 전환/저장이 행 수에 비례하지 않습니다."""
+    COLS = (("순번", None), ("지번", "지번"), ("지점명", "지점명"), ("작업번호", "작업번호"),
+            ("방향수", "방향수"), ("상태", "상태"), ("", None))
+    EDITABLE = (1, 2)
+    _ALIGN = QtCore.Qt.AlignmentFlag.AlignHCenter | QtCore.Qt.AlignmentFlag.AlignVCenter
+    ALIGN_CENTER = int(getattr(_ALIGN, "value", _ALIGN))
+    STATE_COLORS = {"대기": "black", "진행": "blue", "완료": "lightgray"}
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+        self._hay = {}     # id(지점) -> 검색용 소문자 문자열
+
+    def reset(self, rows):
+        self.beginResetModel()
+        self.rows = rows
+        self._hay.clear()
+        self.endResetModel()
+
+    def site(self, r):
+        return self.rows[r] if 0 <= r < len(self.rows) else None
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLS)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if orientation == QtCore.Qt.Orientation.Horizontal and role == QtCore.Qt.ItemDataRole.DisplayRole and 0 <= section < len(self.COLS):
+            return self.COLS[section][0]
+        return None
+
+    def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        r, c = index.row(), index.column()
+        row = self.rows[r]
+        key = self.COLS[c][1]
+        if role in (QtCore.Qt.ItemDataRole.DisplayRole, QtCore.Qt.ItemDataRole.EditRole):
+            if c == 0:
+                return str(r + 1)
+            return str(row.get(key, "")) if key else None
+        if role == QtCore.Qt.ItemDataRole.UserRole:      # 정렬 키
+            if c == 0:
+                return r
+            v = str(row.get(key, "")) if key else ""
+            return int(v) if c == 4 and v.isdigit() else v
+        if role == QtCore.Qt.ItemDataRole.TextAlignmentRole and c < 6:
+            return self.ALIGN_CENTER
+        if role == QtCore.Qt.ItemDataRole.ForegroundRole and c == 5:
+            return QtGui.QBrush(QtGui.QColor(self.STATE_COLORS.get(str(row.get("상태", "")).strip(), "black")))
+        return None
+
+    def flags(self, index):
+        f = QtCore.Qt.ItemFlag.ItemIsEnabled | QtCore.Qt.ItemFlag.ItemIsSelectable
+        if index.isValid() and index.column() in self.EDITABLE:
+            f |= QtCore.Qt.ItemFlag.ItemIsEditable
+        return f
+
+    def setData(self, index, value, role=QtCore.Qt.ItemDataRole.EditRole):
+        if role != QtCore.Qt.ItemDataRole.EditRole or not index.isValid() or index.column() not in self.EDITABLE:
+            return False
+        self.set_field(index.row(), self.COLS[index.column()][1], str(value).strip())
+        return True
+
+    def set_field(self, r, key, value):
+        row = self.site(r)
+        if row is None or row.get(key) == value:
+            return
+        row[key] = value
+        self._hay.pop(id(row), None)
+        c = [k for _, k in self.COLS].index(key)
+        idx = self.index(r, c)
+        self.dataChanged.emit(idx, idx, [])
+
+    def insert_site(self, site):
+        r = len(self.rows)
+        self.beginInsertRows(QtCore.QModelIndex(), r, r)
+        self.rows.append(site)
+        self.endInsertRows()
+        return r
+
+    def remove_rows(self, rows):
+        for r in sorted(set(rows), reverse=True):
+            if 0 <= r < len(self.rows):
+                self.beginRemoveRows(QtCore.QModelIndex(), r, r)
+                self._hay.pop(id(self.rows.pop(r)), None)
+                self.endRemoveRows()
+        self._renumber_view()
+
+    def move_row(self, src, dst):
+        if src == dst or not (0 <= src < len(self.rows)) or not (0 <= dst < len(self.rows)):
+            return False
+        # beginMoveRows 의 목적지는 '이동 전' 기준 삽입 위치
+        if not self.beginMoveRows(QtCore.QModelIndex(), src, src, QtCore.QModelIndex(), dst + 1 if dst > src else dst):
+            return False
+        self.rows.insert(dst, self.rows.pop(src))
+        self.endMoveRows()
+        self._renumber_view()
+        return True
+
+    def _renumber_view(self):
+        if self.rows:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self.rows) - 1, 0), [])
+
+    def renumber(self):
+        """저장 형식 호환: 각 지점의 '순번' 을 현재 순서로."""
+        for i, row in enumerate(self.rows):
+            if row.get("순번") != i + 1:
+                row["순번"] = i + 1
+
+    def haystack(self, r):
+        row = self.rows[r]
+        h = self._hay.get(id(row))
+        if h is None:
+            h = " ".join(str(row.get(k, "")) for k in ("지번", "지점명", "작업번호", "상태")).lower()
+            self._hay[id(row)] = h
+        return h
+
+
+class SiteFilterProxy(QtCore.QSortFilterProxyModel):
+    """지번/지점명/작업번호/상태 부분일치 필터 + 열 정렬 (정렬 키는 모델의 UserRole)."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._needle = ""
+        self.setSortRole(QtCore.Qt.ItemDataRole.UserRole)
+        self.setDynamicSortFilter(True)
+
+    def set_needle(self, text):
+        t = (text or "").strip().lower()
+        if t != self._needle:
+            self._needle = t
+            self.invalidateFilter()
+
+    def is_filtered(self):
+        return bool(self._needle)
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        return not self._needle or self._needle in self.sourceModel().haystack(source_row)
+
+
+class _SiteRowConfigs:
+    """기존 site_data[행번호 문자열] 접근 호환: 모델의 지점 dict 를 직접 읽고 씀."""
+    def __init__(self, model):
+        self.model = model
+
+    def get(self, key, default=None):
+        try:
+            site = self.model.site(int(key))
+        except (TypeError, ValueError):
+            site = None
+        return site if site is not None else default
+
+    def __setitem__(self, key, cfg):
+        site = self.get(key)
+        if site is not None and cfg is not site:
+            site.update(cfg)
+
+
 class SurveySitesTab(QtWidgets.QWidget):
     def __init__(self, page):
         super().__init__(page)
         self.page = page
-        # row_key -> {"groups": [...], "counters": [...]}
-        self.site_data = {}
+        # 지점 목록은 모델이 과업의 sites 리스트를 직접 보유 (get/set 시 복사 없음)
+        self.model = SiteTableModel(self)
+        self.proxy = SiteFilterProxy(self)
+        self.proxy.setSourceModel(self.model)
+        # row_key -> 지점 dict ({"groups": [...], "counters": [...], ...})
+        self.site_data = _SiteRowConfigs(self.model)
 
         root = QtWidgets.QHBoxLayout(self)
 
@@ -1645,10 +2124,17 @@ class SurveySitesTab(QtWidgets.QWidget):
         left = QtWidgets.QVBoxLayout()
         title = QtWidgets.QLabel("지점정보")
         left.addWidget(title)
+        self.ed_filter = QtWidgets.QLineEdit()
+        self.ed_filter.setPlaceholderText("지번 / 지점명 / 작업번호 검색")
+        self.ed_filter.setClearButtonEnabled(True)
+        self.ed_filter.textChanged.connect(self._on_filter_changed)
+        left.addWidget(self.ed_filter)
 
         # 순번 / 지번 / 지점명 / 작업번호 / 방향수 / 상태 / (빈 열)
-        self.tbl = QtWidgets.QTableWidget(0, 7)
-        self.tbl.setHorizontalHeaderLabels(["순번", "지번", "지점명", "작업번호", "방향수", "상태", ""])
+        self.tbl = QtWidgets.QTableView()
+        self.tbl.setModel(self.proxy)
+        self.tbl.setSortingEnabled(True)
+        self.tbl.sortByColumn(0, QtCore.Qt.SortOrder.AscendingOrder)
         self.tbl.verticalHeader().setVisible(False)
         # 지점정보 리스트 행 높이를 기존보다 약 3px 줄여서 표시
         try:
@@ -1674,12 +2160,12 @@ class SurveySitesTab(QtWidgets.QWidget):
         except Exception:
             pass
         # 행 전체 선택 + 한번 더 클릭 또는 더블클릭 시 편집 가능
-        self.tbl.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
-        self.tbl.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self.tbl.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows)
+        self.tbl.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.ExtendedSelection)
         self.tbl.setEditTriggers(
-            QtWidgets.QAbstractItemView.SelectedClicked
-            | QtWidgets.QAbstractItemView.EditKeyPressed
-            | QtWidgets.QAbstractItemView.DoubleClicked
+            QtWidgets.QAbstractItemView.EditTrigger.SelectedClicked
+            | QtWidgets.QAbstractItemView.EditTrigger.EditKeyPressed
+            | QtWidgets.QAbstractItemView.EditTrigger.DoubleClicked
         )
         self.tbl.horizontalHeader().setStretchLastSection(True)
         left.addWidget(self.tbl, 1)
@@ -1745,10 +2231,10 @@ class SurveySitesTab(QtWidgets.QWidget):
 
         # 2~5행: 방향번호 리스트 / 화살표 / 입력 그룹(탭) / 카운터
         self.dir = QtWidgets.QListWidget()
-        self.dir.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self.dir.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.ExtendedSelection)
         self.dir.setFixedWidth(50)
         self.dir.setMinimumHeight(290)
-        g.addWidget(self.dir, 2, 0, 5, 1, alignment=QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+        g.addWidget(self.dir, 2, 0, 5, 1, alignment=QtCore.Qt.AlignmentFlag.AlignRight | QtCore.Qt.AlignmentFlag.AlignVCenter)
 
         vbtn = QtWidgets.QVBoxLayout()
         vbtn.setContentsMargins(0, 2, 0, 1)  # 화살표 좌우 여백 조정
@@ -1758,7 +2244,7 @@ class SurveySitesTab(QtWidgets.QWidget):
         vbtn.addWidget(self.to)
         vbtn.addWidget(self.fr)
         vbtn.addStretch(1)
-        g.addLayout(vbtn, 2, 1, 4, 1, alignment=QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
+        g.addLayout(vbtn, 2, 1, 4, 1, alignment=QtCore.Qt.AlignmentFlag.AlignHCenter | QtCore.Qt.AlignmentFlag.AlignVCenter)
 
         # 오른쪽 위: 입력 그룹(탭)
         self.tabs = QtWidgets.QListWidget()
@@ -1812,7 +2298,7 @@ class SurveySitesTab(QtWidgets.QWidget):
         header = self.ct.horizontalHeader()
         header.setStretchLastSection(False)
         try:
-            header.setSectionResizeMode(3, QtWidgets.QHeaderView.Fixed)
+            header.setSectionResizeMode(3, QtWidgets.QHeaderView.ResizeMode.Fixed)
         except Exception:
             pass
                 # 카운터 시트 열 가로폭을 1/2 수준으로 축소 (컴팩트하게)
@@ -1850,7 +2336,7 @@ class SurveySitesTab(QtWidgets.QWidget):
         right.addWidget(gb, 1)
 
         self.b_preview = QtWidgets.QPushButton("시트 미리보기")
-        right.addWidget(self.b_preview, 0, alignment=QtCore.Qt.AlignRight)
+        right.addWidget(self.b_preview, 0, alignment=QtCore.Qt.AlignmentFlag.AlignRight)
 
         root.addLayout(right, 1)
 
@@ -1860,7 +2346,8 @@ class SurveySitesTab(QtWidgets.QWidget):
         g.setRowStretch(5, 3)
 
         # -------- 시그널 연결 --------
-        self.tbl.currentCellChanged.connect(self._on_select_row)
+        self.tbl.selectionModel().currentRowChanged.connect(self._on_current_index_changed)
+        self.tbl.horizontalHeader().sortIndicatorChanged.connect(lambda *_: self._update_move_buttons())
         self.b_auto.clicked.connect(self.gen_dirs)
         self.to.clicked.connect(self.to_tabs)
         self.fr.clicked.connect(self.from_tabs)
@@ -1883,21 +2370,37 @@ class SurveySitesTab(QtWidgets.QWidget):
     # ---------- 내부 헬퍼 ----------
     def _row_key(self, row=None):
         if row is None:
-            row = self.tbl.currentRow()
+            row = self._cur_row()
         return str(row)
 
-    def _apply_state_color(self, item):
-        """지점정보 상태 셀 색상 지정: 대기=검정, 진행=파랑, 완료=연회색"""
-        if not item:
-            return
-        txt = item.text().strip()
-        color_map = {
-            "대기": QtGui.QColor("black"),
-            "진행": QtGui.QColor("blue"),
-            "완료": QtGui.QColor("lightgray"),
-        }
-        item.setForeground(color_map.get(txt, QtGui.QColor("black")))
-
+    def _cur_row(self):
+        """현재 선택 지점의 모델(원본 리스트) 행 번호, 없으면 -1."""
+        idx = self.tbl.currentIndex()
+        return self.proxy.mapToSource(idx).row() if idx.isValid() else -1
+
+    def _select_source_row(self, r):
+        idx = self.proxy.mapFromSource(self.model.index(r, 0))
+        if idx.isValid():
+            self.tbl.setCurrentIndex(idx)
+            self.tbl.selectRow(idx.row())
+            self.tbl.scrollTo(idx)
+
+    def _on_current_index_changed(self, cur, prev):
+        cur_row = self.proxy.mapToSource(cur).row() if cur.isValid() else -1
+        prev_row = self.proxy.mapToSource(prev).row() if prev.isValid() else -1
+        self._on_select_row(cur_row, 0, prev_row, 0)
+
+    def _on_filter_changed(self, text):
+        self.proxy.set_needle(text)
+        # 정렬/필터 중에는 순서 이동이 화면 순서와 어긋나므로 비활성
+        self._update_move_buttons()
+
+    def _update_move_buttons(self):
+        hdr = self.tbl.horizontalHeader()
+        ordered = (not self.proxy.is_filtered()) and hdr.sortIndicatorSection() in (-1, 0) \
+            and hdr.sortIndicatorOrder() == QtCore.Qt.SortOrder.AscendingOrder
+        for b in (self.b_top, self.b_up, self.b_dn):
+            b.setEnabled(ordered)
 
     def _next_job_no(self):
         """
@@ -2212,7 +2715,7 @@ class SurveySitesTab(QtWidgets.QWidget):
         scroll.setWidgetResizable(True)
         preview_container = QtWidgets.QWidget()
         preview_layout = QtWidgets.QVBoxLayout(preview_container)
-        preview_layout.setAlignment(QtCore.Qt.AlignTop)
+        preview_layout.setAlignment(QtCore.Qt.AlignmentFlag.AlignTop)
         preview_layout.setContentsMargins(4, 4, 4, 4)
         preview_layout.setSpacing(2)
         scroll.setWidget(preview_container)
@@ -2249,9 +2752,9 @@ class SurveySitesTab(QtWidgets.QWidget):
                     d_item = self.ct.item(row, 1)
                     if d_item and d_item.text().strip() == dir_str:
                         name_item = QtWidgets.QTableWidgetItem(sheet_name)
-                        name_item.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
+                        name_item.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter | QtCore.Qt.AlignmentFlag.AlignVCenter)
                         # 카운터 이름 열은 사용자 편집 불가
-                        name_item.setFlags(name_item.flags() & ~QtCore.Qt.ItemIsEditable)
+                        name_item.setFlags(name_item.flags() & ~QtCore.Qt.ItemFlag.ItemIsEditable)
                         self.ct.setItem(row, 0, name_item)
                         found = True
                 # 해당 방향번호에 대한 카운터 행이 없으면 새로 추가
@@ -2259,13 +2762,13 @@ class SurveySitesTab(QtWidgets.QWidget):
                     r = self.ct.rowCount()
                     self.ct.insertRow(r)
                     name_item = QtWidgets.QTableWidgetItem(sheet_name)
-                    name_item.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
-                    name_item.setFlags(name_item.flags() & ~QtCore.Qt.ItemIsEditable)
+                    name_item.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter | QtCore.Qt.AlignmentFlag.AlignVCenter)
+                    name_item.setFlags(name_item.flags() & ~QtCore.Qt.ItemFlag.ItemIsEditable)
                     self.ct.setItem(r, 0, name_item)
                     dir_item = QtWidgets.QTableWidgetItem(dir_str)
-                    dir_item.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
+                    dir_item.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter | QtCore.Qt.AlignmentFlag.AlignVCenter)
                     # 방향 열은 읽기 전용
-                    dir_item.setFlags(dir_item.flags() & ~QtCore.Qt.ItemIsEditable)
+                    dir_item.setFlags(dir_item.flags() & ~QtCore.Qt.ItemFlag.ItemIsEditable)
                     self.ct.setItem(r, 1, dir_item)
                     self.ct.setItem(r, 2, QtWidgets.QTableWidgetItem(""))
             # 현재 지점 설정을 저장
@@ -2286,7 +2789,7 @@ class SurveySitesTab(QtWidgets.QWidget):
         btn_ok.clicked.connect(_on_ok)
         btn_cancel.clicked.connect(dlg.reject)
 
-        dlg.exec_()
+        dlg.exec()
 
     def _on_counter_cell_double_clicked(self, row, column):
         """카운터 열을 더블클릭하면 해당 카운터 항목의 단축키 구성을 팝업으로 보여준다."""
@@ -2446,7 +2949,7 @@ class SurveySitesTab(QtWidgets.QWidget):
 
         # 상단: 방향 정보
         dir_label = QtWidgets.QLabel(f"{dir_text}번 방향")
-        dir_label.setAlignment(QtCore.Qt.AlignCenter)
+        dir_label.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
         font = dir_label.font()
         font.setBold(True)
         dir_label.setFont(font)
@@ -2477,7 +2980,7 @@ class SurveySitesTab(QtWidgets.QWidget):
         btn_row.addWidget(btn_close)
         v.addLayout(btn_row)
 
-        dlg.exec_()
+        dlg.exec()
     def apply_template_from_vehicle(self):
         """조사차종 설정에서 선택된 차종 유형의 입력그룹 템플릿을 불러와 적용."""
         # SurveyManagerPage 내의 조사차종 탭(SurveyVehicleTab)에서 현재 프로젝트 인덱스 확인
@@ -2555,16 +3058,16 @@ class SurveySitesTab(QtWidgets.QWidget):
             r = self.ct.rowCount()
             self.ct.insertRow(r)
             name_item = QtWidgets.QTableWidgetItem(c.get("name", ""))
-            name_item.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
+            name_item.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter | QtCore.Qt.AlignmentFlag.AlignVCenter)
             # 카운터 이름 열은 사용자 편집 불가
-            name_item.setFlags(name_item.flags() & ~QtCore.Qt.ItemIsEditable)
+            name_item.setFlags(name_item.flags() & ~QtCore.Qt.ItemFlag.ItemIsEditable)
             dir_item = QtWidgets.QTableWidgetItem(str(c.get("dir", "")))
-            dir_item.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
+            dir_item.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter | QtCore.Qt.AlignmentFlag.AlignVCenter)
             # 방향 열은 읽기 전용
-            dir_item.setFlags(dir_item.flags() & ~QtCore.Qt.ItemIsEditable)
+            dir_item.setFlags(dir_item.flags() & ~QtCore.Qt.ItemFlag.ItemIsEditable)
             label_item = QtWidgets.QTableWidgetItem(c.get("label", ""))
             self.ct.setItem(r, 0, name_item)
-            dir_item.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
+            dir_item.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter | QtCore.Qt.AlignmentFlag.AlignVCenter)
             self.ct.setItem(r, 1, dir_item)
             self.ct.setItem(r, 2, label_item)
 
@@ -2599,16 +3102,16 @@ class SurveySitesTab(QtWidgets.QWidget):
             r = self.ct.rowCount()
             self.ct.insertRow(r)
             name_item = QtWidgets.QTableWidgetItem(c.get("name", ""))
-            name_item.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
+            name_item.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter | QtCore.Qt.AlignmentFlag.AlignVCenter)
             # 카운터 이름 열은 사용자 편집 불가
-            name_item.setFlags(name_item.flags() & ~QtCore.Qt.ItemIsEditable)
+            name_item.setFlags(name_item.flags() & ~QtCore.Qt.ItemFlag.ItemIsEditable)
             dir_item = QtWidgets.QTableWidgetItem(str(c.get("dir", "")))
-            dir_item.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
+            dir_item.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter | QtCore.Qt.AlignmentFlag.AlignVCenter)
             # 방향 열은 읽기 전용
-            dir_item.setFlags(dir_item.flags() & ~QtCore.Qt.ItemIsEditable)
+            dir_item.setFlags(dir_item.flags() & ~QtCore.Qt.ItemFlag.ItemIsEditable)
             label_item = QtWidgets.QTableWidgetItem(c.get("label", ""))
             self.ct.setItem(r, 0, name_item)
-            dir_item.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
+            dir_item.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter | QtCore.Qt.AlignmentFlag.AlignVCenter)
             self.ct.setItem(r, 1, dir_item)
             self.ct.setItem(r, 2, label_item)
 
@@ -2715,15 +3218,15 @@ class SurveySitesTab(QtWidgets.QWidget):
         r = self.ct.rowCount()
         self.ct.insertRow(r)
         name_item = QtWidgets.QTableWidgetItem(f"카운터{r+1}")
-        name_item.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
-        name_item.setFlags(name_item.flags() & ~QtCore.Qt.ItemIsEditable)
+        name_item.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter | QtCore.Qt.AlignmentFlag.AlignVCenter)
+        name_item.setFlags(name_item.flags() & ~QtCore.Qt.ItemFlag.ItemIsEditable)
         dir_item = QtWidgets.QTableWidgetItem("1")
-        dir_item.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
+        dir_item.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter | QtCore.Qt.AlignmentFlag.AlignVCenter)
         # 방향 열은 읽기 전용
-        dir_item.setFlags(dir_item.flags() & ~QtCore.Qt.ItemIsEditable)
+        dir_item.setFlags(dir_item.flags() & ~QtCore.Qt.ItemFlag.ItemIsEditable)
         label_item = QtWidgets.QTableWidgetItem("")
         self.ct.setItem(r, 0, name_item)
-        dir_item.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
+        dir_item.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignHCenter | QtCore.Qt.AlignmentFlag.AlignVCenter)
         self.ct.setItem(r, 1, dir_item)
         self.ct.setItem(r, 2, label_item)
         # 카운터 구성이 바뀌면 바로 저장
@@ -2738,38 +3241,6 @@ class SurveySitesTab(QtWidgets.QWidget):
 
     # ---------- 지점 행 추가/삭제 ----------
     def add_site(self):
-        r = self.tbl.rowCount()
-        self.tbl.insertRow(r)
-
-        # 순번: 가운데 정렬 (사용자 편집 불가)
-        num_item = QtWidgets.QTableWidgetItem(str(r + 1))
-        num_item.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
-        num_item.setFlags(num_item.flags() & ~QtCore.Qt.ItemIsEditable)
-        self.tbl.setItem(r, 0, num_item)
-
-        # 지번: 가운데 정렬
-        jibun_item = QtWidgets.QTableWidgetItem("")
-        jibun_item.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
-        self.tbl.setItem(r, 1, jibun_item)
-
-        # 지점명: 가운데 정렬
-        name_item = QtWidgets.QTableWidgetItem("")
-        name_item.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
-        self.tbl.setItem(r, 2, name_item)
-
-        # 작업번호: 전체 과업에서 중복되지 않게 자동 부여 (가운데 정렬, 편집 불가)
-        job_no = self._next_job_no()
-        job_item = QtWidgets.QTableWidgetItem(job_no)
-        job_item.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
-        job_item.setFlags(job_item.flags() & ~QtCore.Qt.ItemIsEditable)
-        self.tbl.setItem(r, 3, job_item)
-
-        # 방향수: 가운데 정렬 (사용자 편집 불가)
-        dir_item = QtWidgets.QTableWidgetItem(str(self.spin.value()))
-        dir_item.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
-        dir_item.setFlags(dir_item.flags() & ~QtCore.Qt.ItemIsEditable)
-        self.tbl.setItem(r, 4, dir_item)
-
         # 상태: 조사 정보 탭의 진행상태를 반영
         state_text = ""
         try:
@@ -2778,41 +3249,40 @@ class SurveySitesTab(QtWidgets.QWidget):
             state_text = "대기"
         if not state_text:
             state_text = "대기"
-        state_item = QtWidgets.QTableWidgetItem(state_text)
-        state_item.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
-        state_item.setFlags(state_item.flags() & ~QtCore.Qt.ItemIsEditable)
-        self._apply_state_color(state_item)
-        self.tbl.setItem(r, 5, state_item)
-
-        # 빈 슬롯 열(6)은 비워둠
-        self.site_data[self._row_key(r)] = {"groups": [], "counters": []}
+        # 작업번호: 전체 과업에서 중복되지 않게 자동 부여
+        self.model.insert_site({
+            "순번": self.model.rowCount() + 1,
+            "지번": "",
+            "지점명": "",
+            "작업번호": self._next_job_no(),
+            "방향수": str(self.spin.value()),
+            "상태": state_text,
+            "groups": [],
+            "counters": [],
+        })
 
     def del_site(self):
-        """선택된 지점 행(여러 개 선택 가능)을 삭제하고 순번/설정을 재정렬."""
-        rows = self.get()
-        if not rows:
+        """선택된 지점 행(여러 개 선택 가능)을 삭제 (순번은 화면에서 자동 재정렬)."""
+        if not self.model.rows:
             return
+        try:
+            self._apply_to_current_row(False)
+        except Exception:
+            pass
 
         # 선택된 행 인덱스 수집 (없으면 현재 행만 사용)
-        sel_rows = sorted({idx.row() for idx in self.tbl.selectedIndexes()})
-        if not sel_rows and self.tbl.currentRow() >= 0:
-            sel_rows = [self.tbl.currentRow()]
+        sel_rows = {self.proxy.mapToSource(idx).row() for idx in self.tbl.selectionModel().selectedRows()}
+        if not sel_rows and self._cur_row() >= 0:
+            sel_rows = {self._cur_row()}
         if not sel_rows:
             return
-
-        # 뒤에서부터 삭제해야 인덱스가 꼬이지 않음
-        for r in reversed(sel_rows):
-            if 0 <= r < len(rows):
-                del rows[r]
-
-        # 지점정보/카운터 구성을 다시 세팅하여 site_data까지 함께 정리
-        self.set(rows)
+        self.model.remove_rows(sel_rows)
 
     def _apply_to_current_row(self, show_message=False):
         """현재 선택된 지점 행에 카운터 설정을 즉시 반영하고,
         '입력 그룹(탭)'에 실제로 포함된 방향번호만을 기준으로 방향수를 계산합니다.
         또한, 그룹별로 선택한 차종유형(프로젝트 인덱스) 정보(group_projects)는 기존 값을 유지합니다."""
-        r = self.tbl.currentRow()
+        r = self._cur_row()
         if r < 0:
             return
         cfg = self._collect_ui()
@@ -2839,259 +3309,91 @@ class SurveySitesTab(QtWidgets.QWidget):
         # 입력그룹이 하나도 없다면, 스핀박스 값(기본 방향수)을 그대로 사용
         cnt = len(dir_numbers) if dir_numbers else self.spin.value()
 
-        dir_item = QtWidgets.QTableWidgetItem(str(cnt))
-        dir_item.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
-        # 방향수는 항상 자동 계산되므로 편집 불가능하게 고정
-        dir_item.setFlags(dir_item.flags() & ~QtCore.Qt.ItemIsEditable)
-        self.tbl.setItem(r, 4, dir_item)
+        # 방향수는 항상 자동 계산 (모델에서 편집 불가 열)
+        self.model.set_field(r, "방향수", str(cnt))
         if show_message:
             QtWidgets.QMessageBox.information(self, "적용", "선택 지점에 입력그룹/카운터 구성이 저장되었습니다.")
     def apply_to_selected(self):
         """[버튼용] 현재 선택된 지점에 카운터 설정을 저장 (알림 표시)."""
-        if self.tbl.currentRow() < 0:
+        if self._cur_row() < 0:
             QtWidgets.QMessageBox.information(self, "알림", "좌측 지점을 먼저 선택하세요.")
             return
         self._apply_to_current_row(show_message=True)
 
     def move_site(self, direction):
         """지점 행을 위/아래로 이동."""
-        r = self.tbl.currentRow()
+        r = self._cur_row()
         if r < 0:
             return
         new_r = r + direction
-        if not (0 <= new_r < self.tbl.rowCount()):
+        if not (0 <= new_r < self.model.rowCount()):
             return
         # 현재 행의 카운터 설정을 먼저 저장
         self._apply_to_current_row(show_message=False)
-        # 전체 지점정보 + 카운터 설정을 가져와 순서를 바꾸고 다시 세팅
-        rows = self.get()
-        rows[r], rows[new_r] = rows[new_r], rows[r]
-        self.set(rows)
-        # 새 위치 행을 선택 & 포커스 이동
-        try:
-            self.tbl.setCurrentCell(new_r, 0)
-        except Exception:
-            try:
-                self.tbl.selectRow(new_r)
-            except Exception:
-                pass
+        if self.model.move_row(r, new_r):
+            # 새 위치 행을 선택 & 포커스 이동
+            self._select_source_row(new_r)
 
 
     def move_site_top(self):
         """선택된 지점 행을 최상단(1번 행)으로 이동."""
-        r = self.tbl.currentRow()
+        r = self._cur_row()
         if r <= 0:
             return
         # 현재 행의 카운터 설정을 먼저 저장
         self._apply_to_current_row(show_message=False)
-        rows = self.get()
-        if not (0 <= r < len(rows)):
-            return
-        row = rows.pop(r)
-        rows.insert(0, row)
-        self.set(rows)
-        try:
-            self.tbl.setCurrentCell(0, 0)
-        except Exception:
-            try:
-                self.tbl.selectRow(0)
-            except Exception:
-                pass
+        if self.model.move_row(r, 0):
+            self._select_source_row(0)
 
     # ---------- 저장/복원 ----------
     def get(self):
-        """지점정보 + 카운터 설정까지 모두 저장"""
-        # 현재 선택된 지점의 최신 편집 내용을 site_data에 반영
+        """지점정보 + 카운터 설정: 모델이 곧 과업의 sites 리스트이므로 그대로 반환."""
+        # 현재 선택된 지점의 최신 편집 내용(입력그룹/카운터)을 지점 dict 에 반영
         try:
             self._apply_to_current_row(False)
         except Exception:
             pass
-        out = []
-        for r in range(self.tbl.rowCount()):
-            def _text(col):
-                item = self.tbl.item(r, col)
-                return item.text().strip() if item else ""
-            key = self._row_key(r)
-            cfg = self.site_data.get(key, {"groups": [], "counters": []})
-            rec = {
-                "순번": r + 1,
-                "지번": _text(1),
-                "지점명": _text(2),
-                "작업번호": _text(3),
-                "방향수": _text(4),
-                "상태": _text(5),
-                "groups": cfg.get("groups", []),
-                "counters": cfg.get("counters", []),
-            }
-            out.append(rec)
-        return out
+        self.model.renumber()
+        return self.model.rows
 
     def set(self, rows):
-        """저장된 지점정보 복원"""
-        self.tbl.setRowCount(0)
-        self.site_data = {}
-        rows = rows or []
-        for r, row in enumerate(rows):
-            self.tbl.insertRow(self.tbl.rowCount())
-            # 순번 (편집 불가)
-            num_item = QtWidgets.QTableWidgetItem(str(r + 1))
-            num_item.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
-            num_item.setFlags(num_item.flags() & ~QtCore.Qt.ItemIsEditable)
-            self.tbl.setItem(r, 0, num_item)
-            # 지번 (가운데 정렬) / 지점명 / 작업번호 / 방향수 / 상태
-            jibun_item = QtWidgets.QTableWidgetItem(str(row.get("지번", "")))
-            jibun_item.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
-            self.tbl.setItem(r, 1, jibun_item)
-            name_item = QtWidgets.QTableWidgetItem(str(row.get("지점명", "")))
-            name_item.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
-            self.tbl.setItem(r, 2, name_item)
-            job_item = QtWidgets.QTableWidgetItem(str(row.get("작업번호", "")))
-            job_item.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
-            job_item.setFlags(job_item.flags() & ~QtCore.Qt.ItemIsEditable)
-            self.tbl.setItem(r, 3, job_item)
-            dir_item = QtWidgets.QTableWidgetItem(str(row.get("방향수", "")))
-            dir_item.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
-            dir_item.setFlags(dir_item.flags() & ~QtCore.Qt.ItemIsEditable)
-            self.tbl.setItem(r, 4, dir_item)
-            state_item = QtWidgets.QTableWidgetItem(str(row.get("상태", "")))
-            state_item.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
-            state_item.setFlags(state_item.flags() & ~QtCore.Qt.ItemIsEditable)
-            self._apply_state_color(state_item)
-            self.tbl.setItem(r, 5, state_item)
-
-            # 카운터 구성 복원용 메모리
-            self.site_data[self._row_key(r)] = {
-                "groups": row.get("groups", []),
-                "counters": row.get("counters", []),
-            }
+        """저장된 지점정보 연결 (같은 리스트면 아무것도 하지 않음)"""
+        if rows is not None and rows is self.model.rows:
+            return
+        self.model.reset(rows if rows is not None else [])
 
     # ---------- 시트 미리보기 ----------
+    def _preview_default_project(self):
+        """group_projects 에 저장된 값이 없는 방향의 차종유형: 조사차종 탭의 현재 선택값."""
+        try:
+            veh_tab = getattr(self.page, "veh", None)
+            if veh_tab is not None and hasattr(veh_tab, "cb"):
+                return max(0, veh_tab.cb.currentIndex())
+        except Exception:
+            pass
+        return 0
+
     def preview(self):
         """지점정보 시트 미리보기 (방향별).
-        각 방향에 대해, 해당 방향에 연결된 단축키 시트가 있으면
-        그 시트의 차종명을 열 제목으로 사용합니다.
-        (없으면 프로젝트 기본 차종명을 사용)
-        """
-        # 시간대는 조사시간 탭에서 가져옴
+        시트 구성은 sheet_layout.site_sheets 가 계산/캐시하며, 계수 프로그램의 시트/엑셀 저장과
+        같은 15분 슬롯 라벨을 씁니다. 방향에 연결된 단축키 시트가 있으면 그 시트의 차종명을
+        열 제목으로, 없으면 프로젝트 기본 차종명을 사용합니다."""
         try:
             times = self.page.time.get()
         except Exception:
             times = []
-
-        # 현재 선택된 지점의 그룹/카운터 정보
-        cfg = {}
-        r = self.tbl.currentRow()
-        if r >= 0:
-            cfg = self.site_data.get(self._row_key(r), {})
-            groups = cfg.get("groups") or ["1"]
-            counter_cfg = cfg.get("counters") or []
-        else:
-            groups = ["1"]
-            counter_cfg = []
-
-        # 방향별로 연결된 단축키 시트 이름 매핑: {방향번호: 시트이름}
-        dir_to_sheet = {}
-        for rec in counter_cfg:
-            try:
-                d_str = str(rec.get("dir", "")).strip()
-                sheet_name = str(rec.get("name", "")).strip()
-            except Exception:
-                continue
-            if not d_str or not sheet_name:
-                continue
-            if not d_str.isdigit():
-                continue
-            try:
-                d_val = int(d_str)
-            except Exception:
-                continue
-            if sheet_name:
-                dir_to_sheet[d_val] = sheet_name
-
-        # 그룹 문자열(예: "4-5-6", "7-8-9")에서 실제 사용하는 방향번호만 추출
-        import re as _re
-        dir_numbers = set()
-        for label in groups:
-            for part in _re.split(r"[^0-9]+", str(label)):
-                if part.isdigit():
-                    try:
-                        dir_numbers.add(int(part))
-                    except Exception:
-                        pass
-
-        if dir_numbers:
-            dir_list = sorted(dir_numbers)
-        else:
-            # 그룹 정보가 비어 있는 경우 1번 방향만 존재한다고 가정
-            dir_list = [1]
-
-        # 프로젝트/차종/단축키 시트 정보
+        r = self._cur_row()
+        cfg = (self.site_data.get(self._row_key(r), {}) or {}) if r >= 0 else {}
         data = getattr(self.page, "data", {}) if hasattr(self.page, "data") else {}
         projects = data.get("projects", []) if isinstance(data, dict) else []
-
-        # 현재 지점의 group_projects(그룹별 차종유형 인덱스)에서 방향별 프로젝트 인덱스를 계산
-        dir_to_proj_index = {}
-        group_projects = cfg.get("group_projects", {}) or {}
-        for grp_label, p_idx in group_projects.items():
-            try:
-                p_idx_int = int(p_idx)
-            except Exception:
-                continue
-            for part in _re.split(r"[^0-9]+", str(grp_label)):
-                if part.isdigit():
-                    try:
-                        d_val = int(part)
-                    except Exception:
-                        continue
-                    dir_to_proj_index[d_val] = p_idx_int
-
-        def _default_cols_for_direction(d):
-            """해당 방향의 기본 차종 열 목록을 반환 (단축키 시트가 없을 때 사용)."""
-            if not projects:
-                return ["차종1", "차종2"]
-            proj_idx = dir_to_proj_index.get(d, None)
-            # 저장된 값이 없으면 조사차종 탭의 현재 선택값을 사용
-            if proj_idx is None:
-                try:
-                    veh_tab = getattr(self.page, "veh", None)
-                    if veh_tab is not None and hasattr(veh_tab, "cb"):
-                        idx = veh_tab.cb.currentIndex()
-                        if 0 <= idx < len(projects):
-                            proj_idx = idx
-                except Exception:
-                    proj_idx = None
-            if proj_idx is None:
-                proj_idx = 0
-            if not (0 <= proj_idx < len(projects)):
-                proj_idx = 0
-            proj_local = projects[proj_idx]
-            vehicle_rows = proj_local.get("vehicle_set") or []
-            cols = [v.get("차종명", "") for v in vehicle_rows]
-            return cols or ["차종1", "차종2"]
-
-        def _cols_for_direction(d):
-            """해당 방향에 연결된 단축키 시트가 있으면 그 시트의 차종명을 사용하고,
-            그렇지 않으면 group_projects/조사차종 설정에 따른 기본 차종명을 사용한다."""
-            sheet_name = dir_to_sheet.get(d)
-            if sheet_name and projects:
-                # 모든 프로젝트에서 시트를 찾아본다.
-                for proj_local in projects:
-                    sheets = proj_local.get("hotkey_sheets_global") or []
-                    for s in sheets:
-                        if str(s.get("name", "")).strip() == sheet_name:
-                            items = s.get("items") or []
-                            cols = [str(it.get("차종명", "")) for it in items]
-                            if cols:
-                                return cols
-            # 없으면 프로젝트 기본 차종명을 사용
-            return _default_cols_for_direction(d)
+        layout = sheet_layout.site_sheets(times, cfg, projects, self._preview_default_project())
 
         dlg = QtWidgets.QDialog(self)
         dlg.setWindowTitle("시트 보기")
 
         lay = QtWidgets.QVBoxLayout(dlg)
         title_label = QtWidgets.QLabel("지점정보 시트 미리보기 (방향별)")
-        title_label.setAlignment(QtCore.Qt.AlignLeft | QtCore.Qt.AlignVCenter)
+        title_label.setAlignment(QtCore.Qt.AlignmentFlag.AlignLeft | QtCore.Qt.AlignmentFlag.AlignVCenter)
         font = title_label.font()
         font.setBold(True)
         title_label.setFont(font)
@@ -3100,40 +3402,59 @@ class SurveySitesTab(QtWidgets.QWidget):
         tabs = QtWidgets.QTabWidget()
         lay.addWidget(tabs, 1)
 
-        # 각 "입력그룹"이 아니라 실제 방향번호별로 시트를 구성
-        for d in dir_list:
-            cols = _cols_for_direction(d)
-            tbl = QtWidgets.QTableWidget(len(times), 1 + len(cols) + 1)
-            tbl.setHorizontalHeaderLabels(["시간대"] + cols + [""])
+        # 각 "입력그룹"이 아니라 실제 방향번호별로 시트를 구성 (셀은 모델이 그릴 때만 계산)
+        for d, cols in layout.directions:
+            tbl = QtWidgets.QTableView()
+            tbl.setModel(SheetPreviewModel(layout.labels, cols, tbl))
             tbl.horizontalHeader().setStretchLastSection(True)
             tbl.verticalHeader().setVisible(False)
-
-            for i, row in enumerate(times):
-                label = f"{row.get('시작','')}~{row.get('종료','')}"
-                it = QtWidgets.QTableWidgetItem(label)
-                it.setTextAlignment(QtCore.Qt.AlignLeft | QtCore.Qt.AlignVCenter)
-                tbl.setItem(i, 0, it)
-
-                for c in range(len(cols)):
-                    num = QtWidgets.QTableWidgetItem("0")
-                    num.setTextAlignment(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
-                    tbl.setItem(i, 1 + c, num)
-
-                blank = QtWidgets.QTableWidgetItem("")
-                blank.setFlags(blank.flags() & ~QtCore.Qt.ItemIsEditable)
-                tbl.setItem(i, 1 + len(cols), blank)
-
             tabs.addTab(tbl, f"{d}번 방향")
 
         btn = QtWidgets.QPushButton("닫기")
-        lay.addWidget(btn, 0, alignment=QtCore.Qt.AlignRight)
+        lay.addWidget(btn, 0, alignment=QtCore.Qt.AlignmentFlag.AlignRight)
         btn.clicked.connect(dlg.accept)
         dlg.resize(1100, 680)
-        dlg.exec_()
+        dlg.exec()
+
+
+class SheetPreviewModel(QtCore.QAbstractTableModel):
+    """시트 미리보기 표: 시간대 | 차종 열(모두 0) | 빈 열. 읽기 전용."""
+    _LEFT = QtCore.Qt.AlignmentFlag.AlignLeft | QtCore.Qt.AlignmentFlag.AlignVCenter
+    _CENTER = QtCore.Qt.AlignmentFlag.AlignHCenter | QtCore.Qt.AlignmentFlag.AlignVCenter
+    ALIGN_LEFT = int(getattr(_LEFT, "value", _LEFT))
+    ALIGN_CENTER = int(getattr(_CENTER, "value", _CENTER))
+
+    def __init__(self, labels, columns, parent=None):
+        super().__init__(parent)
+        self.labels = labels
+        self.headers = ("시간대",) + tuple(columns) + ("",)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.labels)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if role == QtCore.Qt.ItemDataRole.DisplayRole and orientation == QtCore.Qt.Orientation.Horizontal and 0 <= section < len(self.headers):
+            return self.headers[section]
+        return None
+
+    def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        c = index.column()
+        if role == QtCore.Qt.ItemDataRole.DisplayRole:
+            if c == 0:
+                return self.labels[index.row()]
+            return "0" if c < len(self.headers) - 1 else ""
+        if role == QtCore.Qt.ItemDataRole.TextAlignmentRole:
+            return self.ALIGN_LEFT if c == 0 else self.ALIGN_CENTER
+        return None
 
 
 
 class SurveyManagerPage(QtWidgets.QWidget):
+    QUICK_FIND_LIMIT = 30
+
     def __init__(self, data, parent=None):
         super().__init__(parent); self.data=data
         h=QtWidgets.QHBoxLayout(self)
@@ -3147,6 +3468,13 @@ class SurveyManagerPage(QtWidgets.QWidget):
             left.insertWidget(0, QtWidgets.QLabel("과업명"))
         except Exception:
             pass
+        # 빠른 찾기: 전체 과업의 과업명/SN/발주처/기간/지번/지점명/작업번호 (접두어·초성)
+        self.ed_find=QtWidgets.QLineEdit()
+        self.ed_find.setPlaceholderText("빠른 찾기 (과업·지점·작업번호·초성)")
+        self.ed_find.setClearButtonEnabled(True)
+        self.ed_find.setFixedWidth(220)
+        left.insertWidget(0, self.ed_find)
+        self._setup_quick_find()
         hb=QtWidgets.QHBoxLayout(); self.b_new=QtWidgets.QPushButton("새조사"); self.b_dup=QtWidgets.QPushButton("복제"); self.b_del=QtWidgets.QPushButton("삭제")
         for b in (self.b_new,self.b_dup,self.b_del): hb.addWidget(b)
         left.addLayout(hb); h.addLayout(left,1)
@@ -3155,9 +3483,96 @@ class SurveyManagerPage(QtWidgets.QWidget):
         self.tabs.addTab(self.info,"조사 정보"); self.tabs.addTab(self.time,"조사시간 설정"); self.tabs.addTab(self.veh,"조사차종 설정"); self.tabs.addTab(self.sites,"조사지점 설정")
         box=QtWidgets.QVBoxLayout(); box.addWidget(self.tabs,1); b=QtWidgets.QHBoxLayout(); b.addStretch(1); self.b_reg=QtWidgets.QPushButton("등록"); self.b_save=QtWidgets.QPushButton("저장"); b.addWidget(self.b_reg); b.addWidget(self.b_save); box.addLayout(b); h.addLayout(box,3)
         self.b_new.clicked.connect(self.add_survey); self.b_dup.clicked.connect(self.dup_survey); self.b_del.clicked.connect(self.del_survey); self.b_save.clicked.connect(self.persist_current); self.lst.currentRowChanged.connect(self.load_current); self.lst.itemDoubleClicked.connect(self.rename_survey)
+        # 지점 표 편집은 현재 과업만 다음 검색 때 다시 색인
+        for sig in (self.sites.model.dataChanged, self.sites.model.rowsInserted,
+                    self.sites.model.rowsRemoved, self.sites.model.rowsMoved):
+            sig.connect(self._mark_search_stale)
         self.reload_list()
 
     def surveys(self): return self.data["surveys"]
+
+    # ---------------- 빠른 찾기 ----------------
+    def _setup_quick_find(self):
+        self.search_index = site_search.SiteSearchIndex()
+        self._search_rebuild = True      # 과업 추가/복제/삭제(순서 변경) -> 전체 재색인
+        self._search_stale = set()       # 내용만 바뀐 과업 index -> update_survey
+        self._find_hits = []
+        self._find_model = QtGui.QStandardItemModel(self)
+        comp = QtWidgets.QCompleter(self._find_model, self)
+        comp.setCompletionMode(QtWidgets.QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        comp.setMaxVisibleItems(15)
+        self.ed_find.setCompleter(comp)
+        self.ed_find.textEdited.connect(self._on_find_edited)
+        self.ed_find.returnPressed.connect(self._on_find_return)
+        comp.activated[QtCore.QModelIndex].connect(self._on_find_activated)
+
+    def _mark_search_stale(self, *_):
+        i = self.lst.currentRow()
+        if i >= 0:
+            self._survey_changed(i)
+
+    def _survey_changed(self, i=None):
+        """과업 i(없으면 목록 전체)가 바뀜 -> 빠른 찾기 재색인 + hotkeys_db 재투영 표시. save_data 전에 부릅니다."""
+        if i is None:
+            self._search_rebuild = True
+            mark_hotkeys_changed()
+            return
+        self._search_stale.add(i)
+        if 0 <= i < len(self.surveys()):
+            mark_hotkeys_changed([self.surveys()[i]])
+
+    def _search(self):
+        if self._search_rebuild:
+            self.search_index.build(self.surveys())
+            self._search_rebuild = False
+            self._search_stale.clear()
+        elif self._search_stale:
+            surveys = self.surveys()
+            for i in sorted(self._search_stale):
+                self.search_index.update_survey(i, surveys[i] if i < len(surveys) else None)
+            self._search_stale.clear()
+        return self.search_index
+
+    def _on_find_edited(self, text):
+        self._find_model.clear()
+        self._find_hits = self._search().search(text, limit=self.QUICK_FIND_LIMIT) if text.strip() else []
+        for hit in self._find_hits:
+            item = QtGui.QStandardItem(hit.label)
+            item.setData((hit.survey_index, hit.site_index), QtCore.Qt.ItemDataRole.UserRole)
+            item.setEditable(False)
+            self._find_model.appendRow(item)
+        if self._find_hits:
+            self.ed_find.setToolTip(f"{len(self._find_hits)}건 · {self.search_index.last_ms:.1f} ms")
+        else:
+            self.ed_find.setToolTip("")
+
+    def _on_find_activated(self, index):
+        key = index.data(QtCore.Qt.ItemDataRole.UserRole)
+        self._find_hits = []     # 팝업에서 Enter 로 고르면 returnPressed 도 오므로 중복 이동 방지
+        if key:
+            self.goto_site(*key)
+        QtCore.QTimer.singleShot(0, self.ed_find.clear)
+
+    def _on_find_return(self):
+        if self._find_hits:
+            hit = self._find_hits[0]
+            self._find_hits = []
+            self.goto_site(hit.survey_index, hit.site_index)
+            self.ed_find.clear()
+
+    def goto_site(self, survey_index, site_index=-1):
+        """과업을 선택하고, 지점이면 조사지점 탭에서 그 행을 선택 (-1 이면 조사 정보 탭)."""
+        if not (0 <= survey_index < self.lst.count()):
+            return
+        if self.lst.currentRow() != survey_index:
+            self.lst.setCurrentRow(survey_index)
+        if site_index < 0:
+            self.tabs.setCurrentWidget(self.info)
+            return
+        self.tabs.setCurrentWidget(self.sites)
+        if self.sites.ed_filter.text():
+            self.sites.ed_filter.clear()
+        self.sites._select_source_row(site_index)
     def reload_list(self, preferred_index=None):
         self.lst.clear(); 
         for s in self.surveys():
@@ -3192,12 +3607,14 @@ class SurveyManagerPage(QtWidgets.QWidget):
         name, ok = QtWidgets.QInputDialog.getText(self, "수정", "이름:", text=old_name)
         if ok and name.strip():
             info["name"] = name.strip()
+            self._survey_changed(cur_index)
             save_data(self.data)
             self.reload_list(preferred_index=cur_index)
 
     def add_survey(self):
         d={"info":{"purpose":"일반 조사용(모든작업자 노출)","state":"대기","name":"새 조사","sn":next_sn(),"reg_date":dt.date.today().strftime("%Y-%m-%d"),"client":"", "period":[dt.date.today().strftime("%Y-%m-%d"),dt.date.today().strftime("%Y-%m-%d")], "desc":""}, "times":[], "vehicle":{}, "sites":[]}
-        self.surveys().append(d); save_data(self.data); self.reload_list(); self.lst.setCurrentRow(self.lst.count()-1)
+        self.surveys().append(d); self._survey_changed(); save_data(self.data)
+        self.reload_list(); self.lst.setCurrentRow(self.lst.count()-1)
 
     def dup_survey(self):
         cur = self.current()
@@ -3228,6 +3645,7 @@ class SurveyManagerPage(QtWidgets.QWidget):
 
         # env에 추가 및 저장
         self.surveys().append(new_surv)
+        self._survey_changed()
         save_data(self.data)
 
         # 리스트 갱신 후, 방금 복제된 항목 선택
@@ -3238,8 +3656,8 @@ class SurveyManagerPage(QtWidgets.QWidget):
     def del_survey(self):
         i=self.lst.currentRow(); 
         if i<0: return
-        if QtWidgets.QMessageBox.question(self,"삭제 확인","삭제할까요?")==QtWidgets.QMessageBox.Yes:
-            self.surveys().pop(i); save_data(self.data); 
+        if QtWidgets.QMessageBox.question(self,"삭제 확인","삭제할까요?")==QtWidgets.QMessageBox.StandardButton.Yes:
+            self.surveys().pop(i); self._survey_changed(); save_data(self.data)
             preferred = max(0, min(i, len(self.surveys())-1))
             self.reload_list(preferred_index=preferred)
 
@@ -3248,6 +3666,7 @@ class SurveyManagerPage(QtWidgets.QWidget):
         if i<0: return
         d=self.surveys()[i]
         d["info"]=self.info.get(); d["times"]=self.time.get(); d["vehicle"]=self.veh.get(); d["sites"]=self.sites.get()
+        self._survey_changed(i)
         save_data(self.data); self.reload_list()
 
     def load_current(self,*_):
@@ -3270,7 +3689,7 @@ class UserEditDialog(QtWidgets.QDialog):
         self.ed_name = QtWidgets.QLineEdit()
         self.ed_id = QtWidgets.QLineEdit()
         self.ed_pw = QtWidgets.QLineEdit()
-        self.ed_pw.setEchoMode(QtWidgets.QLineEdit.Password)
+        self.ed_pw.setEchoMode(QtWidgets.QLineEdit.EchoMode.Password)
 
         self.cb_role = QtWidgets.QComboBox()
         self.cb_role.addItems(["일반사용자", "관리자"])
@@ -3303,7 +3722,7 @@ class UserEditDialog(QtWidgets.QDialog):
         layout.addRow("종료일", self.dt_end)
         layout.addRow("부가정보", self.ed_extra)
 
-        btns = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel)
+        btns = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.StandardButton.Ok | QtWidgets.QDialogButtonBox.StandardButton.Cancel)
         layout.addRow(btns)
         btns.accepted.connect(self.accept)
         btns.rejected.connect(self.reject)
@@ -3380,10 +3799,10 @@ class UserManagerPage(QtWidgets.QWidget):
             ["번호", "이름", "아이디", "비밀번호", "권한", "등록일자", "상태", "사용기간", "부가정보", ""]
         )
         header = self.table.horizontalHeader()
-        header.setSectionResizeMode(QtWidgets.QHeaderView.Stretch)
+        header.setSectionResizeMode(QtWidgets.QHeaderView.ResizeMode.Stretch)
         # 번호 열은 가로 폭을 더 작게, 그리고 다른 열과 독립적으로 조정
         try:
-            header.setSectionResizeMode(0, QtWidgets.QHeaderView.ResizeToContents)
+            header.setSectionResizeMode(0, QtWidgets.QHeaderView.ResizeMode.ResizeToContents)
             self.table.setColumnWidth(0, 40)
         except Exception:
             pass
@@ -3392,8 +3811,8 @@ class UserManagerPage(QtWidgets.QWidget):
             self.table.verticalHeader().setVisible(False)
         except Exception:
             pass
-        self.table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
-        self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
         v.addWidget(self.table, 1)
 
         hb = QtWidgets.QHBoxLayout()
@@ -3435,15 +3854,15 @@ class UserManagerPage(QtWidgets.QWidget):
 
             rec.setdefault("번호", idx + 1)
             num_item = QtWidgets.QTableWidgetItem(str(rec.get("번호", idx + 1)))
-            num_item.setTextAlignment(QtCore.Qt.AlignCenter)
-            num_item.setFlags(num_item.flags() & ~QtCore.Qt.ItemIsEditable)
+            num_item.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
+            num_item.setFlags(num_item.flags() & ~QtCore.Qt.ItemFlag.ItemIsEditable)
             self.table.setItem(row, 0, num_item)
 
             def _item(text, align_center=False):
                 it = QtWidgets.QTableWidgetItem(text or "")
                 if align_center:
-                    it.setTextAlignment(QtCore.Qt.AlignCenter)
-                it.setFlags(it.flags() & ~QtCore.Qt.ItemIsEditable)
+                    it.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
+                it.setFlags(it.flags() & ~QtCore.Qt.ItemFlag.ItemIsEditable)
                 return it
 
             self.table.setItem(row, 1, _item(rec.get("이름", ""), True))
@@ -3480,7 +3899,7 @@ class UserManagerPage(QtWidgets.QWidget):
 
     def add_user(self):
         dlg = UserEditDialog(self)
-        if dlg.exec_() == QtWidgets.QDialog.Accepted:
+        if dlg.exec() == QtWidgets.QDialog.DialogCode.Accepted:
             data = dlg.get_data()
             if data is None:
                 return
@@ -3498,7 +3917,7 @@ class UserManagerPage(QtWidgets.QWidget):
         users = self._users()
         rec = dict(users[idx])
         dlg = UserEditDialog(self, rec)
-        if dlg.exec_() == QtWidgets.QDialog.Accepted:
+        if dlg.exec() == QtWidgets.QDialog.DialogCode.Accepted:
             data = dlg.get_data()
             if data is None:
                 return
@@ -3523,9 +3942,9 @@ class UserManagerPage(QtWidgets.QWidget):
         rec = users[idx]
         if QtWidgets.QMessageBox.question(
             self, "확인", f"선택한 사용자 '{rec.get('아이디','')}' 를 삭제하시겠습니까?",
-            QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No,
-            QtWidgets.QMessageBox.No,
-        ) != QtWidgets.QMessageBox.Yes:
+            QtWidgets.QMessageBox.StandardButton.Yes | QtWidgets.QMessageBox.StandardButton.No,
+            QtWidgets.QMessageBox.StandardButton.No,
+        ) != QtWidgets.QMessageBox.StandardButton.Yes:
             return
         del users[idx]
         # 번호 재정렬
@@ -3539,21 +3958,68 @@ class UserManagerPage(QtWidgets.QWidget):
 
 
 class Main(QtWidgets.QDialog):
-    def __init__(self, data):
-        super().__init__(); self.setWindowTitle(f"환경설정 (프로 플러스 – {APP_VER})"); self.resize(810,560)
+    def __init__(self, data, parent=None):
+        super().__init__(parent); self.setWindowTitle(f"환경설정 (프로 플러스 – {APP_VER})"); self.resize(810,560)
         v=QtWidgets.QVBoxLayout(self); self.tabs=QtWidgets.QTabWidget(); v.addWidget(self.tabs,1)
         self.pg_work = WorkManagerPage(data, self); self.tabs.addTab(self.pg_work, "차종 관리")
         self.pg_survey = SurveyManagerPage(data, self); self.tabs.addTab(self.pg_survey, "조사 관리")
         self.pg_user = UserManagerPage(data, self); self.tabs.addTab(self.pg_user, "사용자 관리")
-        hb=QtWidgets.QHBoxLayout(); hb.addStretch(1); b_save=QtWidgets.QPushButton("저장"); b_close=QtWidgets.QPushButton("닫기"); hb.addWidget(b_save); hb.addWidget(b_close); v.addLayout(hb)
-        b_save.clicked.connect(lambda *_:(
-            getattr(self.pg_survey, "persist_current", lambda: None)(),
-            save_data(data),
-            QtWidgets.QMessageBox.information(self,"저장","저장되었습니다.")
-        ))
+        hb=QtWidgets.QHBoxLayout(); self.lbl_save=QtWidgets.QLabel(""); hb.addWidget(self.lbl_save); hb.addStretch(1); b_save=QtWidgets.QPushButton("저장"); b_close=QtWidgets.QPushButton("닫기"); hb.addWidget(b_save); hb.addWidget(b_close); v.addLayout(hb)
+        # 편집 중 저장은 모아서 백그라운드로 (저장 버튼/닫기에서 즉시 기록)
+        global _SAVE_COORDINATOR
+        self.saver = SaveCoordinator(self); _SAVE_COORDINATOR = self.saver
+        self.saver.stateChanged.connect(self._on_save_state)
+        b_save.clicked.connect(lambda *_: self._save_now(data))
         b_close.clicked.connect(self.close)
         self.pg_work.changed.connect(lambda *_: self.pg_survey.veh.refresh_combo())
 
+    def _on_save_state(self, st):
+        if st == "dirty":
+            self.lbl_save.setText("● 저장 안 됨"); self.lbl_save.setStyleSheet("color:#c0392b;")
+        elif st == "saving":
+            self.lbl_save.setText("저장 중…"); self.lbl_save.setStyleSheet("color:#7f8c8d;")
+        elif st == "error":
+            self.lbl_save.setText("저장 실패 (재시도 대기)"); self.lbl_save.setStyleSheet("color:#c0392b; font-weight:bold;")
+        else:
+            at = self.saver.saved_at.strftime("%H:%M:%S") if self.saver.saved_at else ""
+            self.lbl_save.setText(f"저장됨 {at}".strip()); self.lbl_save.setStyleSheet("color:#27ae60;")
+        self.lbl_save.setToolTip(self.saver.last_error or DATA_PATH)
+
+    def _save_now(self, data):
+        getattr(self.pg_survey, "persist_current", lambda: None)()
+        save_data(data)
+        self.saver.flush(wait=True)
+        if self.saver.state == "error":
+            QtWidgets.QMessageBox.warning(self, "저장", f"저장에 실패했습니다.\n{self.saver.last_error}")
+        else:
+            QtWidgets.QMessageBox.information(self,"저장","저장되었습니다.")
+
+    def done(self, r):
+        # 닫기/Esc/X 모두 여기로: 남은 변경을 기록하고 전역 저장 경로를 원래대로.
+        # 기록에 실패하면 다시 시도/버리기를 묻고, 저장됐거나 버리기를 고른 뒤에만 닫습니다.
+        global _SAVE_COORDINATOR
+        MB = QtWidgets.QMessageBox
+        while True:
+            try:
+                self.saver.flush(wait=True)
+            except Exception as e:
+                self.saver.last_error = str(e)
+                self.saver._set_state("error")
+            if self.saver.state != "error":
+                break
+            ans = MB.warning(self, "저장", f"저장에 실패했습니다.\n{self.saver.last_error}\n\n"
+                             "다시 시도할까요? 버리기를 누르면 저장하지 않은 변경이 사라집니다.",
+                             MB.StandardButton.Retry | MB.StandardButton.Discard | MB.StandardButton.Cancel,
+                             MB.StandardButton.Retry)
+            if ans == MB.StandardButton.Discard:
+                break
+            if ans != MB.StandardButton.Retry:
+                return      # 창을 닫지 않음 (재시도 타이머는 그대로)
+        self.saver.stop()
+        if _SAVE_COORDINATOR is self.saver:
+            _SAVE_COORDINATOR = None
+        super().done(r)
+
 def main():
     app=QtWidgets.QApplication(sys.argv)
 
@@ -3577,7 +4043,7 @@ def main():
 # -----------------------------------------------
     data=load_data()
     w=Main(data); w.show()
-    sys.exit(app.exec_())
+    sys.exit(app.exec())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,427 @@
+# -*- coding: utf-8 -*-
+"""
+libmpv 재생 코어 (Qt 없이) — cm_v56 의 프로세스 내 mpv 와 플레이어 호스트 자식 프로세스가 함께 씁니다.
+- SimpleMpv: libmpv C API 를 ctypes 로 직접 호출하는 최소 래퍼 (DLL 탐색은 load_libmpv)
+- host_main: COUNTERMAX_PLAYER_HOST=1 일 때 multiprocessing(spawn) 자식 프로세스 진입점.
+    명령은 파이프로 받고, time-pos/duration/EOF 등 상태는 공유 메모리 블록(HOST_STATE)에 seqlock 으로 게시합니다.
+    spawn 자식은 이 모듈만 다시 import 하므로 PyQt6 와 GUI 모듈을 읽지 않습니다.
+"""
+import ctypes, os, struct, time
+from pathlib import Path
+
+HOST_STATE = struct.Struct("<IIddddBBiIIdd")
+# seq, ack(마지막 처리 명령 id), time_pos, duration, speed, volume, pause, eof, playlist_pos,
+# dropped, decoder_dropped, avsync, vf_fps
+HOST_PUBLISH_S = 0.02
+
+
+class MpvLoadError(RuntimeError):
+    pass
+
+def libmpv_path_cache_file() -> str:
+    """찾아낸 libmpv 경로를 기억해 두는 파일 (다음 실행 때 폴더 탐색 생략)."""
+    base = os.environ.get("LOCALAPPDATA") or str(Path.home() / ".cache")
+    return os.path.join(base, "CounterMax", "libmpv_path.txt")
+
+def load_libmpv():
+    """
+    libmpv DLL을 찾고 로드합니다.
+
+    - 개발용(.py) : counter_max.py 가 있는 폴더 또는 하위 mpv/mpv-64 폴더에서 검색
+    - 배포용(.exe, PyInstaller) :
+        Counter_Max.exe 가 있는 폴더 또는 그 하위 mpv/mpv-64 폴더에서 검색
+
+    추가로 MPV_PATH / MPV_HOME 환경변수로 직접 경로를 지정할 수도 있습니다.
+    환경변수가 없으면 지난 실행에서 찾은 경로(libmpv_path_cache_file)를 먼저 시도합니다.
+    """
+    import os, sys, ctypes
+
+    base_dirs = []
+
+    # 1) 환경변수 우선
+    env = os.environ.get("MPV_PATH") or os.environ.get("MPV_HOME")
+    if env:
+        base_dirs.append(env)
+    else:
+        try:
+            with open(libmpv_path_cache_file(), "r", encoding="utf-8") as f:
+                cached = f.read().strip()
+            if cached and os.path.isfile(cached):
+                return ctypes.WinDLL(cached)
+        except Exception:
+            pass
+
+    # 2) PyInstaller 로 빌드된 exe 위치
+    if getattr(sys, "frozen", False):
+        exe_dir = os.path.dirname(getattr(sys, "executable", "") or "")
+        if exe_dir:
+            base_dirs.extend([
+                exe_dir,
+                os.path.join(exe_dir, "mpv"),
+                os.path.join(exe_dir, "mpv-64"),
+            ])
+        # onefile 모드에서 임시 풀리는 _MEIPASS 도 후보에 추가
+        meipass = getattr(sys, "_MEIPASS", None)
+        if meipass:
+            base_dirs.extend([
+                meipass,
+                os.path.join(meipass, "mpv"),
+                os.path.join(meipass, "mpv-64"),
+            ])
+
+    # 3) 일반 파이썬 실행 시: 스크립트(.py) 파일 기준
+    try:
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+    except Exception:
+        script_dir = os.getcwd()
+    base_dirs.extend([
+        script_dir,
+        os.path.join(script_dir, "mpv"),
+        os.path.join(script_dir, "mpv-64"),
+    ])
+
+    # 4) 현재 작업 디렉터리도 마지막 후보로
+    cwd = os.getcwd()
+    if cwd:
+        base_dirs.append(cwd)
+
+    # 중복 제거 (순서 유지)
+    seen = set()
+    dirs: list[str] = []
+    for d in base_dirs:
+        if not d:
+            continue
+        norm = os.path.normpath(d)
+        if norm in seen:
+            continue
+        seen.add(norm)
+        dirs.append(norm)
+
+    names = ["libmpv-2.dll", "mpv-2.dll", "libmpv.dll", "mpv.dll"]
+    tried = []
+
+    for d in dirs:
+        if not os.path.isdir(d):
+            continue
+        for n in names:
+            path = os.path.join(d, n)
+            if not os.path.exists(path):
+                continue
+            tried.append(path)
+            try:
+                lib = ctypes.WinDLL(path)
+            except Exception:
+                # 로드 실패 시 다음 후보 계속 시도
+                continue
+            try:
+                cache = libmpv_path_cache_file()
+                os.makedirs(os.path.dirname(cache), exist_ok=True)
+                with open(cache, "w", encoding="utf-8") as f:
+                    f.write(path)
+            except Exception:
+                pass
+            return lib
+
+    # 여기까지 도달하면 libmpv 를 전혀 찾지 못한 상태
+    raise MpvLoadError(
+        "libmpv DLL을 찾을 수 없습니다.\n"
+        "mpv 포터블(zip)을 받아서 libmpv-2.dll 파일을\n"
+        "프로그램 exe가 있는 폴더 또는 exe 옆의 mpv/mpv-64 폴더에 복사해 주세요.\n\n"
+        "예) Counter_Max.exe 와 같은 폴더에 libmpv-2.dll 또는 mpv/libmpv-2.dll"
+    )
+
+
+class SimpleMpv:
+    """
+    libmpv C API 를 ctypes로 직접 호출하는 간단 래퍼.
+    - 설치(pip)가 필요 없고, libmpv-2.dll 파일만 있으면 동작합니다.
+    - 여기서는 필요한 기능(loadfile, playlist, stop, pause, speed, time-pos, duration, volume)만 최소 구현합니다.
+    - 자동 다음 재생은 mpv 플레이리스트로 처리합니다: prefetch-playlist 로 다음 파일을 미리 열고,
+      keep-open=yes 로 마지막 항목에서는 끝 프레임에 멈춰 eof-reached 를 알립니다.
+    - 배속이 바뀌면 RATE_PROFILES 중 해당 구간의 옵션(오디오/프레임드롭/동기화/캐시)으로 전환합니다.
+    """
+    AUDIO_OFF_RATE = 4.0
+    # 배속 구간별 재생 프로파일: (최소 배속, 런타임 property 값). 고배속에서는 오디오를 끄고
+    # 디코더 단계부터 프레임을 버리며, 영상 시계를 오디오/디스플레이에서 분리하고 미리 읽기를 늘립니다.
+    RATE_PROFILES = [
+        (0.0, {"aid": "auto", "framedrop": "vo", "video-sync": "audio",
+               "demuxer-readahead-secs": "5", "demuxer-max-bytes": "150MiB", "vd-lavc-skiploopfilter": "default"}),
+        (2.5, {"aid": "auto", "framedrop": "decoder+vo", "video-sync": "audio",
+               "demuxer-readahead-secs": "20", "demuxer-max-bytes": "300MiB", "vd-lavc-skiploopfilter": "nonref"}),
+        (AUDIO_OFF_RATE, {"aid": "no", "framedrop": "decoder+vo", "video-sync": "desync",
+               "demuxer-readahead-secs": "60", "demuxer-max-bytes": "600MiB", "vd-lavc-skiploopfilter": "all"}),
+    ]
+
+    def __init__(self):
+        self.lib = load_libmpv()
+        # 함수 시그니처 설정
+        self.lib.mpv_create.restype = ctypes.c_void_p
+        self.lib.mpv_initialize.argtypes = [ctypes.c_void_p]
+        self.lib.mpv_initialize.restype = ctypes.c_int
+        self.lib.mpv_terminate_destroy.argtypes = [ctypes.c_void_p]
+        self.lib.mpv_terminate_destroy.restype = None
+        self.lib.mpv_set_option_string.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_char_p]
+        self.lib.mpv_set_option_string.restype = ctypes.c_int
+        self.lib.mpv_command.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_char_p)]
+        self.lib.mpv_command.restype = ctypes.c_int
+        self.lib.mpv_set_property_string.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_char_p]
+        self.lib.mpv_set_property_string.restype = ctypes.c_int
+        # 문자열 property 조회용
+        self.lib.mpv_get_property_string.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
+        self.lib.mpv_get_property_string.restype = ctypes.c_void_p
+        self.lib.mpv_free.argtypes = [ctypes.c_void_p]
+        self.lib.mpv_free.restype = None
+
+        self.handle = self.lib.mpv_create()
+        if not self.handle:
+            raise RuntimeError("mpv_create 실패")
+
+        # 콘솔 메시지 최소화
+        self.lib.mpv_set_option_string(self.handle, b"terminal", b"no")
+        self.lib.mpv_set_option_string(self.handle, b"msg-level", b"all=no")
+        # 플레이리스트 다음 항목 미리 열기 + 마지막 항목에서 멈춤 (클립 경계 무중단 전환)
+        self.lib.mpv_set_option_string(self.handle, b"prefetch-playlist", b"yes")
+        self.lib.mpv_set_option_string(self.handle, b"keep-open", b"yes")
+        # 디코더: 하드웨어 디코딩(가능할 때) + CPU 코어 수만큼 디코더 스레드
+        self.lib.mpv_set_option_string(self.handle, b"hwdec", b"auto-safe")
+        self.lib.mpv_set_option_string(self.handle, b"vd-lavc-threads", str(min(16, os.cpu_count() or 4)).encode("ascii"))
+        self.lib.mpv_set_option_string(self.handle, b"vd-lavc-fast", b"yes")
+        self.lib.mpv_set_option_string(self.handle, b"cache", b"yes")
+        self._profile_idx = None
+
+        # 초기화
+        if self.lib.mpv_initialize(self.handle) < 0:
+            raise RuntimeError("mpv_initialize 실패")
+
+    # -------- 내부 유틸 --------
+    def _command(self, args):
+        # args: [b"loadfile", b"path", b"replace"]
+        c_argv = (ctypes.c_char_p * (len(args)+1))()
+        for i, a in enumerate(args):
+            c_argv[i] = a
+        c_argv[len(args)] = None
+        return self.lib.mpv_command(self.handle, c_argv)
+
+    def _set_prop_str(self, name, value):
+        if isinstance(name, str):
+            name = name.encode("utf-8")
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        return self.lib.mpv_set_property_string(self.handle, name, value)
+
+    def _get_prop_str(self, name):
+        if isinstance(name, str):
+            name = name.encode("utf-8")
+        ptr = self.lib.mpv_get_property_string(self.handle, name)
+        if not ptr:
+            return None
+        try:
+            s = ctypes.cast(ptr, ctypes.c_char_p).value
+            if s is None:
+                return None
+            return s.decode("utf-8")
+        finally:
+            self.lib.mpv_free(ptr)
+
+    # -------- 공개 메서드 --------
+    def set_wid(self, wid: int):
+        """렌더링 윈도우 핸들 설정 (Windows 전용)."""
+        try:
+            self._set_prop_str("wid", str(int(wid)))
+        except Exception:
+            pass
+
+    def loadfile(self, path: str, mode: str = "replace"):
+        """mode: replace(즉시 교체) | append(플레이리스트 끝에 추가)"""
+        try:
+            self._command([b"loadfile", path.encode("utf-8"), mode.encode("ascii")])
+        except Exception:
+            pass
+
+    def playlist_clear(self):
+        """현재 재생 중인 항목만 남기고 플레이리스트를 비움 (현재 항목은 0번이 됨)."""
+        try:
+            self._command([b"playlist-clear"])
+        except Exception:
+            pass
+
+    @property
+    def playlist_pos(self) -> int:
+        v = self._get_prop_str("playlist-pos")
+        try:
+            return int(v)
+        except Exception:
+            return -1
+
+    def stop(self):
+        try:
+            self._command([b"stop"])
+        except Exception:
+            pass
+
+    @property
+    def pause(self) -> bool:
+        v = self._get_prop_str("pause")
+        if v is None:
+            return False
+        return v.lower() in ("yes", "1", "true")
+
+    @pause.setter
+    def pause(self, flag: bool):
+        self._set_prop_str("pause", "yes" if flag else "no")
+
+    @property
+    def speed(self) -> float:
+        v = self._get_prop_str("speed")
+        try:
+            return float(v)
+        except Exception:
+            return 1.0
+
+    @speed.setter
+    def speed(self, sp: float):
+        try:
+            sp = max(0.1, min(16.0, float(sp)))
+        except Exception:
+            sp = 1.0
+        self.apply_rate_profile(sp)
+        self._set_prop_str("speed", str(sp))
+
+    def apply_rate_profile(self, rate: float) -> int:
+        """배속에 맞는 재생 프로파일 적용 (구간이 바뀔 때만 property 설정). 적용된 구간 번호 반환."""
+        idx = 0
+        for i, (lo, _opts) in enumerate(self.RATE_PROFILES):
+            if rate >= lo:
+                idx = i
+        if idx != self._profile_idx:
+            self._profile_idx = idx
+            for k, v in self.RATE_PROFILES[idx][1].items():
+                self._set_prop_str(k, v)
+        return idx
+
+    def playback_stats(self) -> dict:
+        """재생 품질 지표: 버린 프레임 수(출력/디코더), A-V 어긋남(초), 실제 출력 fps."""
+        def _num(name, default=0.0):
+            try:
+                return float(self._get_prop_str(name))
+            except Exception:
+                return default
+        return {
+            "profile": self._profile_idx or 0,
+            "dropped": int(_num("frame-drop-count")),
+            "decoder_dropped": int(_num("decoder-frame-drop-count")),
+            "avsync": _num("avsync"),
+            "vf_fps": _num("estimated-vf-fps"),
+        }
+
+    @property
+    def time_pos(self) -> float:
+        v = self._get_prop_str("time-pos")
+        try:
+            return float(v)
+        except Exception:
+            return 0.0
+
+    @time_pos.setter
+    def time_pos(self, sec: float):
+        try:
+            if sec < 0:
+                sec = 0.0
+            self._set_prop_str("time-pos", str(float(sec)))
+        except Exception:
+            pass
+
+    @property
+    def duration(self) -> float:
+        v = self._get_prop_str("duration")
+        try:
+            return float(v)
+        except Exception:
+            return 0.0
+
+    @property
+    def volume(self) -> int:
+        v = self._get_prop_str("volume")
+        try:
+            return int(float(v))
+        except Exception:
+            return 0
+
+    @volume.setter
+    def volume(self, val: int):
+        try:
+            v = max(0, min(100, int(val)))
+        except Exception:
+            v = 100
+        self._set_prop_str("volume", str(v))
+
+    @property
+    def eof_reached(self) -> bool:
+        v = self._get_prop_str("eof-reached")
+        if v is None:
+            return False
+        return v.lower() in ("yes", "1", "true")
+
+    def terminate(self):
+        try:
+            if self.handle:
+                self.lib.mpv_terminate_destroy(self.handle)
+        except Exception:
+            pass
+        self.handle = None
+
+
+def host_main(conn, shm_name: str):
+    """자식 프로세스 진입점: 명령을 처리하고 상태를 공유 메모리에 게시합니다."""
+    from multiprocessing import shared_memory
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        core = SimpleMpv()
+    except MpvLoadError as e:
+        conn.send(("loaderror", str(e))); return
+    except Exception as e:
+        conn.send(("error", str(e))); return
+    conn.send(("ready", ""))
+    seq = 0
+    ack = 0
+    stats = {}
+    next_stats = 0.0
+    buf = shm.buf
+    try:
+        while True:
+            try:
+                if conn.poll(HOST_PUBLISH_S):
+                    while True:
+                        msg = conn.recv()
+                        if msg[1] == "quit":
+                            return
+                        ack = msg[0]
+                        try:
+                            if msg[1] == "set":
+                                setattr(core, msg[2], msg[3])
+                            else:
+                                getattr(core, msg[2])(*msg[3])
+                        except Exception:
+                            pass
+                        if not conn.poll(0):
+                            break
+            except (EOFError, OSError):
+                return   # 부모 종료
+            now = time.monotonic()
+            if now >= next_stats:
+                stats = core.playback_stats()
+                next_stats = now + 0.5
+            seq += 1
+            struct.pack_into("<I", buf, 0, seq * 2 - 1)   # 쓰는 중(홀수)
+            HOST_STATE.pack_into(buf, 0, seq * 2 - 1, ack, core.time_pos, core.duration, core.speed, float(core.volume),
+                                  1 if core.pause else 0, 1 if core.eof_reached else 0, core.playlist_pos,
+                                  stats.get("dropped", 0), stats.get("decoder_dropped", 0),
+                                  float(stats.get("avsync", 0.0)), float(stats.get("vf_fps", 0.0)))
+            struct.pack_into("<I", buf, 0, seq * 2)       # 완료(짝수)
+    finally:
+        try:
+            core.terminate()
+        except Exception:
+            pass
+        del buf
+        shm.close()
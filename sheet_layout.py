@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+"""
+시트 레이아웃 — 환경설정/계수 프로그램 공용
+- slot_starts / slot_labels(windows): 조사 시간창 [(시작초, 종료초)] -> 15분 슬롯 시작초/라벨 ("07:00~07:15", ...)
+    계수 프로그램의 시간대 콤보/시트/CSV/엑셀과 환경설정 조사시간 자동생성·시트 미리보기가 같은 함수를 씁니다.
+- SheetLayout / layout_for(windows, directions, enabled, vehicles): 설정이 바뀔 때만 새로 만드는 시트 모양
+    (슬롯 행, 사용 방향, 차종 열, CountTable 셀 -> (시트, 행, 열) 매핑). fill(table) 한 번으로
+    방향별 정수 배열을 채우므로 내보내기는 배열을 그대로 쓰기만 합니다.
+- windows_from_times(times): 환경설정 조사시간 행 [{"시작","종료"}] -> 이어지는 구간끼리 합친 시간창
+- site_sheets(times, cfg, projects): 지점 하나의 방향별 시트(시간대 행 + 차종 열).
+    (시간대, 입력그룹, 카운터, 그룹별 차종유형, 프로젝트 시트 버전) 을 키로 메모이즈하므로
+    같은 지점을 다시 미리보기하면 계산 없이 바로 돌려줍니다.
+"""
+import hashlib, json, re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+SLOT_SEC = 15 * 60
+DEFAULT_COLUMNS = ("차종1", "차종2")
+CACHE_SIZE = 64
+
+_DIGITS = re.compile(r"[^0-9]+")
+
+
+# ---------------- 시간대 ----------------
+def hm(sec: int) -> str:
+    sec = sec % 86400
+    return f"{sec // 3600:02d}:{(sec % 3600) // 60:02d}"
+
+
+def slot_label(start_sec: int, slot_sec: int = SLOT_SEC) -> str:
+    return f"{hm(start_sec)}~{hm((start_sec + slot_sec) % 86400)}"
+
+
+_STARTS_CACHE: Dict[Tuple, Tuple[int, ...]] = {}
+
+
+def slot_starts(windows: Iterable[Sequence[int]], slot_sec: int = SLOT_SEC, partial: bool = True) -> Tuple[int, ...]:
+    """시간창을 정렬해 슬롯 시작초를 만들고, 같은 라벨(겹치는 창)은 처음 것만 남깁니다.
+    partial=False 면 창 끝에 걸쳐 잘리는 마지막 슬롯은 뺍니다(조사시간 자동생성)."""
+    key = (tuple(sorted((int(s), int(e)) for s, e in windows)), int(slot_sec), bool(partial))
+    starts = _STARTS_CACHE.get(key)
+    if starts is None:
+        seen, out = set(), []
+        for s, e in key[0]:
+            t = s
+            while t < e and (partial or t + slot_sec <= e):
+                if t % 86400 not in seen:
+                    seen.add(t % 86400)
+                    out.append(t)
+                t += slot_sec
+        starts = tuple(out)
+        if len(_STARTS_CACHE) >= CACHE_SIZE:
+            _STARTS_CACHE.clear()
+        _STARTS_CACHE[key] = starts
+    return starts
+
+
+def slot_labels(windows: Iterable[Sequence[int]], slot_sec: int = SLOT_SEC) -> Tuple[str, ...]:
+    return tuple(slot_label(t, slot_sec) for t in slot_starts(windows, slot_sec))
+
+
+def parse_hm(text) -> Optional[int]:
+    """"HH:MM" -> 초. 형식이 아니면 None."""
+    h, sep, m = str(text or "").strip().partition(":")
+    if not sep:
+        return None
+    try:
+        return int(h) * 3600 + int(m) * 60
+    except ValueError:
+        return None
+
+
+def windows_from_times(times) -> List[Tuple[int, int]]:
+    """조사시간 행들을 시간창으로 (맞닿거나 겹치는 행은 하나로 합침). 종료가 시작 이전이면 자정을 넘긴 것으로 봅니다."""
+    spans = []
+    for row in times or []:
+        if not isinstance(row, dict):
+            continue
+        s, e = parse_hm(row.get("시작")), parse_hm(row.get("종료"))
+        if s is None or e is None:
+            continue
+        if e <= s:
+            e += 86400
+        spans.append((s, e))
+    spans.sort()
+    merged: List[Tuple[int, int]] = []
+    for s, e in spans:
+        if merged and s <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], e))
+        else:
+            merged.append((s, e))
+    return merged
+
+
+# ---------------- 계수 시트 레이아웃 ----------------
+@dataclass(frozen=True, eq=False)
+class SheetLayout:
+    """방향별 시트 한 벌의 모양. 시트 k = directions[k], 행 = 슬롯, 열 = vehicles."""
+    slot_sec: int
+    slot_starts: Tuple[int, ...]
+    labels: Tuple[str, ...]
+    directions: Tuple[int, ...]            # 사용 방향번호 (1부터)
+    direction_names: Tuple[str, ...]       # CountTable 의 방향 키 ("1번방향" ...)
+    vehicles: Tuple[str, ...]
+    slot_rows: Dict[int, int]              # CountTable 슬롯 index -> 행
+    cells: Dict[Tuple[str, str], Tuple[int, int]]   # (방향명, 차종) -> (시트, 열)
+
+    def sheet_of(self, dirno: int) -> int:
+        try:
+            return self.directions.index(int(dirno))
+        except ValueError:
+            return -1
+
+    def empty(self) -> List[List[List[int]]]:
+        ncols = len(self.vehicles)
+        return [[[0] * ncols for _ in self.labels] for _ in self.directions]
+
+    def fill(self, table: Dict[int, Dict[Tuple[str, str], int]]) -> List[List[List[int]]]:
+        """CountTable.table -> 방향별 [행][열] 정수 배열 (레이아웃에 없는 셀은 버림)."""
+        mats = self.empty()
+        rows, cells = self.slot_rows, self.cells
+        for idx, counts in table.items():
+            r = rows.get(idx)
+            if r is None:
+                continue
+            for key, v in counts.items():
+                pos = cells.get(key)
+                if pos is not None and v:
+                    mats[pos[0]][r][pos[1]] += v
+        return mats
+
+    def header(self) -> List[str]:
+        return ["시간대"] + list(self.vehicles)
+
+    def sheet_rows(self, mat: List[List[int]]) -> Iterable[list]:
+        """시트 하나의 데이터 행 (시간대 + 차종별 값)."""
+        for label, row in zip(self.labels, mat):
+            yield [label] + row
+
+    def wide_header(self) -> List[List[str]]:
+        """전체 방향을 가로로 붙인 CSV 머리글 2줄 (방향번호 / 차종)."""
+        return [["시간대"] + [str(d) for d in self.directions for _ in self.vehicles],
+                [""] + [v for _ in self.directions for v in self.vehicles]]
+
+    def wide_rows(self, mats: List[List[List[int]]]) -> Iterable[list]:
+        for r, label in enumerate(self.labels):
+            out = [label]
+            for mat in mats:
+                out.extend(mat[r])
+            yield out
+
+
+_LAYOUT_CACHE: "OrderedDict[Tuple, SheetLayout]" = OrderedDict()
+
+
+def layout_for(windows, directions, enabled, vehicles, slot_sec: int = SLOT_SEC) -> SheetLayout:
+    """설정 값으로 SheetLayout 을 찾거나 만듭니다(같은 설정이면 같은 객체).
+    directions/enabled 는 ProjectConfig.directions/enabled_directions, 켜진 방향이 없으면 1번 방향."""
+    names = tuple(str(d) for d in directions or [])
+    flags = tuple(bool(f) for f in enabled or [])
+    key = (tuple((int(s), int(e)) for s, e in windows or []), names, flags,
+           tuple(str(v) for v in vehicles or []), int(slot_sec))
+    lay = _LAYOUT_CACHE.get(key)
+    if lay is not None:
+        _LAYOUT_CACHE.move_to_end(key)
+        return lay
+    starts = slot_starts(key[0], slot_sec) or (0,)
+    labels = tuple(slot_label(t, slot_sec) for t in starts)
+    row_of_label = {lab: r for r, lab in enumerate(labels)}
+    slot_rows = {}
+    for s, e in sorted(key[0]):
+        t = s
+        while t < e:      # 자정을 넘긴 창은 같은 라벨의 다른 슬롯 index 도 같은 행으로
+            slot_rows.setdefault(t // slot_sec + 1, row_of_label[slot_label(t, slot_sec)])
+            t += slot_sec
+    if not key[0]:
+        slot_rows[1] = 0
+    dirs = tuple(i + 1 for i, ok in enumerate(flags) if ok and i < len(names)) or (1,)
+    dir_names = tuple(names[d - 1] if d - 1 < len(names) else f"{d}번방향" for d in dirs)
+    cells = {(dn, v): (k, c) for k, dn in enumerate(dir_names) for c, v in enumerate(key[3])}
+    lay = SheetLayout(slot_sec=int(slot_sec), slot_starts=starts, labels=labels, directions=dirs,
+                      direction_names=dir_names, vehicles=key[3], slot_rows=slot_rows, cells=cells)
+    _LAYOUT_CACHE[key] = lay
+    if len(_LAYOUT_CACHE) > CACHE_SIZE:
+        _LAYOUT_CACHE.popitem(last=False)
+    return lay
+
+
+# ---------------- 방향/차종 열 ----------------
+def direction_numbers(groups) -> List[int]:
+    """입력그룹 라벨("4-5-6", "7-8-9" ...)에 쓰인 방향번호 (정렬, 중복 제거)."""
+    nums = set()
+    for label in groups or []:
+        for part in _DIGITS.split(str(label)):
+            if part.isdigit():
+                nums.add(int(part))
+    return sorted(nums)
+
+
+def _vehicle_names(project: dict) -> Tuple[str, ...]:
+    return tuple(str(v.get("차종명", "")) for v in (project.get("vehicle_set") or []) if isinstance(v, dict))
+
+
+def _sheet_index(projects) -> Dict[str, Tuple[str, ...]]:
+    """단축키 시트 이름 -> 차종명 열 (앞 프로젝트의 시트가 우선)."""
+    out: Dict[str, Tuple[str, ...]] = {}
+    for proj in projects or []:
+        for sh in (proj.get("hotkey_sheets_global") or []) if isinstance(proj, dict) else []:
+            name = str(sh.get("name", "")).strip() if isinstance(sh, dict) else ""
+            if not name or name in out:
+                continue
+            cols = tuple(str(it.get("차종명", "")) for it in (sh.get("items") or []) if isinstance(it, dict))
+            if cols:
+                out[name] = cols
+    return out
+
+
+def projects_version(projects) -> str:
+    """시트 미리보기에 쓰이는 부분(차종 세트, 단축키 시트)만 해시."""
+    parts = [(p.get("vehicle_set"), p.get("hotkey_sheets_global")) for p in (projects or []) if isinstance(p, dict)]
+    raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class SiteSheets:
+    """지점 하나의 방향별 시트 모양. values 는 없이 행/열 구성만 담습니다."""
+    labels: Tuple[str, ...]                                   # 시간대 행
+    directions: Tuple[Tuple[int, Tuple[str, ...]], ...]       # ((방향번호, 차종 열), ...)
+
+
+_SHEETS_CACHE: "OrderedDict[Tuple, SiteSheets]" = OrderedDict()
+
+
+def _freeze(cfg: dict, times, default_project: int, version: str) -> Tuple:
+    counters = tuple((str(c.get("dir", "")).strip(), str(c.get("name", "")).strip())
+                     for c in (cfg.get("counters") or []) if isinstance(c, dict))
+    group_projects = tuple(sorted((str(k), str(v)) for k, v in (cfg.get("group_projects") or {}).items()))
+    time_rows = tuple((str(r.get("시작", "")), str(r.get("종료", ""))) for r in (times or []) if isinstance(r, dict))
+    return (time_rows, tuple(str(g) for g in (cfg.get("groups") or [])), counters, group_projects,
+            int(default_project), version)
+
+
+def site_sheets(times, cfg: Optional[dict], projects, default_project: int = 0,
+                version: Optional[str] = None) -> SiteSheets:
+    """지점 설정(cfg: groups/counters/group_projects)으로 방향별 시트 구성을 만듭니다.
+    방향에 연결된 단축키 시트가 있으면 그 시트의 차종명, 없으면 그룹별(또는 default_project) 차종 세트."""
+    cfg = cfg or {}
+    if version is None:
+        version = projects_version(projects)
+    key = _freeze(cfg, times, default_project, version)
+    hit = _SHEETS_CACHE.get(key)
+    if hit is not None:
+        _SHEETS_CACHE.move_to_end(key)
+        return hit
+
+    time_rows, groups, counters, group_projects = key[0], key[1] or ("1",), key[2], key[3]
+    dir_to_sheet = {int(d): name for d, name in counters if d.isdigit() and name}
+    dir_to_proj = {}
+    for label, p_idx in group_projects:
+        try:
+            p = int(p_idx)
+        except ValueError:
+            continue
+        for d in direction_numbers([label]):
+            dir_to_proj[d] = p
+    projects = [p for p in (projects or []) if isinstance(p, dict)]
+    sheets = _sheet_index(projects)
+
+    def columns(d: int) -> Tuple[str, ...]:
+        cols = sheets.get(dir_to_sheet.get(d, ""))
+        if cols:
+            return cols
+        if not projects:
+            return DEFAULT_COLUMNS
+        p = dir_to_proj.get(d, default_project)
+        if not (0 <= p < len(projects)):
+            p = 0
+        return _vehicle_names(projects[p]) or DEFAULT_COLUMNS
+
+    dirs = direction_numbers(groups) or [1]
+    labels = slot_labels(windows_from_times([{"시작": s, "종료": e} for s, e in time_rows]))
+    out = SiteSheets(labels=labels, directions=tuple((d, columns(d)) for d in dirs))
+    _SHEETS_CACHE[key] = out
+    if len(_SHEETS_CACHE) > CACHE_SIZE:
+        _SHEETS_CACHE.popitem(last=False)
+    return out
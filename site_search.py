@@ -0,0 +1,335 @@
+# -*- coding: utf-8 -*-
+"""
+과업/지점 빠른 찾기 색인 — 환경설정/계수 프로그램 공용
+- SiteSearchIndex.build(surveys): 과업명·조사번호(SN)·발주처·조사기간·지번·지점명·작업번호를
+  토큰으로 잘라 메모리 역색인(토큰 -> 문서 집합)을 만듭니다. 문서 = (과업 index, 지점 index),
+  과업 자체는 지점 index -1.
+- search(query): 공백으로 나눈 검색어마다 접두어 일치(정렬된 토큰 목록을 bisect),
+  한글 초성만 입력하면(예: "ㄱㄴ") 초성 색인에서 접두어 일치. 모든 검색어를 만족하는 지점만 돌려줍니다.
+  과업 필드에 맞은 검색어는 그 과업의 모든 지점에 맞은 것으로 칩니다("강남 사거리" 등).
+- update_survey(si, survey): 과업 하나만 다시 색인(지점 편집/저장 후). 과업 추가/삭제로
+  순서가 바뀌면 build() 를 다시 부릅니다.
+"""
+import heapq, re, sys, time
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_CHOSEONG_SET = frozenset(CHOSEONG)
+_HANGUL_FIRST, _HANGUL_LAST = 0xAC00, 0xD7A3
+_SPLIT = re.compile(r"[^0-9a-z가-힣ㄱ-ㅎ]+")
+_HAS_HANGUL = re.compile(r"[가-힣]")
+DEFAULT_LIMIT = 50
+
+Doc = Tuple[int, int]     # (과업 index, 지점 index | -1)
+
+
+@dataclass
+class SearchHit:
+    survey_index: int
+    site_index: int         # -1 이면 과업 자체
+    survey_name: str = ""
+    site_label: str = ""
+    work_no: str = ""
+    score: int = 0
+
+    @property
+    def label(self) -> str:
+        if self.site_index < 0:
+            return self.survey_name
+        tail = f" ({self.work_no})" if self.work_no else ""
+        return f"{self.survey_name} › {self.site_label}{tail}"
+
+
+# ---------------- 토큰 ----------------
+def choseong(text: str) -> str:
+    """한글 음절을 초성으로 ("강남역" -> "ㄱㄴㅇ"). 한글이 아닌 글자는 버립니다."""
+    out = []
+    for ch in text:
+        code = ord(ch)
+        if _HANGUL_FIRST <= code <= _HANGUL_LAST:
+            out.append(CHOSEONG[(code - _HANGUL_FIRST) // 588])
+    return "".join(out)
+
+
+def is_choseong_query(term: str) -> bool:
+    return bool(term) and all(ch in _CHOSEONG_SET for ch in term)
+
+
+def split_terms(text) -> List[str]:
+    """소문자로 바꾸고 글자/숫자가 아닌 것으로 자름."""
+    return [p for p in _SPLIT.split(str(text or "").lower()) if p]
+
+
+def field_tokens(text) -> Tuple[Set[str], Set[str]]:
+    """필드 하나의 (일반 토큰, 초성 토큰).
+    낱말 + 구분자를 뺀 전체("wn_0012" -> "wn0012") + 앞자리 0 을 뗀 숫자("0012" -> "12")."""
+    parts = split_terms(text)
+    toks: Set[str] = set(parts)
+    if len(parts) > 1:
+        toks.add("".join(parts))
+    for p in parts:
+        if p.isdigit() and p[0] == "0":
+            stripped = p.lstrip("0")
+            if stripped:
+                toks.add(stripped)
+    cho: Set[str] = set()
+    for t in toks:
+        if _HAS_HANGUL.search(t):
+            c = choseong(t)
+            if c:
+                cho.add(c)
+    return toks, cho
+
+
+def _site_fields(site: dict) -> Tuple[str, str, str]:
+    """(지번, 지점명, 작업번호) — env 한글 키와 json export 영문 키 모두 대응."""
+    jibun = str(site.get("지번") or site.get("jibun") or "").strip()
+    name = str(site.get("지점명") or site.get("name") or site.get("site_name") or "").strip()
+    wno = str(site.get("작업번호") or site.get("work_no") or site.get("id") or "").strip()
+    return jibun, name, wno
+
+
+def site_label(site: dict) -> str:
+    jibun, name, _wno = _site_fields(site)
+    if jibun and name:
+        return f"{jibun}_{name}"
+    return jibun or name or "지점"
+
+
+def _survey_texts(info: dict) -> List[str]:
+    period = info.get("period") or []
+    if isinstance(period, (list, tuple)):
+        period = " ".join(str(p) for p in period)
+    return [info.get("name") or "", info.get("sn") or "", info.get("client") or "", period]
+
+
+# ---------------- 색인 ----------------
+class SiteSearchIndex:
+    def __init__(self, surveys: Optional[list] = None):
+        self._post: Dict[str, Set[Doc]] = {}
+        self._cho: Dict[str, Set[Doc]] = {}
+        self._keys: List[str] = []          # _post 의 정렬된 키 (접두어 bisect 용)
+        self._cho_keys: List[str] = []
+        self._doc_tokens: Dict[Doc, Tuple[Set[str], Set[str]]] = {}
+        self._meta: Dict[Doc, Tuple[str, str]] = {}     # 문서 -> (지점 표기, 작업번호)
+        self._survey_names: Dict[int, str] = {}
+        self._sites_of: Dict[int, List[Doc]] = {}
+        self._order: Optional[List[Doc]] = None          # 전체 문서 정렬 목록 (큰 집합에서 앞쪽 limit 개 찾기용)
+        self.last_ms = 0.0
+        if surveys is not None:
+            self.build(surveys)
+
+    def __len__(self):
+        return len(self._doc_tokens)
+
+    def build(self, surveys: Iterable[dict]):
+        """전체 다시 색인. 정렬 목록은 마지막에 한 번만 만듭니다."""
+        self._post.clear(); self._cho.clear()
+        self._doc_tokens.clear(); self._meta.clear()
+        self._survey_names.clear(); self._sites_of.clear()
+        self._order = None
+        for si, survey in enumerate(surveys or []):
+            self._add_survey(si, survey, keep_sorted=False)
+        self._keys = sorted(self._post)
+        self._cho_keys = sorted(self._cho)
+
+    def update_survey(self, si: int, survey: Optional[dict]):
+        """과업 하나의 문서만 빼고 다시 넣음(과업 순서는 그대로일 때)."""
+        self._remove_survey(si)
+        self._order = None
+        if survey is not None:
+            self._add_survey(si, survey, keep_sorted=True)
+
+    def _add_doc(self, doc: Doc, toks: Set[str], cho: Set[str], keep_sorted: bool):
+        self._doc_tokens[doc] = (toks, cho)
+        for post, keys, tokens in ((self._post, self._keys, toks), (self._cho, self._cho_keys, cho)):
+            for t in tokens:
+                s = post.get(t)
+                if s is None:
+                    post[t] = s = set()
+                    if keep_sorted:
+                        insort(keys, t)
+                s.add(doc)
+
+    def _add_survey(self, si: int, survey: dict, keep_sorted: bool):
+        info = (survey or {}).get("info") or {}
+        toks: Set[str] = set(); cho: Set[str] = set()
+        for text in _survey_texts(info):
+            t, c = field_tokens(text)
+            toks |= t; cho |= c
+        self._survey_names[si] = str(info.get("name") or "(제목 없음)")
+        self._add_doc((si, -1), toks, cho, keep_sorted)
+        docs = []
+        for ti, site in enumerate((survey or {}).get("sites") or []):
+            if not isinstance(site, dict):
+                continue
+            toks = set(); cho = set()
+            jibun, name, wno = _site_fields(site)
+            for text in (jibun, name, wno):
+                t, c = field_tokens(text)
+                toks |= t; cho |= c
+            doc = (si, ti)
+            self._meta[doc] = (site_label(site), wno)
+            self._add_doc(doc, toks, cho, keep_sorted)
+            docs.append(doc)
+        self._sites_of[si] = docs
+
+    def _remove_survey(self, si: int):
+        for doc in [(si, -1)] + self._sites_of.pop(si, []):
+            toks, cho = self._doc_tokens.pop(doc, (set(), set()))
+            self._meta.pop(doc, None)
+            for post, keys, tokens in ((self._post, self._keys, toks), (self._cho, self._cho_keys, cho)):
+                for t in tokens:
+                    s = post.get(t)
+                    if s is None:
+                        continue
+                    s.discard(doc)
+                    if not s:
+                        del post[t]
+                        i = bisect_left(keys, t)
+                        if i < len(keys) and keys[i] == t:
+                            del keys[i]
+        self._survey_names.pop(si, None)
+
+    # ---------------- 검색 ----------------
+    @staticmethod
+    def _prefix_docs(post: Dict[str, Set[Doc]], keys: List[str], prefix: str) -> Tuple[Set[Doc], Set[Doc]]:
+        """(접두어가 맞는 문서, 토큰이 정확히 같은 문서)."""
+        out: Set[Doc] = set()
+        i = bisect_left(keys, prefix)
+        while i < len(keys) and keys[i].startswith(prefix):
+            out |= post[keys[i]]
+            i += 1
+        return out, post.get(prefix, set())
+
+    def _term_source(self, term: str) -> Tuple[Dict[str, Set[Doc]], List[str], str]:
+        """(역색인, 정렬 키, 찾을 접두어). 접두어가 비면 ""."""
+        if is_choseong_query(term):
+            return self._cho, self._cho_keys, term
+        return self._post, self._keys, "".join(split_terms(term))
+
+    def _term_docs(self, term: str) -> Tuple[Set[Doc], Set[Doc]]:
+        post, keys, key = self._term_source(term)
+        if not key:
+            return set(), set()
+        return self._prefix_docs(post, keys, key)
+
+    def _ordered(self) -> List[Doc]:
+        if self._order is None:
+            self._order = [d for si in sorted(self._sites_of) for d in [(si, -1)] + self._sites_of[si]]
+        return self._order
+
+    def _first_docs(self, docs: Set[Doc], n: int, sites_only: bool) -> List[Doc]:
+        """docs 중 앞쪽(과업/지점 순) n 개. 집합이 크면 전체를 정렬하지 않고 문서 순서대로 훑다가 멈춥니다."""
+        if len(docs) * 8 < len(self._doc_tokens):
+            return heapq.nsmallest(n, (d for d in docs if d[1] >= 0) if sites_only else docs)
+        out = []
+        for d in self._ordered():
+            if d in docs and not (sites_only and d[1] < 0):
+                out.append(d)
+                if len(out) >= n:
+                    break
+        return out
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT, include_surveys: bool = True) -> List[SearchHit]:
+        t0 = time.perf_counter()
+        terms = [t for t in str(query or "").lower().split() if t]
+        if not terms:
+            self.last_ms = 0.0
+            return []
+        limit = max(1, int(limit))
+        if len(terms) == 1:
+            ranked = self._rank_single(terms[0], limit, include_surveys)
+        else:
+            ranked = self._rank_all([self._term_docs(t) for t in terms], limit, include_surveys)
+        hits = []
+        for score, (si, ti) in ranked:
+            lab, wno = self._meta.get((si, ti), ("", ""))
+            hits.append(SearchHit(si, ti, self._survey_names.get(si, ""), lab, wno, score))
+        self.last_ms = (time.perf_counter() - t0) * 1000.0
+        return hits
+
+    def _rank_single(self, term: str, limit: int, include_surveys: bool) -> List[Tuple[int, Doc]]:
+        """검색어 하나: 정확 일치 -> 접두어 일치 -> 과업 필드로만 일치 순으로 limit 개만 채움.
+        접두어 토큰은 정렬 순서대로 합치다가 limit 개가 차면 멈추므로 "wn", "ㅈㅈ" 처럼
+        지점 대부분에 걸리는 검색어도 전체 합집합을 만들지 않습니다."""
+        post, keys, key = self._term_source(term)
+        if not key:
+            return []
+        sites_only = not include_surveys
+        exact = post.get(key, set())
+        out = [(3, d) for d in self._first_docs(exact, limit, sites_only)]
+        if len(out) >= limit:
+            return out
+        more: Set[Doc] = set()
+        surveys = {d[0] for d in exact if d[1] < 0}
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            i += 1
+        need = limit - len(out)
+        while i < len(keys) and keys[i].startswith(key):
+            for d in post[keys[i]]:
+                if d[1] < 0:
+                    surveys.add(d[0])
+                    if sites_only:
+                        continue
+                if d not in exact:
+                    more.add(d)
+            if len(more) >= need:
+                break       # 여기서 채워지므로 과업 필드 단계까지 가지 않음
+            i += 1
+        out += [(2, d) for d in heapq.nsmallest(need, more)]
+        for si in sorted(surveys):
+            if len(out) >= limit:
+                break
+            out += [(1, d) for d in self._sites_of.get(si, ())[:limit - len(out)]
+                    if d not in exact and d not in more]
+        return out[:limit]
+
+    def _rank_all(self, matched, limit: int, include_surveys: bool) -> List[Tuple[int, Doc]]:
+        # 후보가 가장 적은 검색어부터 좁힘
+        matched.sort(key=lambda m: len(m[0]))
+        per_term = [(docs, exact, {d[0] for d in docs if d[1] < 0}) for docs, exact in matched]
+        docs0, _exact0, surveys0 = per_term[0]
+        cand: Set[Doc] = {d for d in docs0 if d[1] >= 0}
+        for si in surveys0:
+            cand.update(self._sites_of.get(si, ()))
+            if include_surveys:
+                cand.add((si, -1))
+        for docs, _exact, surveys in per_term[1:]:
+            cand = {d for d in cand if d in docs or (d[1] >= 0 and d[0] in surveys)}
+            if not cand:
+                break
+
+        scored = []
+        for d in cand:
+            score = 0
+            for docs, exact, _surveys in per_term:
+                # 지점 자신의 토큰 일치(정확 > 접두어) > 과업 필드로만 일치
+                score += 3 if d in exact else (2 if d in docs else 1)
+            scored.append((-score, d))
+        return [(-neg, d) for neg, d in heapq.nsmallest(limit, scored)]
+
+
+def _main(argv: List[str]) -> int:
+    """python site_search.py <env_data_plus_allinone.json> <검색어...> — 색인/검색 시간 출력."""
+    import json
+    if len(argv) < 2:
+        print(_main.__doc__)
+        return 2
+    with open(argv[0], "r", encoding="utf-8") as f:
+        surveys = (json.load(f) or {}).get("surveys") or []
+    t0 = time.perf_counter()
+    idx = SiteSearchIndex(surveys)
+    print(f"문서 {len(idx)}개 색인, {(time.perf_counter() - t0) * 1000.0:.0f} ms")
+    hits = idx.search(" ".join(argv[1:]), limit=20)
+    for h in hits:
+        print(f"[{h.score}] {h.label}")
+    print(f"{len(hits)}건, {idx.last_ms:.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""cm_v56.py --batch 가 spawn 작업 프로세스에서도 Qt/GUI 모듈을 불러오지 않는지 확인."""
+import os, subprocess, sys, tempfile, unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import dat_codec  # noqa: E402
+
+# PyQt6 를 불러오면 바로 실패하게 하는 가짜 패키지 (부모/작업 프로세스 모두 PYTHONPATH 로 상속)
+_QT_BLOCKER = 'raise ImportError("batch 경로에서 PyQt6 를 불러옴")\n'
+
+
+class BatchSpawnTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        base = self.tmp.name
+        self.inp = os.path.join(base, "in", "SN_1")
+        self.out = os.path.join(base, "out")
+        os.makedirs(self.inp)
+        for k in range(6):
+            dat_codec.write_dat(os.path.join(self.inp, f"WN_{k}_20260101_u.dat"),
+                                {"SURVEY_NO": "SN_1", "WORK_NO": f"WN_{k}", "USER_ID": "u"},
+                                [[[1, 2, 0, 0, 0, 0]] * 4] * 2, sparse=True)
+        blocker = os.path.join(base, "blocker", "PyQt6")
+        os.makedirs(blocker)
+        with open(os.path.join(blocker, "__init__.py"), "w", encoding="utf-8") as f:
+            f.write(_QT_BLOCKER)
+        self.env = dict(os.environ, COUNTERMAX_MP_START="spawn",
+                        PYTHONPATH=os.pathsep.join([os.path.dirname(blocker), ROOT]))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _run(self, *args):
+        return subprocess.run([sys.executable, os.path.join(ROOT, "cm_v56.py"), "--batch", *args],
+                              cwd=ROOT, env=self.env, capture_output=True, text=True, timeout=300)
+
+    def test_spawn_pool_does_not_import_gui(self):
+        proc = self._run(os.path.dirname(self.inp), "-o", self.out, "--workers", "2", "--format", "CSV,xlsx")
+        self.assertEqual(proc.returncode, 0, proc.stdout + proc.stderr)
+        for k in range(6):
+            self.assertTrue(os.path.exists(os.path.join(self.out, f"WN_{k}.csv")))
+            self.assertTrue(os.path.exists(os.path.join(self.out, f"WN_{k}.xlsx")))
+
+    def test_unknown_format_is_rejected(self):
+        proc = self._run(os.path.dirname(self.inp), "-o", self.out, "--format", "csv,pdf")
+        self.assertEqual(proc.returncode, 2)
+        self.assertIn("pdf", proc.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
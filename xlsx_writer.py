@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+최소 XLSX 쓰기 — pandas/openpyxl 없이 시트 행을 바로 zip 안의 XML 로 흘려 씁니다.
+- write_xlsx(path, sheets, progress=None)
+    sheets: [(시트이름, 행들)], 행 = [값, ...] (str / int / float / None)
+    문자열은 inlineStr 로 써서 sharedStrings 를 만들지 않고, 시트마다 행을 모아 큰 덩어리로 한 번씩 씁니다.
+    임시 파일에 다 쓴 뒤 os.replace 로 바꾸므로 중간에 실패해도 기존 파일은 그대로입니다.
+- progress(끝난 시트 수, 전체 시트 수) 는 시트 하나를 다 쓸 때마다 불립니다(작업 스레드에서 호출될 수 있음).
+"""
+import os, re, zipfile
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+_ILLEGAL = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_SHEET_BAD = re.compile(r"[\[\]:*?/\\]")
+ROWS_PER_CHUNK = 512
+
+_CONTENT_TYPES_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>')
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/></Relationships>')
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="1"><font><sz val="11"/><name val="맑은 고딕"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>')
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>')
+_SHEET_TAIL = '</sheetData></worksheet>'
+
+
+def col_name(i: int) -> str:
+    """0 -> A, 25 -> Z, 26 -> AA"""
+    out = ""
+    i += 1
+    while i:
+        i, r = divmod(i - 1, 26)
+        out = chr(65 + r) + out
+    return out
+
+
+def _esc(text: str) -> str:
+    text = _ILLEGAL.sub("", text)
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+
+
+def sheet_names(names: Iterable[str]) -> List[str]:
+    """엑셀 규칙(31자, 금지문자, 중복 불가)에 맞춘 시트 이름."""
+    out, seen = [], set()
+    for i, name in enumerate(names, 1):
+        base = _SHEET_BAD.sub("_", str(name or "")).strip("'")[:31] or f"Sheet{i}"
+        cand, n = base, 2
+        while cand.lower() in seen:
+            suffix = f"({n})"
+            cand = base[:31 - len(suffix)] + suffix
+            n += 1
+        seen.add(cand.lower())
+        out.append(cand)
+    return out
+
+
+def _row_xml(r: int, row: Sequence, cols: List[str]) -> str:
+    parts = [f'<row r="{r}">']
+    for c, v in enumerate(row):
+        if v is None or v == "":
+            continue
+        while c >= len(cols):
+            cols.append(col_name(len(cols)))
+        ref = f"{cols[c]}{r}"
+        if isinstance(v, bool):
+            parts.append(f'<c r="{ref}" t="b"><v>{int(v)}</v></c>')
+        elif isinstance(v, (int, float)):
+            parts.append(f'<c r="{ref}"><v>{v}</v></c>')
+        else:
+            parts.append(f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{_esc(str(v))}</t></is></c>')
+    parts.append("</row>")
+    return "".join(parts)
+
+
+def _write_sheet(zf: zipfile.ZipFile, arcname: str, rows: Iterable[Sequence]):
+    cols = [col_name(i) for i in range(32)]
+    with zf.open(arcname, "w") as f:
+        f.write(_SHEET_HEAD.encode("utf-8"))
+        buf = []
+        for r, row in enumerate(rows, 1):
+            buf.append(_row_xml(r, row, cols))
+            if len(buf) >= ROWS_PER_CHUNK:
+                f.write("".join(buf).encode("utf-8")); buf.clear()
+        if buf:
+            f.write("".join(buf).encode("utf-8"))
+        f.write(_SHEET_TAIL.encode("utf-8"))
+
+
+def write_xlsx(path: str, sheets: Sequence[Tuple[str, Iterable[Sequence]]],
+               progress: Optional[Callable[[int, int], None]] = None) -> str:
+    sheets = list(sheets) or [("Sheet1", [])]
+    names = sheet_names(name for name, _rows in sheets)
+    n = len(sheets)
+    tmp = path + ".tmp"
+    try:
+        with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+            zf.writestr("[Content_Types].xml", _CONTENT_TYPES_HEAD + "".join(
+                f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+                'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                for i in range(1, n + 1)) + "</Types>")
+            zf.writestr("_rels/.rels", _ROOT_RELS)
+            zf.writestr("xl/workbook.xml",
+                        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+                        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets>'
+                        + "".join(f'<sheet name="{_esc(nm)}" sheetId="{i}" r:id="rId{i}"/>'
+                                  for i, nm in enumerate(names, 1))
+                        + "</sheets></workbook>")
+            zf.writestr("xl/_rels/workbook.xml.rels",
+                        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                        + "".join(f'<Relationship Id="rId{i}" '
+                                  'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+                                  f'Target="worksheets/sheet{i}.xml"/>' for i in range(1, n + 1))
+                        + f'<Relationship Id="rId{n + 1}" '
+                        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+                        'Target="styles.xml"/></Relationships>')
+            zf.writestr("xl/styles.xml", _STYLES)
+            for i, (_name, rows) in enumerate(sheets, 1):
+                _write_sheet(zf, f"xl/worksheets/sheet{i}.xml", rows)
+                if progress is not None:
+                    progress(i, n)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+    return path